@@ -8,6 +8,58 @@ CONFIG_FILE = config_file
 # Valeurs par défaut
 DEFAULT_CONFIG = {
     "notifications_enabled": True,
+    "nombre_workers_encodage": 1,
+    # Mode de détection des nouveaux fichiers : "auto", "evenements" ou "polling"
+    "mode_surveillance": "auto",
+    # Durée (en secondes) sans modification avant qu'un fichier détecté soit encodé
+    "delai_stabilite_fichier": 30,
+    # Délai minimal (en secondes) entre deux mises à jour de la progression d'un encodage
+    "intervalle_mise_a_jour_progression": 0.5,
+    # Priorité des processus d'encodage : "" pour celle de l'application (aucun
+    # changement), "basse", "inferieure" ou "normale"
+    "priorite_encodage": "",
+    # Adresse et port de l'API de contrôle du mode sans interface (headless.py)
+    "adresse_api_controle": "127.0.0.1",
+    "port_api_controle": 8765,
+    # Jeton partagé exigé sur chaque route de l'API de contrôle (en-tête
+    # "Authorization: Bearer <jeton>") ; sans jeton, l'API n'écoute que sur la
+    # boucle locale
+    "jeton_api_controle": "",
+    # Ordre de la file d'attente : "fifo", "plus_court_d_abord" ou "equitable"
+    "politique_file_attente": "fifo",
+    # Poids par dossier surveillé (plus élevé = traité plus tôt, 1 par défaut)
+    "poids_dossiers": {},
+    # Points de priorité gagnés par minute d'attente, pour éviter la famine
+    "vieillissement_par_minute": 0.0,
+    # Nombre de jours d'historique des encodages conservés (0 = tout conserver)
+    "retention_historique_jours": 365,
+    # Ignorer les fichiers dont le contenu est identique à un média déjà traité
+    "ignorer_doublons": True,
+    # Encoder les fichiers longs par segments (découpés sur leurs chapitres) repris
+    # individuellement après une interruption, puis assemblés avec ffmpeg
+    "encodage_segmente": False,
+    # Durée visée (en minutes) de chaque segment ; les fichiers de moins de deux
+    # segments sont encodés d'un seul tenant
+    "duree_segment_minutes": 10,
+    # Dossier local rapide où les sources sont copiées et encodées avant le
+    # déplacement du fichier encodé vers sa destination ("" = désactivé)
+    "dossier_transit": "",
+    # Espace maximal (en Go) occupé par les copies et les fichiers encodés en transit
+    "budget_transit_go": 100,
+    # Nombre de fichiers en tête de file copiés à l'avance pendant les encodages
+    "profondeur_transit": 1,
+    # Copier sans réencodage (remux ffmpeg des pistes sélectionnées) les sources
+    # dont la vidéo respecte déjà leur preset : même format, résolution et
+    # profondeur de couleur au plus celles du preset, débit sous debit_max_remux_kbps
+    "remux_sources_conformes": False,
+    # Débit vidéo maximal (en kb/s) d'une source remuxée, par classe de résolution
+    "debit_max_remux_kbps": {"SD": 1500, "720p": 3000, "1080p": 6000, "2160p": 20000},
+    # Adresse de l'API du coordinateur utilisée par les agents de la ferme d'encodage
+    # (farm_worker.py), par exemple "http://192.168.1.10:8765"
+    "adresse_coordinateur_ferme": "",
+    # Traduction des chemins du coordinateur en chemins locaux sur les agents,
+    # par exemple {"D:/Torrents": "/mnt/torrents", "D:/Ripped": "/mnt/ripped"}
+    "correspondance_chemins_ferme": {},
     "dossiers_sortie_surveillance": {
         "D:/Torrents/Dessins animes VF": "D:/Ripped/seriesJeunes",
         "D:/Torrents/Film VF": "D:/Ripped/films",
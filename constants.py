@@ -32,6 +32,21 @@ dossiers_presets = {
     "D:/Torrents/Serie 4K": "4K - 10bits",
 }
 
+# Coût relatif de chaque preset, utilisé pour répartir les cœurs entre les encodages
+# simultanés (un encodage "4K - 10bits" reçoit plus de cœurs qu'un dessin animé)
+poids_presets = {
+    "4K - 10bits": 4,
+    "Films - Series MULTI": 2,
+    "Films - Series VF": 2,
+    "Mangas MULTI": 1.5,
+    "Mangas VO": 1.5,
+    "Dessins animes VF": 1,
+}
+poids_preset_defaut = 2
+
+# Durée d'encodage estimée (en minutes) d'un Go de source pour un preset de poids 1
+minutes_encodage_par_go = 3
+
 # Configuration des dossiers de sortie pour chaque dossier surveillé
 # Chaque dossier surveillé a son propre dossier de sortie correspondant
 dossiers_sortie_surveillance = {
@@ -61,6 +76,27 @@ fichier_presets = os.path.join(BASE_PATH, "datas", "custom_presets.json")
 fichier_sauvegarde = os.path.join(BASE_PATH, "datas", "fichiers_detectes.json")
 fichier_encodes = os.path.join(BASE_PATH, "datas", "fichiers_encodes.json")
 
+# Regroupement des écritures de ces fichiers : écriture après 'delai_ecriture_etat'
+# secondes sans modification, ou au plus tard 'delai_max_ecriture_etat' secondes
+# après la première modification non enregistrée
+delai_ecriture_etat = 2
+delai_max_ecriture_etat = 10
+
+# Index des médias déjà traités (chemin et empreinte du contenu), pour détecter
+# les fichiers renommés ou téléchargés à nouveau
+fichier_index_medias = os.path.join(BASE_PATH, "datas", "index_medias.json")
+
+# Taille des blocs lus au début et à la fin d'un fichier pour calculer son empreinte
+taille_bloc_empreinte = 1024 * 1024
+
+# Index des dossiers surveillés (date de modification et contenu de chaque répertoire)
+fichier_index_dossiers = os.path.join(BASE_PATH, "datas", "index_dossiers.json")
+
+# Cache disque des analyses de fichiers (HandBrakeCLI --scan, MediaInfo, ffprobe)
+dossier_cache_sondes = os.path.join(BASE_PATH, "datas", "probe_cache")
+# Nombre maximal de fichiers conservés dans le cache (les moins récemment utilisés sont évincés)
+taille_max_cache_sondes = 2000
+
 # Fichier qui enregistre les titres de sous-titres collectés
 fichier_sous_titres = os.path.join(
     BASE_PATH, "datas", "subtitle_titles_collection.json"
@@ -69,6 +105,33 @@ fichier_sous_titres = os.path.join(
 # Extensions de fichiers à surveiller
 extensions = [".mkv", ".mp4", ".avi"]
 
+# Intervalle (en secondes) entre deux cycles de surveillance des dossiers
+intervalle_surveillance = 10
+
+# Intervalle (en secondes) entre deux parcours complets des dossiers en mode
+# événements, pour rattraper d'éventuelles notifications perdues
+intervalle_resynchronisation = 600
+
+# Durée (en secondes) pendant laquelle les notifications rapprochées sont regroupées
+delai_regroupement_evenements = 1
+
+# Délai maximal (en secondes) de prise en compte des commandes pause, passer et arrêter
+# pendant un encodage
+delai_controle_encodage = 0.2
+
+# Taille des blocs lus lors de la copie d'une source dans la zone de transit
+taille_bloc_copie_transit = 8 * 1024 * 1024
+
+# Nombre d'éléments en tête de file analysés à l'avance pendant les encodages
+profondeur_pre_analyse = 3
+
+# Intervalle (en secondes) entre deux passages de l'analyse anticipée de la file
+intervalle_pre_analyse = 2
+
+# Intervalle (en secondes) entre deux réestimations complètes de la file d'attente
+# (les nouvelles tâches sont estimées dès leur ajout)
+intervalle_estimation_file = 30
+
 # Critères pour filtrer les pistes françaises indésirables
 criteres_audios = [
     "vfq",
@@ -93,11 +156,29 @@ criteres_sous_titres_supprimer = [
 dossier_encodage_manuel = "D:/Torrents/Encodage_manuel"
 fichier_encodage_manuel = os.path.join(BASE_PATH, "Encodage_manuel.txt")
 
-# Dossier pour l'historique des encodages réussis
-fichier_historique = os.path.join(BASE_PATH, "datas", "successful_encodings.json")
+# Historique des encodages réussis (JSON Lines, un encodage par ligne)
+fichier_historique = os.path.join(BASE_PATH, "datas", "successful_encodings.jsonl")
 
 state_file = os.path.join(BASE_PATH, "datas", "interrupted_encodings.json")
 
+# Journal des modifications de la file d'attente depuis le dernier instantané
+# (state_file), compacté en un nouvel instantané au-delà de taille_max_journal lignes
+fichier_journal_etat = os.path.join(BASE_PATH, "datas", "interrupted_encodings.journal")
+taille_max_journal = 500
+
+# Durée (en secondes) d'un bail confié à un agent de la ferme d'encodage sans
+# battement de cœur avant que sa tâche soit remise en file
+duree_bail_ferme = 60
+
+# Écart toléré entre la durée d'un fichier encodé et celle de sa source avant
+# de le rejeter : tolerance_duree_sortie (2 %), et au moins ecart_duree_sortie_min secondes
+tolerance_duree_sortie = 0.02
+ecart_duree_sortie_min = 2
+
+# Âge minimal (en secondes) d'un fichier encodé incomplet avant sa suppression au
+# démarrage : un fichier plus récent peut être écrit par un agent de la ferme
+age_min_sortie_partielle = 600
+
 # Taille maximal des messages de notifications windows
 maxsize_message = 70
 
@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import psutil
+from constants import fichier_presets, poids_presets, poids_preset_defaut
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+# Options d'encodeur permettant de limiter le nombre de threads (encodeurs logiciels)
+OPTIONS_THREADS_ENCODEURS = {
+    "x264": "threads",
+    "x265": "pools",
+}
+
+
+def obtenir_coeurs_disponibles():
+    """
+    Retourne la liste des cœurs utilisables par l'application.
+    Utilise l'affinité du processus courant si elle est disponible.
+    """
+    try:
+        return sorted(psutil.Process().cpu_affinity())
+    except (AttributeError, psutil.Error, OSError):
+        # cpu_affinity n'est pas disponible sur toutes les plateformes (macOS)
+        return list(range(os.cpu_count() or 1))
+
+
+def repartir_coeurs(poids_jobs, coeurs):
+    """
+    Répartit les cœurs entre les jobs proportionnellement à leur poids.
+
+    Args:
+        poids_jobs: Liste de tuples (job_id, poids) dans l'ordre de démarrage.
+        coeurs: Liste des identifiants de cœurs disponibles.
+
+    Returns:
+        Un dictionnaire {job_id: liste des cœurs attribués}. Chaque job reçoit
+        au moins un cœur ; s'il y a plus de jobs que de cœurs, les cœurs sont partagés.
+    """
+    if not poids_jobs or not coeurs:
+        return {}
+
+    nombre_coeurs = len(coeurs)
+
+    # Plus de jobs que de cœurs : un cœur chacun, attribués en tourniquet
+    if len(poids_jobs) >= nombre_coeurs:
+        return {
+            job_id: [coeurs[i % nombre_coeurs]]
+            for i, (job_id, _) in enumerate(poids_jobs)
+        }
+
+    total_poids = sum(max(poids, 0.0) for _, poids in poids_jobs) or len(poids_jobs)
+    restants = nombre_coeurs - len(poids_jobs)
+
+    # Chaque job reçoit un cœur, le reste est réparti au prorata (plus forts restes)
+    parts = {}
+    restes = []
+    attribues = 0
+    for job_id, poids in poids_jobs:
+        part_exacte = restants * max(poids, 0.0) / total_poids
+        part_entiere = int(part_exacte)
+        parts[job_id] = 1 + part_entiere
+        attribues += part_entiere
+        restes.append((part_exacte - part_entiere, job_id))
+
+    for _, job_id in sorted(restes, key=lambda r: -r[0])[: restants - attribues]:
+        parts[job_id] += 1
+
+    # Attribuer des plages de cœurs contiguës dans l'ordre des jobs
+    repartition = {}
+    debut = 0
+    for job_id, _ in poids_jobs:
+        repartition[job_id] = coeurs[debut : debut + parts[job_id]]
+        debut += parts[job_id]
+    return repartition
+
+
+def obtenir_preset(preset):
+    """
+    Retourne les réglages d'un preset du fichier de presets (custom_presets.json),
+    ou None s'il est introuvable.
+    """
+    try:
+        with open(fichier_presets, "r", encoding="utf-8") as f:
+            presets = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Impossible de lire le fichier de presets: {e}")
+        return None
+
+    a_parcourir = list(presets.get("PresetList", []))
+    while a_parcourir:
+        entree = a_parcourir.pop()
+        if entree.get("Folder"):
+            a_parcourir.extend(entree.get("ChildrenArray", []))
+        elif entree.get("PresetName") == preset:
+            return entree
+    return None
+
+
+def obtenir_encodeur_preset(preset):
+    """
+    Retourne l'encodeur vidéo (VideoEncoder) d'un preset du fichier de presets,
+    ou None s'il est introuvable.
+    """
+    return (obtenir_preset(preset) or {}).get("VideoEncoder")
+
+
+def option_threads_encodeur(preset, threads):
+    """
+    Construit l'option HandBrakeCLI limitant le nombre de threads de l'encodeur
+    du preset, ou None si l'encodeur n'en propose pas (encodeurs matériels).
+    """
+    encodeur = obtenir_encodeur_preset(preset) or ""
+    for prefixe, option in OPTIONS_THREADS_ENCODEURS.items():
+        if encodeur.startswith(prefixe):
+            return f"--encopts={option}={threads}"
+    return None
+
+
+class OrdonnanceurCoeurs:
+    """
+    Répartit les cœurs de la machine entre les encodages en cours, au prorata du
+    coût de leur preset, et rééquilibre l'affinité des processus HandBrakeCLI
+    à chaque démarrage ou fin d'encodage.
+    """
+
+    def __init__(self, coeurs=None):
+        self.coeurs = coeurs if coeurs is not None else obtenir_coeurs_disponibles()
+        self.jobs = {}
+        self.repartition = {}
+        self._lock = threading.Lock()
+
+    def _poids(self, preset):
+        return poids_presets.get(preset, poids_preset_defaut)
+
+    def _reequilibrer(self):
+        """Recalcule la répartition et applique l'affinité aux processus lancés."""
+        poids_jobs = [(job_id, job["poids"]) for job_id, job in self.jobs.items()]
+        self.repartition = repartir_coeurs(poids_jobs, self.coeurs)
+        for job_id, job in self.jobs.items():
+            if job["pid"] is not None:
+                self._appliquer_affinite(job["pid"], self.repartition[job_id])
+
+    def _appliquer_affinite(self, pid, coeurs):
+        try:
+            psutil.Process(pid).cpu_affinity(coeurs)
+        except (AttributeError, psutil.Error, OSError) as e:
+            logger.debug(f"Impossible d'appliquer l'affinité au processus {pid}: {e}")
+
+    def enregistrer_job(self, job_id, preset):
+        """
+        Enregistre un nouvel encodage et rééquilibre la répartition.
+
+        Returns:
+            Le nombre de threads attribués à ce job.
+        """
+        with self._lock:
+            self.jobs[job_id] = {"poids": self._poids(preset), "pid": None}
+            self._reequilibrer()
+            threads = len(self.repartition[job_id])
+        logger.debug(
+            f"{threads} cœur(s) attribué(s) à l'encodage {os.path.basename(job_id)} ({preset})"
+        )
+        return threads
+
+    def attacher_processus(self, job_id, pid):
+        """Associe le processus HandBrakeCLI à son job et applique son affinité."""
+        with self._lock:
+            if job_id in self.jobs:
+                self.jobs[job_id]["pid"] = pid
+                self._appliquer_affinite(pid, self.repartition[job_id])
+
+    def liberer_job(self, job_id):
+        """Retire un encodage terminé et redistribue ses cœurs aux autres."""
+        with self._lock:
+            if self.jobs.pop(job_id, None) is not None:
+                self._reequilibrer()
+
+    def coeurs_attribues(self, job_id):
+        """Retourne la liste des cœurs actuellement attribués à un job."""
+        with self._lock:
+            return list(self.repartition.get(job_id, []))
+
+
+# Ordonnanceur partagé par tous les workers d'encodage
+ordonnanceur_coeurs = OrdonnanceurCoeurs()
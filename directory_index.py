@@ -0,0 +1,128 @@
+import os
+import time
+from constants import extensions
+from file_handling import charger_fichiers, sauvegarder_fichiers
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+# Marge (en secondes) en dessous de laquelle la date de modification d'un répertoire
+# n'est pas jugée fiable : un ajout survenu dans la même seconde que le listage
+# ne modifierait pas la date (systèmes de fichiers à faible précision)
+marge_precision_mtime = 2
+
+
+class IndexDossiers:
+    """
+    Index incrémental des fichiers vidéo d'une arborescence.
+
+    Pour chaque répertoire, l'index retient sa date de modification ainsi que les
+    fichiers vidéo et sous-dossiers qu'il contient. La date de modification d'un
+    répertoire change dès qu'une entrée y est ajoutée, supprimée ou renommée : un
+    répertoire dont la date n'a pas changé n'est donc pas relu, seul un stat est
+    effectué pour descendre dans ses sous-dossiers.
+    """
+
+    def __init__(self, fichier_index=None):
+        """
+        Args:
+            fichier_index: Fichier JSON où conserver l'index entre deux lancements
+                           (None pour un index uniquement en mémoire).
+        """
+        self.fichier_index = fichier_index
+        self.repertoires = {}
+        self.modifie = False
+        self.charger()
+
+    def charger(self):
+        """Charge l'index sauvegardé lors d'un précédent lancement."""
+        if not self.fichier_index:
+            return
+        try:
+            self.repertoires = charger_fichiers(self.fichier_index)
+        except Exception as e:
+            logger.warning(f"Index des dossiers illisible, il sera reconstruit: {e}")
+            self.repertoires = {}
+
+    def sauvegarder(self):
+        """Sauvegarde l'index s'il a changé depuis la dernière sauvegarde."""
+        if not self.fichier_index or not self.modifie:
+            return
+        try:
+            sauvegarder_fichiers(self.fichier_index, self.repertoires)
+            self.modifie = False
+        except Exception as e:
+            logger.warning(f"Impossible de sauvegarder l'index des dossiers: {e}")
+
+    def _lister(self, repertoire, mtime):
+        """Lit le contenu d'un répertoire et retourne sa nouvelle entrée d'index."""
+        entree = {
+            "mtime": mtime,
+            "liste_a": time.time(),
+            "fichiers": [],
+            "sous_dossiers": [],
+        }
+        try:
+            with os.scandir(repertoire) as contenu:
+                for element in contenu:
+                    try:
+                        if element.is_dir():
+                            # Comme os.walk, ne pas suivre les liens symboliques
+                            if not element.is_symlink():
+                                entree["sous_dossiers"].append(element.name)
+                        elif os.path.splitext(element.name)[1].lower() in extensions:
+                            entree["fichiers"].append(element.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"Impossible de lire le répertoire {repertoire}: {e}")
+            return None
+        return entree
+
+    def _est_a_jour(self, entree, mtime):
+        return (
+            entree is not None
+            and entree["mtime"] == mtime
+            and entree["liste_a"] - mtime > marge_precision_mtime
+        )
+
+    def obtenir_fichiers(self, dossier):
+        """
+        Retourne l'ensemble des fichiers vidéo du dossier et de ses sous-dossiers,
+        en ne relisant que les répertoires modifiés depuis le dernier passage.
+        """
+        fichiers = set()
+        visites = set()
+        a_parcourir = [dossier]
+        while a_parcourir:
+            repertoire = a_parcourir.pop()
+            visites.add(repertoire)
+            try:
+                mtime = os.stat(repertoire).st_mtime
+            except OSError:
+                continue
+
+            entree = self.repertoires.get(repertoire)
+            if not self._est_a_jour(entree, mtime):
+                entree = self._lister(repertoire, mtime)
+                if entree is None:
+                    continue
+                self.repertoires[repertoire] = entree
+                self.modifie = True
+
+            fichiers.update(os.path.join(repertoire, nom) for nom in entree["fichiers"])
+            a_parcourir.extend(
+                os.path.join(repertoire, nom) for nom in entree["sous_dossiers"]
+            )
+
+        # Oublier les répertoires disparus de l'arborescence
+        prefixe = os.path.join(dossier, "")
+        for repertoire in list(self.repertoires):
+            if repertoire not in visites and (
+                repertoire == dossier or repertoire.startswith(prefixe)
+            ):
+                del self.repertoires[repertoire]
+                self.modifie = True
+
+        return fichiers
@@ -0,0 +1,211 @@
+import os
+import threading
+from statistics import median
+from successful_encodings import charger_historique, SUCCESSFUL_ENCODINGS_FILE
+from probe_cache import cache_sondes
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+# Nombre d'encodages récents retenus par groupe pour les estimations
+TAILLE_ECHANTILLON = 50
+
+
+def caracteristiques_media(info_pistes):
+    """
+    Extrait la durée (en secondes), la résolution et le codec vidéo du premier titre
+    d'un scan HandBrakeCLI.
+
+    Retourne:
+    Un dictionnaire {"duree_source", "largeur", "hauteur", "codec"} dont les valeurs
+    inconnues valent None.
+    """
+    infos = {"duree_source": None, "largeur": None, "hauteur": None, "codec": None}
+    try:
+        titre = info_pistes["TitleList"][0]
+    except (KeyError, IndexError, TypeError):
+        return infos
+
+    duree = titre.get("Duration") or {}
+    if duree:
+        infos["duree_source"] = (
+            duree.get("Hours", 0) * 3600
+            + duree.get("Minutes", 0) * 60
+            + duree.get("Seconds", 0)
+        ) or None
+    geometrie = titre.get("Geometry") or {}
+    infos["largeur"] = geometrie.get("Width")
+    infos["hauteur"] = geometrie.get("Height")
+    infos["codec"] = titre.get("VideoCodec")
+    return infos
+
+
+def caracteristiques_fichier(fichier):
+    """
+    Retourne les caractéristiques d'un fichier d'après son scan HandBrakeCLI en
+    cache, sans lancer de scan s'il n'a pas encore été analysé.
+    """
+    return caracteristiques_media(
+        cache_sondes.obtenir(fichier, "handbrake", lambda chemin: None)
+    )
+
+
+def classe_resolution(largeur):
+    """Regroupe les résolutions proches pour que les estimations restent comparables."""
+    if not largeur:
+        return None
+    if largeur >= 3000:
+        return "2160p"
+    if largeur >= 1700:
+        return "1080p"
+    if largeur >= 1100:
+        return "720p"
+    return "SD"
+
+
+class EstimateurEncodage:
+    """
+    Estime la durée d'encodage et la taille de sortie d'un fichier à partir de
+    l'historique des encodages réussis.
+
+    La vitesse (secondes de vidéo encodées par seconde) et le rapport de taille
+    sortie/source sont pris comme médianes des encodages récents du même preset et
+    de la même classe de résolution, puis du même preset, puis de tout l'historique.
+    Sans durée connue pour le fichier, le débit en Mo de source par seconde est
+    utilisé à la place. Le modèle est recalculé lorsque le fichier d'historique
+    change.
+    """
+
+    def __init__(self, fichier=SUCCESSFUL_ENCODINGS_FILE):
+        self.fichier = fichier
+        self._lock = threading.Lock()
+        self._signature = None
+        self._groupes = {}
+        # Estimations déjà calculées : (fichier, preset) -> (signatures, estimation)
+        self._memo = {}
+
+    def entrainer(self, enregistrements):
+        """Construit le modèle à partir d'une liste d'enregistrements d'historique."""
+        groupes = {}
+        for enregistrement in enregistrements:
+            duree_encodage = enregistrement.get("duree_encodage")
+            if not duree_encodage or duree_encodage <= 0:
+                continue
+            # Un remux sans réencodage ne renseigne pas sur la vitesse d'encodage
+            if enregistrement.get("remux"):
+                continue
+            preset = enregistrement.get("preset")
+            classe = classe_resolution(enregistrement.get("largeur"))
+            for cle in ((preset, classe), (preset, None), (None, None)):
+                groupe = groupes.setdefault(
+                    cle, {"vitesse": [], "debit": [], "rapport_taille": []}
+                )
+                if enregistrement.get("duree_source"):
+                    groupe["vitesse"].append(
+                        enregistrement["duree_source"] / duree_encodage
+                    )
+                taille_source = enregistrement.get("taille_source")
+                if taille_source:
+                    groupe["debit"].append(taille_source / duree_encodage)
+                    groupe["rapport_taille"].append(
+                        enregistrement.get("file_size", 0) / taille_source
+                    )
+        self._groupes = {
+            cle: {
+                mesure: median(valeurs[-TAILLE_ECHANTILLON:])
+                for mesure, valeurs in groupe.items()
+                if valeurs
+            }
+            for cle, groupe in groupes.items()
+        }
+
+    def _actualiser(self):
+        try:
+            stat = os.stat(self.fichier)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature = None
+        if signature != self._signature:
+            self._signature = signature
+            self._memo.clear()
+            self.entrainer(charger_historique() if signature else [])
+
+    def _mesure(self, preset, classe, mesure):
+        for cle in ((preset, classe), (preset, None), (None, None)):
+            valeur = self._groupes.get(cle, {}).get(mesure)
+            if valeur:
+                return valeur
+        return None
+
+    def estimer(self, fichier, preset, infos=None):
+        """
+        Estime l'encodage d'un fichier avec un preset.
+
+        Args:
+            fichier: Chemin du fichier source.
+            preset: Preset HandBrake utilisé.
+            infos: Caractéristiques du fichier (voir caracteristiques_media). Par
+                défaut, lues dans le cache d'analyse sans lancer de scan.
+
+        Returns:
+            Un dictionnaire {"duree": secondes, "taille": Mo}, dont les valeurs
+            valent None si l'historique ne permet pas de les estimer, ou None si le
+            fichier est inaccessible.
+        """
+        try:
+            stat = os.stat(fichier)
+        except OSError:
+            return None
+        taille_source = stat.st_size / (1024 * 1024)
+
+        with self._lock:
+            self._actualiser()
+            signatures = (stat.st_size, stat.st_mtime_ns, self._signature)
+            memo = self._memo.get((fichier, preset))
+            if infos is None and memo is not None and memo[0] == signatures:
+                return memo[1]
+
+        if infos is None:
+            infos = caracteristiques_fichier(fichier)
+
+        with self._lock:
+            classe = classe_resolution(infos.get("largeur"))
+            vitesse = self._mesure(preset, classe, "vitesse")
+            debit = self._mesure(preset, classe, "debit")
+            rapport = self._mesure(preset, classe, "rapport_taille")
+
+        duree = None
+        if vitesse and infos.get("duree_source"):
+            duree = infos["duree_source"] / vitesse
+        elif debit:
+            duree = taille_source / debit
+        taille = taille_source * rapport if rapport else None
+        estimation = {"duree": duree, "taille": taille}
+        # Sans durée connue, le fichier n'a pas encore été analysé : réessayer plus tard
+        if infos.get("duree_source"):
+            with self._lock:
+                self._memo[(fichier, preset)] = (signatures, estimation)
+        return estimation
+
+
+def temps_restant(ecoule, pourcentage, duree_prevue=None):
+    """
+    Estime le temps restant d'un encodage en cours (en secondes).
+
+    L'extrapolation linéaire du temps écoulé est peu fiable en début d'encodage :
+    elle est combinée à la durée prévue par l'historique, avec un poids qui croît
+    avec l'avancement.
+    """
+    lineaire = ecoule * (100 - pourcentage) / pourcentage if pourcentage > 0 else None
+    if not duree_prevue:
+        return lineaire
+    prevu = max(duree_prevue - ecoule, 0)
+    if lineaire is None:
+        return prevu
+    poids = pourcentage / 100
+    return poids * lineaire + (1 - poids) * prevu
+
+
+# Instance partagée par les workers, l'ordonnancement et l'interface
+estimateur_encodage = EstimateurEncodage()
@@ -1,62 +1,381 @@
 import threading
 import os
 import subprocess
-import re
 import time
-from audio_selection import filtrer_pistes_audio
-from subtitle_analyzer import analyser_sous_titres_francais
+from queue import Queue, Empty
 from successful_encodings import record_successful_encoding
-from state_persistence import (
-    save_interrupted_encodings,
-    clear_interrupted_encodings,
-)
-from constants import (
-    dossier_sortie,
-    debug_mode,
-    fichier_presets,
+from core_scheduler import ordonnanceur_coeurs, option_threads_encodeur
+from progress_parser import SuiviProgression, pourcentage_global, formater_duree
+from encode_estimator import (
+    estimateur_encodage,
+    caracteristiques_fichier,
+    temps_restant,
 )
+from config import load_config
+from probe_ahead import pre_analyseur, preparer_encodage, lire_tache
+from scratch_staging import zone_transit
+from output_finalizer import chemin_temporaire, finaliseur_sorties
+from remux_fast_path import commande_copie_flux
+from segmented_encoding import ManifesteSegments, commande_segment, planifier_segments
+from constants import debug_mode, delai_controle_encodage
 from utils import (
     horodatage,
     tronquer_nom_fichier,
-    obtenir_dossier_sortie_dossier_source,
-)
-from file_operations import (
-    obtenir_pistes,
-    ajouter_fichier_a_liste_encodage_manuel,
+    normaliser_chemin,
+    calculer_chemin_sortie,
+    copier_file_attente,
 )
+from file_operations import ajouter_fichier_a_liste_encodage_manuel
 from notifications import (
     notifier_encodage_lancement,
     notifier_encodage_termine,
     notifier_erreur_encodage,
 )
+from process_launcher import (
+    lancer_processus,
+    suspendre_arbre,
+    reprendre_arbre,
+    tuer_arbre,
+)
 from logger import colored_log, setup_logger
-import psutil  # Ajouter cet import au début du fichier
 
 # Configuration du logger
 logger = setup_logger(__name__)
 
-# Verrou pour synchroniser l'accès à la console
-console_lock = threading.Lock()
 
+def read_output(pipe, file_sortie):
+    """
+    Lit la sortie d'un processus ligne par ligne dans un thread dédié et la transmet
+    via une file, pour que la boucle de contrôle de l'encodage ne soit jamais
+    bloquée par une lecture. None est ajouté à la file à la fin du flux.
+
+    Arguments:
+    pipe -- Flux de sortie du processus.
+    file_sortie -- Queue recevant les lignes lues.
+    """
+    try:
+        for line in iter(pipe.readline, ""):
+            file_sortie.put(line)
+    except (OSError, ValueError):
+        # Flux fermé pendant la lecture (processus arrêté)
+        pass
+    finally:
+        file_sortie.put(None)
+        pipe.close()
+
+
+def terminer_processus(process):
+    """
+    Demande l'arrêt d'un processus et de ses descendants, puis les tue s'ils ne se
+    sont pas arrêtés à temps.
+    """
+    tuer_arbre(process.pid)
+    process.wait()
+
+
+def publier_progression(signals, evenement, start_time, duree_prevue=None):
+    """
+    Met à jour la progression, les temps écoulé et restant et les fps d'un encodage
+    dans l'interface à partir d'un événement de progression HandBrake.
+
+    'duree_prevue' est la durée d'encodage estimée d'après l'historique, utilisée
+    lorsque HandBrake ne fournit pas d'ETA pour l'ensemble de l'encodage.
+    """
+    if not signals:
+        return
+
+    pourcentage = pourcentage_global(evenement)
+
+    # Mettre à jour la barre de progression
+    if hasattr(signals, "update_progress"):
+        signals.update_progress.emit(int(pourcentage))
+
+    # Mettre à jour les infos de temps
+    if hasattr(signals, "update_time_info"):
+        elapsed = time.time() - start_time
+        if evenement.eta is not None and evenement.passes_total == 1:
+            # ETA calculé par HandBrake
+            remaining_str = formater_duree(evenement.eta)
+        else:
+            # Estimer le temps restant (début d'encodage ou encodage en plusieurs passes)
+            restant = temps_restant(elapsed, pourcentage, duree_prevue)
+            if restant is not None:
+                remaining_str = formater_duree(restant)
+            else:
+                remaining_str = "Calcul en cours..."
+        signals.update_time_info.emit(formater_duree(elapsed), remaining_str)
+
+    # Mettre à jour les statistiques d'encodage
+    if evenement.fps is not None and hasattr(signals, "update_encoding_stats"):
+        signals.update_encoding_stats.emit(f"{evenement.fps:.2f}")
 
-def read_output(pipe, process_output):
+
+def executer_handbrake(handbrake_cmd, short_fichier, control_flags, job_id, publier):
     """
-    Lit les sorties standard (stdout) et les erreurs (stderr) d'un processus en cours
-    et les affiche dans la console tout en les ajoutant à une liste.
+    Exécute une commande HandBrakeCLI (ou ffmpeg pour un remux) en appliquant les
+    commandes arrêter, passer et pause de control_flags, et transmet la progression
+    à la fonction 'publier'.
 
     Arguments:
-    pipe -- Flux de sortie ou d'erreur du processus.
-    process_output -- Liste pour stocker les sorties lues.
+    handbrake_cmd -- Ligne de commande HandBrakeCLI.
+    short_fichier -- Nom du fichier affiché dans les logs.
+    control_flags -- Les drapeaux de contrôle.
+    job_id -- Identifiant de l'encodage auprès de l'ordonnanceur des cœurs.
+    publier -- Fonction appelée avec chaque EvenementProgression retenu.
+
+    Retourne:
+    Un dictionnaire {"code", "duree", "fps_moyen"} : code de retour du processus
+    (None si l'encodage a été arrêté ou sauté), durée d'encodage hors pauses (en
+    secondes) et dernier fps moyen indiqué par HandBrake.
     """
-    for line in iter(pipe.readline, ""):
-        with console_lock:
-            print(line, end="")
-        process_output.append(line)
-    pipe.close()
+    # Exécuter HandBrake
+    process = lancer_processus(
+        handbrake_cmd,
+        priorite=load_config().get("priorite_encodage"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        text=True,
+    )
+
+    # Limiter HandBrakeCLI aux cœurs qui lui sont attribués
+    ordonnanceur_coeurs.attacher_processus(job_id, process.pid)
+    debut_processus = time.time()
+
+    # Variables pour le suivi de la mise en pause
+    is_paused = False
+    debut_pause = None
+    duree_pauses = 0.0
+    fps_moyen = None
 
+    # Suivi de la progression (mises à jour de l'interface limitées dans le temps)
+    suivi_progression = SuiviProgression(
+        load_config().get("intervalle_mise_a_jour_progression", 0.5)
+    )
 
-def normaliser_chemin(chemin):
-    return chemin.replace("\\", "/")
+    # Lire la sortie de HandBrake dans un thread dédié
+    file_sortie = Queue()
+    threading.Thread(
+        target=read_output, args=(process.stdout, file_sortie), daemon=True
+    ).start()
+
+    # Gérer la sortie du processus en continue
+    while True:
+        # Vérifier si l'encodage doit être interrompu (tous les workers, ce worker ou
+        # fermeture de l'application)
+        if control_flags and any(
+            control_flags.get(cle, False) for cle in ("stop_all", "stop", "closing")
+        ):
+            colored_log(
+                logger,
+                f"Arrêt de l'encodage demandé pour {short_fichier}",
+                "INFO",
+                "red",
+            )
+            terminer_processus(process)
+            return {"code": None, "duree": 0, "fps_moyen": fps_moyen}
+
+        # Vérifier si l'encodage doit être sauté
+        if control_flags and control_flags.get("skip", False):
+            logger.info(f"Saut de l'encodage demandé pour {short_fichier}")
+            logger.info("=" * 100)
+            terminer_processus(process)
+            control_flags["skip"] = False
+            return {"code": None, "duree": 0, "fps_moyen": fps_moyen}
+
+        # Gérer la pause - modification majeure ici
+        if control_flags and control_flags.get("pause", False):
+            if not is_paused:
+                # Mettre en pause le processus HandBrakeCLI et ses descendants
+                try:
+                    suspendre_arbre(process.pid)
+                    is_paused = True
+                    debut_pause = time.time()
+                    colored_log(
+                        logger,
+                        f"Encodage mis en pause pour {short_fichier}",
+                        "INFO",
+                        "orange",
+                    )
+                except Exception as e:
+                    logger.error(f"Erreur lors de la mise en pause: {str(e)}")
+        elif is_paused:
+            # Reprendre le processus si on était en pause
+            try:
+                reprendre_arbre(process.pid)
+                is_paused = False
+                duree_pauses += time.time() - debut_pause
+                colored_log(
+                    logger, f"Encodage repris pour {short_fichier}", "INFO", "green"
+                )
+            except Exception as e:
+                logger.error(f"Erreur lors de la reprise: {str(e)}")
+
+        # En pause, juste attendre un peu
+        if is_paused:
+            time.sleep(delai_controle_encodage)
+            # Vérifier si le processus est toujours en vie
+            if process.poll() is not None:
+                break
+            continue
+
+        # Attendre la prochaine ligne au plus delai_controle_encodage secondes,
+        # pour revenir régulièrement aux vérifications ci-dessus
+        try:
+            output = file_sortie.get(timeout=delai_controle_encodage)
+        except Empty:
+            continue
+        if output is None:
+            # Fin de la sortie : le processus se termine
+            break
+
+        if debug_mode:
+            print(output.strip())
+
+        # Transmettre la progression à l'interface si l'intervalle est écoulé
+        evenement = suivi_progression.traiter(output)
+        if evenement is not None:
+            fps_moyen = evenement.fps_moyen or fps_moyen
+            publier(evenement)
+
+    # Transmettre la dernière progression retenue
+    evenement = suivi_progression.vider()
+    if evenement is not None:
+        fps_moyen = evenement.fps_moyen or fps_moyen
+        publier(evenement)
+
+    process.wait()
+    return {
+        "code": process.returncode,
+        "duree": time.time() - debut_processus - duree_pauses,
+        "fps_moyen": fps_moyen,
+    }
+
+
+def encoder_par_segments(
+    manifeste,
+    handbrake_cmd,
+    short_fichier,
+    signals,
+    control_flags,
+    job_id,
+    start_time,
+    duree_prevue=None,
+):
+    """
+    Encode les segments restants d'un manifeste l'un après l'autre, puis les
+    assemble dans le fichier de sortie. Chaque segment terminé est enregistré dans
+    le manifeste et n'est pas réencodé si l'encodage reprend plus tard.
+
+    Retourne:
+    Un dictionnaire {"code", "duree", "fps_moyen"} comme executer_handbrake ; la
+    durée est celle de tous les segments, reprises comprises.
+    """
+    duree_totale = manifeste.duree_totale()
+    fps_moyen = None
+
+    for segment in manifeste.restants():
+        duree_faite = manifeste.duree_terminee()
+
+        def publier(evenement, segment=segment, duree_faite=duree_faite):
+            # Convertir la progression du segment en progression du fichier complet
+            avancement = (
+                duree_faite + segment["duree"] * pourcentage_global(evenement) / 100
+            )
+            publier_progression(
+                signals,
+                evenement._replace(
+                    passe=1,
+                    passes_total=1,
+                    pourcentage=100 * avancement / duree_totale,
+                    eta=None,
+                ),
+                start_time,
+                duree_prevue,
+            )
+
+        resultat = executer_handbrake(
+            commande_segment(handbrake_cmd, segment, manifeste.chemin_segment(segment)),
+            short_fichier,
+            control_flags,
+            job_id,
+            publier,
+        )
+        fps_moyen = resultat["fps_moyen"] or fps_moyen
+        if resultat["code"] != 0:
+            if resultat["code"] is not None:
+                logger.error(
+                    f"Échec de l'encodage du segment {segment['index'] + 1} de "
+                    f"{short_fichier} (code {resultat['code']})"
+                )
+            return resultat
+        manifeste.marquer_termine(segment, resultat["duree"])
+
+    code = 0 if manifeste.assembler() else 1
+    return {"code": code, "duree": manifeste.duree_encodage(), "fps_moyen": fps_moyen}
+
+
+def enregistrer_sortie(
+    erreur,
+    chemin_sortie,
+    short_fichier,
+    details,
+    signals=None,
+    file_encodage=None,
+    rappel_validation=None,
+):
+    """
+    Termine un encodage après sa validation par le thread de finalisation
+    (output_finalizer.py) : historique, rafraîchissement de l'interface et
+    notification si le fichier encodé est en place, sinon ajout de la source à la
+    liste des encodages manuels avec la raison du rejet.
+
+    Arguments:
+    erreur -- None si le fichier est en place, sinon la raison de l'échec.
+    details -- Informations enregistrées dans l'historique (dont "source" et "preset").
+    rappel_validation -- Fonction appelée en dernier avec True si le fichier encodé
+                         est en place, False s'il a été rejeté.
+    """
+    try:
+        _enregistrer_sortie(
+            erreur, chemin_sortie, short_fichier, details, signals, file_encodage
+        )
+    finally:
+        if rappel_validation is not None:
+            rappel_validation(erreur is None)
+
+
+def _enregistrer_sortie(
+    erreur, chemin_sortie, short_fichier, details, signals, file_encodage
+):
+    zone_transit.liberer_sortie(chemin_sortie)
+    if erreur is not None:
+        fichier = details["source"]
+        ajouter_fichier_a_liste_encodage_manuel(
+            fichier,
+            os.path.basename(fichier),
+            f"Fichier encodé invalide : {erreur}",
+            details["preset"],
+            signals,
+        )
+        notifier_erreur_encodage(short_fichier)
+        return
+
+    taille = os.path.getsize(chemin_sortie) / (1024 * 1024)  # En MB
+    colored_log(
+        logger,
+        f"Fichier encodé avec succès: {chemin_sortie} ({taille:.2f} MB)",
+        "INFO",
+        "green",
+    )
+    logger.info("=" * 100)
+    # Enregistrer l'encodage réussi pour l'historique et les estimations
+    record_successful_encoding(chemin_sortie, taille, details)
+    # Rafraîchir l'historique des encodages dans l'interface
+    if signals and hasattr(signals, "refresh_history"):
+        signals.refresh_history.emit()
+    # Envoyer une notification de fin d'encodage
+    notifier_encodage_termine(short_fichier, file_encodage)
 
 
 def lancer_encodage_avec_gui(
@@ -67,6 +386,7 @@ def lancer_encodage_avec_gui(
     file_encodage=None,
     dossier_source=None,
     dossier_sortie_personnalise=None,
+    rappel_validation=None,
 ):
     logger = setup_logger(__name__)
 
@@ -74,17 +394,9 @@ def lancer_encodage_avec_gui(
     fichier = normaliser_chemin(fichier)
 
     # Obtenir le dossier de sortie selon la priorité
-    if dossier_sortie_personnalise:
-        # Priorité 1 : Dossier personnalisé (ajout manuel via interface)
-        dossier_sortie_final = dossier_sortie_personnalise
-    elif dossier_source:
-        # Priorité 2 : Dossier basé sur la surveillance automatique
-        dossier_sortie_final = obtenir_dossier_sortie_dossier_source(dossier_source)
-    else:
-        # Priorité 3 : Fallback vers le dossier par défaut
-        from constants import dossier_sortie
-
-        dossier_sortie_final = dossier_sortie
+    dossier_sortie_final, chemin_sortie = calculer_chemin_sortie(
+        fichier, dossier_source, dossier_sortie_personnalise
+    )
 
     # S'assurer que le dossier de sortie existe
     if not os.path.exists(dossier_sortie_final):
@@ -93,11 +405,6 @@ def lancer_encodage_avec_gui(
     # Récupérer uniquement le nom du fichier
     nom_fichier = os.path.basename(fichier)
     short_fichier = tronquer_nom_fichier(nom_fichier)
-    base_nom, _ = os.path.splitext(nom_fichier)
-    fichier_sortie = f"{base_nom}_encoded.mkv"  # Toujours utiliser .mkv comme extension
-    chemin_sortie = normaliser_chemin(
-        os.path.join(dossier_sortie_final, fichier_sortie)
-    )
 
     # Mettre à jour le chemin de sortie dans l'interface si disponible
     if signals and hasattr(signals, "update_output_path"):
@@ -121,286 +428,194 @@ def lancer_encodage_avec_gui(
         logger.warning(f"Le fichier {nom_fichier} a déjà été encodé, ignoré")
         return False
 
+    # Copie locale de la source et chemin écrit par HandBrake (nom temporaire ou
+    # zone de transit), renommé en chemin_sortie une fois validé
+    source_locale = None
+    chemin_encodage = chemin_sortie
+    sortie_confiee = False
+
     try:
         # Initialiser le temps de début pour calculer le temps écoulé
         start_time = time.time()
 
-        # Analyse des pistes du fichier
-        info_pistes = obtenir_pistes(fichier)
-        if info_pistes is None:
-            logger.error(
-                f"Erreur lors de l'obtention des informations des pistes pour {fichier}"
-            )
+        # Reprendre l'analyse faite à l'avance pendant l'encodage précédent,
+        # ou analyser les pistes maintenant
+        preparation = pre_analyseur.prendre(fichier, preset, chemin_sortie)
+        if preparation is None:
+            preparation = preparer_encodage(fichier, preset, chemin_sortie)
+        if preparation is None:
             return False
 
-        # Sélection des pistes audio selon le preset
-        audio_tracks = filtrer_pistes_audio(info_pistes, preset)
-        if audio_tracks is None:
-            reason = "audio"
-            logger.warning(
-                f"Pas de piste audio française disponibles pour {nom_fichier}"
-            )
-            # Ajouter à la liste des encodages manuels avec le preset
+        if preparation.get("raison_manuel"):
+            # Ajouter à la liste des encodages manuels avec le preset (la raison
+            # est aussi transmise au coordinateur par un agent de la ferme)
             ajouter_fichier_a_liste_encodage_manuel(
-                fichier, nom_fichier, reason, preset, signals
+                fichier, nom_fichier, preparation["raison_manuel"], preset, signals
             )
+            if control_flags is not None:
+                control_flags["raison_manuel"] = preparation["raison_manuel"]
             # Si des signaux GUI sont disponibles, mettre à jour l'interface
             if signals and hasattr(signals, "encoding_done"):
                 signals.encoding_done.emit()
             return False
 
-        # Préparer les options audio
-        audio_option = (
-            f'--audio={",".join(map(str, audio_tracks))}' if audio_tracks else ""
-        )
-
-        # Sélection des sous-titres selon le preset
-        subtitle_tracks, burn_track, _ = analyser_sous_titres_francais(fichier, preset)
-
-        # Vérifier si le preset est VO pour forcer le sous-titrage verbal
-        if "VO" in preset:
-            if subtitle_tracks is None:
-                reason = "subtitle"
-                logger.warning(
-                    f"Pas de sous-titres à inclure pour {nom_fichier} (requis pour {preset})"
-                )
-                # Ajouter à la liste des encodages manuels avec le preset
-                ajouter_fichier_a_liste_encodage_manuel(
-                    fichier, nom_fichier, reason, preset, signals
-                )
-                # Si des signaux GUI sont disponibles, mettre à jour l'interface
-                if signals and hasattr(signals, "encoding_done"):
-                    signals.encoding_done.emit()
-                return False
-
-        # Vérifier si il y a des sous-titres à inclure sinon afficher un avertissement
-        if subtitle_tracks is None and burn_track is None:
-            logger.warning(
-                f"Pas de piste de sous-titres en français disponible pour {nom_fichier}"
+        handbrake_cmd = list(preparation["commande"])
+        remux = preparation.get("remux")
+
+        # Caractéristiques du fichier (scan déjà en cache) et durée prévue d'après l'historique
+        infos_media = caracteristiques_fichier(fichier)
+        prevision = estimateur_encodage.estimer(fichier, preset, infos_media)
+        duree_prevue = prevision["duree"] if prevision else None
+
+        # Réserver des cœurs pour cet encodage et limiter les threads de l'encodeur
+        threads = ordonnanceur_coeurs.enregistrer_job(chemin_sortie, preset)
+        option_threads = option_threads_encodeur(preset, threads)
+        if option_threads:
+            handbrake_cmd.append(option_threads)
+
+        # Écrire le fichier encodé sous un nom temporaire : un fichier incomplet
+        # n'apparaît jamais sous son nom définitif
+        chemin_encodage = chemin_temporaire(chemin_sortie)
+        handbrake_cmd[handbrake_cmd.index("-o") + 1] = chemin_encodage
+
+        # Encoder depuis une copie locale de la source et écrire le fichier encodé
+        # dans la zone de transit si elle est configurée et a la place
+        if zone_transit.active:
+            source_locale = zone_transit.prendre(
+                fichier,
+                lambda: bool(
+                    control_flags
+                    and any(
+                        control_flags.get(cle)
+                        for cle in ("stop", "stop_all", "skip", "closing")
+                    )
+                ),
             )
-
-        # Préparer les options des sous-titres
-        subtitle_option = "--subtitle=none"
-        burn_option = None
-
-        if subtitle_tracks is not None:
-            subtitle_option = f"--subtitle={subtitle_tracks}"
-            if "VO" in preset:
-                burn_option = "--subtitle-burned=1"
-            elif burn_track is not None:
-                subtitle_option = f"--subtitle={subtitle_tracks},{burn_track}"
-                burn_option = "--subtitle-burned=2"
-        elif burn_track is not None:
-            subtitle_option = f"--subtitle={burn_track}"
-            burn_option = "--subtitle-burned=1"
-
-        # Construire la commande complète
-        handbrake_cmd = [
-            "HandBrakeCLI",
-            "--preset-import-file",
-            fichier_presets,
-            "-i",
-            fichier,
-            "-o",
-            chemin_sortie,
-            "--preset",
-            preset,
-        ]
-
-        # Ajouter les options audio et sous-titres si disponibles
-        if audio_option:
-            handbrake_cmd.append(audio_option)
-        if subtitle_option:
-            handbrake_cmd.append(subtitle_option)
-        if burn_option is not None:
-            handbrake_cmd.append(burn_option)
-
-        # Ajouter les paramètres d'encodage audio
-        handbrake_cmd.extend(["--aencoder=aac", "--ab=192", "--mixdown=5point1"])
+            if source_locale is not None:
+                handbrake_cmd[handbrake_cmd.index("-i") + 1] = source_locale
+            taille_prevue = (
+                prevision["taille"] * 1024 * 1024
+                if prevision and prevision["taille"] and not remux
+                else os.path.getsize(fichier)
+            )
+            sortie_locale = zone_transit.reserver_sortie(chemin_sortie, taille_prevue)
+            if sortie_locale is not None:
+                chemin_encodage = sortie_locale
+                handbrake_cmd[handbrake_cmd.index("-o") + 1] = chemin_encodage
 
         if debug_mode:
             logger.debug(f"Exécution de la commande: {' '.join(handbrake_cmd)}")
             print(f"{horodatage()} 🔧 Commande d'encodage : {' '.join(handbrake_cmd)}")
 
-        # Exécuter HandBrake
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = 0  # SW_HIDE
-        process = subprocess.Popen(
-            handbrake_cmd,
-            startupinfo=startupinfo,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            creationflags=subprocess.CREATE_NO_WINDOW,
-            universal_newlines=True,
-            text=True,
-        )
-
-        # Variables pour le suivi de la mise en pause
-        is_paused = False
-        proc_obj = None
-
-        # Variables pour suivre la progression
-        last_percent_complete = -1
-        percent_pattern = re.compile(r"Encoding:.*?(\d+\.\d+)\s?%")
-        fps_pattern = re.compile(r"(\d+\.\d+) fps")
-
-        # Initialiser percent_complete avant utilisation
-        percent_complete = 0
-        current_fps = "0.0"
-
-        # Gérer la sortie du processus en continue
-        while True:
-            # Vérifier si l'encodage doit être interrompu
-            if control_flags and control_flags.get("stop_all", False):
-                # Si le processus est en pause, le reprendre d'abord
-                if is_paused and proc_obj:
-                    try:
-                        proc_obj.resume()
-                    except:
-                        pass
+        # Encoder par segments les fichiers longs si l'option est activée : un
+        # encodage interrompu reprend alors au premier segment non terminé
+        manifeste = None
+        if not remux and load_config().get("encodage_segmente", False):
+            segments = planifier_segments(
+                fichier,
+                infos_media.get("duree_source"),
+                load_config().get("duree_segment_minutes", 10) * 60,
+            )
+            if segments:
+                manifeste = ManifesteSegments(chemin_encodage)
+                repris = manifeste.preparer(fichier, preset, segments)
                 colored_log(
                     logger,
-                    f"Arrêt de l'encodage demandé pour {short_fichier}",
+                    f"Encodage de {short_fichier} en {len(segments)} segments"
+                    + (f" ({repris} déjà encodés)" if repris else ""),
                     "INFO",
-                    "red",
+                    "skyblue",
                 )
-                process.terminate()
-                if signals:
-                    signals.encoding_done.emit()
-                return False
-
-            # Vérifier si l'encodage doit être sauté
-            if control_flags and control_flags.get("skip", False):
-                # Si le processus est en pause, le reprendre d'abord
-                if is_paused and proc_obj:
-                    try:
-                        proc_obj.resume()
-                    except:
-                        pass
-                logger.info(f"Saut de l'encodage demandé pour {short_fichier}")
-                logger.info("=" * 100)
-                process.terminate()
-                control_flags["skip"] = False
-                if signals:
-                    signals.encoding_done.emit()
-                clear_interrupted_encodings()
-                return False
-
-            # Gérer la pause - modification majeure ici
-            if control_flags and control_flags.get("pause", False):
-                if not is_paused:
-                    # Mettre en pause le processus HandBrakeCLI
-                    try:
-                        if proc_obj is None:
-                            proc_obj = psutil.Process(process.pid)
-                        proc_obj.suspend()
-                        is_paused = True
-                        colored_log(
-                            logger,
-                            f"Encodage mis en pause pour {short_fichier}",
-                            "INFO",
-                            "orange",
-                        )
-                    except Exception as e:
-                        logger.error(f"Erreur lors de la mise en pause: {str(e)}")
-            elif is_paused and proc_obj:
-                # Reprendre le processus si on était en pause
-                try:
-                    proc_obj.resume()
-                    is_paused = False
-                    colored_log(
-                        logger, f"Encodage repris pour {short_fichier}", "INFO", "green"
-                    )
-                except Exception as e:
-                    logger.error(f"Erreur lors de la reprise: {str(e)}")
 
-            # Lire la sortie seulement si le processus n'est pas en pause
-            if not is_paused:
-                output = process.stdout.readline()
-                if output == "" and process.poll() is not None:
-                    break
-
-                if output:
-                    if debug_mode:
-                        print(output.strip())
-
-                    # Extraire le pourcentage d'avancement
-                    match = percent_pattern.search(output)
-                    if match:
-                        percent_complete = float(match.group(1))
-                        if percent_complete != last_percent_complete:
-                            last_percent_complete = percent_complete
-
-                            # Mettre à jour la barre de progression
-                            if signals and hasattr(signals, "update_progress"):
-                                signals.update_progress.emit(int(percent_complete))
-
-                            # Calculer le temps écoulé et restant
-                            elapsed = time.time() - start_time
-                            elapsed_str = f"{int(elapsed // 3600)}h{int((elapsed % 3600) // 60)}m{int(elapsed % 60)}s"
-
-                            # Estimer le temps restant
-                            if percent_complete > 0:
-                                remaining = (
-                                    elapsed
-                                    * (100 - percent_complete)
-                                    / percent_complete
-                                )
-                                remaining_str = f"{int(remaining // 3600)}h{int((remaining % 3600) // 60)}m{int(remaining % 60)}s"
-                            else:
-                                remaining_str = "Calcul en cours..."
-
-                            # Mettre à jour les infos de temps
-                            if signals and hasattr(signals, "update_time_info"):
-                                signals.update_time_info.emit(
-                                    elapsed_str, remaining_str
-                                )
-
-                    # Extraire les informations d'encodage (fps)
-                    fps_match = fps_pattern.search(output)
-                    if fps_match:
-                        current_fps = fps_match.group(1)
-
-                    # Seulement mettre à jour l'interface si on a de nouvelles informations
-                    if fps_match:
-                        # Mettre à jour les statistiques d'encodage
-                        if signals and hasattr(signals, "update_encoding_stats"):
-                            signals.update_encoding_stats.emit(current_fps)
-            else:
-                # En pause, juste attendre un peu
-                time.sleep(0.5)
-                # Vérifier si le processus est toujours en vie
-                if process.poll() is not None:
-                    break
+        if remux:
+            # La source respecte déjà le preset : copie des pistes retenues avec
+            # ffmpeg, sans réencodage
+            colored_log(
+                logger,
+                f"{short_fichier} respecte déjà le preset {preset}, remux sans réencodage",
+                "INFO",
+                "skyblue",
+            )
+            resultat = executer_handbrake(
+                commande_copie_flux(
+                    handbrake_cmd[handbrake_cmd.index("-i") + 1],
+                    chemin_encodage,
+                    remux,
+                    ["-y", "-nostdin"],
+                ),
+                short_fichier,
+                control_flags,
+                chemin_sortie,
+                lambda evenement: None,
+            )
+        elif manifeste is not None:
+            resultat = encoder_par_segments(
+                manifeste,
+                handbrake_cmd,
+                short_fichier,
+                signals,
+                control_flags,
+                chemin_sortie,
+                start_time,
+                duree_prevue,
+            )
+        else:
+            resultat = executer_handbrake(
+                handbrake_cmd,
+                short_fichier,
+                control_flags,
+                chemin_sortie,
+                lambda evenement: publier_progression(
+                    signals, evenement, start_time, duree_prevue
+                ),
+            )
+
+        # Encodage arrêté ou sauté
+        if resultat["code"] is None:
+            # Conserver les segments encodés si l'application se ferme, pour reprendre
+            if manifeste is not None and not (
+                control_flags and control_flags.get("closing", False)
+            ):
+                manifeste.nettoyer()
+            if signals:
+                signals.encoding_done.emit()
+            return False
 
         # Vérifier le résultat
-        process.wait()
-        if process.returncode == 0:
-            if os.path.exists(chemin_sortie):
-                taille = os.path.getsize(chemin_sortie) / (1024 * 1024)  # En MB
-                colored_log(
-                    logger,
-                    f"Fichier encodé avec succès: {chemin_sortie} ({taille:.2f} MB)",
-                    "INFO",
-                    "green",
-                )
-                logger.info("=" * 100)
-                # Enregistrer l'encodage réussi pour l'historique
-                record_successful_encoding(chemin_sortie, taille)
-                # Rafraîchir l'historique des encodages dans l'interface
-                if signals and hasattr(signals, "refresh_history"):
-                    signals.refresh_history.emit()
-                # Envoyer une notification de fin d'encodage
-                notifier_encodage_termine(short_fichier, file_encodage)
-            else:
-                logger.warning(f"Le fichier encodé n'a pas été trouvé: {chemin_sortie}")
-                # Envoyer une notification d'erreur d'encodage
-                notifier_erreur_encodage(short_fichier)
-                logger.info("=" * 100)
+        if resultat["code"] == 0:
+            if manifeste is not None:
+                manifeste.nettoyer()
+            details = dict(
+                infos_media,
+                source=fichier,
+                preset=preset,
+                duree_encodage=round(resultat["duree"], 1),
+                fps_moyen=resultat["fps_moyen"],
+                taille_source=round(os.path.getsize(fichier) / (1024 * 1024), 2),
+            )
+            if remux:
+                details["remux"] = True
+            # Vérifier le fichier encodé (durée, pistes audio et sous-titres) puis le
+            # mettre à sa place pendant l'encodage suivant
+            sortie_confiee = True
+            finaliseur_sorties.publier(
+                chemin_encodage,
+                chemin_sortie,
+                infos_media.get("duree_source"),
+                preparation.get("attentes"),
+                lambda erreur: enregistrer_sortie(
+                    erreur,
+                    chemin_sortie,
+                    short_fichier,
+                    details,
+                    signals,
+                    file_encodage,
+                    rappel_validation,
+                ),
+            )
         else:
             logger.error(
-                f"Échec de l'encodage pour {nom_fichier} avec code de retour {process.returncode}"
+                f"Échec de l'encodage pour {nom_fichier} avec code de retour {resultat['code']}"
             )
             reason = "Erreur ou fermeture pendant l'encodage !"
             # Vérifier si l'application est en cours de fermeture
@@ -413,6 +628,8 @@ def lancer_encodage_avec_gui(
                 ajouter_fichier_a_liste_encodage_manuel(
                     fichier, nom_fichier, reason, preset, signals
                 )
+                if control_flags is not None:
+                    control_flags["raison_manuel"] = reason
             # Envoyer une notification d'erreur d'encodage
             notifier_erreur_encodage(short_fichier)
 
@@ -420,7 +637,7 @@ def lancer_encodage_avec_gui(
         if signals and hasattr(signals, "encoding_done"):
             signals.encoding_done.emit()
 
-        return process.returncode == 0
+        return resultat["code"] == 0
 
     except Exception as e:
         logger.error(
@@ -429,6 +646,15 @@ def lancer_encodage_avec_gui(
         if signals and hasattr(signals, "encoding_done"):
             signals.encoding_done.emit()
         return False
+    finally:
+        # Libérer les cœurs de cet encodage et rééquilibrer les autres
+        ordonnanceur_coeurs.liberer_job(chemin_sortie)
+        # Supprimer la copie locale de la source, et le fichier encodé incomplet
+        # ou invalide (la place d'un fichier en cours de déplacement reste réservée)
+        if source_locale is not None:
+            zone_transit.rendre(fichier)
+        if not sortie_confiee:
+            zone_transit.liberer_sortie(chemin_sortie, chemin_encodage)
 
 
 def traitement_file_encodage(file_encodage, signals=None, control_flags=None):
@@ -437,9 +663,18 @@ def traitement_file_encodage(file_encodage, signals=None, control_flags=None):
     Avec support pour l'interface graphique
     """
     logger = setup_logger(__name__)
-    logger.info("Thread de traitement de la file d'encodage démarré")
+    worker_id = control_flags.get("worker_id") if control_flags else None
+    nom_worker = f"n°{worker_id}" if worker_id else "principal"
+    logger.info(f"Thread de traitement de la file d'encodage démarré ({nom_worker})")
 
     while True:
+        # Vérifier si ce worker doit s'arrêter (arrêt demandé ou retrait du pool)
+        if control_flags and (
+            control_flags.get("stop", False) or control_flags.get("retire", False)
+        ):
+            logger.info(f"Arrêt du thread de traitement de la file ({nom_worker})")
+            break
+
         # Vérifier si on doit arrêter complètement
         if control_flags and control_flags.get("stop_all", False):
             colored_log(logger, "Arrêt de tous les encodages demandé", "INFO", "red")
@@ -449,111 +684,76 @@ def traitement_file_encodage(file_encodage, signals=None, control_flags=None):
             if signals:
                 signals.encoding_done.emit()
                 signals.update_queue.emit([])
-            # Effacer les encodages interrompus car on a tout arrêté
-            clear_interrupted_encodings()
             time.sleep(1)
             continue
 
         # Attendre qu'un fichier soit disponible dans la file
-        if file_encodage.empty():
-            time.sleep(1)
+        # (get avec délai : plusieurs workers peuvent se disputer le même élément)
+        try:
+            tache = file_encodage.get(timeout=1)
+        except Empty:
             continue
 
-        # Extraire le prochain fichier à traiter
-        tache = file_encodage.get()
-
-        if isinstance(tache, dict):
-            fichier = tache.get("file")
-            preset = tache.get("preset")
-            dossier = tache.get("folder", "")
-            dossier_sortie_personnalise = tache.get("output_dir", None)
-        else:
-            # Fallback au cas où c'est un tuple
-            fichier = tache[0] if len(tache) > 0 else ""
-            preset = tache[1] if len(tache) > 1 else ""
-            dossier = ""
-            dossier_sortie_personnalise = None
+        fichier, preset, dossier, dossier_sortie_personnalise = lire_tache(tache)
 
         # Créer un dictionnaire pour l'encodage en cours
         current_encoding = {"file": fichier, "preset": preset, "folder": dossier}
 
-        # Mettre à jour la file d'attente dans l'interface
-        queue_items = []
-
         # Récupérer les éléments de la file d'attente sans les retirer
-        # Note: Queue.queue est un attribut interne qui peut ne pas être fiable
-        # Nous utilisons une approche plus sûre en créant une copie de la file
-        queue_size = file_encodage.qsize()
-
-        if queue_size > 0:
+        queue_items = copier_file_attente(file_encodage)
+        if queue_items:
             logger.debug(
-                f"Récupération de {queue_size} éléments dans la file d'attente"
+                f"Récupération de {len(queue_items)} éléments dans la file d'attente"
             )
 
-            # Créer une liste temporaire pour stocker les éléments
-            temp_items = []
-
-            # Retirer tous les éléments de la file
-            for _ in range(queue_size):
-                if not file_encodage.empty():
-                    item = file_encodage.get()
-                    temp_items.append(item)
-
-            # Remettre les éléments dans la file et les ajouter à notre liste
-            for item in temp_items:
-                file_encodage.put(item)
-                queue_items.append(item)
-
         if signals and hasattr(signals, "update_queue"):
             signals.update_queue.emit(queue_items)
 
         # Vérifier si le fichier existe avant de lancer l'encodage
         if not os.path.exists(fichier):
             logger.error(f"Le fichier {fichier} n'existe pas, encodage ignoré")
+            file_encodage.terminer(tache, reussi=False)
             # Si des signaux GUI sont disponibles, mettre à jour l'interface
             if signals and hasattr(signals, "encoding_done"):
                 signals.encoding_done.emit()
             continue
 
         # Vérifier si l'application est en cours de fermeture
+        # (la tâche reste alors dans le journal pour être reprise au redémarrage)
         if control_flags and control_flags.get("closing", False):
             logger.info(
                 f"Fermeture de l'application en cours, encodage de {fichier} annulé"
             )
-        else:
-            # Sauvegarder l'état de l'encodage en cours et de la file d'attente
-            save_interrupted_encodings(current_encoding, queue_items)
 
         # Encodage avec gestion GUI
 
         basename = os.path.basename(fichier)
 
-        logger.info(f"Début de l'encodage de {basename} avec le preset {preset}")
-        result = lancer_encodage_avec_gui(
-            fichier,
-            preset,
-            signals,
-            control_flags,
-            file_encodage,
-            dossier,
-            dossier_sortie_personnalise,
-        )
+        # Mémoriser l'encodage en cours de ce worker
+        if control_flags is not None:
+            control_flags["en_cours"] = current_encoding
 
-        # Si l'encodage est terminé avec succès, on peut effacer l'état sauvegardé
-        # pour cet encodage spécifique
-        if result:
-            # Mettre à jour les informations sur les encodages en attente
-            if not file_encodage.empty():
-                queue_items = list(file_encodage.queue)
-                save_interrupted_encodings(None, queue_items)
-                if debug_mode:
-                    logger.debug(
-                        "État des encodages mis à jour (file d'attente uniquement)"
-                    )
-            else:
-                # Si la file est vide, on peut tout effacer
-                clear_interrupted_encodings()
-                if debug_mode:
-                    logger.debug(
-                        "État des encodages effacé (aucun encodage en attente)"
-                    )
+        logger.info(f"Début de l'encodage de {basename} avec le preset {preset}")
+        try:
+            result = lancer_encodage_avec_gui(
+                fichier,
+                preset,
+                signals,
+                control_flags,
+                file_encodage,
+                dossier,
+                dossier_sortie_personnalise,
+                # Un encodage réussi n'est terminé dans le journal de reprise
+                # qu'une fois le fichier encodé vérifié et mis en place
+                lambda valide, tache=tache: file_encodage.terminer(
+                    tache, reussi=valide
+                ),
+            )
+        finally:
+            if control_flags is not None:
+                control_flags["en_cours"] = None
+
+        # Enregistrer l'échec de l'encodage dans le journal de reprise, sauf si
+        # l'application se ferme : il sera alors repris au prochain démarrage
+        if not result and not (control_flags and control_flags.get("closing", False)):
+            file_encodage.terminer(tache, reussi=False)
@@ -0,0 +1,219 @@
+import threading
+from collections import ChainMap
+from encoding import traitement_file_encodage
+from logger import colored_log, setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+class PoolEncodage:
+    """
+    Pool de workers d'encodage qui consomment la même file d'attente.
+    Chaque worker possède ses propres drapeaux de contrôle (pause, passer, arrêter)
+    et ses propres signaux, les drapeaux globaux (fermeture, etc.) restant partagés.
+    Les fonctions abonnées avec abonner() sont appelées avec le nouveau nombre de
+    workers lorsqu'il change (redimensionnement, arrêt ou fin imprévue d'un worker).
+    """
+
+    def __init__(self, file_encodage, control_flags, creer_signaux=None, taille=1):
+        """
+        Initialise le pool et démarre les workers.
+
+        Args:
+            file_encodage: File d'attente partagée par tous les workers.
+            control_flags: Drapeaux de contrôle globaux de l'application.
+            creer_signaux: Fonction appelée avec l'identifiant du worker et qui retourne
+                les signaux à utiliser pour ce worker (optionnel).
+            taille: Nombre de workers à démarrer.
+        """
+        self.file_encodage = file_encodage
+        self.control_flags = control_flags
+        self.creer_signaux = creer_signaux
+        self.workers = {}
+        self.en_pause = False
+        self._prochain_id = 1
+        self._lock = threading.RLock()
+        self._abonnes = []
+        self._taille_notifiee = None
+        self.redimensionner(taille)
+
+    def abonner(self, fonction):
+        """Appelle 'fonction(taille)' lorsque le nombre de workers change."""
+        self._abonnes.append(fonction)
+
+    def _notifier_taille(self):
+        with self._lock:
+            taille = len(self._workers_actifs())
+            if taille == self._taille_notifiee:
+                return
+            self._taille_notifiee = taille
+        for fonction in list(self._abonnes):
+            try:
+                fonction(taille)
+            except Exception as e:
+                logger.error(f"Erreur dans un abonné du pool d'encodage: {e}")
+
+    def _creer_drapeaux(self, worker_id):
+        """Crée les drapeaux propres à un worker, chaînés aux drapeaux globaux."""
+        drapeaux_worker = {
+            "worker_id": worker_id,
+            "pause": self.en_pause,
+            "skip": False,
+            "stop": False,
+            "stop_all": False,
+            "retire": False,
+            "en_cours": None,
+        }
+        # Les écritures vont dans le dictionnaire du worker, les lectures des clés
+        # absentes (closing, etc.) retombent sur les drapeaux globaux
+        return ChainMap(drapeaux_worker, self.control_flags)
+
+    def _demarrer_worker(self):
+        """Démarre un nouveau worker et retourne son identifiant."""
+        worker_id = self._prochain_id
+        self._prochain_id += 1
+
+        drapeaux = self._creer_drapeaux(worker_id)
+        signals = self.creer_signaux(worker_id) if self.creer_signaux else None
+
+        thread = threading.Thread(
+            target=self._executer_worker,
+            args=(worker_id, signals, drapeaux),
+            name=f"encodage-{worker_id}",
+            daemon=True,
+        )
+        self.workers[worker_id] = {
+            "thread": thread,
+            "flags": drapeaux,
+            "signals": signals,
+        }
+        thread.start()
+        logger.info(f"Worker d'encodage n°{worker_id} démarré")
+        return worker_id
+
+    def _executer_worker(self, worker_id, signals, drapeaux):
+        """Boucle d'un worker : traite la file jusqu'à son retrait du pool."""
+        try:
+            traitement_file_encodage(self.file_encodage, signals, drapeaux)
+        except Exception as e:
+            logger.error(
+                f"Erreur dans le worker d'encodage n°{worker_id}: {str(e)}",
+                exc_info=True,
+            )
+        finally:
+            with self._lock:
+                self.workers.pop(worker_id, None)
+            logger.info(f"Worker d'encodage n°{worker_id} arrêté")
+            if signals and hasattr(signals, "worker_finished"):
+                signals.worker_finished.emit()
+            self._notifier_taille()
+
+    def _workers_actifs(self):
+        """Retourne les identifiants des workers qui ne sont pas en cours de retrait."""
+        return [
+            worker_id
+            for worker_id, worker in self.workers.items()
+            if not worker["flags"]["retire"] and not worker["flags"]["stop"]
+        ]
+
+    def taille(self):
+        """Retourne le nombre de workers actifs."""
+        with self._lock:
+            return len(self._workers_actifs())
+
+    def redimensionner(self, taille):
+        """
+        Ajuste le nombre de workers. Les workers en trop terminent leur encodage
+        en cours avant de s'arrêter, en retirant d'abord les workers inactifs.
+
+        Args:
+            taille: Nouveau nombre de workers (au moins 1).
+        """
+        taille = max(1, int(taille))
+        with self._lock:
+            actifs = self._workers_actifs()
+            if len(actifs) < taille:
+                for _ in range(taille - len(actifs)):
+                    self._demarrer_worker()
+            elif len(actifs) > taille:
+                # Retirer en priorité les workers sans encodage en cours, puis les plus récents
+                a_retirer = sorted(
+                    actifs,
+                    key=lambda w: (
+                        self.workers[w]["flags"]["en_cours"] is not None,
+                        -w,
+                    ),
+                )[: len(actifs) - taille]
+                for worker_id in a_retirer:
+                    self.workers[worker_id]["flags"]["retire"] = True
+            colored_log(
+                logger,
+                f"Nombre d'encodages simultanés: {taille}",
+                "INFO",
+                "skyblue",
+            )
+        self._notifier_taille()
+
+    def _drapeaux(self, worker_id):
+        worker = self.workers.get(worker_id)
+        return worker["flags"] if worker else None
+
+    def basculer_pause(self, worker_id, en_pause):
+        """Met en pause ou reprend l'encodage d'un worker."""
+        with self._lock:
+            drapeaux = self._drapeaux(worker_id)
+            if drapeaux is not None:
+                drapeaux["pause"] = en_pause
+
+    def passer(self, worker_id):
+        """Abandonne l'encodage en cours d'un worker et passe au fichier suivant."""
+        with self._lock:
+            drapeaux = self._drapeaux(worker_id)
+            if drapeaux is not None:
+                drapeaux["skip"] = True
+
+    def arreter(self, worker_id):
+        """
+        Interrompt l'encodage en cours d'un worker et retire ce worker du pool, dont
+        la taille diminue d'un. Le dernier worker actif n'est pas retiré : seul son
+        encodage est interrompu, comme avec arreter_tout().
+        """
+        with self._lock:
+            drapeaux = self._drapeaux(worker_id)
+            if drapeaux is None:
+                return
+            actifs = self._workers_actifs()
+            if actifs == [worker_id]:
+                drapeaux["stop_all"] = True
+            else:
+                drapeaux["stop"] = True
+        self._notifier_taille()
+
+    def mettre_en_pause(self, en_pause):
+        """Met en pause ou reprend tous les workers."""
+        with self._lock:
+            self.en_pause = en_pause
+            for worker in self.workers.values():
+                worker["flags"]["pause"] = en_pause
+
+    def passer_tout(self):
+        """Abandonne l'encodage en cours de tous les workers."""
+        with self._lock:
+            for worker in self.workers.values():
+                worker["flags"]["skip"] = True
+
+    def arreter_tout(self):
+        """Interrompt les encodages en cours de tous les workers."""
+        with self._lock:
+            for worker in self.workers.values():
+                worker["flags"]["stop_all"] = True
+
+    def encodages_en_cours(self):
+        """Retourne la liste des encodages en cours, tous workers confondus."""
+        with self._lock:
+            return [
+                dict(worker["flags"]["en_cours"])
+                for worker in self.workers.values()
+                if worker["flags"]["en_cours"]
+            ]
@@ -0,0 +1,212 @@
+import itertools
+import os
+import secrets
+import threading
+import time
+from queue import Empty
+from utils import calculer_chemin_sortie
+from file_operations import ajouter_fichier_a_liste_encodage_manuel
+from constants import duree_bail_ferme
+from logger import colored_log, setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+class CoordinateurFerme:
+    """
+    Distribue la file d'attente d'encodage aux agents de la ferme (voir
+    farm_worker.py) qui encodent sur d'autres machines.
+
+    Chaque tâche réclamée par un agent lui est confiée sous un bail de
+    'duree_bail' secondes, prolongé par les battements de cœur envoyés pendant
+    l'encodage. Le bail d'un agent qui ne donne plus de nouvelles expire : sa
+    tâche est remise en tête de file pour un autre worker. Un agent dont le bail
+    a expiré l'apprend au battement suivant et abandonne son encodage.
+
+    Les tâches confiées aux agents passent par get() et terminer() de la file
+    comme celles des workers locaux : le journal de reprise les conserve donc
+    jusqu'à leur fin.
+    """
+
+    def __init__(
+        self, file_encodage, duree_bail=duree_bail_ferme, horloge=time.monotonic
+    ):
+        self.file_encodage = file_encodage
+        self.duree_bail = duree_bail
+        self.horloge = horloge
+        self.baux = {}
+        # Baux expirés : identifiant -> identifiant de la tâche remise en file
+        self._remis = {}
+        self._numeros = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def reclamer(self, worker):
+        """
+        Confie la première tâche de la file à un agent.
+
+        Arguments:
+        worker -- Nom de l'agent.
+
+        Retourne:
+        Un dictionnaire {"bail", "tache", "duree_bail"}, ou None si la file est vide.
+        La tâche reçoit le dossier de sortie calculé par le coordinateur
+        ("output_dir"), la configuration des dossiers de sortie n'étant pas
+        partagée avec les agents.
+        """
+        self.expirer()
+        try:
+            tache = self.file_encodage.get_nowait()
+        except Empty:
+            return None
+
+        if not tache.get("output_dir"):
+            dossier_sortie, _ = calculer_chemin_sortie(
+                tache.get("file", ""), tache.get("folder")
+            )
+            tache = dict(tache, output_dir=dossier_sortie)
+
+        # Identifiant imprévisible : un agent ne peut pas deviner le bail d'un autre,
+        # et les baux d'une exécution précédente du coordinateur restent invalides
+        bail_id = f"{next(self._numeros)}-{secrets.token_hex(8)}"
+        with self._lock:
+            self.baux[bail_id] = {
+                "worker": worker,
+                "tache": tache,
+                "expiration": self.horloge() + self.duree_bail,
+                "progression": 0,
+                "temps_restant": None,
+                "fps": None,
+            }
+        colored_log(
+            logger,
+            f"Fichier {os.path.basename(tache.get('file', ''))} confié à l'agent {worker}",
+            "INFO",
+            "skyblue",
+        )
+        return {"bail": bail_id, "tache": tache, "duree_bail": self.duree_bail}
+
+    def battement(self, bail_id, progression=None, temps_restant=None, fps=None):
+        """
+        Prolonge le bail d'un agent et enregistre sa progression.
+
+        Retourne:
+        False si le bail a expiré ou n'existe pas : l'agent doit abandonner la tâche.
+        """
+        self.expirer()
+        with self._lock:
+            bail = self.baux.get(bail_id)
+            if bail is None:
+                return False
+            bail["expiration"] = self.horloge() + self.duree_bail
+            if progression is not None:
+                bail["progression"] = progression
+            bail["temps_restant"] = temps_restant
+            bail["fps"] = fps
+        return True
+
+    def terminer(self, bail_id, reussi, raison_manuel=None):
+        """
+        Enregistre le résultat d'une tâche confiée à un agent.
+
+        Un résultat reçu après l'expiration du bail est accepté tant que la tâche
+        remise en file n'a pas encore été reprise par un autre worker.
+
+        Arguments:
+        raison_manuel -- Raison pour laquelle l'agent a renvoyé le fichier vers les
+                         encodages manuels (pistes incompatibles, échec) : le
+                         fichier est ajouté à la liste du coordinateur.
+
+        Retourne:
+        True si le résultat a été pris en compte.
+        """
+        with self._lock:
+            bail = self.baux.pop(bail_id, None)
+            remise = self._remis.pop(bail_id, None)
+        if bail is not None:
+            tache = bail["tache"]
+        elif remise is not None and (reussi or raison_manuel):
+            tache = self.file_encodage.retirer(remise)
+            if tache is None:
+                return False
+        else:
+            return False
+
+        self.file_encodage.terminer(tache, reussi)
+        if not reussi and raison_manuel:
+            fichier = tache.get("file", "")
+            ajouter_fichier_a_liste_encodage_manuel(
+                fichier, os.path.basename(fichier), raison_manuel, tache.get("preset")
+            )
+        return True
+
+    def expirer(self):
+        """
+        Remet en tête de file les tâches dont le bail a expiré.
+
+        Retourne:
+        Le nombre de baux expirés.
+        """
+        maintenant = self.horloge()
+        with self._lock:
+            expires = [
+                (bail_id, bail)
+                for bail_id, bail in self.baux.items()
+                if bail["expiration"] <= maintenant
+            ]
+            for bail_id, _ in expires:
+                del self.baux[bail_id]
+
+        for bail_id, bail in expires:
+            colored_log(
+                logger,
+                f"Bail expiré pour l'agent {bail['worker']}, "
+                f"{os.path.basename(bail['tache'].get('file', ''))} remis en file",
+                "WARNING",
+                "orange",
+            )
+            self._remettre_en_file(bail_id, bail)
+        return len(expires)
+
+    def liberer(self, bail_id):
+        """
+        Remet immédiatement en tête de file la tâche d'un agent qui s'arrête.
+
+        Retourne:
+        True si le bail existait encore.
+        """
+        with self._lock:
+            bail = self.baux.pop(bail_id, None)
+        if bail is None:
+            return False
+        logger.info(
+            f"Agent {bail['worker']} arrêté, "
+            f"{os.path.basename(bail['tache'].get('file', ''))} remis en file"
+        )
+        self._remettre_en_file(bail_id, bail)
+        return True
+
+    def _remettre_en_file(self, bail_id, bail):
+        self.file_encodage.terminer(bail["tache"], reussi=False)
+        id_tache = self.file_encodage.put(bail["tache"])
+        self.file_encodage.monter_en_tete(id_tache)
+        with self._lock:
+            self._remis[bail_id] = id_tache
+
+    def instantane(self):
+        """Retourne les tâches confiées aux agents et leur progression."""
+        maintenant = self.horloge()
+        with self._lock:
+            return [
+                {
+                    "bail": bail_id,
+                    "worker": bail["worker"],
+                    "fichier": bail["tache"].get("file"),
+                    "preset": bail["tache"].get("preset"),
+                    "progression": bail["progression"],
+                    "temps_restant": bail["temps_restant"],
+                    "fps": bail["fps"],
+                    "expiration_dans": round(bail["expiration"] - maintenant, 1),
+                }
+                for bail_id, bail in self.baux.items()
+            ]
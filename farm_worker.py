@@ -0,0 +1,306 @@
+"""
+Agent de la ferme d'encodage : réclame des tâches au coordinateur (API du mode sans
+interface, voir headless.py), les encode avec HandBrakeCLI sur cette machine et
+renvoie la progression et le résultat.
+
+Lancement : python farm_worker.py [http://coordinateur:8765] [--workers N] [--nom NOM]
+
+Les fichiers sources et les dossiers de sortie doivent être accessibles depuis
+l'agent (partage réseau) ; l'option de configuration correspondance_chemins_ferme
+traduit les chemins du coordinateur en chemins locaux. Le jeton jeton_api_controle
+doit être le même que celui du coordinateur.
+"""
+
+import argparse
+import json
+import socket
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+from encoding import lancer_encodage_avec_gui
+from headless import SignauxEncodage
+from notifications import set_notifications_enabled
+from scratch_staging import zone_transit
+from output_finalizer import finaliseur_sorties
+from tool_registry import registre_outils
+from config import load_config
+from utils import normaliser_chemin
+from logger import colored_log, setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+class ErreurCoordinateur(Exception):
+    """Le coordinateur est injoignable ou a refusé la requête."""
+
+
+class ClientCoordinateur:
+    """Appels aux routes /farm/* de l'API du coordinateur."""
+
+    def __init__(self, adresse, jeton=None, delai=10):
+        self.adresse = adresse.rstrip("/")
+        self.jeton = jeton
+        self.delai = delai
+
+    def _appeler(self, route, donnees):
+        entetes = {"Content-Type": "application/json"}
+        if self.jeton:
+            # Jeton partagé exigé par l'API du coordinateur (jeton_api_controle)
+            entetes["Authorization"] = f"Bearer {self.jeton}"
+        requete = urllib.request.Request(
+            self.adresse + route,
+            data=json.dumps(donnees).encode("utf-8"),
+            headers=entetes,
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(requete, timeout=self.delai) as reponse:
+                contenu = json.loads(reponse.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise ErreurCoordinateur(f"{route}: HTTP {e.code}") from e
+        except (OSError, ValueError) as e:
+            raise ErreurCoordinateur(f"{route}: {e}") from e
+        return contenu.get("resultat")
+
+    def reclamer(self, worker):
+        return self._appeler("/farm/claim", {"worker": worker})
+
+    def battement(self, bail, progression=None, temps_restant=None, fps=None):
+        return self._appeler(
+            "/farm/heartbeat",
+            {
+                "lease": bail,
+                "progress": progression,
+                "remaining": temps_restant,
+                "fps": fps,
+            },
+        )
+
+    def terminer(self, bail, reussi, raison_manuel=None):
+        return self._appeler(
+            "/farm/complete",
+            {"lease": bail, "success": reussi, "manual": raison_manuel},
+        )
+
+    def liberer(self, bail):
+        return self._appeler("/farm/release", {"lease": bail})
+
+
+def traduire_chemin(chemin, correspondances):
+    """
+    Traduit un chemin du coordinateur en chemin local selon le premier préfixe
+    correspondant (par exemple {"D:/Torrents": "/mnt/torrents"}).
+    """
+    if not chemin:
+        return chemin
+    chemin = normaliser_chemin(chemin)
+    for distant, local in (correspondances or {}).items():
+        distant = normaliser_chemin(distant).rstrip("/")
+        if chemin == distant or chemin.startswith(distant + "/"):
+            return normaliser_chemin(local).rstrip("/") + chemin[len(distant) :]
+    return chemin
+
+
+class AgentFerme:
+    """
+    Boucle d'un agent : réclame une tâche, l'encode en envoyant des battements de
+    cœur, puis renvoie le résultat. Si le coordinateur indique que le bail a
+    expiré (tâche confiée à un autre worker), l'encodage est abandonné.
+    """
+
+    def __init__(self, client, nom, correspondances=None, attente=5):
+        self.client = client
+        self.nom = nom
+        self.correspondances = correspondances or {}
+        self.attente = attente
+        self.arret = threading.Event()
+        self.control_flags = None
+
+    def arreter(self):
+        """Arrête l'agent ; l'encodage en cours est rendu au coordinateur."""
+        self.arret.set()
+        if self.control_flags is not None:
+            self.control_flags["closing"] = True
+            self.control_flags["stop"] = True
+
+    def executer(self):
+        """Traite des tâches jusqu'à l'arrêt de l'agent."""
+        logger.info(f"Agent {self.nom} connecté à {self.client.adresse}")
+        while not self.arret.is_set():
+            try:
+                bail = self.client.reclamer(self.nom)
+            except ErreurCoordinateur as e:
+                logger.warning(f"Coordinateur injoignable: {e}")
+                bail = None
+            if bail is None:
+                self.arret.wait(self.attente)
+                continue
+            self.traiter(bail)
+        logger.info(f"Agent {self.nom} arrêté")
+
+    def traiter(self, bail):
+        """
+        Encode la tâche d'un bail et renvoie son résultat au coordinateur.
+
+        Retourne:
+        True si l'encodage a réussi.
+        """
+        tache = bail["tache"]
+        fichier = traduire_chemin(tache.get("file"), self.correspondances)
+        dossier = traduire_chemin(tache.get("folder"), self.correspondances)
+        dossier_sortie = traduire_chemin(tache.get("output_dir"), self.correspondances)
+
+        etat = {"progression": 0, "temps_restant": None, "fps": None}
+        signals = SignauxEncodage()
+        signals.update_progress.connect(
+            lambda pourcentage: etat.update(progression=pourcentage)
+        )
+        signals.update_time_info.connect(
+            lambda ecoule, restant: etat.update(temps_restant=restant)
+        )
+        signals.update_encoding_stats.connect(lambda fps: etat.update(fps=fps))
+
+        self.control_flags = {
+            "pause": False,
+            "skip": False,
+            "stop": False,
+            "stop_all": False,
+            "closing": self.arret.is_set(),
+            "bail_perdu": False,
+        }
+        fin = threading.Event()
+        battements = threading.Thread(
+            target=self._envoyer_battements,
+            args=(bail, etat, self.control_flags, fin),
+            name=f"battements-{self.nom}",
+            daemon=True,
+        )
+        battements.start()
+        verdict = {}
+        valide = threading.Event()
+
+        def rappel_validation(reussi):
+            verdict["reussi"] = reussi
+            valide.set()
+
+        try:
+            resultat = lancer_encodage_avec_gui(
+                fichier,
+                tache.get("preset"),
+                signals,
+                self.control_flags,
+                None,
+                dossier,
+                dossier_sortie,
+                rappel_validation,
+            )
+            # Le coordinateur n'apprend la réussite qu'une fois le fichier encodé
+            # vérifié et mis en place (le bail est entretenu pendant l'attente)
+            if resultat:
+                valide.wait()
+                resultat = verdict["reussi"]
+        finally:
+            fin.set()
+            battements.join()
+
+        try:
+            if self.control_flags["bail_perdu"]:
+                logger.warning(f"Bail perdu, encodage de {fichier} abandonné")
+            elif self.control_flags["closing"]:
+                self.client.liberer(bail["bail"])
+            else:
+                # Un renvoi vers les encodages manuels est enregistré par le
+                # coordinateur, avec ses propres chemins
+                self.client.terminer(
+                    bail["bail"],
+                    bool(resultat),
+                    self.control_flags.get("raison_manuel"),
+                )
+        except ErreurCoordinateur as e:
+            # Le bail expirera et la tâche sera confiée à un autre worker
+            logger.error(f"Impossible d'envoyer le résultat au coordinateur: {e}")
+        return bool(resultat)
+
+    def _envoyer_battements(self, bail, etat, control_flags, fin):
+        intervalle = max(bail.get("duree_bail", 60) / 3, 0.1)
+        while not fin.wait(intervalle):
+            try:
+                valide = self.client.battement(bail["bail"], **etat)
+            except ErreurCoordinateur as e:
+                logger.warning(f"Battement non transmis au coordinateur: {e}")
+                continue
+            if not valide:
+                colored_log(
+                    logger,
+                    "Bail expiré côté coordinateur, arrêt de l'encodage",
+                    "WARNING",
+                    "orange",
+                )
+                control_flags["bail_perdu"] = True
+                control_flags["stop"] = True
+                return
+
+
+def main(arguments=None):
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Agent de la ferme d'encodage")
+    parser.add_argument(
+        "coordinateur",
+        nargs="?",
+        default=config.get("adresse_coordinateur_ferme"),
+        help="Adresse de l'API du coordinateur (http://hote:port)",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--nom", default=socket.gethostname())
+    options = parser.parse_args(arguments)
+    if not options.coordinateur:
+        parser.error("adresse du coordinateur manquante")
+
+    logger.info("=== Démarrage d'un agent de la ferme d'encodage ===")
+    registre_outils.resoudre()
+    if not registre_outils.est_disponible("HandBrakeCLI"):
+        logger.error("❌ HandBrakeCLI n'est pas installé ou n'est pas accessible")
+        return 1
+    set_notifications_enabled(False)
+    # Les sources sont copiées dans la zone de transit de l'agent au moment de les encoder
+    zone_transit.charger_configuration()
+    zone_transit.nettoyer()
+
+    client = ClientCoordinateur(
+        options.coordinateur, config.get("jeton_api_controle") or None
+    )
+    agents = [
+        AgentFerme(
+            client,
+            options.nom if options.workers == 1 else f"{options.nom}-{numero}",
+            config.get("correspondance_chemins_ferme", {}),
+        )
+        for numero in range(1, options.workers + 1)
+    ]
+    threads = [
+        threading.Thread(target=agent.executer, name=agent.nom, daemon=True)
+        for agent in agents
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(1)
+    except KeyboardInterrupt:
+        logger.info("Arrêt demandé, les encodages en cours sont rendus")
+        for agent in agents:
+            agent.arreter()
+        for thread in threads:
+            thread.join()
+    # Laisser se terminer les déplacements de fichiers encodés vers leur destination
+    finaliseur_sorties.attendre()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
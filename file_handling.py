@@ -1,5 +1,14 @@
 import os
 import json
+import time
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from constants import delai_ecriture_etat, delai_max_ecriture_etat
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
 
 
 def charger_fichiers(fichier):
@@ -22,10 +31,142 @@ def charger_fichiers(fichier):
 def sauvegarder_fichiers(fichier, fichiers):
     """
     Sauvegarde les fichiers détectés et encodés dans un fichier JSON de sauvegarde.
+    L'écriture est atomique (fichier temporaire, fsync puis renommage) : un arrêt
+    pendant l'écriture laisse l'ancienne version intacte.
 
     Arguments:
     fichier -- Chemin du fichier JSON où sauvegarder les données.
     fichiers -- Dictionnaire contenant les données à sauvegarder.
     """
-    with open(fichier, "w") as f:
+    temporaire = f"{fichier}.tmp"
+    with open(temporaire, "w") as f:
         json.dump(fichiers, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporaire, fichier)
+
+
+class SauvegardeDifferee(ABC):
+    """
+    Base des états enregistrés dans un fichier JSON de sauvegarde : le fichier n'est
+    réécrit que si l'état a changé, et les modifications rapprochées sont regroupées
+    en une seule écriture (voir delai_ecriture_etat).
+
+    Les classes dérivées modifient leur état sous self._verrou, appellent _modifie()
+    à chaque changement et fournissent donnees() pour la sauvegarde. Les
+    modifications encore en attente sont enregistrées à la fermeture de
+    l'application par sauvegarder_etats_en_attente().
+    """
+
+    # États en vie, enregistrés à la fermeture de l'application
+    _instances = weakref.WeakSet()
+
+    def __init__(
+        self,
+        fichier,
+        delai=delai_ecriture_etat,
+        delai_max=delai_max_ecriture_etat,
+        horloge=time.monotonic,
+    ):
+        self.fichier = fichier
+        self.delai = delai
+        self.delai_max = delai_max
+        self.horloge = horloge
+        self._premiere_modification = None
+        self._derniere_modification = None
+        self._verrou = threading.RLock()
+        SauvegardeDifferee._instances.add(self)
+
+    @abstractmethod
+    def donnees(self):
+        """Retourne le contenu du fichier de sauvegarde (sérialisable en JSON)."""
+
+    def _modifie(self):
+        maintenant = self.horloge()
+        if self._premiere_modification is None:
+            self._premiere_modification = maintenant
+        self._derniere_modification = maintenant
+
+    @property
+    def modifie(self):
+        return self._premiere_modification is not None
+
+    def sauvegarder_si_necessaire(self, forcer=False):
+        """
+        Enregistre l'état s'il a changé et que les modifications sont terminées
+        depuis 'delai' secondes (ou en attente depuis 'delai_max' secondes).
+
+        Arguments:
+        forcer -- Enregistrer immédiatement les modifications en attente.
+
+        Retourne:
+        True si le fichier a été écrit.
+        """
+        with self._verrou:
+            if not self.modifie:
+                return False
+            maintenant = self.horloge()
+            if not (
+                forcer
+                or maintenant - self._derniere_modification >= self.delai
+                or maintenant - self._premiere_modification >= self.delai_max
+            ):
+                return False
+            sauvegarder_fichiers(self.fichier, self.donnees())
+            self._premiere_modification = None
+            self._derniere_modification = None
+            return True
+
+
+def sauvegarder_etats_en_attente():
+    """
+    Enregistre immédiatement les modifications encore en attente de tous les états
+    à sauvegarde différée (fichiers détectés et encodés, index des médias), à la
+    fermeture de l'application.
+    """
+    for etat in list(SauvegardeDifferee._instances):
+        try:
+            etat.sauvegarder_si_necessaire(forcer=True)
+        except Exception as e:
+            logger.warning(f"Impossible de sauvegarder le fichier {etat.fichier}: {e}")
+
+
+class EtatFichiers(SauvegardeDifferee):
+    """
+    Fichiers de chaque dossier surveillé (détectés ou encodés), conservés en mémoire
+    sous forme d'ensembles et enregistrés dans un fichier JSON de sauvegarde dont le
+    format (listes par dossier) est inchangé.
+    """
+
+    def __init__(self, fichier, **options):
+        super().__init__(fichier, **options)
+        self.dossiers = {}
+
+    def charger(self):
+        """Charge l'état depuis le fichier de sauvegarde (lève une exception si illisible)."""
+        self.dossiers = {
+            dossier: set(fichiers)
+            for dossier, fichiers in charger_fichiers(self.fichier).items()
+        }
+
+    def donnees(self):
+        return {
+            dossier: sorted(fichiers) for dossier, fichiers in self.dossiers.items()
+        }
+
+    def contient(self, dossier, fichier):
+        return fichier in self.dossiers.get(dossier, ())
+
+    def ajouter(self, dossier, fichier):
+        with self._verrou:
+            fichiers = self.dossiers.setdefault(dossier, set())
+            if fichier not in fichiers:
+                fichiers.add(fichier)
+                self._modifie()
+
+    def retirer(self, dossier, fichier):
+        with self._verrou:
+            fichiers = self.dossiers.get(dossier)
+            if fichiers is not None and fichier in fichiers:
+                fichiers.discard(fichier)
+                self._modifie()
@@ -1,7 +1,6 @@
 import logging
 import os
 import json
-import subprocess
 import sys
 from constants import (
     debug_mode,
@@ -10,7 +9,10 @@ from constants import (
     dossiers_sortie_surveillance,
     fichier_encodage_manuel,
 )
+from tool_registry import registre_outils
+from process_launcher import executer
 from logger import colored_log, setup_logger
+from probe_cache import cache_sondes
 from utils import horodatage
 
 # Configuration du logger
@@ -18,6 +20,21 @@ logger = setup_logger(__name__)
 
 
 def obtenir_pistes(filepath):
+    """
+    Obtient les informations sur les pistes du fichier spécifié, telles que retournées
+    par le scan HandBrakeCLI. Le scan n'est lancé que si le fichier n'a pas déjà été
+    analysé depuis sa dernière modification.
+
+    Arguments:
+    filepath -- Chemin du fichier à analyser.
+
+    Retourne:
+    Un dictionnaire contenant les informations des pistes si réussi, None sinon.
+    """
+    return cache_sondes.obtenir(filepath, "handbrake", scanner_pistes_handbrake)
+
+
+def scanner_pistes_handbrake(filepath):
     """
     Exécute HandBrakeCLI pour scanner le fichier spécifié et obtenir des informations sur les pistes
     sous forme de JSON.
@@ -28,18 +45,19 @@ def obtenir_pistes(filepath):
     Retourne:
     Un dictionnaire contenant les informations des pistes si réussi, None sinon.
     """
-    commande = ["HandBrakeCLI", "-i", filepath, "--scan", "--json"]
-
-    startupinfo = subprocess.STARTUPINFO()
-    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    startupinfo.wShowWindow = 0  # SW_HIDE
-    result = subprocess.run(
-        commande,
-        startupinfo=startupinfo,
-        creationflags=subprocess.CREATE_NO_WINDOW,
-        capture_output=True,
-        text=True,
-    )
+    commande = [
+        registre_outils.commande("HandBrakeCLI"),
+        "-i",
+        filepath,
+        "--scan",
+        "--json",
+    ]
+
+    try:
+        result = executer(commande, capture_output=True, text=True)
+    except OSError as e:
+        print(f"Erreur lors de l'exécution de HandBrakeCLI: {e}")
+        return None
     if result.returncode != 0:
         print(f"Erreur lors de l'exécution de HandBrakeCLI: {result.stderr}")
         return None
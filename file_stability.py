@@ -0,0 +1,110 @@
+import os
+import time
+import threading
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+def est_verrouille(chemin):
+    """
+    Indique si un fichier est encore ouvert en écriture par un autre processus.
+
+    Sous Windows, un fichier ouvert par le client torrent ne peut pas être renommé
+    (même vers son propre nom). Sous Linux, il n'existe pas de verrou obligatoire :
+    seul l'accès en lecture est vérifié, la stabilité de la taille faisant le reste.
+    """
+    try:
+        with open(chemin, "rb"):
+            pass
+        if os.name == "nt":
+            os.rename(chemin, chemin)
+        return False
+    except OSError:
+        return True
+
+
+class FiltreStabilite:
+    """
+    Retient les fichiers détectés tant qu'ils sont en cours d'écriture.
+    Un fichier n'est considéré comme prêt que lorsque sa taille et sa date de
+    modification n'ont pas changé pendant 'delai' secondes et qu'il n'est plus verrouillé.
+    """
+
+    def __init__(self, delai, horloge=time.time):
+        """
+        Args:
+            delai: Durée (en secondes) sans modification avant qu'un fichier soit prêt.
+            horloge: Fonction retournant l'heure courante (remplaçable pour les tests).
+        """
+        self.delai = delai
+        self.horloge = horloge
+        self.en_attente = {}
+        self._lock = threading.Lock()
+
+    def ajouter(self, fichier, **infos):
+        """
+        Met un fichier en attente de stabilisation.
+
+        Args:
+            fichier: Chemin du fichier détecté.
+            infos: Informations à restituer quand le fichier sera prêt (dossier, preset...).
+        """
+        with self._lock:
+            if fichier in self.en_attente:
+                return
+            self.en_attente[fichier] = {
+                "infos": infos,
+                "signature": None,
+                "depuis": self.horloge(),
+            }
+
+    def retirer(self, fichier):
+        """Retire un fichier de l'attente (fichier supprimé ou déplacé)."""
+        with self._lock:
+            self.en_attente.pop(fichier, None)
+
+    def __contains__(self, fichier):
+        with self._lock:
+            return fichier in self.en_attente
+
+    def __len__(self):
+        with self._lock:
+            return len(self.en_attente)
+
+    def fichiers_prets(self):
+        """
+        Vérifie les fichiers en attente et retourne ceux qui sont stables.
+
+        Returns:
+            Une liste de tuples (fichier, infos) retirés de l'attente.
+        """
+        maintenant = self.horloge()
+        prets = []
+        with self._lock:
+            for fichier, entree in list(self.en_attente.items()):
+                try:
+                    stat = os.stat(fichier)
+                except OSError:
+                    # Le fichier a disparu (renommé, supprimé) : l'oublier
+                    del self.en_attente[fichier]
+                    continue
+
+                signature = (stat.st_size, stat.st_mtime)
+                if signature != entree["signature"]:
+                    # Le fichier grossit encore : redémarrer la période de calme
+                    entree["signature"] = signature
+                    entree["depuis"] = maintenant
+                    continue
+
+                if maintenant - entree["depuis"] < self.delai:
+                    continue
+
+                if est_verrouille(fichier):
+                    logger.debug(f"Fichier encore verrouillé: {fichier}")
+                    continue
+
+                del self.en_attente[fichier]
+                prets.append((fichier, entree["infos"]))
+        return prets
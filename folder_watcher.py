@@ -0,0 +1,254 @@
+import os
+import time
+import threading
+from queue import Queue, Empty
+from constants import (
+    extensions,
+    intervalle_resynchronisation,
+    delai_regroupement_evenements,
+    fichier_index_dossiers,
+)
+from directory_index import IndexDossiers
+from logger import setup_logger
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+
+    WATCHDOG_DISPONIBLE = True
+except ImportError:
+    # watchdog n'est pas installé : seule la surveillance par scrutation est possible
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_DISPONIBLE = False
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+def est_fichier_video(chemin):
+    """Indique si le chemin correspond à une extension vidéo surveillée."""
+    return os.path.splitext(chemin)[1].lower() in extensions
+
+
+def obtenir_fichiers(dossier):
+    """
+    Retourne un ensemble de fichiers présents dans le dossier et ses sous-dossiers dont les extensions
+    correspondent à celles spécifiées dans la liste 'extensions'.
+    """
+    fichiers = set()
+    for root, _, files in os.walk(dossier):
+        for fichier in files:
+            if os.path.splitext(fichier)[1].lower() in extensions:
+                fichiers.add(os.path.join(root, fichier))
+    return fichiers
+
+
+class DetecteurPolling:
+    """
+    Détecte les fichiers ajoutés et supprimés en parcourant périodiquement
+    l'arborescence de chaque dossier surveillé. Seuls les répertoires modifiés
+    depuis le dernier parcours sont relus (voir IndexDossiers).
+    """
+
+    mode = "polling"
+
+    def __init__(self, dossiers, fichier_index=None):
+        self.dossiers = list(dossiers)
+        self.fichiers_connus = {}
+        self.index = IndexDossiers(fichier_index)
+
+    def demarrer(self):
+        """Effectue le parcours initial des dossiers surveillés."""
+        self.fichiers_connus = {
+            dossier: self.index.obtenir_fichiers(dossier) for dossier in self.dossiers
+        }
+        self.index.sauvegarder()
+
+    def arreter(self):
+        pass
+
+    def _comparer(self, dossier):
+        """Compare l'état actuel d'un dossier au dernier état connu."""
+        fichiers_actuels = self.index.obtenir_fichiers(dossier)
+        connus = self.fichiers_connus.get(dossier, set())
+        nouveaux = fichiers_actuels - connus
+        supprimes = connus - fichiers_actuels
+        self.fichiers_connus[dossier] = fichiers_actuels
+        return nouveaux, supprimes
+
+    def attendre_changements(self, delai):
+        """
+        Attend 'delai' secondes puis retourne les changements détectés.
+
+        Returns:
+            Un dictionnaire {dossier: (nouveaux_fichiers, fichiers_supprimes)}.
+        """
+        time.sleep(delai)
+        changements = {dossier: self._comparer(dossier) for dossier in self.dossiers}
+        self.index.sauvegarder()
+        return changements
+
+
+class _GestionnaireEvenements(FileSystemEventHandler):
+    """Transmet les notifications du système de fichiers d'un dossier surveillé."""
+
+    def __init__(self, dossier, evenements):
+        super().__init__()
+        self.dossier = dossier
+        self.evenements = evenements
+
+    def _signaler(self, type_evenement, chemin, est_dossier):
+        self.evenements.put((self.dossier, type_evenement, chemin, est_dossier))
+
+    def on_created(self, event):
+        self._signaler("ajout", event.src_path, event.is_directory)
+
+    def on_deleted(self, event):
+        self._signaler("suppression", event.src_path, event.is_directory)
+
+    def on_moved(self, event):
+        self._signaler("suppression", event.src_path, event.is_directory)
+        self._signaler("ajout", event.dest_path, event.is_directory)
+
+
+class DetecteurEvenements(DetecteurPolling):
+    """
+    Détecte les fichiers ajoutés et supprimés à partir des notifications du système
+    de fichiers (inotify sous Linux, ReadDirectoryChangesW sous Windows) via watchdog.
+    Un parcours complet est refait périodiquement pour rattraper d'éventuels
+    événements perdus (partages réseau, débordement de la file du noyau).
+    """
+
+    mode = "evenements"
+
+    def __init__(self, dossiers, fichier_index=None):
+        super().__init__(dossiers, fichier_index)
+        self.evenements = Queue()
+        self.observateur = None
+        self.derniere_resynchronisation = time.time()
+
+    def demarrer(self):
+        """Démarre l'observateur puis effectue le parcours initial."""
+        self.observateur = Observer()
+        for dossier in self.dossiers:
+            if os.path.isdir(dossier):
+                self.observateur.schedule(
+                    _GestionnaireEvenements(dossier, self.evenements),
+                    dossier,
+                    recursive=True,
+                )
+            else:
+                logger.warning(f"Dossier surveillé introuvable: {dossier}")
+        self.observateur.start()
+        # Le parcours initial est fait après le démarrage de l'observateur pour
+        # ne manquer aucun fichier arrivé entre les deux
+        super().demarrer()
+        self.derniere_resynchronisation = time.time()
+
+    def arreter(self):
+        if self.observateur is not None:
+            self.observateur.stop()
+            self.observateur.join(timeout=5)
+            self.observateur = None
+
+    def _appliquer_evenement(self, changements, dossier, type_evenement, chemin, est_dossier):
+        """Met à jour l'état connu du dossier et les changements à partir d'un événement."""
+        connus = self.fichiers_connus.setdefault(dossier, set())
+        nouveaux, supprimes = changements.setdefault(dossier, (set(), set()))
+
+        if est_dossier:
+            # Un dossier déplacé ou créé peut contenir des fichiers déjà complets
+            if type_evenement == "ajout":
+                chemins = obtenir_fichiers(chemin)
+            else:
+                prefixe = os.path.join(chemin, "")
+                chemins = {f for f in connus if f.startswith(prefixe)}
+        elif est_fichier_video(chemin):
+            chemins = {chemin}
+        else:
+            return
+
+        for fichier in chemins:
+            if type_evenement == "ajout" and fichier not in connus:
+                connus.add(fichier)
+                if fichier in supprimes:
+                    supprimes.discard(fichier)
+                else:
+                    nouveaux.add(fichier)
+            elif type_evenement == "suppression" and fichier in connus:
+                connus.discard(fichier)
+                if fichier in nouveaux:
+                    nouveaux.discard(fichier)
+                else:
+                    supprimes.add(fichier)
+
+    def attendre_changements(self, delai):
+        """
+        Attend jusqu'à 'delai' secondes le premier événement, regroupe les événements
+        qui suivent de près, puis retourne les changements détectés.
+
+        Returns:
+            Un dictionnaire {dossier: (nouveaux_fichiers, fichiers_supprimes)}.
+        """
+        changements = {}
+
+        # Resynchronisation périodique par parcours complet
+        if time.time() - self.derniere_resynchronisation >= intervalle_resynchronisation:
+            self.derniere_resynchronisation = time.time()
+            logger.debug("Resynchronisation complète des dossiers surveillés")
+            changements = {
+                dossier: self._comparer(dossier) for dossier in self.dossiers
+            }
+            self.index.sauvegarder()
+            return changements
+
+        try:
+            evenement = self.evenements.get(timeout=delai)
+        except Empty:
+            return changements
+
+        # Regrouper les rafales d'événements (copie de plusieurs fichiers, etc.)
+        fin_regroupement = time.time() + delai_regroupement_evenements
+        while True:
+            self._appliquer_evenement(changements, *evenement)
+            restant = fin_regroupement - time.time()
+            if restant <= 0:
+                break
+            try:
+                evenement = self.evenements.get(timeout=restant)
+            except Empty:
+                break
+
+        return changements
+
+
+def creer_detecteur(dossiers, mode="auto"):
+    """
+    Crée le détecteur de changements pour les dossiers surveillés.
+
+    Arguments:
+    dossiers -- Liste des dossiers à surveiller.
+    mode -- "evenements", "polling" ou "auto" (événements si watchdog est disponible).
+
+    Retourne:
+    Un détecteur démarré, prêt à fournir les changements.
+    """
+    if mode in ("auto", "evenements") and WATCHDOG_DISPONIBLE:
+        detecteur = DetecteurEvenements(dossiers, fichier_index_dossiers)
+        try:
+            detecteur.demarrer()
+            return detecteur
+        except Exception as e:
+            detecteur.arreter()
+            logger.warning(
+                f"Surveillance par événements indisponible, retour à la scrutation: {e}"
+            )
+    elif mode == "evenements":
+        logger.warning(
+            "Le module watchdog n'est pas installé, surveillance par scrutation"
+        )
+
+    detecteur = DetecteurPolling(dossiers, fichier_index_dossiers)
+    detecteur.demarrer()
+    return detecteur
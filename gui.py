@@ -23,10 +23,12 @@ from PyQt5.QtWidgets import (
     QFileDialog,  # Ajout pour la boîte de dialogue de sélection de fichier
     QComboBox,  # Ajout pour la liste déroulante de presets
     QMessageBox,  # Ajout pour afficher des messages
+    QSpinBox,  # Ajout pour le nombre d'encodages simultanés
 )
 from PyQt5.QtCore import Qt, QObject, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QFont
 from successful_encodings import get_recent_encodings
+from progress_parser import formater_duree
 from constants import fichier_encodage_manuel, extensions, dossiers_presets
 from config import load_config
 
@@ -118,6 +120,49 @@ class EncodingStatusWidget(QFrame):
         self.layout().addWidget(self.output_path_label)
 
 
+class EncodingWorkerWidget(QFrame):
+    """Widget regroupant l'état et les contrôles d'un worker d'encodage"""
+
+    def __init__(self, worker_id, parent=None):
+        super().__init__(parent)
+        self.worker_id = worker_id
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # Titre du worker
+        self.title_label = QLabel(f"Encodeur n°{worker_id}")
+        self.title_label.setFont(QFont("Arial", 9, QFont.Bold))
+        layout.addWidget(self.title_label)
+
+        # État de l'encodage en cours pour ce worker
+        self.status = EncodingStatusWidget()
+        layout.addWidget(self.status)
+
+        # Boutons de contrôle propres au worker
+        buttons_layout = QHBoxLayout()
+
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.setCheckable(True)
+        self.pause_button.toggled.connect(self.update_pause_text)
+        buttons_layout.addWidget(self.pause_button)
+
+        self.skip_button = QPushButton("Passer")
+        buttons_layout.addWidget(self.skip_button)
+
+        self.stop_button = QPushButton("Arrêter")
+        self.stop_button.setToolTip(
+            "Interrompre l'encodage en cours et retirer cet encodeur"
+        )
+        self.stop_button.setStyleSheet("background-color: #A94442;")
+        buttons_layout.addWidget(self.stop_button)
+
+        layout.addLayout(buttons_layout)
+
+    def update_pause_text(self, checked):
+        self.pause_button.setText("Reprendre" if checked else "Pause")
+
+
 class EncodingsHistoryPanel(QWidget):
     """Widget pour afficher l'historique des encodages réussis dans un panneau latéral"""
 
@@ -457,6 +502,10 @@ class MainWindow(QMainWindow):
 
     # Signal pour indiquer que la fenêtre est sur le point d'être fermée
     closing = pyqtSignal()
+    # Signal émis quand le nombre d'encodages simultanés est modifié
+    workers_count_changed = pyqtSignal(int)
+    # Signal reçu quand le nombre de workers du pool change (arrêt d'un worker...)
+    workers_count_synced = pyqtSignal(int)
 
     def __init__(self):
         super().__init__()
@@ -547,6 +596,21 @@ class MainWindow(QMainWindow):
         self.notifications_checkbox.stateChanged.connect(self.toggle_notifications)
         notifications_layout.addWidget(self.notifications_checkbox)
 
+        # Nombre d'encodages simultanés (ajustable pendant l'exécution)
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Encodages simultanés:")
+        workers_layout.addWidget(workers_label)
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, max(1, os.cpu_count() or 1))
+        self.workers_spinbox.setValue(config.get("nombre_workers_encodage", 1))
+        self.workers_spinbox.setToolTip(
+            "Nombre de fichiers encodés en parallèle par HandBrakeCLI"
+        )
+        self.workers_spinbox.valueChanged.connect(self.change_workers_count)
+        self.workers_count_synced.connect(self.sync_workers_count)
+        workers_layout.addWidget(self.workers_spinbox)
+        notifications_layout.addLayout(workers_layout)
+
         # Ajouter le layout des notifications à la barre supérieure
         top_bar.addLayout(notifications_layout)
 
@@ -585,24 +649,25 @@ class MainWindow(QMainWindow):
 
         main_layout.addLayout(top_bar)
 
-        # Informations sur l'encodage en cours
-        encoding_label = QLabel("Encodage en cours:")
+        # Informations sur les encodages en cours (un widget par worker)
+        encoding_label = QLabel("Encodages en cours:")
         encoding_label.setFont(QFont("Arial", 10, QFont.Bold))
         main_layout.addWidget(encoding_label)
 
-        self.encoding_status = EncodingStatusWidget()
-        main_layout.addWidget(self.encoding_status)
+        self.workers_layout = QVBoxLayout()
+        main_layout.addLayout(self.workers_layout)
+        self.worker_widgets = {}
 
-        # Boutons de contrôle juste après la barre de chargement
+        # Boutons de contrôle globaux (appliqués à tous les workers)
         control_buttons_layout = QHBoxLayout()
 
-        self.pause_button = QPushButton("Pause")
+        self.pause_button = QPushButton("Tout mettre en pause")
         self.pause_button.setCheckable(True)
         self.is_paused = False
         self.pause_button.clicked.connect(self.toggle_pause)
         control_buttons_layout.addWidget(self.pause_button)
 
-        self.skip_button = QPushButton("Passer")
+        self.skip_button = QPushButton("Tout passer")
         control_buttons_layout.addWidget(self.skip_button)
 
         self.stop_button = QPushButton("Stopper tout")
@@ -760,12 +825,52 @@ class MainWindow(QMainWindow):
         # Référence à la fonction de nettoyage (sera définie par main.py)
         self.cleanup_function = None
 
+    def add_worker_widget(self, worker_id):
+        """
+        Ajoute le widget d'un worker d'encodage et le retourne
+        """
+        widget = EncodingWorkerWidget(worker_id)
+        self.worker_widgets[worker_id] = widget
+        self.workers_layout.addWidget(widget)
+        return widget
+
+    def remove_worker_widget(self, worker_id):
+        """
+        Retire le widget d'un worker d'encodage arrêté
+        """
+        widget = self.worker_widgets.pop(worker_id, None)
+        if widget is not None:
+            self.workers_layout.removeWidget(widget)
+            widget.deleteLater()
+
+    def change_workers_count(self, count):
+        """Modifie le nombre d'encodages simultanés et sauvegarde la préférence"""
+        from config import save_config, load_config
+
+        config = load_config()
+        config["nombre_workers_encodage"] = count
+        save_config(config)
+
+        self.workers_count_changed.emit(count)
+
+    def sync_workers_count(self, count):
+        """Affiche le nombre de workers du pool sans redimensionner ni sauvegarder"""
+        self.workers_spinbox.blockSignals(True)
+        self.workers_spinbox.setValue(count)
+        self.workers_spinbox.blockSignals(False)
+
     def set_control_flags(self, flags):
         """
         Définit les drapeaux de contrôle pour l'application
         """
         self.control_flags = flags
 
+    def set_file_encodage(self, file_encodage):
+        """
+        Définit la file d'attente d'encodage manipulée par les boutons de la file
+        """
+        self.file_encodage = file_encodage
+
     def set_cleanup_function(self, cleanup_func):
         """
         Définit la fonction de nettoyage à appeler lors de la fermeture de la fenêtre
@@ -962,6 +1067,17 @@ class MainWindow(QMainWindow):
                 else:
                     display_text = f"{i}. {filename} - {preset}"
 
+                # Durée et taille estimées en arrière-plan d'après l'historique
+                # des encodages (scheduling.EstimationsFile)
+                if item.get("duree_estimee"):
+                    display_text += f" ≈ {formater_duree(item['duree_estimee'])}"
+                    if item.get("taille_estimee"):
+                        display_text += f", {item['taille_estimee']:.0f} MB"
+
+                # Priorité effective calculée par la politique d'ordonnancement
+                if "priorite" in item:
+                    display_text += f" (priorité {item['priorite']:g})"
+
                 # Stocker l'élément original comme userData pour pouvoir le récupérer plus tard
                 list_item = QListWidgetItem(display_text)
                 list_item.setData(Qt.UserRole, item)
@@ -987,235 +1103,90 @@ class MainWindow(QMainWindow):
         self.queue_bottom_btn.setEnabled(enabled)
         self.queue_clear_btn.setEnabled(enabled)
 
+    def selected_queue_task_id(self):
+        """Retourne l'identifiant de la tâche sélectionnée dans la file d'attente, ou None"""
+        item = self.queue_list.currentItem()
+        if item is None or item.text() == "Aucun fichier en attente":
+            return None
+        task = item.data(Qt.UserRole)
+        if not isinstance(task, dict):
+            return None
+        return task.get("id")
+
+    def move_queue_item(self, move, message):
+        """
+        Applique un déplacement à la tâche sélectionnée dans la file d'attente
+        et garde la sélection sur cette tâche
+        """
+        task_id = self.selected_queue_task_id()
+        if task_id is None or not hasattr(self, "file_encodage"):
+            return
+        # La file notifie ses abonnés : la liste est redessinée par update_queue
+        if move(task_id):
+            new_row = self.file_encodage.position(task_id)
+            if new_row is not None:
+                self.queue_list.setCurrentRow(new_row)
+            self.add_log(message, "INFO", "green")
+
     def delete_queue_item(self):
         """Supprime l'élément sélectionné de la file d'attente"""
         current_row = self.queue_list.currentRow()
-        if current_row == -1:
+        task_id = self.selected_queue_task_id()
+        if task_id is None:
             self.add_log(
                 "Aucun élément sélectionné dans la file d'attente", "WARNING", "orange"
             )
             return
 
-        # Récupérer la liste actuelle des fichiers en attente
-        queue_files = self.get_current_queue_files()
-
-        # Vérifier si la file contient uniquement le message "Aucun fichier en attente"
-        if (
-            len(queue_files) == 1
-            and self.queue_list.item(0).text() == "Aucun fichier en attente"
-        ):
+        if self.file_encodage.retirer(task_id) is None:
+            # Déjà pris par un worker entre-temps
             return
 
-        # Supprimer l'élément de la liste
-        if 0 <= current_row < len(queue_files):
-            del queue_files[current_row]
-
-            # Mettre à jour la file d'attente
-            self.update_queue(queue_files)
-
-            # Sélectionner le même index ou le dernier élément si on a supprimé le dernier
-            new_row = min(current_row, self.queue_list.count() - 1)
-            if new_row >= 0:
-                self.queue_list.setCurrentRow(new_row)
-
-            self.add_log(f"Élément supprimé de la file d'attente", "INFO", "green")
+        # Sélectionner le même index ou le dernier élément si on a supprimé le dernier
+        new_row = min(current_row, self.queue_list.count() - 1)
+        if new_row >= 0:
+            self.queue_list.setCurrentRow(new_row)
 
-            # Signaler le changement de la file d'attente et forcer la mise à jour immédiate
-            if hasattr(self, "control_flags"):
-                self.control_flags["queue_modified"] = True
-                # Forcer la mise à jour immédiate
-                from state_persistence import save_interrupted_encodings
-
-                save_interrupted_encodings(None, queue_files)
+        self.add_log(f"Élément supprimé de la file d'attente", "INFO", "green")
 
     def move_queue_item_up(self):
         """Déplace l'élément sélectionné vers le haut dans la file d'attente"""
-        current_row = self.queue_list.currentRow()
-        if current_row <= 0:
-            return  # Premier élément ou aucun élément sélectionné
-
-        # Récupérer la liste actuelle des fichiers en attente
-        queue_files = self.get_current_queue_files()
-
-        # Vérifier si la file contient uniquement le message "Aucun fichier en attente"
-        if (
-            len(queue_files) == 1
-            and self.queue_list.item(0).text() == "Aucun fichier en attente"
-        ):
-            return
-
-        # Échanger l'élément avec celui au-dessus
-        queue_files[current_row], queue_files[current_row - 1] = (
-            queue_files[current_row - 1],
-            queue_files[current_row],
-        )
-
-        # Mettre à jour la file d'attente
-        self.update_queue(queue_files)
-
-        # Sélectionner l'élément déplacé
-        self.queue_list.setCurrentRow(current_row - 1)
-
-        self.add_log(
-            f"Élément déplacé vers le haut dans la file d'attente", "INFO", "green"
+        self.move_queue_item(
+            self.file_encodage.monter,
+            "Élément déplacé vers le haut dans la file d'attente",
         )
 
-        # Signaler le changement de la file d'attente et forcer la mise à jour immédiate
-        if hasattr(self, "control_flags"):
-            self.control_flags["queue_modified"] = True
-            # Forcer la mise à jour immédiate
-            from state_persistence import save_interrupted_encodings
-
-            save_interrupted_encodings(None, queue_files)
-
     def move_queue_item_to_top(self):
         """Déplace l'élément sélectionné tout en haut de la file d'attente"""
-        current_row = self.queue_list.currentRow()
-        if current_row <= 0:
-            return  # Premier élément ou aucun élément sélectionné
-
-        # Récupérer la liste actuelle des fichiers en attente
-        queue_files = self.get_current_queue_files()
-
-        # Vérifier si la file contient uniquement le message "Aucun fichier en attente"
-        if (
-            len(queue_files) == 1
-            and self.queue_list.item(0).text() == "Aucun fichier en attente"
-        ):
-            return
-
-        # Extraire l'élément à déplacer
-        item_to_move = queue_files.pop(current_row)
-
-        # L'insérer au début de la liste
-        queue_files.insert(0, item_to_move)
-
-        # Mettre à jour la file d'attente
-        self.update_queue(queue_files)
-
-        # Sélectionner l'élément déplacé
-        self.queue_list.setCurrentRow(0)
-
-        self.add_log(
-            f"Élément déplacé tout en haut de la file d'attente", "INFO", "green"
+        self.move_queue_item(
+            self.file_encodage.monter_en_tete,
+            "Élément déplacé tout en haut de la file d'attente",
         )
 
-        # Signaler le changement de la file d'attente et forcer la mise à jour immédiate
-        if hasattr(self, "control_flags"):
-            self.control_flags["queue_modified"] = True
-            # Forcer la mise à jour immédiate
-            from state_persistence import save_interrupted_encodings
-
-            save_interrupted_encodings(None, queue_files)
-
     def move_queue_item_down(self):
         """Déplace l'élément sélectionné vers le bas dans la file d'attente"""
-        current_row = self.queue_list.currentRow()
-        if current_row == -1 or current_row >= self.queue_list.count() - 1:
-            return  # Dernier élément ou aucun élément sélectionné
-
-        # Récupérer la liste actuelle des fichiers en attente
-        queue_files = self.get_current_queue_files()
-
-        # Vérifier si la file contient uniquement le message "Aucun fichier en attente"
-        if (
-            len(queue_files) == 1
-            and self.queue_list.item(0).text() == "Aucun fichier en attente"
-        ):
-            return
-
-        # Échanger l'élément avec celui en-dessous
-        queue_files[current_row], queue_files[current_row + 1] = (
-            queue_files[current_row + 1],
-            queue_files[current_row],
+        self.move_queue_item(
+            self.file_encodage.descendre,
+            "Élément déplacé vers le bas dans la file d'attente",
         )
 
-        # Mettre à jour la file d'attente
-        self.update_queue(queue_files)
-
-        # Sélectionner l'élément déplacé
-        self.queue_list.setCurrentRow(current_row + 1)
-
-        self.add_log(
-            f"Élément déplacé vers le bas dans la file d'attente", "INFO", "green"
-        )
-
-        # Signaler le changement de la file d'attente et forcer la mise à jour immédiate
-        if hasattr(self, "control_flags"):
-            self.control_flags["queue_modified"] = True
-            # Forcer la mise à jour immédiate
-            from state_persistence import save_interrupted_encodings
-
-            save_interrupted_encodings(None, queue_files)
-
     def move_queue_item_to_bottom(self):
         """Déplace l'élément sélectionné tout en bas de la file d'attente"""
-        current_row = self.queue_list.currentRow()
-        if current_row == -1 or current_row >= self.queue_list.count() - 1:
-            return  # Dernier élément ou aucun élément sélectionné
-
-        # Récupérer la liste actuelle des fichiers en attente
-        queue_files = self.get_current_queue_files()
-
-        # Vérifier si la file contient uniquement le message "Aucun fichier en attente"
-        if (
-            len(queue_files) == 1
-            and self.queue_list.item(0).text() == "Aucun fichier en attente"
-        ):
-            return
-
-        # Extraire l'élément à déplacer
-        item_to_move = queue_files.pop(current_row)
-
-        # L'ajouter à la fin de la liste
-        queue_files.append(item_to_move)
-
-        # Mettre à jour la file d'attente
-        self.update_queue(queue_files)
-
-        # Sélectionner l'élément déplacé
-        self.queue_list.setCurrentRow(len(queue_files) - 1)
-
-        self.add_log(
-            f"Élément déplacé tout en bas de la file d'attente", "INFO", "green"
+        self.move_queue_item(
+            self.file_encodage.descendre_en_fin,
+            "Élément déplacé tout en bas de la file d'attente",
         )
 
-        # Signaler le changement de la file d'attente et forcer la mise à jour immédiate
-        if hasattr(self, "control_flags"):
-            self.control_flags["queue_modified"] = True
-            # Forcer la mise à jour immédiate
-            from state_persistence import save_interrupted_encodings
-
-            save_interrupted_encodings(None, queue_files)
-
     def clear_queue(self):
         """Vide complètement la file d'attente"""
-        # Récupérer la liste actuelle des fichiers en attente
-        queue_files = self.get_current_queue_files()
-
-        # Vérifier si la file contient uniquement le message "Aucun fichier en attente"
-        if (
-            len(queue_files) == 1
-            and self.queue_list.item(0).text() == "Aucun fichier en attente"
-        ):
+        if not hasattr(self, "file_encodage") or self.file_encodage.empty():
             return
 
-        # Vider la file d'attente
-        self.update_queue([])
+        # La sauvegarde de l'état est mise à jour par l'abonné de la file
+        self.file_encodage.vider()
 
         self.add_log("File d'attente vidée", "INFO", "green")
 
-        # Signaler le changement de la file d'attente et forcer la mise à jour immédiate
-        if hasattr(self, "control_flags"):
-            self.control_flags["queue_modified"] = True
-            self.control_flags["queue_cleared"] = True
-            # Forcer la mise à jour immédiate
-            from state_persistence import (
-                clear_interrupted_encodings,
-            )
-
-            clear_interrupted_encodings()
-
     def get_current_queue_files(self):
         """Récupère la liste actuelle des fichiers en attente à partir du QListWidget"""
         queue_files = []
@@ -1245,11 +1216,14 @@ class MainWindow(QMainWindow):
         """Mettre en pause ou reprendre l'encodage en cours"""
         self.is_paused = not self.is_paused
         if self.is_paused:
-            self.pause_button.setText("Reprendre")
+            self.pause_button.setText("Tout reprendre")
             # Signal to pause encoding
         else:
-            self.pause_button.setText("Pause")
+            self.pause_button.setText("Tout mettre en pause")
             # Signal to resume encoding
+        # Synchroniser les boutons de pause des workers
+        for widget in self.worker_widgets.values():
+            widget.pause_button.setChecked(self.is_paused)
 
     def skip_encoding(self):
         """Arrête l'encodage en cours et passe au suivant"""
@@ -1259,7 +1233,8 @@ class MainWindow(QMainWindow):
     def stop_all(self):
         """Arrête tous les encodages et vide la file d'attente"""
         # Signal to stop all encodings
-        self.encoding_status.clear()
+        for widget in self.worker_widgets.values():
+            widget.status.clear()
         self.update_queue([])
         pass
 
@@ -1636,23 +1611,10 @@ class MainWindow(QMainWindow):
                                 }
                             )
 
-                # Récupérer la file d'attente actuelle
-                current_queue = self.get_current_queue_files()
-
-                # Ajouter les nouveaux fichiers
+                # Ajouter les nouveaux fichiers à la file d'attente
+                # (l'interface et l'état sauvegardé sont mis à jour par ses abonnés)
                 for file_info in files_to_add:
-                    current_queue.append(file_info)
-
-                # Mettre à jour l'interface
-                self.update_queue(current_queue)
-
-                # Signaler le changement à l'encodeur
-                if hasattr(self, "control_flags"):
-                    self.control_flags["queue_modified"] = True
-                    # Forcer la mise à jour immédiate
-                    from state_persistence import save_interrupted_encodings
-
-                    save_interrupted_encodings(None, current_queue)
+                    self.file_encodage.put(file_info)
 
                 self.add_log(
                     f"Ajouté {len(files_to_add)} fichier(s) à la file d'attente",
@@ -0,0 +1,517 @@
+"""
+Mode sans interface : surveillance des dossiers et workers d'encodage pilotés par
+une API HTTP locale, sans importer PyQt5 (serveurs sans affichage).
+
+Lancement : python headless.py
+
+Routes de l'API (JSON) :
+GET  /queue         -- File d'attente, avec durée (s) et taille (MB) estimées
+GET  /progress      -- Encodages en cours et leur progression
+POST /queue         -- Ajoute un fichier : {"file", "preset", "output_dir" (optionnel)}
+POST /queue/move    -- Déplace une tâche : {"id", "position": "top", "up", "down" ou "bottom"}
+POST /queue/remove  -- Retire une tâche : {"id"}
+POST /pause         -- Pause ou reprise : {"paused", "worker" (optionnel)}
+POST /skip          -- Passe l'encodage en cours : {"worker" (optionnel)}
+POST /stop          -- Arrête l'encodage en cours : {"worker" (optionnel)}
+POST /workers       -- Nombre d'encodages simultanés : {"count"}
+
+Routes des agents de la ferme d'encodage (voir farm_worker.py) :
+POST /farm/claim     -- Réclame la prochaine tâche : {"worker"}
+POST /farm/heartbeat -- Prolonge un bail : {"lease", "progress", "remaining", "fps"}
+POST /farm/complete  -- Résultat d'une tâche : {"lease", "success", "manual" (optionnel,
+                        raison du renvoi vers les encodages manuels)}
+POST /farm/release   -- Rend la tâche d'un agent qui s'arrête : {"lease"}
+
+Si l'option jeton_api_controle est définie, chaque requête doit porter l'en-tête
+"Authorization: Bearer <jeton>" (réponse 401 sinon). Sans jeton, l'API refuse
+d'écouter sur une autre adresse que la boucle locale.
+"""
+
+import hmac
+import ipaddress
+import json
+import os
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from surveillance import surveille_dossiers
+from encoding_pool import PoolEncodage
+from probe_ahead import pre_analyseur
+from scratch_staging import zone_transit
+from output_finalizer import (
+    finaliseur_sorties,
+    dossiers_sortie_connus,
+    nettoyer_sorties_partielles,
+)
+from file_handling import sauvegarder_etats_en_attente
+from config import load_config
+from tool_registry import registre_outils
+from process_launcher import arreter_processus_nommes
+from constants import dossiers_presets
+from initialization import vider_fichiers
+from successful_encodings import compacter_historique
+from state_persistence import (
+    load_interrupted_encodings,
+    has_interrupted_encodings,
+    journal_encodages,
+)
+from job_queue import FileTaches
+from scheduling import creer_politique, estimations_file
+from farm_coordinator import CoordinateurFerme
+from utils import copier_file_attente
+from logger import colored_log, setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+class Signal:
+    """Remplaçant de pyqtSignal : appelle directement les fonctions connectées."""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            try:
+                slot(*args)
+            except Exception as e:
+                logger.error(f"Erreur dans un gestionnaire de signal: {e}")
+
+
+class SignauxEncodage:
+    """Mêmes signaux que main.EncodingSignals, sans Qt."""
+
+    noms = [
+        "update_progress",
+        "update_file_info",
+        "update_time_info",
+        "update_encoding_stats",
+        "encoding_done",
+        "update_queue",
+        "update_output_path",
+        "update_manual_encodings",
+        "refresh_history",
+        "worker_finished",
+    ]
+
+    def __init__(self):
+        for nom in self.noms:
+            setattr(self, nom, Signal())
+
+
+class EtatEncodages:
+    """
+    Progression des encodages en cours, mise à jour par les signaux des workers
+    et consultée par l'API.
+    """
+
+    def __init__(self):
+        self.workers = {}
+        self._lock = threading.Lock()
+
+    def _mettre_a_jour(self, worker_id, **valeurs):
+        with self._lock:
+            if worker_id in self.workers:
+                self.workers[worker_id].update(valeurs)
+
+    def _reinitialiser(self, worker_id):
+        self._mettre_a_jour(
+            worker_id,
+            fichier=None,
+            preset=None,
+            chemin_sortie=None,
+            progression=0,
+            temps_ecoule=None,
+            temps_restant=None,
+            fps=None,
+        )
+
+    def _retirer(self, worker_id):
+        with self._lock:
+            self.workers.pop(worker_id, None)
+
+    def creer_signaux(self, worker_id):
+        """Crée les signaux d'un worker du pool, reliés à son état."""
+        with self._lock:
+            self.workers[worker_id] = {}
+        self._reinitialiser(worker_id)
+
+        signals = SignauxEncodage()
+        signals.update_file_info.connect(
+            lambda fichier, preset: self._mettre_a_jour(
+                worker_id, fichier=fichier, preset=preset, progression=0
+            )
+        )
+        signals.update_output_path.connect(
+            lambda chemin: self._mettre_a_jour(worker_id, chemin_sortie=chemin)
+        )
+        signals.update_progress.connect(
+            lambda pourcentage: self._mettre_a_jour(worker_id, progression=pourcentage)
+        )
+        signals.update_time_info.connect(
+            lambda ecoule, restant: self._mettre_a_jour(
+                worker_id, temps_ecoule=ecoule, temps_restant=restant
+            )
+        )
+        signals.update_encoding_stats.connect(
+            lambda fps: self._mettre_a_jour(worker_id, fps=fps)
+        )
+        signals.encoding_done.connect(lambda: self._reinitialiser(worker_id))
+        signals.worker_finished.connect(lambda: self._retirer(worker_id))
+        return signals
+
+    def instantane(self):
+        """Retourne l'état de chaque worker, trié par identifiant."""
+        with self._lock:
+            return [
+                dict(etat, worker=worker_id)
+                for worker_id, etat in sorted(self.workers.items())
+            ]
+
+
+class ServiceControle:
+    """Commandes de l'API appliquées à la file d'attente et au pool de workers."""
+
+    def __init__(self, file_encodage, pool, etat, coordinateur=None):
+        self.file_encodage = file_encodage
+        self.pool = pool
+        self.etat = etat
+        self.coordinateur = coordinateur or CoordinateurFerme(file_encodage)
+
+    def file_attente(self):
+        # Estimations calculées en arrière-plan (scheduling.EstimationsFile)
+        return copier_file_attente(self.file_encodage)
+
+    def progression(self):
+        return {
+            "paused": self.pool.en_pause,
+            "workers": self.etat.instantane(),
+            "farm": self.coordinateur.instantane(),
+        }
+
+    def ajouter(self, fichier, preset, output_dir=None):
+        if not fichier or not preset:
+            raise ValueError("Les champs 'file' et 'preset' sont obligatoires")
+        if not os.path.isfile(fichier):
+            raise ValueError(f"Fichier introuvable: {fichier}")
+        tache = {"file": fichier, "preset": preset}
+        if output_dir:
+            tache["output_dir"] = output_dir
+        tache["id"] = self.file_encodage.put(tache)
+        colored_log(
+            logger,
+            f"Fichier {os.path.basename(fichier)} ajouté à la file via l'API ({preset})",
+            "INFO",
+            "skyblue",
+        )
+        return tache
+
+    def deplacer(self, id_tache, position):
+        deplacements = {
+            "top": self.file_encodage.monter_en_tete,
+            "up": self.file_encodage.monter,
+            "down": self.file_encodage.descendre,
+            "bottom": self.file_encodage.descendre_en_fin,
+        }
+        if position not in deplacements:
+            raise ValueError(f"Position inconnue: {position}")
+        if not deplacements[position](int(id_tache)) and (
+            self.file_encodage.position(int(id_tache)) is None
+        ):
+            raise ValueError(f"Tâche absente de la file: {id_tache}")
+        return self.file_encodage.position(int(id_tache))
+
+    def retirer(self, id_tache):
+        tache = self.file_encodage.retirer(int(id_tache))
+        if tache is None:
+            raise ValueError(f"Tâche absente de la file: {id_tache}")
+        return tache
+
+    def pause(self, en_pause, worker_id=None):
+        if worker_id is None:
+            self.pool.mettre_en_pause(bool(en_pause))
+        else:
+            self.pool.basculer_pause(int(worker_id), bool(en_pause))
+
+    def passer(self, worker_id=None):
+        if worker_id is None:
+            self.pool.passer_tout()
+        else:
+            self.pool.passer(int(worker_id))
+
+    def arreter(self, worker_id=None):
+        if worker_id is None:
+            self.pool.arreter_tout()
+        else:
+            self.pool.arreter(int(worker_id))
+
+    def redimensionner(self, nombre):
+        self.pool.redimensionner(int(nombre))
+
+    def ferme_reclamer(self, worker):
+        if not worker:
+            raise ValueError("Le champ 'worker' est obligatoire")
+        return self.coordinateur.reclamer(str(worker))
+
+    def ferme_battement(self, bail, progression=None, temps_restant=None, fps=None):
+        return self.coordinateur.battement(str(bail), progression, temps_restant, fps)
+
+    def ferme_terminer(self, bail, reussi, raison_manuel=None):
+        return self.coordinateur.terminer(str(bail), bool(reussi), raison_manuel)
+
+    def ferme_liberer(self, bail):
+        return self.coordinateur.liberer(str(bail))
+
+
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    """Traduit les requêtes HTTP en appels au ServiceControle du serveur."""
+
+    def _repondre(self, code, contenu):
+        corps = json.dumps(contenu, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _autorise(self):
+        """Vérifie le jeton de l'en-tête Authorization (si l'API en exige un)."""
+        jeton = self.server.jeton
+        if not jeton:
+            return True
+        recu = self.headers.get("Authorization") or ""
+        return hmac.compare_digest(
+            recu.encode("utf-8"), f"Bearer {jeton}".encode("utf-8")
+        )
+
+    def _refuser(self):
+        self._repondre(401, {"erreur": "Jeton d'API manquant ou invalide"})
+
+    def _lire_corps(self):
+        longueur = int(self.headers.get("Content-Length") or 0)
+        if not longueur:
+            return {}
+        donnees = json.loads(self.rfile.read(longueur).decode("utf-8"))
+        if not isinstance(donnees, dict):
+            raise ValueError("Le corps de la requête doit être un objet JSON")
+        return donnees
+
+    def do_GET(self):
+        if not self._autorise():
+            self._refuser()
+            return
+        service = self.server.service
+        if self.path == "/queue":
+            self._repondre(200, {"queue": service.file_attente()})
+        elif self.path == "/progress":
+            self._repondre(200, service.progression())
+        else:
+            self._repondre(404, {"erreur": f"Route inconnue: {self.path}"})
+
+    def do_POST(self):
+        if not self._autorise():
+            self._refuser()
+            return
+        service = self.server.service
+        routes = {
+            "/queue": lambda d: service.ajouter(
+                d.get("file"), d.get("preset"), d.get("output_dir")
+            ),
+            "/queue/move": lambda d: service.deplacer(d["id"], d["position"]),
+            "/queue/remove": lambda d: service.retirer(d["id"]),
+            "/pause": lambda d: service.pause(d.get("paused", True), d.get("worker")),
+            "/skip": lambda d: service.passer(d.get("worker")),
+            "/stop": lambda d: service.arreter(d.get("worker")),
+            "/workers": lambda d: service.redimensionner(d["count"]),
+            "/farm/claim": lambda d: service.ferme_reclamer(d.get("worker")),
+            "/farm/heartbeat": lambda d: service.ferme_battement(
+                d["lease"], d.get("progress"), d.get("remaining"), d.get("fps")
+            ),
+            "/farm/complete": lambda d: service.ferme_terminer(
+                d["lease"], d.get("success", False), d.get("manual")
+            ),
+            "/farm/release": lambda d: service.ferme_liberer(d["lease"]),
+        }
+        action = routes.get(self.path)
+        if action is None:
+            self._repondre(404, {"erreur": f"Route inconnue: {self.path}"})
+            return
+        try:
+            resultat = action(self._lire_corps())
+        except KeyError as e:
+            self._repondre(400, {"erreur": f"Champ manquant: {e.args[0]}"})
+            return
+        except (ValueError, TypeError) as e:
+            self._repondre(400, {"erreur": str(e)})
+            return
+        self._repondre(200, {"ok": True, "resultat": resultat})
+
+    def log_message(self, format, *args):
+        logger.debug(f"API {self.address_string()} - {format % args}")
+
+
+def est_adresse_locale(adresse):
+    """Indique si une adresse d'écoute n'est joignable que depuis cette machine."""
+    if adresse == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(adresse).is_loopback
+    except ValueError:
+        return False
+
+
+def creer_serveur(service, adresse="127.0.0.1", port=0, jeton=None):
+    """
+    Crée le serveur HTTP de l'API (port 0 : port libre choisi par le système).
+
+    Arguments:
+    jeton -- Jeton exigé dans l'en-tête Authorization de chaque requête. Il est
+             obligatoire pour écouter sur une adresse autre que la boucle locale :
+             l'API permet d'ajouter, retirer et arrêter des encodages.
+    """
+    if not jeton and not est_adresse_locale(adresse):
+        raise ValueError(
+            f"L'API de contrôle ne peut écouter sur {adresse} sans jeton_api_controle"
+        )
+    serveur = ThreadingHTTPServer((adresse, port), GestionnaireAPI)
+    serveur.daemon_threads = True
+    serveur.service = service
+    serveur.jeton = jeton
+    return serveur
+
+
+def restaurer_file_interrompue(file_encodage):
+    """Remet en file les encodages interrompus lors de la dernière exécution."""
+    etat = load_interrupted_encodings()
+    if not etat:
+        return
+    # Encodages commencés en premier, puis la file d'attente dans son ordre
+    taches = list(
+        etat.get("encodages_en_cours")
+        or ([etat["current_encoding"]] if etat.get("current_encoding") else [])
+    )
+    taches.extend(etat.get("encoding_queue", []))
+    for tache in taches:
+        file_encodage.put(tache)
+    logger.info(f"Reprise de {len(taches)} encodage(s) interrompu(s)")
+
+
+def main():
+    logger.info(
+        "=== Démarrage de l'application Encodage_Auto_Plex (sans interface) ==="
+    )
+
+    # Localiser les outils externes (HandBrakeCLI, MediaInfo, ffmpeg, ffprobe)
+    registre_outils.resoudre()
+
+    # Supprimer de l'historique les encodages au-delà de la durée de rétention
+    compacter_historique(load_config().get("retention_historique_jours", 0))
+    if registre_outils.est_disponible("HandBrakeCLI"):
+        logger.info(
+            f"✅ HandBrakeCLI installé et opérationnel: {registre_outils.version('HandBrakeCLI')}"
+        )
+    else:
+        logger.error(
+            "❌ HandBrakeCLI n'est pas installé ou n'est pas accessible. L'encodage ne fonctionnera pas!"
+        )
+
+    # L'API n'est exposée au réseau (agents de la ferme) qu'avec un jeton partagé
+    adresse_api = load_config().get("adresse_api_controle", "127.0.0.1")
+    jeton_api = load_config().get("jeton_api_controle") or None
+    if not jeton_api and not est_adresse_locale(adresse_api):
+        logger.error(
+            f"❌ L'API de contrôle ne peut écouter sur {adresse_api} sans "
+            "jeton_api_controle : définissez un jeton ou utilisez 127.0.0.1"
+        )
+        return 1
+
+    file_encodage = FileTaches(creer_politique(load_config()))
+    control_flags = {"pause": False, "skip": False, "stop_all": False, "closing": False}
+
+    # Sans interface, les encodages interrompus sont toujours repris
+    if has_interrupted_encodings():
+        restaurer_file_interrompue(file_encodage)
+    else:
+        logger.info("Nettoyage des fichiers temporaires")
+        vider_fichiers()
+
+    # Journaliser désormais chaque modification de la file d'attente
+    file_encodage.attacher_journal(journal_encodages)
+
+    config = load_config()
+    etat = EtatEncodages()
+    nombre_workers = config.get("nombre_workers_encodage", 1)
+    logger.info(f"Démarrage de {nombre_workers} worker(s) d'encodage")
+    # Supprimer les fichiers encodés incomplets laissés par une exécution interrompue
+    nettoyer_sorties_partielles(
+        dossiers_sortie_connus(dossiers_presets, copier_file_attente(file_encodage))
+    )
+    # Copier à l'avance les prochains fichiers dans la zone de transit (si configurée)
+    zone_transit.demarrer(file_encodage)
+
+    pool = PoolEncodage(
+        file_encodage, control_flags, etat.creer_signaux, nombre_workers
+    )
+
+    # Signaux de la surveillance et de l'analyse anticipée (sans affichage)
+    signals = SignauxEncodage()
+    pre_analyseur.demarrer(file_encodage, signals)
+    estimations_file.demarrer(file_encodage)
+
+    logger.info("Démarrage de la surveillance des dossiers")
+    threading.Thread(
+        target=surveille_dossiers,
+        args=(dossiers_presets, file_encodage, signals, control_flags),
+        daemon=True,
+    ).start()
+
+    service = ServiceControle(file_encodage, pool, etat)
+    serveur = creer_serveur(
+        service, adresse_api, config.get("port_api_controle", 8765), jeton_api
+    )
+    threading.Thread(target=serveur.serve_forever, name="api", daemon=True).start()
+    adresse, port = serveur.server_address[:2]
+    colored_log(
+        logger,
+        f"API de contrôle à l'écoute sur http://{adresse}:{port}",
+        "INFO",
+        "green",
+    )
+
+    # Attendre un signal d'arrêt (Ctrl+C ou arrêt du service)
+    arret = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: arret.set())
+    signal.signal(signal.SIGTERM, lambda *_: arret.set())
+    while not arret.wait(1):
+        # Remettre en file les tâches des agents de la ferme qui ne répondent plus
+        service.coordinateur.expirer()
+
+    # L'état de la file est déjà journalisé : les encodages en cours, interrompus
+    # par l'arrêt, seront repris au prochain démarrage
+    logger.info("Arrêt demandé, interruption des encodages en cours")
+    control_flags["closing"] = True
+    pre_analyseur.arreter()
+    estimations_file.arreter()
+    zone_transit.arreter()
+    serveur.shutdown()
+
+    # Terminer tous les processus HandBrakeCLI en cours (et leurs descendants)
+    if not arreter_processus_nommes("HandBrakeCLI"):
+        logger.info("Aucun processus HandBrakeCLI en cours d'exécution")
+    # Terminer aussi les remux et assemblages ffmpeg lancés par l'application
+    arreter_processus_nommes("ffmpeg", descendants_seulement=True)
+    # Laisser se terminer les déplacements de fichiers encodés vers leur destination
+    finaliseur_sorties.attendre()
+    # Enregistrer les états dont la sauvegarde était différée
+    sauvegarder_etats_en_attente()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
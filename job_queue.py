@@ -0,0 +1,361 @@
+import heapq
+import itertools
+import threading
+import time
+from queue import Empty
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+class FileTaches:
+    """
+    File d'attente d'encodage à priorités, partagée par la surveillance, les workers,
+    l'interface et l'API.
+
+    Chaque tâche reçoit un identifiant stable (clé "id" ajoutée aux tâches de type
+    dictionnaire) qui permet de la déplacer ou de la retirer sans connaître sa
+    position. L'ordre est donné par une clé (niveau, priorité, rang) conservée dans
+    un tas : ajout, prise par un worker, passage en tête ou en fin sont en
+    O(log n). Les entrées du tas devenues obsolètes (tâche retirée ou déplacée)
+    sont ignorées lorsqu'elles remontent. L'ordre complet (instantane(),
+    position(), échange avec un voisin, notification des abonnés) demande un tri,
+    conservé jusqu'à la modification suivante.
+
+    Le niveau vaut 0 pour les tâches placées automatiquement ; un passage en tête
+    lui donne un niveau négatif (de plus en plus bas), un passage en fin un niveau
+    positif (de plus en plus haut), si bien qu'aucune priorité ne peut repasser
+    devant une tâche déplacée à la main.
+
+    Avec une politique d'ordonnancement (voir scheduling.py), la priorité d'une
+    tâche est calculée à son ajout, puis recalculée pour elle seule lorsque ses
+    informations sont complétées (actualiser_infos()). La priorité effective est
+    alors ajoutée aux tâches retournées par instantane() (clé "priorite"), tout
+    comme leur estimation d'encodage une fois calculée en arrière-plan (voir
+    scheduling.EstimationsFile).
+
+    L'interface reprend celle de queue.Queue utilisée par les workers (put, get,
+    get_nowait, empty, qsize). Les fonctions abonnées avec abonner() sont appelées
+    avec la nouvelle liste ordonnée des tâches après chaque modification.
+
+    Une fois un journal attaché (voir state_persistence.JournalEncodages), chaque
+    modification y est enregistrée sous le verrou de la file, donc dans l'ordre où
+    elle a eu lieu ; les workers y signalent la fin de leurs tâches avec terminer().
+    """
+
+    def __init__(self, politique=None):
+        self.politique = politique
+        self.journal = None
+        self.mutex = threading.Lock()
+        self._disponible = threading.Condition(self.mutex)
+        self._tas = []
+        self._entrees = {}
+        self._ids = itertools.count(1)
+        self._rangs = itertools.count(1)
+        # Niveaux des tâches déplacées en tête (décroissants) ou en fin (croissants)
+        self._niveaux_tete = itertools.count(-1, -1)
+        self._niveaux_fin = itertools.count(1)
+        self._ordre = None
+        self._abonnes = []
+        # Notifications une par une : le dernier abonné servi reçoit l'état le plus récent
+        self._verrou_notification = threading.RLock()
+
+    # --- Abonnements -------------------------------------------------------
+
+    def abonner(self, fonction):
+        """Appelle 'fonction(taches)' après chaque modification de la file."""
+        self._abonnes.append(fonction)
+
+    def _notifier(self):
+        if not self._abonnes:
+            return
+        with self._verrou_notification:
+            taches = self.instantane()
+            for fonction in list(self._abonnes):
+                try:
+                    fonction(taches)
+                except Exception as e:
+                    logger.error(f"Erreur dans un abonné de la file d'attente: {e}")
+
+    # --- Journal de reprise ------------------------------------------------
+
+    def attacher_journal(self, journal):
+        """
+        Enregistre l'état actuel de la file comme instantané du journal, puis y
+        journalise chaque modification.
+        """
+        with self.mutex:
+            journal.demarrer([self._entrees[i]["tache"] for i in self._ids_ordonnes()])
+            self.journal = journal
+
+    def _journaliser(self, op, **donnees):
+        if self.journal is not None:
+            self.journal.enregistrer(op, **donnees)
+
+    def terminer(self, tache, reussi=True):
+        """Signale au journal la fin (réussie ou non) d'une tâche prise par get()."""
+        if isinstance(tache, dict):
+            with self.mutex:
+                self._journaliser("fin" if reussi else "echec", id=tache.get("id"))
+
+    # --- Gestion interne du tas (appelée sous le verrou) -------------------
+
+    def _placer(self, id_tache, cle):
+        self._entrees[id_tache]["cle"] = cle
+        heapq.heappush(self._tas, (cle, id_tache))
+        self._ordre = None
+        # Reconstruire le tas lorsque les entrées obsolètes dominent
+        if len(self._tas) > 2 * len(self._entrees) + 16:
+            self._tas = [(e["cle"], i) for i, e in self._entrees.items()]
+            heapq.heapify(self._tas)
+
+    def _nettoyer_tete(self):
+        while self._tas:
+            cle, id_tache = self._tas[0]
+            entree = self._entrees.get(id_tache)
+            if entree is not None and entree["cle"] == cle:
+                return
+            heapq.heappop(self._tas)
+
+    def _ids_ordonnes(self):
+        if self._ordre is None:
+            self._ordre = sorted(self._entrees, key=lambda i: self._entrees[i]["cle"])
+        return self._ordre
+
+    def _deplacer(self, id_tache, cle, position=None):
+        """Place une tâche à la main ; 'position' est journalisée si elle est donnée."""
+        self._entrees[id_tache]["manuel"] = True
+        self._placer(id_tache, cle)
+        if position is not None:
+            self._journaliser("deplacement", id=id_tache, position=position)
+
+    def _cle_automatique(self, entree):
+        priorite = entree["priorite"]
+        if self.politique is not None:
+            priorite += self.politique.cle(entree["tache"], entree["infos"])
+        return (0, priorite, entree["rang"])
+
+    # --- Interface de queue.Queue ------------------------------------------
+
+    def put(self, tache, priorite=0):
+        """
+        Ajoute une tâche en fin de file (parmi les tâches de même priorité).
+        Une priorité plus basse passe avant ; avec une politique d'ordonnancement,
+        elle s'ajoute à la priorité calculée par celle-ci.
+
+        Retourne:
+        L'identifiant attribué à la tâche.
+        """
+        with self.mutex:
+            id_tache = next(self._ids)
+            if isinstance(tache, dict):
+                tache = dict(tache, id=id_tache)
+                # Valeurs affichées par une exécution précédente (tâche restaurée)
+                for cle in ("priorite", "duree_estimee", "taille_estimee"):
+                    tache.pop(cle, None)
+                self._journaliser("ajout", id=id_tache, tache=tache)
+            entree = {
+                "tache": tache,
+                "rang": next(self._rangs),
+                "priorite": priorite,
+                "infos": self.politique.preparer(tache) if self.politique else {},
+                "manuel": False,
+            }
+            self._entrees[id_tache] = entree
+            self._placer(id_tache, self._cle_automatique(entree))
+            self._disponible.notify()
+        self._notifier()
+        return id_tache
+
+    def get(self, block=True, timeout=None):
+        """Retire et retourne la première tâche (lève queue.Empty si la file est vide)."""
+        with self._disponible:
+            if not block:
+                if not self._entrees:
+                    raise Empty
+            elif timeout is None:
+                while not self._entrees:
+                    self._disponible.wait()
+            else:
+                fin = time.monotonic() + timeout
+                while not self._entrees:
+                    restant = fin - time.monotonic()
+                    if restant <= 0:
+                        raise Empty
+                    self._disponible.wait(restant)
+            self._nettoyer_tete()
+            _, id_tache = heapq.heappop(self._tas)
+            entree = self._entrees.pop(id_tache)
+            tache = entree["tache"]
+            self._ordre = None
+            if self.politique is not None:
+                self.politique.prise(tache, entree["infos"])
+            self._journaliser("debut", id=id_tache)
+        self._notifier()
+        return tache
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        with self.mutex:
+            return len(self._entrees)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    # --- Consultation et manipulation par identifiant ----------------------
+
+    def instantane(self):
+        """
+        Retourne une copie cohérente des tâches, dans l'ordre de traitement. Les
+        tâches de type dictionnaire reçoivent leur estimation d'encodage
+        (clés "duree_estimee" en secondes et "taille_estimee" en Mo) une fois
+        calculée, et leur priorité effective avec une politique d'ordonnancement.
+        """
+        with self.mutex:
+            entrees = [self._entrees[i] for i in self._ids_ordonnes()]
+        return [self._presenter(e) for e in entrees]
+
+    def _presenter(self, entree):
+        tache = entree["tache"]
+        if not isinstance(tache, dict):
+            return tache
+        ajouts = {}
+        estimation = entree["infos"].get("estimation")
+        if estimation:
+            ajouts["duree_estimee"] = estimation["duree"]
+            ajouts["taille_estimee"] = estimation["taille"]
+        if self.politique is not None:
+            ajouts["priorite"] = round(
+                self.politique.priorite_effective(entree["cle"][1]), 2
+            )
+        return dict(tache, **ajouts) if ajouts else tache
+
+    def position(self, id_tache):
+        """Retourne la position d'une tâche dans la file, ou None si elle n'y est plus."""
+        with self.mutex:
+            if id_tache not in self._entrees:
+                return None
+            return self._ids_ordonnes().index(id_tache)
+
+    def retirer(self, id_tache):
+        """
+        Retire une tâche de la file.
+
+        Retourne:
+        La tâche retirée, ou None si elle avait déjà été prise par un worker.
+        """
+        with self.mutex:
+            entree = self._entrees.pop(id_tache, None)
+            if entree is None:
+                return None
+            self._ordre = None
+            if self.politique is not None:
+                self.politique.retrait(entree["tache"], entree["infos"])
+            self._journaliser("retrait", id=id_tache)
+        self._notifier()
+        return entree["tache"]
+
+    def id_de(self, tache):
+        """Retourne l'identifiant d'une tâche présente dans la file, ou None."""
+        with self.mutex:
+            if isinstance(tache, dict) and tache.get("id") in self._entrees:
+                return tache["id"]
+            for id_tache, entree in self._entrees.items():
+                if entree["tache"] == tache:
+                    return id_tache
+        return None
+
+    def monter_en_tete(self, id_tache):
+        """Place une tâche en tête de file."""
+        with self.mutex:
+            if id_tache not in self._entrees:
+                return False
+            _, priorite, rang = self._entrees[id_tache]["cle"]
+            self._deplacer(
+                id_tache, (next(self._niveaux_tete), priorite, rang), position=0
+            )
+        self._notifier()
+        return True
+
+    def descendre_en_fin(self, id_tache):
+        """Place une tâche en fin de file."""
+        with self.mutex:
+            if id_tache not in self._entrees:
+                return False
+            _, priorite, rang = self._entrees[id_tache]["cle"]
+            self._deplacer(
+                id_tache,
+                (next(self._niveaux_fin), priorite, rang),
+                position=len(self._entrees) - 1,
+            )
+        self._notifier()
+        return True
+
+    def actualiser_infos(self, infos_par_tache):
+        """
+        Complète les informations de plusieurs tâches (estimations calculées en
+        arrière-plan) et les replace selon la politique, sauf celles déplacées à la
+        main. Les abonnés ne sont notifiés qu'une fois.
+
+        Arguments:
+        infos_par_tache -- Dictionnaire {identifiant: informations}, dans l'ordre où
+            les tâches doivent être replacées.
+
+        Retourne:
+        Les identifiants des tâches encore présentes dans la file.
+        """
+        actualisees = []
+        with self.mutex:
+            for id_tache, infos in infos_par_tache.items():
+                entree = self._entrees.get(id_tache)
+                if entree is None:
+                    continue
+                entree["infos"].update(infos)
+                if self.politique is not None and not entree["manuel"]:
+                    self._placer(id_tache, self._cle_automatique(entree))
+                else:
+                    self._ordre = None
+                actualisees.append(id_tache)
+        if actualisees:
+            self._notifier()
+        return actualisees
+
+    def _echanger_avec_voisin(self, id_tache, decalage):
+        with self.mutex:
+            if id_tache not in self._entrees:
+                return False
+            ordre = self._ids_ordonnes()
+            position = ordre.index(id_tache) + decalage
+            if not 0 <= position < len(ordre):
+                return False
+            voisin = ordre[position]
+            cle, cle_voisin = (
+                self._entrees[id_tache]["cle"],
+                self._entrees[voisin]["cle"],
+            )
+            self._deplacer(voisin, cle)
+            self._deplacer(id_tache, cle_voisin, position=position)
+        self._notifier()
+        return True
+
+    def monter(self, id_tache):
+        """Échange une tâche avec celle qui la précède."""
+        return self._echanger_avec_voisin(id_tache, -1)
+
+    def descendre(self, id_tache):
+        """Échange une tâche avec celle qui la suit."""
+        return self._echanger_avec_voisin(id_tache, 1)
+
+    def vider(self):
+        """Retire toutes les tâches de la file."""
+        with self.mutex:
+            self._entrees.clear()
+            self._tas = []
+            self._ordre = None
+            if self.politique is not None:
+                self.politique.vidage()
+            self._journaliser("vidage")
+        self._notifier()
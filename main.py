@@ -1,26 +1,38 @@
 import logging
-from queue import Queue
-import subprocess
 from threading import Thread
 import sys
 import os
-import time
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtGui import QIcon  # Ajoutez cette importation
 import qdarkstyle  # Ajouter cet import en haut du fichier
 
 from surveillance import surveille_dossiers
-from encoding import traitement_file_encodage
+from encoding import copier_file_attente
+from job_queue import FileTaches
+from scheduling import creer_politique, estimations_file
+from encoding_pool import PoolEncodage
+from probe_ahead import pre_analyseur
+from scratch_staging import zone_transit
+from output_finalizer import (
+    finaliseur_sorties,
+    dossiers_sortie_connus,
+    nettoyer_sorties_partielles,
+)
+from file_handling import sauvegarder_etats_en_attente
+from config import load_config
+from tool_registry import registre_outils
+from process_launcher import arreter_processus_nommes
 from constants import dossiers_presets, icon_file
 from initialization import vider_fichiers
+from successful_encodings import compacter_historique
 from logger import setup_logger
 from gui import MainWindow, LogHandler
 from state_persistence import (
     load_interrupted_encodings,
     clear_interrupted_encodings,
     has_interrupted_encodings,
-    save_interrupted_encodings,
+    journal_encodages,
 )
 from resume_dialog import RestartEncodingDialog
 
@@ -33,17 +45,9 @@ else:
 
 # Fonction pour vérifier si HandBrakeCLI est installé
 def check_handbrake_cli():
-    try:
-        result = subprocess.run(
-            ["HandBrakeCLI", "--version"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=5,
-        )
-        return result.returncode == 0, result.stdout if result.returncode == 0 else None
-    except (FileNotFoundError, subprocess.SubprocessError):
+    if not registre_outils.est_disponible("HandBrakeCLI"):
         return False, None
+    return True, registre_outils.version("HandBrakeCLI")
 
 
 # Classe intermédiaire pour les signaux entre threads
@@ -61,15 +65,16 @@ class EncodingSignals(QObject):
     refresh_history = (
         pyqtSignal()
     )  # signal pour rafraîchir l'historique des encodages réussis
+    worker_finished = pyqtSignal()  # signal quand un worker d'encodage s'arrête
 
 
-# Variable globale pour suivre l'encodage en cours
-current_encoding_info = None
+# Pool des workers d'encodage (créé au démarrage)
+pool_encodage = None
 
 
 # Point d'entrée principal
 def main():
-    global current_encoding_info
+    global pool_encodage
     # Créer l'application Qt
     app = QApplication(sys.argv)
     # Définir l'icône de l'application (affecte toutes les fenêtres)
@@ -96,95 +101,30 @@ def main():
     root_logger.addHandler(log_handler)
 
     # Fonction de nettoyage pour éviter l'erreur à la fermeture
-    # et sauvegarder l'état des encodages en cours
     def cleanup():
         # Indiquer que l'application est en cours de fermeture
         control_flags["closing"] = True
+        pre_analyseur.arreter()
+        estimations_file.arreter()
+        zone_transit.arreter()
 
         # Supprimer le handler de log pour éviter les erreurs
         root_logger.removeHandler(log_handler)
 
-        # Sauvegarder l'état des encodages en cours
-        logger.info("Sauvegarde de l'état des encodages en cours avant fermeture")
-
-        # Récupérer l'encodage en cours et la file d'attente
-        current_encoding = current_encoding_info
-        queue_items = []
-
-        # Récupérer les éléments de la file d'attente sans les retirer
-        # Note: Queue.queue est un attribut interne qui peut ne pas être fiable
-        # Nous utilisons une approche plus sûre en créant une copie de la file
-        queue_size = file_encodage.qsize()
-        queue_items = []
-
-        if queue_size > 0:
-            logger.info(f"Sauvegarde de {queue_size} éléments dans la file d'attente")
-            # Créer une liste temporaire pour stocker les éléments
-            temp_items = []
-
-            # Retirer tous les éléments de la file
-            for _ in range(queue_size):
-                if not file_encodage.empty():
-                    item = file_encodage.get()
-                    temp_items.append(item)
-
-            # Remettre les éléments dans la file et les ajouter à notre liste
-            for item in temp_items:
-                file_encodage.put(item)
-                queue_items.append(item)
+        # L'état de la file est déjà journalisé : les encodages en cours, interrompus
+        # par la fermeture, seront repris au prochain démarrage
 
-        # Terminer tous les processus HandBrakeCLI en cours
+        # Terminer tous les processus HandBrakeCLI en cours (et leurs descendants)
         logger.info("Arrêt des processus HandBrakeCLI en cours")
-        import psutil
-
-        # Fonction pour tuer un processus avec plusieurs tentatives
-        def kill_process(proc):
-            try:
-                # D'abord essayer de terminer proprement le processus
-                logger.info(
-                    f"Tentative d'arrêt du processus HandBrakeCLI (PID: {proc.pid})"
-                )
-                proc.terminate()
-
-                # Attendre jusqu'à 3 secondes pour que le processus se termine
-                gone, still_alive = psutil.wait_procs([proc], timeout=3)
-
-                # Si le processus est toujours en vie, le tuer de force
-                if still_alive:
-                    logger.warning(
-                        f"Le processus HandBrakeCLI (PID: {proc.pid}) ne répond pas, arrêt forcé"
-                    )
-                    for p in still_alive:
-                        p.kill()
-
-                return True
-            except (
-                psutil.NoSuchProcess,
-                psutil.AccessDenied,
-                psutil.ZombieProcess,
-            ) as e:
-                logger.error(
-                    f"Erreur lors de l'arrêt du processus (PID: {proc.pid}): {str(e)}"
-                )
-                return False
-
-        # Trouver et tuer tous les processus HandBrakeCLI
-        handbrake_processes = []
-        for proc in psutil.process_iter(["pid", "name"]):
-            try:
-                # Si c'est un processus HandBrakeCLI, l'ajouter à la liste
-                if "HandBrakeCLI" in proc.info["name"]:
-                    handbrake_processes.append(psutil.Process(proc.info["pid"]))
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-
-        # Tuer tous les processus HandBrakeCLI trouvés
-        if handbrake_processes:
-            logger.info(f"Arrêt de {len(handbrake_processes)} processus HandBrakeCLI")
-            for proc in handbrake_processes:
-                kill_process(proc)
-        else:
+        if not arreter_processus_nommes("HandBrakeCLI"):
             logger.info("Aucun processus HandBrakeCLI en cours d'exécution")
+        # Terminer aussi les remux et assemblages ffmpeg lancés par l'application
+        arreter_processus_nommes("ffmpeg", descendants_seulement=True)
+
+        # Laisser se terminer les déplacements de fichiers encodés vers leur destination
+        finaliseur_sorties.attendre()
+        # Enregistrer les états dont la sauvegarde était différée
+        sauvegarder_etats_en_attente()
 
     # Connecter la fonction de nettoyage à la fermeture de l'application
     app.aboutToQuit.connect(cleanup)
@@ -194,6 +134,12 @@ def main():
 
     logger.info("=== Démarrage de l'application Encodage_Auto_Plex ===")
 
+    # Localiser les outils externes (HandBrakeCLI, MediaInfo, ffmpeg, ffprobe)
+    registre_outils.resoudre()
+
+    # Supprimer de l'historique les encodages au-delà de la durée de rétention
+    compacter_historique(load_config().get("retention_historique_jours", 0))
+
     # Vérifier l'installation de HandBrakeCLI
     handbrake_installed, version_info = check_handbrake_cli()
     if handbrake_installed:
@@ -204,74 +150,44 @@ def main():
         )
 
     # Créer les signaux pour la communication entre threads
+    # (surveillance et mises à jour générales de l'interface)
     signals = EncodingSignals()
-    signals.update_progress.connect(window.encoding_status.update_progress)
-    signals.update_file_info.connect(window.encoding_status.update_file_info)
-    signals.update_time_info.connect(window.encoding_status.update_time_info)
-    signals.update_encoding_stats.connect(window.encoding_status.update_encoding_stats)
-    signals.encoding_done.connect(window.encoding_status.clear)
     signals.update_queue.connect(window.update_queue)
     signals.update_manual_encodings.connect(window.load_manual_encodings)
     signals.refresh_history.connect(window.refresh_history_panel)
 
     # File d'attente pour les encodages
-    file_encodage = Queue()
+    file_encodage = FileTaches(creer_politique(load_config()))
     logger.info("Initialisation de la file d'attente d'encodage")
 
     # Variable de contrôle pour la pause et l'arrêt
     control_flags = {"pause": False, "skip": False, "stop_all": False, "closing": False}
 
-    # Associer les control_flags à la fenêtre principale
+    # Associer les control_flags et la file d'attente à la fenêtre principale
     window.set_control_flags(control_flags)
+    window.set_file_encodage(file_encodage)
+
+    # Afficher la file d'attente à chaque modification (surveillance, workers ou
+    # interface) ; sa sauvegarde est assurée par le journal de reprise
+    file_encodage.abonner(signals.update_queue.emit)
 
     # Connecter les boutons de l'interface aux flags de contrôle
     def update_pause_flag():
-        control_flags["pause"] = window.is_paused
+        if pool_encodage is not None:
+            pool_encodage.mettre_en_pause(window.is_paused)
 
     def trigger_skip():
-        control_flags["skip"] = True
+        if pool_encodage is not None:
+            pool_encodage.passer_tout()
 
     def trigger_stop_all():
-        control_flags["stop_all"] = True
+        if pool_encodage is not None:
+            pool_encodage.arreter_tout()
         # Vider la file d'attente
-        while not file_encodage.empty():
-            file_encodage.get()
+        file_encodage.vider()
         # Effacer les encodages interrompus
         clear_interrupted_encodings()
 
-    # Fonction pour mettre à jour la file d'attente lorsqu'elle est modifiée via l'interface
-    def update_queue_from_gui():
-        if control_flags.get("queue_modified", False):
-            # Récupérer la liste actuelle des fichiers en attente depuis l'interface
-            queue_files = window.get_current_queue_files()
-
-            # Vider la file d'attente actuelle
-            while not file_encodage.empty():
-                file_encodage.get()
-
-            # Remplir la file avec les nouveaux éléments
-            for item in queue_files:
-                file_encodage.put(item)
-
-            # Réinitialiser le flag
-            control_flags["queue_modified"] = False
-
-            # Sauvegarder l'état des encodages en cours
-            current_encoding = current_encoding_info
-            save_interrupted_encodings(current_encoding, queue_files)
-
-            logger.info("File d'attente mise à jour depuis l'interface")
-
-    # Vérifier périodiquement si la file d'attente a été modifiée via l'interface
-    def check_queue_modifications():
-        while not control_flags.get("closing", False):
-            update_queue_from_gui()
-            time.sleep(1)  # Vérifier toutes les secondes
-
-    # Démarrer un thread pour surveiller les modifications de la file d'attente
-    thread_queue_monitor = Thread(target=check_queue_modifications, daemon=True)
-    thread_queue_monitor.start()
-
     window.pause_button.clicked.connect(update_pause_flag)
     window.skip_button.clicked.connect(trigger_skip)
     window.stop_button.clicked.connect(trigger_stop_all)
@@ -293,36 +209,15 @@ def main():
             if restart_encoding:
                 logger.info("Redémarrage des encodages interrompus")
 
-                # Récupérer l'encodage interrompu
-                current_encoding = interrupted_state.get("current_encoding")
-                if current_encoding:
-                    # Vérifier si le chemin du fichier est complet ou juste un nom de fichier
-                    fichier = current_encoding.get("file", "")
-                    if fichier and not os.path.isabs(fichier):
-                        # Si c'est juste un nom de fichier, essayer de trouver le fichier dans les dossiers surveillés
-                        found = False
-                        for items in dossiers_presets:
-                            chemin_complet = os.path.join(items[0], fichier)
-                            if os.path.exists(chemin_complet):
-                                # Mettre à jour le chemin dans l'encodage interrompu
-                                current_encoding["file"] = chemin_complet
-                                current_encoding["folder"] = items[0]
-                                found = True
-                                logger.info(f"Fichier trouvé: {chemin_complet}")
-                                break
-
-                        if not found:
-                            logger.warning(
-                                f"Impossible de trouver le fichier: {fichier}"
-                            )
-                            # Continuer quand même, peut-être que le fichier existe ailleurs
-
-                    # Ajouter l'encodage interrompu à la file d'attente en premier
-                    file_encodage.put(current_encoding)
-
-                # Récupérer la file d'attente
+                # Remettre en file les encodages interrompus en premier,
+                # puis la file d'attente dans son ordre
+                encodages_en_cours = interrupted_state.get("encodages_en_cours") or (
+                    [interrupted_state["current_encoding"]]
+                    if interrupted_state.get("current_encoding")
+                    else []
+                )
                 queue_items = interrupted_state.get("encoding_queue", [])
-                for item in queue_items:
+                for item in encodages_en_cours + queue_items:
                     # Vérifier si le chemin du fichier est complet ou juste un nom de fichier
                     fichier = item.get("file", "")
                     if fichier and not os.path.isabs(fichier):
@@ -345,12 +240,6 @@ def main():
                             # Continuer quand même, peut-être que le fichier existe ailleurs
 
                     file_encodage.put(item)
-
-                # Mettre à jour l'interface avec la file d'attente
-                if signals and hasattr(signals, "update_queue"):
-                    all_items = [current_encoding] if current_encoding else []
-                    all_items.extend(queue_items)
-                    signals.update_queue.emit(all_items)
             else:
                 # L'utilisateur a choisi de repartir à zéro
                 logger.info("Démarrage à zéro, effacement des encodages interrompus")
@@ -366,81 +255,58 @@ def main():
         # Afficher la fenêtre principale
         window.show()
 
-    # Fonction pour mettre à jour l'encodage en cours
-    def update_current_encoding(file_info, preset_info):
-        global current_encoding_info
-        if file_info and preset_info:
-            # Vérifier si le chemin du fichier est complet ou juste un nom de fichier
-            if file_info and not os.path.isabs(file_info):
-                # Si c'est juste un nom de fichier, essayer de trouver le fichier dans les dossiers surveillés
-                found = False
-                for items in dossiers_presets:
-                    chemin_complet = os.path.join(items, file_info)
-                    if os.path.exists(chemin_complet):
-                        # Utiliser le chemin complet
-                        file_info = chemin_complet
-                        folder = items
-                        found = True
-                        logger.info(
-                            f"Fichier trouvé pour l'encodage en cours: {chemin_complet}"
-                        )
-                        break
-
-                if not found:
-                    logger.warning(
-                        f"Impossible de trouver le chemin complet pour: {file_info}"
-                    )
-                    # Continuer quand même, peut-être que le fichier existe ailleurs
-                    folder = ""
-                else:
-                    folder = items
-            else:
-                # Si c'est déjà un chemin complet, utiliser le dossier parent
-                folder = os.path.dirname(file_info) if os.path.isabs(file_info) else ""
-
-            # Créer un dictionnaire avec les informations de l'encodage en cours
-            current_encoding_info = {
-                "file": file_info,
-                "preset": preset_info,
-                "folder": folder,
-            }
-        else:
-            current_encoding_info = None
-
-    # Connecter le signal de mise à jour des informations de fichier à notre fonction
-    signals.update_file_info.connect(update_current_encoding)
-
-    # Connecter le signal de fin d'encodage pour réinitialiser l'encodage en cours
-    def clear_current_encoding():
-        global current_encoding_info
-        current_encoding_info = None
-
-    signals.encoding_done.connect(clear_current_encoding)
-
-    # Démarrer le thread de traitement de la file d'attente d'encodage
-    logger.info("Démarrage du thread d'encodage")
-    thread_encodage = Thread(
-        target=traitement_file_encodage,
-        args=(file_encodage, signals, control_flags),
-        daemon=True,
+    # Journaliser désormais chaque modification de la file d'attente, à partir
+    # d'un instantané de la file (éventuellement restaurée)
+    file_encodage.attacher_journal(journal_encodages)
+
+    # Créer les signaux et le widget d'un worker d'encodage
+    def creer_signaux_worker(worker_id):
+        worker_signals = EncodingSignals()
+        widget = window.add_worker_widget(worker_id)
+        worker_signals.update_progress.connect(widget.status.update_progress)
+        worker_signals.update_file_info.connect(widget.status.update_file_info)
+        worker_signals.update_time_info.connect(widget.status.update_time_info)
+        worker_signals.update_encoding_stats.connect(
+            widget.status.update_encoding_stats
+        )
+        worker_signals.encoding_done.connect(widget.status.clear)
+        worker_signals.update_queue.connect(window.update_queue)
+        worker_signals.update_manual_encodings.connect(window.load_manual_encodings)
+        worker_signals.refresh_history.connect(window.refresh_history_panel)
+        worker_signals.worker_finished.connect(
+            lambda: window.remove_worker_widget(worker_id)
+        )
+
+        # Contrôles propres au worker
+        widget.pause_button.setChecked(window.is_paused)
+        widget.pause_button.toggled.connect(
+            lambda checked: pool_encodage.basculer_pause(worker_id, checked)
+        )
+        widget.skip_button.clicked.connect(lambda: pool_encodage.passer(worker_id))
+        widget.stop_button.clicked.connect(lambda: pool_encodage.arreter(worker_id))
+        return worker_signals
+
+    # Démarrer le pool de workers de traitement de la file d'attente d'encodage
+    nombre_workers = load_config().get("nombre_workers_encodage", 1)
+    logger.info(f"Démarrage de {nombre_workers} worker(s) d'encodage")
+    # Supprimer les fichiers encodés incomplets laissés par une exécution interrompue
+    nettoyer_sorties_partielles(
+        dossiers_sortie_connus(dossiers_presets, copier_file_attente(file_encodage))
     )
-    thread_encodage.start()
-
-    # Gérer le cas où l'utilisateur vide complètement la file d'attente
-    def handle_queue_cleared():
-        if control_flags.get("queue_cleared", False):
-            # Vider la file d'attente
-            while not file_encodage.empty():
-                file_encodage.get()
-            # Effacer les encodages interrompus si aucun encodage n'est en cours
-            if current_encoding_info is None:
-                clear_interrupted_encodings()
-            # Réinitialiser le flag
-            control_flags["queue_cleared"] = False
-            logger.info("File d'attente vidée depuis l'interface")
+    # Copier à l'avance les prochains fichiers dans la zone de transit (si configurée)
+    zone_transit.demarrer(file_encodage)
 
-    # Connecter le signal de mise à jour de la file d'attente à notre fonction
-    signals.update_queue.connect(lambda _: handle_queue_cleared())
+    pool_encodage = PoolEncodage(
+        file_encodage, control_flags, creer_signaux_worker, nombre_workers
+    )
+    window.workers_count_changed.connect(pool_encodage.redimensionner)
+    # Garder le nombre affiché à jour lorsqu'un worker est arrêté
+    pool_encodage.abonner(window.workers_count_synced.emit)
+
+    # Démarrer l'analyse anticipée des fichiers en tête de file et l'estimation
+    # de toute la file en arrière-plan
+    pre_analyseur.demarrer(file_encodage, signals)
+    estimations_file.demarrer(file_encodage)
 
     # Démarrer le thread de surveillance des dossiers
     logger.info(f"Démarrage de la surveillance des dossiers")
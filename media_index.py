@@ -0,0 +1,93 @@
+import os
+import hashlib
+from file_handling import SauvegardeDifferee, charger_fichiers
+from constants import fichier_index_medias, taille_bloc_empreinte
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+def empreinte_fichier(chemin, taille_bloc=taille_bloc_empreinte):
+    """
+    Calcule une empreinte rapide du contenu d'un fichier : sa taille et le hachage
+    de ses premiers et derniers blocs, sans lire le reste du fichier.
+
+    Arguments:
+    chemin -- Chemin du fichier.
+    taille_bloc -- Nombre d'octets lus au début et à la fin du fichier.
+
+    Retourne:
+    L'empreinte sous la forme "taille-hachage", ou None si le fichier est illisible.
+    """
+    try:
+        with open(chemin, "rb") as f:
+            taille = os.fstat(f.fileno()).st_size
+            hachage = hashlib.sha1(f.read(taille_bloc))
+            if taille > taille_bloc:
+                f.seek(max(taille - taille_bloc, taille_bloc))
+                hachage.update(f.read(taille_bloc))
+    except OSError as e:
+        logger.warning(f"Impossible de calculer l'empreinte de {chemin}: {e}")
+        return None
+    return f"{taille}-{hachage.hexdigest()}"
+
+
+class IndexMedias(SauvegardeDifferee):
+    """
+    Index des médias déjà ajoutés à la file d'encodage, tous dossiers surveillés
+    confondus, par chemin et par empreinte du contenu (voir empreinte_fichier).
+
+    Un fichier renommé, déplacé dans un autre dossier surveillé ou téléchargé à
+    nouveau a la même empreinte qu'un média déjà traité : il est reconnu comme
+    doublon sans être encodé une seconde fois. Les entrées sont conservées après la
+    suppression du fichier source.
+    """
+
+    def __init__(self, fichier=fichier_index_medias, **options):
+        super().__init__(fichier, **options)
+        self.chemins = {}
+        self.empreintes = {}
+
+    def charger(self):
+        """Charge l'index depuis son fichier de sauvegarde (lève une exception si illisible)."""
+        self.chemins = dict(charger_fichiers(self.fichier).get("chemins", {}))
+        self.empreintes = {}
+        for chemin, empreinte in self.chemins.items():
+            self.empreintes.setdefault(empreinte, chemin)
+
+    def donnees(self):
+        return {"chemins": self.chemins}
+
+    def doublon(self, chemin, empreinte):
+        """
+        Retourne le chemin du média déjà traité ayant la même empreinte : 'chemin'
+        lui-même s'il a déjà été traité avec ce contenu (fichier supprimé puis
+        téléchargé à nouveau au même endroit), sinon un autre chemin, ou None.
+        """
+        if empreinte is None:
+            return None
+        if self.chemins.get(chemin) == empreinte:
+            return chemin
+        return self.empreintes.get(empreinte)
+
+    def enregistrer(self, chemin, empreinte):
+        """Ajoute un média traité à l'index."""
+        if empreinte is None:
+            return
+        with self._verrou:
+            ancienne = self.chemins.get(chemin)
+            if ancienne == empreinte:
+                return
+            self.chemins[chemin] = empreinte
+            self.empreintes.setdefault(empreinte, chemin)
+            # Contenu remplacé : l'ancienne empreinte ne désigne plus ce chemin
+            if ancienne is not None and self.empreintes.get(ancienne) == chemin:
+                autre = next(
+                    (c for c, e in self.chemins.items() if e == ancienne), None
+                )
+                if autre is None:
+                    del self.empreintes[ancienne]
+                else:
+                    self.empreintes[ancienne] = autre
+            self._modifie()
@@ -0,0 +1,287 @@
+import errno
+import os
+import re
+import shutil
+import threading
+import time
+from queue import Queue
+from encode_estimator import caracteristiques_media
+from file_operations import obtenir_pistes
+from probe_cache import cache_sondes
+from utils import obtenir_dossier_sortie_dossier_source, normaliser_chemin
+from constants import (
+    tolerance_duree_sortie,
+    ecart_duree_sortie_min,
+    age_min_sortie_partielle,
+    dossier_sortie,
+)
+from logger import colored_log, setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+# Signatures des en-têtes des conteneurs produits par HandBrake
+ENTETES = {
+    ".mkv": (0, b"\x1a\x45\xdf\xa3"),  # EBML (Matroska)
+    ".webm": (0, b"\x1a\x45\xdf\xa3"),
+    ".mp4": (4, b"ftyp"),
+    ".m4v": (4, b"ftyp"),
+}
+
+
+def chemin_temporaire(chemin_sortie):
+    """
+    Nom sous lequel un fichier encodé est écrit avant d'être renommé à sa place :
+    fichier caché dans le même dossier, avec la même extension (HandBrake et
+    ffmpeg en déduisent le conteneur), ignoré par Plex tant qu'il est incomplet.
+    """
+    dossier, nom = os.path.split(chemin_sortie)
+    base, extension = os.path.splitext(nom)
+    return os.path.join(dossier, f".{base}.partiel{extension}")
+
+
+# Nom d'un fichier produit par chemin_temporaire()
+MOTIF_TEMPORAIRE = re.compile(r"^\..+\.partiel\.[^.]+$")
+
+
+def dossiers_sortie_connus(dossiers_presets, taches=()):
+    """
+    Dossiers dans lesquels des fichiers encodés ont pu être écrits : dossier de
+    sortie de chaque dossier surveillé, dossier par défaut et dossiers choisis pour
+    les tâches de la file d'attente.
+    """
+    dossiers = {obtenir_dossier_sortie_dossier_source(d) for d in dossiers_presets}
+    dossiers.add(dossier_sortie)
+    dossiers.update(
+        tache.get("output_dir") for tache in taches if isinstance(tache, dict)
+    )
+    return {normaliser_chemin(dossier) for dossier in dossiers if dossier}
+
+
+def nettoyer_sorties_partielles(dossiers, age_min=age_min_sortie_partielle):
+    """
+    Supprime les fichiers encodés incomplets (voir chemin_temporaire) laissés dans
+    les dossiers de sortie par une exécution interrompue. Ceux d'un encodage par
+    segments dont le manifeste permet la reprise sont conservés, ainsi que ceux
+    modifiés depuis moins de 'age_min' secondes.
+
+    Retourne:
+    Le nombre de fichiers supprimés.
+    """
+    limite = time.time() - age_min
+    supprimes = 0
+    for dossier in dossiers:
+        try:
+            noms = os.listdir(dossier)
+        except OSError:
+            continue
+        for nom in noms:
+            chemin = os.path.join(dossier, nom)
+            if not MOTIF_TEMPORAIRE.match(nom) or os.path.isdir(f"{chemin}.segments"):
+                continue
+            try:
+                if not os.path.isfile(chemin) or os.path.getmtime(chemin) > limite:
+                    continue
+                os.remove(chemin)
+                supprimes += 1
+            except OSError as e:
+                logger.warning(f"Impossible de supprimer {chemin}: {e}")
+    if supprimes:
+        logger.info(f"{supprimes} fichier(s) encodé(s) incomplet(s) supprimé(s)")
+    return supprimes
+
+
+def verifier_entete(chemin):
+    """Vérifie que le fichier commence par l'en-tête de son conteneur."""
+    position, signature = ENTETES.get(os.path.splitext(chemin)[1].lower(), (0, b""))
+    try:
+        with open(chemin, "rb") as f:
+            f.seek(position)
+            return f.read(len(signature)) == signature
+    except OSError:
+        return False
+
+
+def verifier_sortie(chemin, duree_source=None, attentes=None):
+    """
+    Vérifie un fichier encodé avant de le mettre à sa place définitive : taille
+    non nulle et en-tête du conteneur lisible, puis, d'après son scan par la couche
+    de sondes partagée, durée égale à celle de la source (à tolerance_duree_sortie
+    près) et nombre de pistes audio et de sous-titres conforme à la sélection.
+    Un fichier dont le scan échoue est rejeté : il ne peut pas être contrôlé.
+
+    Arguments:
+    chemin -- Chemin du fichier encodé.
+    duree_source -- Durée de la source en secondes (None si inconnue).
+    attentes -- Pistes attendues {"pistes_audio", "sous_titres", "incrustation"}
+                (voir probe_ahead.preparer_encodage) ; une valeur None n'est pas vérifiée.
+                Un sous-titre incrusté fait partie de l'image : il ne doit plus
+                apparaître parmi les pistes de sous-titres.
+
+    Retourne:
+    None si le fichier est valide, sinon la raison du rejet.
+    """
+    try:
+        taille = os.path.getsize(chemin)
+    except OSError:
+        return "fichier encodé introuvable"
+    if taille == 0:
+        return "fichier encodé vide"
+    if not verifier_entete(chemin):
+        return "en-tête du conteneur illisible"
+
+    attentes = attentes or {}
+    if not duree_source and all(
+        attentes.get(cle) is None for cle in ("pistes_audio", "sous_titres")
+    ):
+        return None
+
+    info_pistes = obtenir_pistes(chemin)
+    if info_pistes is None:
+        # Un fichier que l'on ne peut pas contrôler n'est pas mis en place
+        return "scan du fichier encodé impossible"
+    # Le fichier encodé est renommé ensuite : son scan ne servira plus
+    cache_sondes.invalider(chemin)
+
+    problemes = []
+    duree = caracteristiques_media(info_pistes)["duree_source"]
+    if duree_source and duree is not None:
+        if abs(duree - duree_source) > max(
+            ecart_duree_sortie_min, duree_source * tolerance_duree_sortie
+        ):
+            problemes.append(f"durée de {duree} s au lieu de {duree_source} s")
+
+    titre = (info_pistes.get("TitleList") or [{}])[0]
+    for cle, liste, libelle in [
+        ("pistes_audio", "AudioList", "piste(s) audio"),
+        ("sous_titres", "SubtitleList", "piste(s) de sous-titres"),
+    ]:
+        attendu = attentes.get(cle)
+        obtenu = len(titre.get(liste) or [])
+        if attendu is not None and obtenu != attendu:
+            probleme = f"{obtenu} {libelle} au lieu de {attendu}"
+            if cle == "sous_titres" and attentes.get("incrustation"):
+                probleme += " (sous-titre incrusté attendu)"
+            problemes.append(probleme)
+
+    return ", ".join(problemes) or None
+
+
+def deplacer_atomiquement(chemin, destination):
+    """
+    Déplace un fichier de sorte que 'destination' n'existe jamais à moitié écrit :
+    renommage direct sur le même volume, sinon copie sous un nom temporaire dans
+    le dossier de destination, fsync, puis renommage.
+    """
+    try:
+        os.replace(chemin, destination)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    temporaire = chemin_temporaire(destination)
+    try:
+        with open(chemin, "rb") as entree, open(temporaire, "wb") as sortie:
+            shutil.copyfileobj(entree, sortie, 8 * 1024 * 1024)
+            sortie.flush()
+            os.fsync(sortie.fileno())
+        os.replace(temporaire, destination)
+    except OSError:
+        try:
+            os.remove(temporaire)
+        except OSError:
+            pass
+        raise
+    os.remove(chemin)
+
+
+class FinaliseurSorties:
+    """
+    Étape de validation et de mise en place des fichiers encodés, exécutée par un
+    thread dédié pendant l'encodage suivant : chaque fichier est vérifié
+    (verifier_sortie), supprimé s'il est invalide, sinon renommé à sa place
+    définitive, ou copié puis renommé s'il vient d'un autre volume (zone de transit).
+    """
+
+    def __init__(self):
+        self._file = Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publier(
+        self,
+        chemin_encode,
+        chemin_sortie,
+        duree_source=None,
+        attentes=None,
+        rappel=None,
+    ):
+        """
+        Confie un fichier encodé au thread de finalisation, qui appelle ensuite
+        'rappel(erreur)' : erreur vaut None si le fichier est en place, sinon la
+        raison de l'échec de la vérification ou du déplacement.
+
+        Arguments:
+        chemin_encode -- Chemin du fichier écrit par l'encodeur.
+        chemin_sortie -- Chemin définitif du fichier encodé.
+        duree_source, attentes -- Voir verifier_sortie().
+        rappel -- Fonction appelée depuis le thread de finalisation.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._boucle, name="finalisation-sorties", daemon=True
+                )
+                self._thread.start()
+        self._file.put((chemin_encode, chemin_sortie, duree_source, attentes, rappel))
+
+    def _boucle(self):
+        while True:
+            tache = self._file.get()
+            try:
+                self._finaliser(*tache)
+            finally:
+                self._file.task_done()
+
+    def _finaliser(self, chemin_encode, chemin_sortie, duree_source, attentes, rappel):
+        try:
+            erreur = verifier_sortie(chemin_encode, duree_source, attentes)
+        except Exception as e:
+            logger.error(f"Erreur pendant la vérification de {chemin_encode}: {e}")
+            erreur = f"vérification impossible : {e}"
+        if erreur is not None:
+            logger.error(f"Fichier encodé invalide {chemin_sortie}: {erreur}")
+            try:
+                os.remove(chemin_encode)
+            except OSError:
+                pass
+        else:
+            try:
+                deplacer_atomiquement(chemin_encode, chemin_sortie)
+            except OSError as e:
+                # Le fichier encodé reste sous son nom temporaire
+                logger.error(
+                    f"Impossible de déplacer {chemin_encode} vers {chemin_sortie}: {e}"
+                )
+                erreur = f"déplacement impossible : {e}"
+        if rappel is not None:
+            try:
+                rappel(erreur)
+            except Exception as e:
+                logger.error(f"Erreur après la finalisation de {chemin_sortie}: {e}")
+
+    def attendre(self):
+        """Attend la fin des vérifications et déplacements en cours (avant de quitter)."""
+        if self._file.unfinished_tasks:
+            colored_log(
+                logger,
+                "Attente de la vérification et du déplacement des fichiers encodés",
+                "INFO",
+                "orange",
+            )
+        self._file.join()
+
+
+# Finaliseur partagé par tous les workers d'encodage
+finaliseur_sorties = FinaliseurSorties()
@@ -0,0 +1,297 @@
+import os
+import threading
+from audio_selection import filtrer_pistes_audio
+from subtitle_analyzer import analyser_sous_titres_francais
+from remux_fast_path import flux_remux
+from file_operations import (
+    obtenir_pistes,
+    ajouter_fichier_a_liste_encodage_manuel,
+)
+from constants import (
+    fichier_presets,
+    profondeur_pre_analyse,
+    intervalle_pre_analyse,
+)
+from utils import (
+    normaliser_chemin,
+    calculer_chemin_sortie,
+    copier_file_attente,
+    retirer_de_file_attente,
+)
+from tool_registry import registre_outils
+from logger import colored_log, setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+def preparer_encodage(fichier, preset, chemin_sortie):
+    """
+    Analyse les pistes d'un fichier et construit la commande HandBrakeCLI correspondante.
+
+    Arguments:
+    fichier -- Chemin du fichier à encoder.
+    preset -- Preset HandBrake à utiliser.
+    chemin_sortie -- Chemin du fichier encodé.
+
+    Retourne:
+    Un dictionnaire {"commande": [...], "attentes": {...}, "remux": [...] ou None}
+    si le fichier peut être encodé (les attentes décrivent les pistes du fichier
+    encodé ; "remux" liste les flux à copier avec ffmpeg au lieu d'encoder),
+    {"raison_manuel": "audio" ou "subtitle"} s'il doit être ajouté à la liste
+    des encodages manuels, ou None si l'analyse des pistes a échoué.
+    """
+    nom_fichier = os.path.basename(fichier)
+
+    # Analyse des pistes du fichier
+    info_pistes = obtenir_pistes(fichier)
+    if info_pistes is None:
+        logger.error(
+            f"Erreur lors de l'obtention des informations des pistes pour {fichier}"
+        )
+        return None
+
+    # Sélection des pistes audio selon le preset
+    audio_tracks = filtrer_pistes_audio(info_pistes, preset)
+    if audio_tracks is None:
+        logger.warning(f"Pas de piste audio française disponibles pour {nom_fichier}")
+        return {"raison_manuel": "audio"}
+
+    # Préparer les options audio
+    audio_option = f'--audio={",".join(map(str, audio_tracks))}' if audio_tracks else ""
+
+    # Sélection des sous-titres selon le preset
+    subtitle_tracks, burn_track, _ = analyser_sous_titres_francais(fichier, preset)
+
+    # Vérifier si le preset est VO pour forcer le sous-titrage verbal
+    if "VO" in preset and subtitle_tracks is None:
+        logger.warning(
+            f"Pas de sous-titres à inclure pour {nom_fichier} (requis pour {preset})"
+        )
+        return {"raison_manuel": "subtitle"}
+
+    # Vérifier si il y a des sous-titres à inclure sinon afficher un avertissement
+    if subtitle_tracks is None and burn_track is None:
+        logger.warning(
+            f"Pas de piste de sous-titres en français disponible pour {nom_fichier}"
+        )
+
+    # Préparer les options des sous-titres
+    subtitle_option = "--subtitle=none"
+    burn_option = None
+
+    if subtitle_tracks is not None:
+        subtitle_option = f"--subtitle={subtitle_tracks}"
+        if "VO" in preset:
+            burn_option = "--subtitle-burned=1"
+        elif burn_track is not None:
+            subtitle_option = f"--subtitle={subtitle_tracks},{burn_track}"
+            burn_option = "--subtitle-burned=2"
+    elif burn_track is not None:
+        subtitle_option = f"--subtitle={burn_track}"
+        burn_option = "--subtitle-burned=1"
+
+    # Construire la commande complète
+    handbrake_cmd = [
+        registre_outils.commande("HandBrakeCLI"),
+        "--preset-import-file",
+        fichier_presets,
+        "-i",
+        fichier,
+        "-o",
+        chemin_sortie,
+        "--preset",
+        preset,
+    ]
+
+    # Ajouter les options audio et sous-titres si disponibles
+    if audio_option:
+        handbrake_cmd.append(audio_option)
+    if subtitle_option:
+        handbrake_cmd.append(subtitle_option)
+    if burn_option is not None:
+        handbrake_cmd.append(burn_option)
+
+    # Ajouter les paramètres d'encodage audio
+    handbrake_cmd.extend(["--aencoder=aac", "--ab=192", "--mixdown=5point1"])
+
+    # Pistes attendues dans le fichier encodé, vérifiées après l'encodage
+    # (output_finalizer.py) : un sous-titre incrusté n'est plus une piste à part
+    nb_sous_titres = (
+        0 if subtitle_option == "--subtitle=none" else len(subtitle_option.split(","))
+    )
+    attentes = {
+        "pistes_audio": len(audio_tracks) if audio_tracks else None,
+        "sous_titres": nb_sous_titres - (1 if burn_option is not None else 0),
+        "incrustation": burn_option is not None,
+    }
+
+    # Copier les flux retenus sans réencodage si la source respecte déjà le preset
+    remux = flux_remux(
+        fichier, preset, audio_tracks, subtitle_tracks, burn_option is not None
+    )
+
+    return {"commande": handbrake_cmd, "attentes": attentes, "remux": remux}
+
+
+def signature_fichier(fichier):
+    """Retourne (taille, date de modification) d'un fichier, ou None s'il est inaccessible."""
+    try:
+        stat = os.stat(fichier)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def lire_tache(tache):
+    """
+    Extrait les informations d'un élément de la file d'attente.
+
+    Retourne:
+    Un tuple (fichier, preset, dossier, dossier_sortie_personnalise).
+    """
+    if isinstance(tache, dict):
+        return (
+            tache.get("file"),
+            tache.get("preset"),
+            tache.get("folder", ""),
+            tache.get("output_dir", None),
+        )
+    # Fallback au cas où c'est un tuple
+    fichier = tache[0] if len(tache) > 0 else ""
+    preset = tache[1] if len(tache) > 1 else ""
+    return fichier, preset, "", None
+
+
+class PreAnalyseur:
+    """
+    Analyse à l'avance les premiers éléments de la file d'attente pendant que les
+    workers encodent : scan HandBrake, MediaInfo, sélection des pistes et commande
+    HandBrakeCLI sont prêts lorsqu'un worker prend le fichier. Les fichiers qui
+    finiraient dans la liste des encodages manuels en sont retirés sans attendre.
+    """
+
+    def __init__(self, profondeur=profondeur_pre_analyse):
+        self.profondeur = profondeur
+        self.file_encodage = None
+        self.signals = None
+        self.preparations = {}
+        self._lock = threading.Lock()
+        self._arret = threading.Event()
+        self._thread = None
+
+    def demarrer(self, file_encodage, signals=None):
+        """Démarre le thread d'analyse anticipée de la file d'attente."""
+        self.file_encodage = file_encodage
+        self.signals = signals
+        self._arret.clear()
+        self._thread = threading.Thread(
+            target=self._boucle, name="pre-analyse", daemon=True
+        )
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+
+    def _boucle(self):
+        logger.info("Thread d'analyse anticipée de la file d'attente démarré")
+        while not self._arret.wait(intervalle_pre_analyse):
+            try:
+                self.analyser_file()
+            except Exception as e:
+                logger.error(f"Erreur pendant l'analyse anticipée: {e}", exc_info=True)
+
+    def analyser_file(self):
+        """Prépare les premiers éléments de la file qui ne l'ont pas encore été."""
+        taches = copier_file_attente(self.file_encodage)[: self.profondeur]
+
+        cles = set()
+        for tache in taches:
+            fichier, preset, dossier, dossier_sortie_personnalise = lire_tache(tache)
+            if not fichier:
+                continue
+            fichier = normaliser_chemin(fichier)
+            cle = (fichier, preset)
+            cles.add(cle)
+
+            _, chemin_sortie = calculer_chemin_sortie(
+                fichier, dossier, dossier_sortie_personnalise
+            )
+            signature = signature_fichier(fichier)
+            with self._lock:
+                existante = self.preparations.get(cle)
+            if (
+                existante is not None
+                and existante["signature"] == signature
+                and existante["chemin_sortie"] == chemin_sortie
+            ):
+                continue
+            if signature is None:
+                # Fichier inaccessible : le worker signalera l'erreur
+                continue
+
+            preparation = preparer_encodage(fichier, preset, chemin_sortie)
+            if preparation is None:
+                # Le worker refera l'analyse et gérera l'échec
+                continue
+
+            if preparation.get("raison_manuel"):
+                self._detourner(tache, fichier, preset, preparation["raison_manuel"])
+                cles.discard(cle)
+                continue
+
+            preparation = dict(
+                preparation, signature=signature, chemin_sortie=chemin_sortie
+            )
+            with self._lock:
+                self.preparations[cle] = preparation
+            logger.debug(f"Encodage de {os.path.basename(fichier)} préparé à l'avance")
+
+            if self._arret.is_set():
+                break
+
+        # Oublier les préparations des fichiers qui ne sont plus en tête de file
+        with self._lock:
+            for cle in list(self.preparations):
+                if cle not in cles:
+                    del self.preparations[cle]
+
+    def _detourner(self, tache, fichier, preset, raison):
+        """Retire de la file un fichier à encoder manuellement."""
+        if not retirer_de_file_attente(self.file_encodage, tache):
+            # Déjà pris par un worker, qui le traitera lui-même
+            return
+
+        nom_fichier = os.path.basename(fichier)
+        colored_log(
+            logger,
+            f"{nom_fichier} retiré de la file d'attente avant son encodage",
+            "INFO",
+            "orange",
+        )
+        ajouter_fichier_a_liste_encodage_manuel(
+            fichier, nom_fichier, raison, preset, self.signals
+        )
+
+        queue_items = copier_file_attente(self.file_encodage)
+        if self.signals and hasattr(self.signals, "update_queue"):
+            self.signals.update_queue.emit(queue_items)
+
+    def prendre(self, fichier, preset, chemin_sortie):
+        """
+        Retourne la préparation d'un fichier si elle est toujours valable
+        (fichier inchangé et même chemin de sortie), None sinon.
+        """
+        with self._lock:
+            preparation = self.preparations.pop((fichier, preset), None)
+        if (
+            preparation is None
+            or preparation["chemin_sortie"] != chemin_sortie
+            or preparation["signature"] != signature_fichier(fichier)
+        ):
+            return None
+        return preparation
+
+
+# Analyseur partagé par tous les workers d'encodage
+pre_analyseur = PreAnalyseur()
@@ -0,0 +1,160 @@
+import os
+import json
+import hashlib
+import threading
+from constants import dossier_cache_sondes, taille_max_cache_sondes
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+def resultat_valide(resultat):
+    """Les analyses en échec (None ou message d'erreur) ne sont pas mises en cache."""
+    return resultat is not None and not isinstance(resultat, str)
+
+
+class CacheSondes:
+    """
+    Cache disque des analyses d'un fichier vidéo par les différents outils
+    (HandBrakeCLI, MediaInfo, ffprobe).
+
+    Chaque fichier analysé possède une entrée JSON identifiée par son chemin, valable
+    tant que sa taille et sa date de modification ne changent pas. La date de
+    modification de l'entrée sert d'horodatage d'utilisation : au-delà de 'taille_max'
+    entrées, les moins récemment utilisées sont supprimées.
+
+    Le nombre d'entrées est tenu à jour à chaque écriture et suppression : le dossier
+    n'est parcouru qu'une fois au premier ajout, puis seulement lorsque la taille
+    maximale est dépassée. L'éviction redescend alors à 90 % de cette taille pour
+    que les ajouts suivants ne le parcourent pas de nouveau.
+    """
+
+    def __init__(self, dossier, taille_max):
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self._lock = threading.Lock()
+        # Nombre d'entrées du cache, inconnu tant que le dossier n'a pas été parcouru
+        self._nombre_entrees = None
+
+    def _chemin_entree(self, chemin):
+        cle = hashlib.sha1(os.path.abspath(chemin).encode("utf-8")).hexdigest()
+        return os.path.join(self.dossier, f"{cle}.json")
+
+    def _lire_entree(self, chemin_entree):
+        try:
+            with open(chemin_entree, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def obtenir(self, chemin, outil, sonder, est_valide=resultat_valide):
+        """
+        Retourne le résultat de l'analyse d'un fichier par un outil, en ne lançant
+        l'analyse que si elle n'est pas déjà en cache pour la version actuelle du fichier.
+
+        Args:
+            chemin: Chemin du fichier vidéo.
+            outil: Nom de l'outil d'analyse ("handbrake", "mediainfo", "ffprobe").
+            sonder: Fonction prenant le chemin et retournant le résultat analysé.
+            est_valide: Indique si un résultat peut être mis en cache.
+
+        Returns:
+            Le résultat de l'analyse (depuis le cache ou tout juste calculé).
+        """
+        try:
+            stat = os.stat(chemin)
+        except OSError:
+            # Fichier inaccessible : laisser l'outil produire son propre message d'erreur
+            return sonder(chemin)
+
+        signature = [stat.st_size, stat.st_mtime_ns]
+        chemin_entree = self._chemin_entree(chemin)
+
+        with self._lock:
+            entree = self._lire_entree(chemin_entree)
+            if entree is not None and entree.get("signature") == signature:
+                if outil in entree.get("outils", {}):
+                    self._marquer_utilise(chemin_entree)
+                    return entree["outils"][outil]
+            else:
+                entree = None
+
+        resultat = sonder(chemin)
+        if not est_valide(resultat):
+            return resultat
+
+        with self._lock:
+            # Relire l'entrée : un autre worker a pu y ajouter une autre analyse entre-temps
+            courante = self._lire_entree(chemin_entree)
+            if courante is not None and courante.get("signature") == signature:
+                entree = courante
+            elif entree is None:
+                entree = {"chemin": chemin, "signature": signature, "outils": {}}
+            entree["outils"][outil] = resultat
+            nouvelle = not os.path.exists(chemin_entree)
+            if self._ecrire_entree(chemin_entree, entree) and nouvelle:
+                self._compter(1)
+            self._evincer()
+        return resultat
+
+    def invalider(self, chemin):
+        """Supprime les analyses en cache d'un fichier."""
+        with self._lock:
+            try:
+                os.remove(self._chemin_entree(chemin))
+            except OSError:
+                return
+            self._compter(-1)
+
+    def _compter(self, variation):
+        if self._nombre_entrees is not None:
+            self._nombre_entrees += variation
+
+    def _marquer_utilise(self, chemin_entree):
+        try:
+            os.utime(chemin_entree)
+        except OSError:
+            pass
+
+    def _ecrire_entree(self, chemin_entree, entree):
+        try:
+            os.makedirs(self.dossier, exist_ok=True)
+            temporaire = f"{chemin_entree}.tmp"
+            with open(temporaire, "w", encoding="utf-8") as f:
+                json.dump(entree, f)
+            os.replace(temporaire, chemin_entree)
+            return True
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire dans le cache d'analyse: {e}")
+            return False
+
+    def _evincer(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de la taille maximale."""
+        if self._nombre_entrees is not None and self._nombre_entrees <= self.taille_max:
+            return
+        try:
+            with os.scandir(self.dossier) as contenu:
+                entrees = [
+                    (element.stat().st_mtime, element.path)
+                    for element in contenu
+                    if element.name.endswith(".json")
+                ]
+        except OSError:
+            self._nombre_entrees = None
+            return
+        self._nombre_entrees = len(entrees)
+        if len(entrees) <= self.taille_max:
+            return
+        entrees.sort()
+        conservees = max(int(self.taille_max * 0.9), 1)
+        for _, chemin_entree in entrees[: len(entrees) - conservees]:
+            try:
+                os.remove(chemin_entree)
+                self._nombre_entrees -= 1
+            except OSError:
+                pass
+
+
+# Cache partagé par l'encodage, l'analyse des sous-titres et l'éditeur de pistes
+cache_sondes = CacheSondes(dossier_cache_sondes, taille_max_cache_sondes)
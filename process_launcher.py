@@ -0,0 +1,192 @@
+import os
+import subprocess
+import psutil
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+EST_WINDOWS = os.name == "nt"
+
+# Priorités de processus disponibles : classe de priorité sous Windows,
+# valeur nice et classe ionice (si disponible) sous Linux
+PRIORITES = {
+    "basse": {
+        "windows": "IDLE_PRIORITY_CLASS",
+        "nice": 19,
+        "ionice": "IOPRIO_CLASS_IDLE",
+    },
+    "inferieure": {
+        "windows": "BELOW_NORMAL_PRIORITY_CLASS",
+        "nice": 10,
+        "ionice": "IOPRIO_CLASS_BE",
+    },
+    "normale": {
+        "windows": "NORMAL_PRIORITY_CLASS",
+        "nice": 0,
+        "ionice": None,
+    },
+}
+
+
+def options_lancement(groupe=False):
+    """
+    Retourne les arguments de subprocess propres à la plateforme pour lancer un
+    outil sans fenêtre de console.
+
+    Arguments:
+    groupe -- Lancer le processus dans son propre groupe (arrêt de l'arbre complet
+              sans toucher l'application).
+    """
+    if EST_WINDOWS:
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = 0  # SW_HIDE
+        creationflags = subprocess.CREATE_NO_WINDOW
+        if groupe:
+            creationflags |= subprocess.CREATE_NEW_PROCESS_GROUP
+        return {"startupinfo": startupinfo, "creationflags": creationflags}
+    if groupe:
+        return {"start_new_session": True}
+    return {}
+
+
+def executer(commande, **kwargs):
+    """
+    Exécute une commande jusqu'à son terme sans fenêtre de console
+    (équivalent de subprocess.run).
+    """
+    return subprocess.run(commande, **options_lancement(), **kwargs)
+
+
+def lancer_processus(commande, priorite=None, **kwargs):
+    """
+    Lance un processus de longue durée (encodage, remux) sans fenêtre de console,
+    dans son propre groupe de processus.
+
+    Arguments:
+    commande -- Liste des arguments de la commande.
+    priorite -- Clé de PRIORITES à appliquer au processus (optionnel).
+    kwargs -- Arguments supplémentaires transmis à subprocess.Popen.
+
+    Retourne:
+    L'objet subprocess.Popen du processus lancé.
+    """
+    process = subprocess.Popen(commande, **options_lancement(groupe=True), **kwargs)
+    if priorite:
+        appliquer_priorite(process.pid, priorite)
+    return process
+
+
+def appliquer_priorite(pid, priorite):
+    """Applique une priorité CPU (et disque sous Linux) à un processus."""
+    reglage = PRIORITES.get(priorite)
+    if reglage is None:
+        logger.warning(f"Priorité de processus inconnue: {priorite}")
+        return
+    try:
+        proc = psutil.Process(pid)
+        if EST_WINDOWS:
+            proc.nice(getattr(psutil, reglage["windows"]))
+        else:
+            proc.nice(reglage["nice"])
+            if reglage["ionice"] and hasattr(psutil, reglage["ionice"]):
+                proc.ionice(getattr(psutil, reglage["ionice"]))
+    except (psutil.Error, OSError, ValueError) as e:
+        logger.debug(
+            f"Impossible d'appliquer la priorité {priorite} au processus {pid}: {e}"
+        )
+
+
+def _arbre(pid):
+    """Retourne le processus et tous ses descendants."""
+    proc = psutil.Process(pid)
+    return [proc] + proc.children(recursive=True)
+
+
+def suspendre_arbre(pid):
+    """
+    Suspend un processus et ses descendants (SIGSTOP sous Linux,
+    suspension des threads sous Windows).
+    """
+    for proc in _arbre(pid):
+        try:
+            proc.suspend()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def reprendre_arbre(pid):
+    """Reprend un processus suspendu et ses descendants (SIGCONT sous Linux)."""
+    for proc in reversed(_arbre(pid)):
+        try:
+            proc.resume()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def tuer_arbre(pid, delai=10):
+    """
+    Arrête un processus et tous ses descendants : demande d'arrêt d'abord, puis
+    arrêt forcé des processus encore en vie après 'delai' secondes.
+
+    Retourne:
+    True si tous les processus sont arrêtés, False si certains n'ont pas pu l'être.
+    """
+    try:
+        processus = _arbre(pid)
+    except psutil.NoSuchProcess:
+        return True
+
+    for proc in processus:
+        try:
+            # Un processus suspendu ne traite pas la demande d'arrêt sous Linux
+            proc.resume()
+            proc.terminate()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied as e:
+            logger.error(f"Impossible d'arrêter le processus {proc.pid}: {e}")
+
+    _, encore_vivants = psutil.wait_procs(processus, timeout=delai)
+    for proc in encore_vivants:
+        logger.warning(f"Le processus {proc.pid} ne répond pas, arrêt forcé")
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.AccessDenied as e:
+            logger.error(f"Impossible de tuer le processus {proc.pid}: {e}")
+            return False
+    return True
+
+
+def arreter_processus_nommes(nom, delai=3, descendants_seulement=False):
+    """
+    Arrête tous les processus dont le nom contient 'nom', avec leurs descendants.
+
+    Arguments:
+    nom -- Partie du nom des processus à arrêter.
+    delai -- Délai (en secondes) laissé aux processus pour se terminer.
+    descendants_seulement -- Ne chercher que parmi les processus lancés par
+        l'application (pour un outil comme ffmpeg que d'autres programmes utilisent).
+
+    Retourne:
+    Le nombre de processus trouvés.
+    """
+    if descendants_seulement:
+        candidats = psutil.Process().children(recursive=True)
+    else:
+        candidats = psutil.process_iter(["pid", "name"])
+    trouves = []
+    for proc in candidats:
+        try:
+            if nom in (proc.name() or ""):
+                trouves.append(proc.pid)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+
+    for pid in trouves:
+        logger.info(f"Tentative d'arrêt du processus {nom} (PID: {pid})")
+        tuer_arbre(pid, delai=delai)
+    return len(trouves)
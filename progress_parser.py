@@ -0,0 +1,125 @@
+import re
+import time
+from collections import namedtuple
+
+# Progression d'un encodage telle qu'affichée par HandBrakeCLI, par exemple :
+# "Encoding: task 1 of 2, 45.67 % (123.45 fps, avg 110.23 fps, ETA 00h12m34s)"
+EvenementProgression = namedtuple(
+    "EvenementProgression",
+    ["passe", "passes_total", "pourcentage", "fps", "fps_moyen", "eta"],
+)
+
+progression_pattern = re.compile(
+    r"Encoding: task (\d+) of (\d+), (\d+(?:\.\d+)?) ?%"
+    r"(?: \((\d+(?:\.\d+)?) fps, avg (\d+(?:\.\d+)?) fps, ETA (\d+)h(\d+)m(\d+)s\))?"
+)
+
+
+def analyser_ligne(ligne):
+    """
+    Extrait la progression d'une ligne de sortie de HandBrakeCLI.
+
+    Args:
+        ligne: Ligne lue sur la sortie du processus.
+
+    Returns:
+        Un EvenementProgression (fps, fps_moyen et eta valent None tant que HandBrake
+        ne les affiche pas), ou None si la ligne ne concerne pas la progression.
+    """
+    match = progression_pattern.search(ligne)
+    if not match:
+        return None
+    passe, passes_total, pourcentage, fps, fps_moyen, heures, minutes, secondes = (
+        match.groups()
+    )
+    eta = None
+    if heures is not None:
+        eta = int(heures) * 3600 + int(minutes) * 60 + int(secondes)
+    return EvenementProgression(
+        int(passe),
+        int(passes_total),
+        float(pourcentage),
+        float(fps) if fps is not None else None,
+        float(fps_moyen) if fps_moyen is not None else None,
+        eta,
+    )
+
+
+def pourcentage_global(evenement):
+    """Convertit la progression de la passe courante en progression de l'encodage complet."""
+    passes_total = max(evenement.passes_total, 1)
+    return ((evenement.passe - 1) * 100 + evenement.pourcentage) / passes_total
+
+
+def formater_duree(secondes):
+    """Formate une durée en secondes sous la forme 1h2m3s."""
+    secondes = int(secondes)
+    return f"{secondes // 3600}h{(secondes % 3600) // 60}m{secondes % 60}s"
+
+
+class SuiviProgression:
+    """
+    Regroupe les événements de progression d'un encodage pour n'en transmettre
+    à l'interface qu'un nombre limité par seconde. Les événements intermédiaires
+    sont fusionnés : seul le plus récent est conservé. Un changement de passe et
+    la fin de l'encodage sont toujours transmis.
+    """
+
+    def __init__(self, intervalle_min, horloge=time.monotonic):
+        """
+        Args:
+            intervalle_min: Délai minimal (en secondes) entre deux événements transmis.
+            horloge: Fonction retournant l'heure courante (remplaçable pour les tests).
+        """
+        self.intervalle_min = intervalle_min
+        self.horloge = horloge
+        self.dernier_envoi = None
+        self.dernier_transmis = None
+        self.en_attente = None
+
+    def traiter(self, ligne):
+        """
+        Analyse une ligne de sortie de HandBrakeCLI.
+
+        Returns:
+            L'événement à transmettre à l'interface, ou None s'il n'y a rien à
+            transmettre pour l'instant.
+        """
+        evenement = analyser_ligne(ligne)
+        if evenement is None:
+            return None
+
+        # HandBrake affiche les fps et l'ETA par intermittence : conserver les derniers connus
+        if evenement.fps is None and self.en_attente is not None:
+            if self.en_attente.passe == evenement.passe:
+                evenement = evenement._replace(
+                    fps=self.en_attente.fps,
+                    fps_moyen=self.en_attente.fps_moyen,
+                    eta=self.en_attente.eta,
+                )
+        self.en_attente = evenement
+
+        maintenant = self.horloge()
+        changement_passe = (
+            self.dernier_transmis is not None
+            and self.dernier_transmis.passe != evenement.passe
+        )
+        if (
+            self.dernier_envoi is None
+            or maintenant - self.dernier_envoi >= self.intervalle_min
+            or changement_passe
+            or evenement.pourcentage >= 100
+        ):
+            return self._transmettre(maintenant)
+        return None
+
+    def vider(self):
+        """Retourne le dernier événement non transmis (à appeler en fin d'encodage)."""
+        if self.en_attente is None or self.en_attente == self.dernier_transmis:
+            return None
+        return self._transmettre(self.horloge())
+
+    def _transmettre(self, maintenant):
+        self.dernier_envoi = maintenant
+        self.dernier_transmis = self.en_attente
+        return self.en_attente
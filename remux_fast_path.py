@@ -0,0 +1,175 @@
+from core_scheduler import obtenir_preset
+from encode_estimator import classe_resolution
+from subtitle_analyzer import obtenir_info_mediainfo
+from tool_registry import registre_outils
+from config import load_config
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+# Format vidéo MediaInfo produit par chaque famille d'encodeurs HandBrake
+FORMATS_ENCODEURS = {
+    "265": "HEVC",
+    "hevc": "HEVC",
+    "264": "AVC",
+    "av1": "AV1",
+    "vp9": "VP9",
+}
+
+
+def commande_copie_flux(entree, sortie, flux, options=(), ffmpeg_path=None):
+    """
+    Construit la commande ffmpeg qui copie des flux d'un fichier dans un autre sans
+    les réencoder (utilisée par l'éditeur de pistes et par le remux des sources
+    déjà conformes à leur preset).
+
+    Arguments:
+    entree -- Chemin du fichier source.
+    sortie -- Chemin du fichier produit.
+    flux -- Spécificateurs des flux conservés, dans l'ordre ("0:v", "0:a:1", "0:3"...).
+    options -- Options de sortie supplémentaires (métadonnées, dispositions).
+    ffmpeg_path -- Chemin de ffmpeg (celui du registre des outils par défaut).
+    """
+    commande = [ffmpeg_path or registre_outils.commande("ffmpeg"), "-i", entree]
+    for specificateur in flux:
+        commande.extend(["-map", specificateur])
+    commande.extend(options)
+    commande.extend(["-c", "copy", sortie])
+    return commande
+
+
+def cible_preset(preset):
+    """
+    Retourne la cible vidéo d'un preset de custom_presets.json : format
+    ("HEVC", "AVC"...), profondeur de couleur en bits et dimensions maximales
+    (None si le preset ne les limite pas), ou None si le preset est introuvable.
+    """
+    reglages = obtenir_preset(preset)
+    if reglages is None:
+        return None
+    encodeur = (reglages.get("VideoEncoder") or "").lower()
+    return {
+        "format": next(
+            (
+                format_video
+                for motif, format_video in FORMATS_ENCODEURS.items()
+                if motif in encodeur
+            ),
+            None,
+        ),
+        "profondeur": 12 if "12bit" in encodeur else 10 if "10bit" in encodeur else 8,
+        "largeur": reglages.get("PictureWidth") or None,
+        "hauteur": reglages.get("PictureHeight") or None,
+    }
+
+
+def caracteristiques_video(info_mediainfo):
+    """
+    Extrait le format, les dimensions, la profondeur de couleur et le débit (en
+    kb/s) de la première piste vidéo d'une analyse MediaInfo. Le débit du
+    conteneur est utilisé lorsque celui de la piste n'est pas indiqué.
+
+    Retourne:
+    Un dictionnaire {"format", "largeur", "hauteur", "profondeur", "debit"} dont les
+    valeurs inconnues valent None, ou None si l'analyse n'a pas de piste vidéo.
+    """
+    try:
+        pistes = info_mediainfo["media"]["track"]
+    except (KeyError, TypeError):
+        return None
+    video = next((piste for piste in pistes if piste.get("@type") == "Video"), None)
+    if video is None:
+        return None
+    general = next((piste for piste in pistes if piste.get("@type") == "General"), {})
+
+    def entier(valeur):
+        try:
+            return int(float(valeur))
+        except (TypeError, ValueError):
+            return None
+
+    debit = entier(video.get("BitRate")) or entier(general.get("OverallBitRate"))
+    return {
+        "format": video.get("Format"),
+        "largeur": entier(video.get("Width")),
+        "hauteur": entier(video.get("Height")),
+        "profondeur": entier(video.get("BitDepth")),
+        "debit": debit // 1000 if debit else None,
+    }
+
+
+def raison_reencodage(fichier, preset):
+    """
+    Compare la vidéo d'une source (analyse MediaInfo en cache) à la cible de son
+    preset : format, dimensions, profondeur de couleur et débit maximal de sa
+    classe de résolution (option debit_max_remux_kbps).
+
+    Retourne:
+    None si la source respecte déjà le preset et peut être remuxée sans
+    réencodage, sinon la raison pour laquelle elle doit être encodée.
+    """
+    cible = cible_preset(preset)
+    if cible is None or cible["format"] is None:
+        return "cible du preset inconnue"
+    source = caracteristiques_video(obtenir_info_mediainfo(fichier))
+    if source is None:
+        return "caractéristiques vidéo inconnues"
+
+    if source["format"] != cible["format"]:
+        return f"format {source['format']} au lieu de {cible['format']}"
+    if (cible["largeur"] and (source["largeur"] or 0) > cible["largeur"]) or (
+        cible["hauteur"] and (source["hauteur"] or 0) > cible["hauteur"]
+    ):
+        return (
+            f"résolution {source['largeur']}x{source['hauteur']} supérieure au preset"
+        )
+    if (source["profondeur"] or 8) < cible["profondeur"]:
+        return f"{source['profondeur'] or 8} bits au lieu de {cible['profondeur']}"
+
+    classe = classe_resolution(source["largeur"])
+    debit_max = load_config().get("debit_max_remux_kbps", {}).get(classe)
+    if not debit_max:
+        return f"pas de débit maximal configuré pour la résolution {classe}"
+    if not source["debit"]:
+        return "débit inconnu"
+    if source["debit"] > debit_max:
+        return f"débit de {source['debit']} kb/s supérieur à {debit_max} kb/s"
+    return None
+
+
+def flux_remux(fichier, preset, pistes_audio, piste_sous_titres, incrustation):
+    """
+    Décide si une source peut être remuxée au lieu d'être encodée (option
+    remux_sources_conformes), d'après ses caractéristiques et les pistes
+    sélectionnées par filtrer_pistes_audio et analyser_sous_titres_francais.
+
+    Arguments:
+    pistes_audio -- Numéros HandBrake (à partir de 1) des pistes audio retenues,
+                    liste vide pour toutes les pistes.
+    piste_sous_titres -- Numéro HandBrake de la piste de sous-titres retenue, ou None.
+    incrustation -- True si un sous-titre doit être incrusté (réencodage obligatoire).
+
+    Retourne:
+    La liste des flux à copier avec commande_copie_flux(), ou None s'il faut encoder.
+    """
+    if not load_config().get("remux_sources_conformes", False):
+        return None
+    if incrustation:
+        raison = "sous-titre à incruster"
+    elif not registre_outils.est_disponible("ffmpeg"):
+        raison = "ffmpeg introuvable"
+    else:
+        raison = raison_reencodage(fichier, preset)
+    if raison is not None:
+        logger.debug(f"Encodage nécessaire pour {fichier}: {raison}")
+        return None
+
+    flux = ["0:v:0"]
+    if pistes_audio:
+        flux.extend(f"0:a:{numero - 1}" for numero in pistes_audio)
+    else:
+        flux.append("0:a?")
+    if piste_sous_titres is not None:
+        flux.append(f"0:s:{piste_sous_titres - 1}")
+    return flux
@@ -47,9 +47,11 @@ class RestartEncodingDialog(QDialog):
         details_frame.setFrameStyle(QFrame.StyledPanel | QFrame.Raised)
         details_layout = QVBoxLayout(details_frame)
 
-        # Informations sur l'encodage en cours
-        current_encoding = state.get("current_encoding")
-        if current_encoding:
+        # Informations sur les encodages en cours (un par worker)
+        current_encodings = state.get("encodages_en_cours") or (
+            [state["current_encoding"]] if state.get("current_encoding") else []
+        )
+        for current_encoding in current_encodings:
             file_path = current_encoding.get("file", "")
             file_name = os.path.basename(file_path) if file_path else "Inconnu"
             preset = current_encoding.get("preset", "Inconnu")
@@ -0,0 +1,270 @@
+import os
+import threading
+import time
+from constants import (
+    poids_presets,
+    poids_preset_defaut,
+    minutes_encodage_par_go,
+    intervalle_estimation_file,
+)
+from encode_estimator import estimateur_encodage
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+# Politiques d'ordonnancement de la file d'attente disponibles
+POLITIQUES = ("fifo", "plus_court_d_abord", "equitable")
+
+
+def estimer_duree_encodage(tache, estimation=None):
+    """
+    Estime la durée d'encodage d'une tâche (en minutes) d'après l'historique des
+    encodages, ou à défaut à partir de la taille du fichier et du coût relatif de
+    son preset.
+
+    Arguments:
+    tache -- Tâche de la file d'attente.
+    estimation -- Estimation déjà obtenue de estimateur_encodage, le cas échéant.
+
+    Retourne:
+    La durée estimée, ou None si le fichier est inaccessible.
+    """
+    if not isinstance(tache, dict):
+        return None
+    if estimation is None:
+        estimation = estimateur_encodage.estimer(
+            tache.get("file", ""), tache.get("preset")
+        )
+    if estimation and estimation["duree"]:
+        return estimation["duree"] / 60
+    try:
+        taille_go = os.path.getsize(tache.get("file", "")) / (1024**3)
+    except OSError:
+        return None
+    poids = poids_presets.get(tache.get("preset"), poids_preset_defaut)
+    return taille_go * poids * minutes_encodage_par_go
+
+
+def estimer_tache(tache):
+    """
+    Estime l'encodage d'une tâche de la file d'attente.
+
+    Retourne:
+    Un dictionnaire {"estimation": estimation de estimateur_encodage ou None,
+    "minutes_estimees": durée en minutes utilisée pour l'ordonnancement ou None}.
+    """
+    if not isinstance(tache, dict):
+        return {"estimation": None, "minutes_estimees": None}
+    estimation = estimateur_encodage.estimer(tache.get("file", ""), tache.get("preset"))
+    return {
+        "estimation": estimation,
+        "minutes_estimees": estimer_duree_encodage(tache, estimation),
+    }
+
+
+def dossier_tache(tache):
+    return tache.get("folder", "") if isinstance(tache, dict) else ""
+
+
+class PolitiqueOrdonnancement:
+    """
+    Calcule la priorité effective des tâches de la file d'attente (plus basse =
+    encodée plus tôt) :
+
+    - "fifo" : ordre d'arrivée ;
+    - "plus_court_d_abord" : durée d'encodage estimée, en minutes ;
+    - "equitable" : tour de rôle entre les dossiers surveillés, par files
+      équitables pondérées (chaque tâche d'un dossier reçoit la fin de tour
+      virtuelle max(dernière fin du dossier, tour en cours) + 1 / poids).
+
+    La priorité de base est divisée par le poids du dossier de la tâche, puis
+    diminuée de 'vieillissement' points par minute d'attente pour qu'aucune tâche
+    ne reste bloquée derrière un flot de tâches plus prioritaires.
+
+    Le vieillissement fait baisser toutes les priorités à la même vitesse : les
+    clés de tri sont donc calculées par rapport à l'heure de création de la
+    politique et ne changent pas avec le temps, seule la priorité affichée évolue.
+    Chaque clé est calculée une seule fois, sous le verrou de la file et sans
+    accès au disque : à l'ajout de la tâche, puis lorsque son estimation arrive
+    (voir EstimationsFile).
+    """
+
+    def __init__(
+        self, nom="fifo", poids_dossiers=None, vieillissement=0.0, horloge=time.time
+    ):
+        if nom not in POLITIQUES:
+            logger.warning(f"Politique de file d'attente inconnue: {nom}, fifo utilisé")
+            nom = "fifo"
+        self.nom = nom
+        self.poids_dossiers = poids_dossiers or {}
+        self.vieillissement = vieillissement
+        self.horloge = horloge
+        self.origine = horloge()
+        # Plus longue durée estimée rencontrée (tâches dont la durée est inconnue)
+        self._duree_max = 0
+        # Tour virtuel en cours et dernière fin de tour de chaque dossier ("equitable")
+        self._tour = 0
+        self._fins = {}
+
+    def poids(self, tache):
+        try:
+            return max(float(self.poids_dossiers.get(dossier_tache(tache), 1)), 0.01)
+        except (TypeError, ValueError):
+            return 1.0
+
+    def preparer(self, tache):
+        """
+        Retourne les informations conservées avec une tâche à son ajout et
+        transmises à cle() ; l'estimation de durée y est ajoutée plus tard.
+        """
+        return {"ajout": self.horloge()}
+
+    def cle(self, tache, infos):
+        """Calcule la clé de tri d'une tâche à partir de ses informations."""
+        if self.nom == "plus_court_d_abord":
+            duree = infos.get("minutes_estimees")
+            if duree is None:
+                # Durée inconnue : derrière toutes les durées connues jusqu'ici
+                base = self._duree_max + 1
+            else:
+                self._duree_max = max(self._duree_max, duree)
+                base = duree
+            base /= self.poids(tache)
+        elif self.nom == "equitable":
+            if "tour" not in infos:
+                dossier = dossier_tache(tache)
+                infos["tour"] = max(
+                    self._fins.get(dossier, 0), self._tour
+                ) + 1 / self.poids(tache)
+                self._fins[dossier] = infos["tour"]
+            base = infos["tour"]
+        else:
+            base = 0
+        anciennete = (infos["ajout"] - self.origine) / 60
+        return base + self.vieillissement * anciennete
+
+    def prise(self, tache, infos):
+        """Signale qu'une tâche a été prise par un worker."""
+        if self.nom == "equitable":
+            self._tour = max(self._tour, infos.get("tour", 0))
+
+    def retrait(self, tache, infos):
+        """Signale qu'une tâche a été retirée de la file sans être encodée."""
+        if self.nom == "equitable" and "tour" in infos:
+            dossier = dossier_tache(tache)
+            # Rendre son tour au dossier si c'était sa dernière tâche
+            if self._fins.get(dossier) == infos["tour"]:
+                self._fins[dossier] = infos["tour"] - 1 / self.poids(tache)
+
+    def vidage(self):
+        """Signale que la file a été vidée."""
+        self._fins.clear()
+
+    def priorite_effective(self, cle):
+        """Convertit une clé de tri en priorité effective à l'instant présent."""
+        ecoule = (self.horloge() - self.origine) / 60
+        return cle - self.vieillissement * ecoule
+
+
+def creer_politique(config):
+    """
+    Crée la politique d'ordonnancement décrite par la configuration, ou None pour
+    l'ordre d'arrivée simple (la file n'a alors aucune priorité à recalculer).
+    """
+    nom = config.get("politique_file_attente", "fifo")
+    if nom == "fifo":
+        return None
+    return PolitiqueOrdonnancement(
+        nom,
+        config.get("poids_dossiers", {}),
+        config.get("vieillissement_par_minute", 0.0),
+    )
+
+
+class EstimationsFile:
+    """
+    Estime en arrière-plan l'encodage des tâches de la file d'attente (historique
+    des encodages, cache d'analyse, taille des fichiers), pour que ni la
+    surveillance qui ajoute les tâches ni l'interface qui les affiche n'accèdent
+    au disque. Les estimations sont conservées avec les tâches
+    (FileTaches.actualiser_infos), qui sont replacées selon la politique.
+
+    Les nouvelles tâches sont estimées dès leur ajout ; toute la file est
+    réestimée toutes les 'intervalle' secondes, l'historique ou le cache
+    d'analyse ayant pu changer entre-temps.
+    """
+
+    def __init__(self, estimer=estimer_tache, intervalle=intervalle_estimation_file):
+        self.estimer = estimer
+        self.intervalle = intervalle
+        self.file_encodage = None
+        # Dernières informations transmises à la file, par identifiant de tâche
+        self._connues = {}
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        self._thread = None
+
+    def demarrer(self, file_encodage):
+        """Démarre le thread d'estimation de la file d'attente."""
+        self.file_encodage = file_encodage
+        file_encodage.abonner(lambda taches: self._reveil.set())
+        self._arret.clear()
+        self._thread = threading.Thread(
+            target=self._boucle, name="estimation-file", daemon=True
+        )
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        self._reveil.set()
+
+    def _boucle(self):
+        prochaine = 0
+        while not self._arret.is_set():
+            complete = time.monotonic() >= prochaine
+            if complete:
+                prochaine = time.monotonic() + self.intervalle
+            try:
+                self.actualiser(self.file_encodage, complete)
+            except Exception as e:
+                logger.error(
+                    f"Erreur pendant l'estimation de la file: {e}", exc_info=True
+                )
+            self._reveil.wait(max(prochaine - time.monotonic(), 0))
+            self._reveil.clear()
+
+    def actualiser(self, file_encodage, complete=True):
+        """
+        Estime les tâches de la file et transmet les estimations nouvelles ou
+        modifiées. Sans 'complete', seules les tâches pas encore estimées le sont.
+        """
+        estimations = []
+        presentes = set()
+        for tache in file_encodage.instantane():
+            if not isinstance(tache, dict) or tache.get("id") is None:
+                continue
+            presentes.add(tache["id"])
+            if not complete and tache["id"] in self._connues:
+                continue
+            infos = self.estimer(tache)
+            if infos != self._connues.get(tache["id"]):
+                estimations.append((tache["id"], infos))
+            if self._arret.is_set():
+                return
+
+        # Durées connues d'abord : les durées inconnues se placent derrière elles
+        estimations = dict(
+            sorted(estimations, key=lambda e: e[1].get("minutes_estimees") is None)
+        )
+        if estimations:
+            for id_tache in file_encodage.actualiser_infos(estimations):
+                self._connues[id_tache] = estimations[id_tache]
+        # Oublier les tâches qui ont quitté la file
+        for id_tache in list(self._connues):
+            if id_tache not in presentes:
+                del self._connues[id_tache]
+
+
+# Estimation partagée de la file d'attente
+estimations_file = EstimationsFile()
@@ -0,0 +1,348 @@
+import hashlib
+import itertools
+import os
+import shutil
+import threading
+import time
+from config import load_config
+from constants import intervalle_pre_analyse, taille_bloc_copie_transit
+from utils import copier_file_attente, normaliser_chemin
+from logger import colored_log, setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+def signature_source(chemin):
+    """Retourne (taille, date de modification) d'un fichier, ou None s'il est inaccessible."""
+    try:
+        stat = os.stat(chemin)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def nom_sortie_locale(chemin_sortie):
+    """
+    Nom du fichier encodé dans la zone de transit : préfixé par une empreinte du
+    chemin de sortie complet, pour que deux fichiers de même nom dans des dossiers
+    différents (ShowA/S01E01, ShowB/S01E01) ne partagent pas le même fichier local,
+    et stable, pour qu'un encodage par segments interrompu retrouve ses segments.
+    """
+    empreinte = hashlib.sha1(normaliser_chemin(chemin_sortie).encode("utf-8"))
+    return f"{empreinte.hexdigest()[:12]}_{os.path.basename(chemin_sortie)}"
+
+
+class ZoneTransit:
+    """
+    Dossier de travail local et rapide (SSD) dans lequel les sources sont copiées
+    avant leur encodage et où HandBrake écrit le fichier encodé, déplacé ensuite
+    vers son dossier de sortie définitif (voir output_finalizer.py). Sur un NAS ou un disque chargé, la
+    lecture séquentielle d'une copie évite les accès aléatoires de l'encodeur.
+
+    Un thread copie à l'avance les premiers fichiers de la file pendant les
+    encodages en cours. L'espace occupé (copies et sorties réservées) reste sous
+    un budget : les copies inutilisées les moins récemment utilisées sont
+    supprimées pour faire de la place, et un fichier qui ne tient pas dans le
+    budget est encodé directement depuis son emplacement d'origine.
+    """
+
+    def __init__(self, dossier=None, budget_go=0, profondeur=1):
+        self.configurer(dossier, budget_go, profondeur)
+        self.copies = {}
+        self.reservations = {}
+        self._numeros = itertools.count(1)
+        self._lock = threading.Lock()
+        self._arret = threading.Event()
+        self._thread = None
+
+    def configurer(self, dossier, budget_go, profondeur=1):
+        self.dossier = dossier
+        self.budget = int((budget_go or 0) * 1024**3)
+        self.profondeur = profondeur
+
+    def charger_configuration(self):
+        """Applique les options dossier_transit, budget_transit_go et profondeur_transit."""
+        config = load_config()
+        self.configurer(
+            config.get("dossier_transit"),
+            config.get("budget_transit_go", 0),
+            config.get("profondeur_transit", 1),
+        )
+
+    @property
+    def active(self):
+        return bool(self.dossier) and self.budget > 0
+
+    def _dossier_sources(self):
+        return os.path.join(self.dossier, "sources")
+
+    def _dossier_sorties(self):
+        return os.path.join(self.dossier, "sorties")
+
+    # --- Budget (appelé sous le verrou) --------------------------------------
+
+    def _occupation(self):
+        return sum(copie["taille"] for copie in self.copies.values()) + sum(
+            self.reservations.values()
+        )
+
+    def _faire_de_la_place(self, besoin):
+        """Supprime les copies inutilisées les plus anciennes jusqu'à disposer de 'besoin' octets."""
+        if besoin > self.budget:
+            return False
+        evincables = sorted(
+            (
+                (copie["acces"], source)
+                for source, copie in self.copies.items()
+                if copie["pret"].is_set() and not copie["utilisations"]
+            )
+        )
+        while self._occupation() + besoin > self.budget and evincables:
+            _, source = evincables.pop(0)
+            copie = self.copies.pop(source)
+            self._supprimer(copie["chemin"])
+            logger.debug(f"Copie locale de {os.path.basename(source)} évincée")
+        if self._occupation() + besoin > self.budget:
+            return False
+        try:
+            os.makedirs(self.dossier, exist_ok=True)
+            libre = shutil.disk_usage(self.dossier).free
+        except OSError:
+            return False
+        return libre > besoin
+
+    @staticmethod
+    def _supprimer(chemin):
+        try:
+            os.remove(chemin)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Impossible de supprimer {chemin}: {e}")
+
+    # --- Copies des sources ----------------------------------------------------
+
+    def copier(self, source, interrompre=None):
+        """
+        Copie une source dans la zone de transit, par lecture séquentielle en gros
+        blocs. Sans effet si une copie à jour existe déjà ; attend la fin d'une
+        copie déjà en cours.
+
+        Arguments:
+        source -- Chemin du fichier source.
+        interrompre -- Fonction sans argument retournant True pour abandonner la copie.
+
+        Retourne:
+        Le chemin de la copie, ou None si le fichier ne tient pas dans le budget,
+        est inaccessible ou si la copie a échoué.
+        """
+        signature = signature_source(source)
+        if signature is None:
+            return None
+
+        with self._lock:
+            copie = self.copies.get(source)
+            if copie is not None and copie["signature"] != signature:
+                if copie["utilisations"] or not copie["pret"].is_set():
+                    return None
+                self._supprimer(copie["chemin"])
+                del self.copies[source]
+                copie = None
+            if copie is None:
+                if not self._faire_de_la_place(signature[0]):
+                    return None
+                os.makedirs(self._dossier_sources(), exist_ok=True)
+                nom = f"{next(self._numeros)}_{os.path.basename(source)}"
+                copie = {
+                    "chemin": os.path.join(self._dossier_sources(), nom),
+                    "taille": signature[0],
+                    "signature": signature,
+                    "utilisations": 0,
+                    "acces": time.monotonic(),
+                    "pret": threading.Event(),
+                    "valide": False,
+                }
+                self.copies[source] = copie
+                copier_ici = True
+            else:
+                copier_ici = False
+
+        if not copier_ici:
+            copie["pret"].wait()
+            return copie["chemin"] if copie["valide"] else None
+
+        debut = time.monotonic()
+        temporaire = f"{copie['chemin']}.part"
+        try:
+            with open(source, "rb") as entree, open(temporaire, "wb") as sortie:
+                while True:
+                    if interrompre is not None and interrompre():
+                        raise InterruptedError("copie interrompue")
+                    bloc = entree.read(taille_bloc_copie_transit)
+                    if not bloc:
+                        break
+                    sortie.write(bloc)
+            os.replace(temporaire, copie["chemin"])
+            copie["valide"] = signature_source(source) == signature
+        except OSError as e:
+            if not isinstance(e, InterruptedError):
+                logger.error(f"Échec de la copie locale de {source}: {e}")
+            self._supprimer(temporaire)
+
+        if not copie["valide"]:
+            with self._lock:
+                self.copies.pop(source, None)
+            self._supprimer(copie["chemin"])
+        copie["pret"].set()
+        if not copie["valide"]:
+            return None
+
+        duree = max(time.monotonic() - debut, 0.001)
+        logger.info(
+            f"{os.path.basename(source)} copié dans la zone de transit "
+            f"({copie['taille'] / 1024**2 / duree:.0f} MB/s)"
+        )
+        return copie["chemin"]
+
+    def prendre(self, source, interrompre=None):
+        """
+        Retourne la copie locale d'une source pour l'encoder, en la copiant si le
+        thread d'anticipation ne l'a pas déjà fait. La copie n'est pas évincée tant
+        qu'elle n'a pas été rendue avec rendre().
+
+        Retourne:
+        Le chemin de la copie, ou None pour encoder depuis la source.
+        """
+        if not self.active:
+            return None
+        chemin = self.copier(source, interrompre)
+        if chemin is None:
+            return None
+        with self._lock:
+            copie = self.copies.get(source)
+            if copie is None or copie["chemin"] != chemin:
+                return None
+            copie["utilisations"] += 1
+            copie["acces"] = time.monotonic()
+        return chemin
+
+    def rendre(self, source):
+        """Supprime la copie d'une source encodée (elle ne servira plus)."""
+        with self._lock:
+            copie = self.copies.get(source)
+            if copie is None:
+                return
+            copie["utilisations"] = max(copie["utilisations"] - 1, 0)
+            if copie["utilisations"]:
+                return
+            del self.copies[source]
+        self._supprimer(copie["chemin"])
+
+    # --- Fichiers encodés ------------------------------------------------------
+
+    def reserver_sortie(self, chemin_sortie, taille):
+        """
+        Réserve la place du fichier encodé dans la zone de transit.
+
+        Arguments:
+        chemin_sortie -- Chemin définitif du fichier encodé.
+        taille -- Taille prévue du fichier encodé (en octets).
+
+        Retourne:
+        Le chemin local où écrire le fichier encodé, ou None s'il n'y a pas la place.
+        """
+        if not self.active:
+            return None
+        with self._lock:
+            self.reservations.pop(chemin_sortie, None)
+            if not self._faire_de_la_place(int(taille)):
+                return None
+            self.reservations[chemin_sortie] = int(taille)
+        os.makedirs(self._dossier_sorties(), exist_ok=True)
+        return os.path.join(self._dossier_sorties(), nom_sortie_locale(chemin_sortie))
+
+    def liberer_sortie(self, chemin_sortie, chemin_local=None):
+        """
+        Libère la place réservée pour un fichier encodé et supprime ce qu'il reste
+        du fichier local (encodage arrêté ou échoué).
+
+        Un fichier encodé resté dans la zone de transit (déplacement vers le dossier
+        de sortie impossible) garde sa place réservée jusqu'au nettoyage du
+        prochain démarrage.
+        """
+        if chemin_local is not None and chemin_local != chemin_sortie:
+            self._supprimer(chemin_local)
+        if self.dossier and os.path.exists(
+            os.path.join(self._dossier_sorties(), nom_sortie_locale(chemin_sortie))
+        ):
+            return
+        with self._lock:
+            self.reservations.pop(chemin_sortie, None)
+
+    # --- Anticipation ----------------------------------------------------------
+
+    def nettoyer(self):
+        """
+        Supprime les copies de sources et les fichiers encodés laissés par une
+        exécution précédente, sauf ceux d'un encodage par segments dont le
+        manifeste permet la reprise.
+        """
+        if not self.dossier:
+            return
+        shutil.rmtree(self._dossier_sources(), ignore_errors=True)
+        try:
+            noms = os.listdir(self._dossier_sorties())
+        except OSError:
+            return
+        for nom in noms:
+            chemin = os.path.join(self._dossier_sorties(), nom)
+            if os.path.isfile(chemin) and not os.path.isdir(f"{chemin}.segments"):
+                self._supprimer(chemin)
+
+    def demarrer(self, file_encodage):
+        """
+        Charge la configuration et, si la zone de transit est activée, démarre la
+        copie anticipée des premiers fichiers de la file d'attente.
+        """
+        self.charger_configuration()
+        if not self.active:
+            return
+        self.nettoyer()
+        self._arret.clear()
+        self._thread = threading.Thread(
+            target=self._boucle,
+            args=(file_encodage,),
+            name="zone-transit",
+            daemon=True,
+        )
+        self._thread.start()
+        colored_log(
+            logger,
+            f"Zone de transit {self.dossier} ({self.budget / 1024**3:.0f} GB)",
+            "INFO",
+            "green",
+        )
+
+    def arreter(self):
+        self._arret.set()
+
+    def _boucle(self, file_encodage):
+        while not self._arret.wait(intervalle_pre_analyse):
+            try:
+                self.anticiper(file_encodage)
+            except Exception as e:
+                logger.error(f"Erreur pendant la copie anticipée: {e}", exc_info=True)
+
+    def anticiper(self, file_encodage):
+        """Copie les premiers fichiers de la file qui ne l'ont pas encore été."""
+        for tache in copier_file_attente(file_encodage)[: self.profondeur]:
+            if self._arret.is_set():
+                return
+            source = tache.get("file") if isinstance(tache, dict) else None
+            if source:
+                self.copier(normaliser_chemin(source), self._arret.is_set)
+
+
+# Zone de transit partagée par les workers (configurée au démarrage par main)
+zone_transit = ZoneTransit()
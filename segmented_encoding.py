@@ -0,0 +1,262 @@
+import os
+import shutil
+import subprocess
+from file_handling import charger_fichiers, sauvegarder_fichiers
+from probe_ahead import signature_fichier
+from probe_cache import cache_sondes
+from process_launcher import executer
+from tool_registry import registre_outils
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+
+def duree_en_secondes(duree):
+    """Convertit une durée du scan HandBrakeCLI ({"Hours", "Minutes", "Seconds"}) en secondes."""
+    duree = duree or {}
+    return (
+        duree.get("Hours", 0) * 3600
+        + duree.get("Minutes", 0) * 60
+        + duree.get("Seconds", 0)
+    )
+
+
+def chapitres_media(info_pistes):
+    """
+    Retourne la durée (en secondes) de chaque chapitre du premier titre d'un scan
+    HandBrakeCLI, ou une liste vide si le fichier n'a pas de chapitres.
+    """
+    try:
+        chapitres = info_pistes["TitleList"][0].get("ChapterList") or []
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return []
+    return [duree_en_secondes(chapitre.get("Duration")) for chapitre in chapitres]
+
+
+def chapitres_fichier(fichier):
+    """
+    Retourne les chapitres d'un fichier d'après son scan HandBrakeCLI en cache,
+    sans lancer de scan s'il n'a pas encore été analysé.
+    """
+    return chapitres_media(cache_sondes.obtenir(fichier, "handbrake", lambda c: None))
+
+
+def decouper_en_segments(duree_source, duree_segment, chapitres=None):
+    """
+    Découpe un fichier en segments d'environ 'duree_segment' secondes, encodables
+    indépendamment puis assemblés sans réencodage.
+
+    Les segments suivent les chapitres (chapitres consécutifs regroupés jusqu'à
+    atteindre la durée voulue) : HandBrake découpe alors sur des images exactes et
+    l'audio de chaque segment couvre exactement sa vidéo. Un découpage à
+    intervalles réguliers (--start-at/--stop-at) ne tombe pas sur des images
+    exactes et chaque segment réencode son audio : l'assemblage laisserait des
+    trous dans le son et un décalage audio/vidéo à chaque jonction. Les fichiers
+    sans chapitres ne sont donc pas segmentés.
+
+    Arguments:
+    duree_source -- Durée du fichier en secondes.
+    duree_segment -- Durée visée pour chaque segment en secondes.
+    chapitres -- Durées des chapitres en secondes.
+
+    Retourne:
+    La liste des segments {"index", "debut", "duree", "chapitres"} ("chapitres"
+    vaut [premier, dernier] numérotés à partir de 1), ou une liste vide si le
+    fichier est trop court ou n'a pas de chapitres exploitables.
+    """
+    if not duree_source or not duree_segment or duree_source < 2 * duree_segment:
+        return []
+    if not chapitres or not all(chapitres) or len(chapitres) < 2:
+        return []
+
+    bornes = []
+    premier, debut, cumul = 1, 0, 0
+    for numero, duree in enumerate(chapitres, start=1):
+        cumul += duree
+        if cumul - debut >= duree_segment or numero == len(chapitres):
+            bornes.append((debut, cumul - debut, [premier, numero]))
+            premier, debut = numero + 1, cumul
+    # Rattacher un dernier segment trop court au précédent
+    if len(bornes) > 1 and bornes[-1][1] < duree_segment / 2:
+        debut, duree, (premier, _) = bornes[-2]
+        bornes[-2:] = [(debut, duree + bornes[-1][1], [premier, len(chapitres)])]
+
+    if len(bornes) < 2:
+        return []
+    return [
+        {
+            "index": index,
+            "debut": debut,
+            "duree": duree,
+            "chapitres": chapitres_segment,
+        }
+        for index, (debut, duree, chapitres_segment) in enumerate(bornes)
+    ]
+
+
+def commande_segment(handbrake_cmd, segment, chemin_segment):
+    """Adapte la commande HandBrakeCLI d'un fichier pour n'encoder qu'un segment."""
+    commande = list(handbrake_cmd)
+    commande[commande.index("-o") + 1] = chemin_segment
+    premier, dernier = segment["chapitres"]
+    commande.append(f"--chapters={premier}-{dernier}")
+    return commande
+
+
+class ManifesteSegments:
+    """
+    Suivi d'un encodage segmenté dans le dossier '<sortie>.segments' : le manifeste
+    décrit le découpage et les segments déjà encodés. Il est enregistré de façon
+    atomique après chaque segment, si bien qu'un encodage interrompu reprend au
+    premier segment non terminé au lieu de repartir de zéro.
+
+    Le manifeste n'est réutilisé que pour la même source (taille et date de
+    modification), le même preset et le même découpage.
+    """
+
+    def __init__(self, chemin_sortie):
+        self.chemin_sortie = chemin_sortie
+        self.dossier = f"{chemin_sortie}.segments"
+        self.fichier = os.path.join(self.dossier, "manifeste.json")
+        self.entete = {}
+        self.segments = []
+
+    def preparer(self, source, preset, segments):
+        """
+        Reprend le manifeste existant s'il correspond à cet encodage, ou en crée un
+        nouveau (les segments d'un encodage différent sont supprimés).
+
+        Retourne:
+        Le nombre de segments déjà encodés repris.
+        """
+        entete = {
+            "source": source,
+            "signature": list(signature_fichier(source) or []),
+            "preset": preset,
+        }
+        existant = self._charger()
+        if (
+            existant is not None
+            and all(existant.get(cle) == valeur for cle, valeur in entete.items())
+            and [self._decoupage(s) for s in existant.get("segments", [])]
+            == [self._decoupage(s) for s in segments]
+        ):
+            self.segments = existant["segments"]
+            for segment in self.segments:
+                if segment.get("termine") and not os.path.exists(
+                    self.chemin_segment(segment)
+                ):
+                    segment["termine"] = False
+        else:
+            if os.path.isdir(self.dossier):
+                shutil.rmtree(self.dossier, ignore_errors=True)
+            os.makedirs(self.dossier, exist_ok=True)
+            self.segments = [
+                dict(segment, termine=False, duree_encodage=None)
+                for segment in segments
+            ]
+        self.entete = entete
+        self._sauvegarder()
+        return len(self.segments) - len(self.restants())
+
+    @staticmethod
+    def _decoupage(segment):
+        return (segment["debut"], segment["duree"], segment["chapitres"])
+
+    def _charger(self):
+        try:
+            donnees = charger_fichiers(self.fichier)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifeste de segments illisible {self.fichier}: {e}")
+            return None
+        return donnees or None
+
+    def _sauvegarder(self):
+        sauvegarder_fichiers(self.fichier, dict(self.entete, segments=self.segments))
+
+    def chemin_segment(self, segment):
+        extension = os.path.splitext(self.chemin_sortie)[1]
+        return os.path.join(self.dossier, f"segment_{segment['index']:03d}{extension}")
+
+    def restants(self):
+        """Segments restant à encoder, dans l'ordre."""
+        return [segment for segment in self.segments if not segment.get("termine")]
+
+    def duree_totale(self):
+        return sum(segment["duree"] for segment in self.segments)
+
+    def duree_terminee(self):
+        """Durée de vidéo (en secondes) des segments déjà encodés."""
+        return sum(segment["duree"] for segment in self.segments if segment["termine"])
+
+    def duree_encodage(self):
+        """Durée d'encodage cumulée des segments, reprises comprises (en secondes)."""
+        return sum(segment.get("duree_encodage") or 0 for segment in self.segments)
+
+    def marquer_termine(self, segment, duree_encodage):
+        segment["termine"] = True
+        segment["duree_encodage"] = round(duree_encodage, 1)
+        self._sauvegarder()
+
+    def assembler(self):
+        """
+        Assemble les segments encodés dans le fichier de sortie avec ffmpeg, sans
+        réencodage (démultiplexeur concat).
+
+        Retourne:
+        True si le fichier de sortie a été créé.
+        """
+        liste = os.path.join(self.dossier, "segments.txt")
+        with open(liste, "w", encoding="utf-8") as f:
+            for segment in self.segments:
+                chemin = os.path.abspath(self.chemin_segment(segment))
+                f.write("file '{}'\n".format(chemin.replace("'", "'\\''")))
+
+        commande = [
+            registre_outils.commande("ffmpeg"),
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            liste,
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            self.chemin_sortie,
+        ]
+        try:
+            result = executer(commande, capture_output=True, text=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(
+                f"Impossible de lancer ffmpeg pour assembler les segments: {e}"
+            )
+            return False
+        if result.returncode != 0:
+            logger.error(
+                f"Échec de l'assemblage des segments de {self.chemin_sortie}: "
+                f"{result.stderr.strip()}"
+            )
+            return False
+        return os.path.exists(self.chemin_sortie)
+
+    def nettoyer(self):
+        """Supprime le dossier des segments."""
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+
+def planifier_segments(fichier, duree_source, duree_segment):
+    """
+    Retourne le découpage en segments d'un fichier, ou une liste vide si le fichier
+    ne doit pas être segmenté (durée inconnue, fichier court, sans chapitres ou
+    ffmpeg introuvable pour l'assemblage).
+    """
+    if not duree_source or not registre_outils.est_disponible("ffmpeg"):
+        return []
+    return decouper_en_segments(duree_source, duree_segment, chapitres_fichier(fichier))
@@ -1,8 +1,9 @@
 import os
 import json
 import logging
+import threading
 from datetime import datetime
-from constants import state_file
+from constants import state_file, fichier_journal_etat, taille_max_journal
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
@@ -11,10 +12,180 @@ logger = logging.getLogger(__name__)
 STATE_FILE = state_file
 
 
+class JournalEncodages:
+    """
+    État de la file d'encodage sauvegardé pour la reprise après une interruption :
+    un instantané (fichier d'état JSON) suivi d'un journal des modifications
+    effectuées depuis (une ligne JSON par événement).
+
+    Chaque modification ne coûte qu'un ajout en fin de journal ; au-delà de
+    'taille_max' lignes, le journal est compacté dans un nouvel instantané écrit de
+    façon atomique. Les événements sont numérotés : ceux déjà inclus dans
+    l'instantané sont ignorés à la relecture, même si le journal n'a pas pu être
+    vidé après son écriture.
+
+    Événements (tâches identifiées par leur clé "id", voir FileTaches) :
+    ajout, retrait, deplacement (nouvelle position), vidage, debut (la tâche passe
+    de la file aux encodages en cours), fin et echec (l'encodage en cours est
+    terminé). Les encodages commencés mais jamais terminés sont repris en premier.
+    """
+
+    def __init__(self, fichier_etat, fichier_journal, taille_max=taille_max_journal):
+        self.fichier_etat = fichier_etat
+        self.fichier_journal = fichier_journal
+        self.taille_max = taille_max
+        self._lock = threading.RLock()
+        self._etat = {"file": [], "en_cours": []}
+        self._sequence = 0
+        self._lignes = 0
+        # Rien n'est écrit avant demarrer() : l'état précédent reste disponible
+        self.actif = False
+
+    @staticmethod
+    def appliquer(etat, evenement):
+        """Applique un événement du journal à un état {"file": [...], "en_cours": [...]}."""
+        op = evenement.get("op")
+        id_tache = evenement.get("id")
+        file = etat["file"]
+
+        def extraire(taches):
+            for index, tache in enumerate(taches):
+                if tache.get("id") == id_tache:
+                    return taches.pop(index)
+            return None
+
+        if op == "ajout":
+            file.append(evenement["tache"])
+        elif op == "retrait":
+            extraire(file)
+        elif op == "deplacement":
+            tache = extraire(file)
+            if tache is not None:
+                file.insert(evenement.get("position", len(file)), tache)
+        elif op == "vidage":
+            file.clear()
+        elif op == "debut":
+            tache = extraire(file)
+            if tache is not None:
+                etat["en_cours"].append(tache)
+        elif op in ("fin", "echec"):
+            extraire(etat["en_cours"])
+
+    def _lire(self):
+        """Relit l'instantané puis les événements du journal qui le suivent."""
+        etat = {"file": [], "en_cours": []}
+        sequence = 0
+        if os.path.exists(self.fichier_etat):
+            with open(self.fichier_etat, "r", encoding="utf-8") as f:
+                instantane = json.load(f)
+            sequence = instantane.get("sequence", 0)
+            etat["en_cours"] = list(
+                instantane.get("encodages_en_cours")
+                or (
+                    [instantane["current_encoding"]]
+                    if instantane.get("current_encoding")
+                    else []
+                )
+            )
+            etat["file"] = list(instantane.get("encoding_queue", []))
+
+        lignes = 0
+        if os.path.exists(self.fichier_journal):
+            with open(self.fichier_journal, "r", encoding="utf-8") as f:
+                for ligne in f:
+                    try:
+                        evenement = json.loads(ligne)
+                    except ValueError:
+                        # Dernière ligne tronquée par un arrêt pendant l'écriture
+                        break
+                    lignes += 1
+                    if evenement.get("seq", 0) > sequence:
+                        self.appliquer(etat, evenement)
+                        sequence = evenement["seq"]
+        return etat, sequence, lignes
+
+    def charger(self):
+        """
+        Retourne l'état sauvegardé au format de load_interrupted_encodings(), ou None
+        s'il n'y a aucun encodage à reprendre.
+        """
+        with self._lock:
+            etat, _, _ = self._lire()
+        if not etat["file"] and not etat["en_cours"]:
+            return None
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "current_encoding": etat["en_cours"][0] if etat["en_cours"] else None,
+            "encodages_en_cours": etat["en_cours"],
+            "encoding_queue": etat["file"],
+        }
+
+    def demarrer(self, taches, en_cours=()):
+        """
+        Remplace l'état sauvegardé par un instantané des tâches données, puis
+        journalise les modifications suivantes.
+        """
+        with self._lock:
+            self._etat = {"file": list(taches), "en_cours": list(en_cours)}
+            self._instantane()
+            self.actif = True
+
+    def enregistrer(self, op, **donnees):
+        """Ajoute un événement au journal (sans effet tant que demarrer() n'a pas été appelé)."""
+        with self._lock:
+            if not self.actif:
+                return
+            self._sequence += 1
+            evenement = {"seq": self._sequence, "op": op, **donnees}
+            self.appliquer(self._etat, evenement)
+            try:
+                with open(self.fichier_journal, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(evenement, ensure_ascii=False) + "\n")
+                self._lignes += 1
+                if self._lignes >= self.taille_max:
+                    self._instantane()
+            except OSError as e:
+                logger.error(f"Erreur lors de l'écriture du journal des encodages: {e}")
+
+    def _instantane(self):
+        etat = {
+            "timestamp": datetime.now().isoformat(),
+            "sequence": self._sequence,
+            "current_encoding": (
+                self._etat["en_cours"][0] if self._etat["en_cours"] else None
+            ),
+            "encodages_en_cours": self._etat["en_cours"],
+            "encoding_queue": self._etat["file"],
+        }
+        os.makedirs(os.path.dirname(self.fichier_etat) or ".", exist_ok=True)
+        temporaire = f"{self.fichier_etat}.tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(etat, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaire, self.fichier_etat)
+        # Les événements du journal sont maintenant inclus dans l'instantané
+        open(self.fichier_journal, "w").close()
+        self._lignes = 0
+
+    def effacer(self):
+        """Supprime l'état sauvegardé ; les modifications suivantes restent journalisées."""
+        with self._lock:
+            self._etat = {"file": [], "en_cours": []}
+            self._lignes = 0
+            for fichier in (self.fichier_etat, self.fichier_journal):
+                if os.path.exists(fichier):
+                    os.remove(fichier)
+
+
+# Journal partagé par la file d'encodage, les workers et la reprise au démarrage
+journal_encodages = JournalEncodages(STATE_FILE, fichier_journal_etat)
+
+
 def save_interrupted_encodings(current_encoding=None, encoding_queue=None):
     """
-    Sauvegarde les informations sur l'encodage interrompu et la file d'attente dans un fichier JSON.
-    Ne sauvegarde pas l'état détaillé de l'encodage, juste les fichiers à encoder.
+    Sauvegarde un instantané complet de l'encodage en cours et de la file d'attente,
+    puis journalise les modifications suivantes (voir JournalEncodages).
 
     Args:
         current_encoding (dict, optional): Informations sur l'encodage en cours.
@@ -26,50 +197,9 @@ def save_interrupted_encodings(current_encoding=None, encoding_queue=None):
         bool: True si la sauvegarde a réussi, False sinon.
     """
     try:
-        # Vérifier si le chemin du fichier en cours est un chemin absolu
-        if current_encoding and "file" in current_encoding:
-            fichier = current_encoding["file"]
-            if fichier and not os.path.isabs(fichier):
-                logger.warning(
-                    f"Le chemin du fichier en cours n'est pas absolu: {fichier}"
-                )
-                # On ne modifie pas le chemin ici, on le laisse tel quel
-                # Le code dans main.py se chargera de trouver le chemin complet lors du chargement
-
-        # Vérifier si les chemins des fichiers dans la file d'attente sont des chemins absolus
-        if encoding_queue:
-            for item in encoding_queue:
-                if "file" in item:
-                    fichier = item["file"]
-                    if fichier and not os.path.isabs(fichier):
-                        logger.warning(
-                            f"Le chemin d'un fichier dans la file d'attente n'est pas absolu: {fichier}"
-                        )
-                        # On ne modifie pas le chemin ici, on le laisse tel quel
-                        # Le code dans main.py se chargera de trouver le chemin complet lors du chargement
-
-        # Préparer les données à sauvegarder
-        # Charger l'état existant s'il y en a un
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
-        else:
-            state = {}
-        old_current_encoding = state.get("current_encoding", None)
-
-        state = {
-            "timestamp": datetime.now().isoformat(),
-            "current_encoding": (
-                current_encoding
-                if current_encoding is not None
-                else old_current_encoding
-            ),
-            "encoding_queue": encoding_queue if encoding_queue else [],
-        }
-        # Sauvegarder dans un fichier JSON
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-
+        journal_encodages.demarrer(
+            encoding_queue or [], [current_encoding] if current_encoding else []
+        )
         logger.info(f"Encodages interrompus sauvegardés dans {STATE_FILE}")
         return True
 
@@ -82,44 +212,40 @@ def save_interrupted_encodings(current_encoding=None, encoding_queue=None):
 
 def load_interrupted_encodings():
     """
-    Charge les informations sur les encodages interrompus depuis le fichier JSON.
+    Charge les informations sur les encodages interrompus : instantané et événements
+    du journal qui le suivent.
 
     Returns:
         dict: Informations sur les encodages interrompus ou None si aucun n'est trouvé ou en cas d'erreur.
             Format: {
                 "timestamp": horodatage,
                 "current_encoding": {"file": chemin_fichier, "preset": preset, "folder": dossier},
+                "encodages_en_cours": [{"file": ..., "preset": ..., "folder": ...}, ...],
                 "encoding_queue": [{"file": chemin_fichier, "preset": preset, "folder": dossier}, ...]
             }
     """
-    if not os.path.exists(STATE_FILE):
-        logger.info("Aucun fichier d'encodages interrompus trouvé")
-        return None
-
     try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            state = json.load(f)
-
-        logger.info(f"Encodages interrompus chargés depuis {STATE_FILE}")
-        return state
-
+        state = journal_encodages.charger()
     except Exception as e:
         logger.error(f"Erreur lors du chargement des encodages interrompus: {str(e)}")
         return None
 
+    if state is None:
+        logger.info("Aucun encodage interrompu trouvé")
+        return None
+    logger.info(f"Encodages interrompus chargés depuis {STATE_FILE}")
+    return state
+
 
 def clear_interrupted_encodings():
     """
-    Supprime le fichier d'encodages interrompus s'il existe.
+    Supprime l'instantané et le journal des encodages interrompus s'ils existent.
 
     Returns:
-        bool: True si la suppression a réussi ou si le fichier n'existait pas, False en cas d'erreur.
+        bool: True si la suppression a réussi ou si les fichiers n'existaient pas, False en cas d'erreur.
     """
-    if not os.path.exists(STATE_FILE):
-        return True
-
     try:
-        os.remove(STATE_FILE)
+        journal_encodages.effacer()
         logger.info(f"Fichier d'encodages interrompus supprimé: {STATE_FILE}")
         return True
 
@@ -132,9 +258,13 @@ def clear_interrupted_encodings():
 
 def has_interrupted_encodings():
     """
-    Vérifie si un fichier d'encodages interrompus existe.
+    Vérifie s'il reste des encodages interrompus à reprendre.
 
     Returns:
-        bool: True si un fichier d'encodages interrompus existe, False sinon.
+        bool: True si des encodages interrompus ont été sauvegardés, False sinon.
     """
-    return os.path.exists(STATE_FILE)
+    if not (
+        os.path.exists(STATE_FILE) or os.path.exists(journal_encodages.fichier_journal)
+    ):
+        return False
+    return load_interrupted_encodings() is not None
@@ -1,9 +1,10 @@
-import os
-import subprocess
 import json
 
 from subtitle_collector import collect_subtitle_title
 from logger import setup_logger
+from probe_cache import cache_sondes
+from tool_registry import registre_outils
+from process_launcher import executer
 
 # Configuration du logger
 logger = setup_logger(__name__)
@@ -12,6 +13,8 @@ logger = setup_logger(__name__)
 def obtenir_info_mediainfo(fichier_mkv):
     """
     Obtenir des informations sur les pistes de sous-titres d'un fichier MKV.
+    MediaInfo n'est exécuté que si le fichier n'a pas déjà été analysé depuis
+    sa dernière modification.
 
     Args:
         fichier_mkv: Chemin du fichier MKV à analyser
@@ -19,43 +22,35 @@ def obtenir_info_mediainfo(fichier_mkv):
     Returns:
         Informations JSON des pistes de sous-titres
     """
+    return cache_sondes.obtenir(fichier_mkv, "mediainfo", executer_mediainfo)
+
+
+def executer_mediainfo(fichier_mkv):
+    """
+    Exécute MediaInfo sur un fichier MKV.
+
+    Args:
+        fichier_mkv: Chemin du fichier MKV à analyser
+
+    Returns:
+        Informations JSON des pistes, ou un message d'erreur
+    """
     try:
-        # Options pour éviter la fenêtre
-        process_flags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
-
-        # Vérifier si mediainfo est disponible
-        try:
-            version_check = subprocess.run(
-                ["mediainfo", "--Version"],
-                capture_output=True,
-                text=True,
-                creationflags=process_flags,
-            )
-            print(f"Version MediaInfo: {version_check.stdout.strip()}")
-        except Exception as e:
-            print(f"Erreur lors de la vérification de MediaInfo: {e}")
-            # Si MediaInfo n'est pas dans le PATH, essayer avec un chemin explicite
-            mediainfo_paths = [
-                r"C:\Program Files\MediaInfo\MediaInfo.exe",
-                r"C:\Program Files (x86)\MediaInfo\MediaInfo.exe",
-            ]
-            for path in mediainfo_paths:
-                if os.path.exists(path):
-                    print(f"MediaInfo trouvé à: {path}")
-                    return obtenir_info_mediainfo_explicit_path(fichier_mkv, path)
+        # Chemin de MediaInfo localisé une fois pour toutes au démarrage
+        mediainfo_path = registre_outils.chemin("mediainfo")
+        if mediainfo_path is None:
             return "MediaInfo non trouvé sur le système"
 
         # Exécuter MediaInfo avec les options appropriées
         print(f"Exécution de MediaInfo pour le fichier: {fichier_mkv}")
-        resultat = subprocess.run(
+        resultat = executer(
             [
-                "mediainfo",
+                mediainfo_path,
                 "--Output=JSON",
                 fichier_mkv,
             ],
             capture_output=True,
             text=True,
-            creationflags=process_flags,
         )
 
         # Vérifier si MediaInfo a renvoyé une erreur
@@ -81,21 +76,6 @@ def obtenir_info_mediainfo(fichier_mkv):
         return f"Une erreur s'est produite : {e}"
 
 
-def obtenir_info_mediainfo_explicit_path(fichier_mkv, mediainfo_path):
-    """Version avec chemin explicite vers MediaInfo"""
-    try:
-        process_flags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
-        resultat = subprocess.run(
-            [mediainfo_path, "--Output=JSON", fichier_mkv],
-            capture_output=True,
-            text=True,
-            creationflags=process_flags,
-        )
-        return json.loads(resultat.stdout)
-    except Exception as e:
-        return f"Une erreur avec le chemin explicite: {e}"
-
-
 def analyser_sous_titres_francais(fichier_mkv, preset, verbose=False):
     """
     Analyse les sous-titres français d'un fichier MKV, détermine leur type et détecte les variantes régionales
@@ -1,48 +1,176 @@
 import os
 import json
+import socket
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from logger import setup_logger
 from constants import fichier_historique
 
 # Configuration du logger
 logger = setup_logger(__name__)
 
-# Chemin du fichier pour stocker les encodages réussis
+# Chemin du fichier pour stocker les encodages réussis (JSON Lines : un encodage par
+# ligne, ajoutés dans l'ordre chronologique)
 SUCCESSFUL_ENCODINGS_FILE = fichier_historique
 
+# Verrou des ajouts et de la compaction de l'historique
+_verrou = threading.Lock()
+
+
+def ancien_fichier_historique():
+    """Chemin de l'ancien historique (liste JSON unique), migré au premier accès."""
+    return os.path.splitext(SUCCESSFUL_ENCODINGS_FILE)[0] + ".json"
+
 
 def ensure_file_exists():
     """
     S'assure que le fichier des encodages réussis existe.
-    Crée le fichier et le dossier parent si nécessaire.
+    Crée le fichier et le dossier parent si nécessaire, en reprenant le contenu de
+    l'ancien historique JSON s'il existe.
     """
     directory = os.path.dirname(SUCCESSFUL_ENCODINGS_FILE)
     if not os.path.exists(directory):
         os.makedirs(directory)
 
     if not os.path.exists(SUCCESSFUL_ENCODINGS_FILE):
-        with open(SUCCESSFUL_ENCODINGS_FILE, "w") as f:
-            json.dump([], f)
+        with _verrou:
+            if not os.path.exists(SUCCESSFUL_ENCODINGS_FILE):
+                migrer_ancien_historique()
+
+
+def migrer_ancien_historique():
+    """
+    Convertit l'ancien historique JSON en JSON Lines trié par horodatage, puis
+    renomme l'ancien fichier en .bak. Crée un historique vide s'il n'existe pas.
+    """
+    ancien = ancien_fichier_historique()
+    encodings = []
+    if os.path.exists(ancien):
+        try:
+            with open(ancien, "r") as f:
+                encodings = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Ancien historique illisible, non migré: {e}")
+            encodings = []
+        encodings.sort(key=lambda x: x.get("timestamp", 0))
+
+    temporaire = f"{SUCCESSFUL_ENCODINGS_FILE}.tmp"
+    with open(temporaire, "w", encoding="utf-8") as f:
+        for encoding in encodings:
+            f.write(json.dumps(encoding, ensure_ascii=False) + "\n")
+    os.replace(temporaire, SUCCESSFUL_ENCODINGS_FILE)
+
+    if encodings:
+        os.replace(ancien, f"{ancien}.bak")
+        logger.info(
+            f"Historique migré au format JSON Lines ({len(encodings)} encodages)"
+        )
+
+
+def _lire_ligne(ligne):
+    """Décode une ligne de l'historique, ou None si elle est vide ou tronquée."""
+    try:
+        encoding = json.loads(ligne)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return encoding if isinstance(encoding, dict) else None
+
+
+def _horodatage_ligne(ligne):
+    encoding = _lire_ligne(ligne)
+    return encoding.get("timestamp", 0) if encoding else 0
+
 
+def _position_depuis(f, taille, horodatage):
+    """
+    Recherche par dichotomie le début de la première ligne dont l'horodatage est
+    supérieur ou égal à 'horodatage', sans lire tout le fichier (les encodages
+    sont ajoutés dans l'ordre chronologique).
+
+    Arguments:
+    f -- Fichier de l'historique ouvert en binaire.
+    taille -- Taille du fichier en octets.
+    horodatage -- Horodatage recherché.
+
+    Retourne:
+    La position de la ligne en octets, ou 'taille' si aucune ligne ne convient.
+    """
+    # 'bas' est toujours un début de ligne ; la réponse est comprise entre bas et haut
+    bas, haut = 0, taille
+    while bas < haut:
+        milieu = (bas + haut) // 2
+        if milieu > bas:
+            f.seek(milieu - 1)
+            f.readline()
+            debut = f.tell()
+        else:
+            debut = bas
+        if debut >= haut:
+            # Aucune ligne ne commence dans la seconde moitié : avancer d'une ligne
+            f.seek(bas)
+            ligne = f.readline()
+            if _horodatage_ligne(ligne) >= horodatage:
+                return bas
+            bas = f.tell()
+            continue
+        f.seek(debut)
+        ligne = f.readline()
+        if _horodatage_ligne(ligne) >= horodatage:
+            haut = debut
+        else:
+            bas = f.tell()
+    return bas
 
-def record_successful_encoding(file_path, file_size):
+
+def lire_historique(depuis=None):
+    """
+    Retourne les encodages réussis enregistrés, du plus ancien au plus récent.
+
+    Arguments:
+    depuis -- Horodatage minimal (optionnel). Seule la fin du fichier à partir de
+              cet horodatage est lue.
+    """
+    ensure_file_exists()
+
+    try:
+        with open(SUCCESSFUL_ENCODINGS_FILE, "rb") as f:
+            if depuis is not None:
+                taille = os.fstat(f.fileno()).st_size
+                f.seek(_position_depuis(f, taille, depuis))
+            encodings = [_lire_ligne(ligne) for ligne in f]
+    except OSError:
+        return []
+    return [
+        encoding
+        for encoding in encodings
+        if encoding is not None
+        and (depuis is None or encoding.get("timestamp", 0) >= depuis)
+    ]
+
+
+def charger_historique():
+    """
+    Retourne tous les encodages réussis enregistrés, du plus ancien au plus récent.
+    """
+    return lire_historique()
+
+
+def record_successful_encoding(file_path, file_size, details=None):
     """
     Enregistre un encodage réussi avec l'horodatage, le nom du fichier et sa taille.
+    L'enregistrement est ajouté en fin d'historique sans relire le fichier.
 
     Arguments:
     file_path -- Chemin du fichier encodé
     file_size -- Taille du fichier en MB
+    details -- Informations sur l'encodage servant aux estimations (optionnel) :
+               source, duree_source (s), largeur, hauteur, codec, preset,
+               duree_encodage (s), fps_moyen, taille_source (MB) et remux (True
+               si les pistes ont été copiées sans réencodage)
     """
     ensure_file_exists()
 
-    # Charger les encodages existants
-    try:
-        with open(SUCCESSFUL_ENCODINGS_FILE, "r") as f:
-            encodings = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        encodings = []
-
     # Créer un nouvel enregistrement
     timestamp = time.time()
     filename = os.path.basename(file_path)
@@ -53,14 +181,62 @@ def record_successful_encoding(file_path, file_size):
         "filename": filename,
         "file_path": file_path,
         "file_size": round(file_size, 2),  # Arrondir à 2 décimales
+        "hote": socket.gethostname(),
     }
+    if details:
+        new_encoding.update(details)
 
-    # Ajouter le nouvel enregistrement
-    encodings.append(new_encoding)
+    ligne = json.dumps(new_encoding, ensure_ascii=False) + "\n"
+    with _verrou:
+        with open(SUCCESSFUL_ENCODINGS_FILE, "ab+") as f:
+            # Terminer une éventuelle ligne tronquée (arrêt pendant une écriture)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    ligne = "\n" + ligne
+            f.write(ligne.encode("utf-8"))
 
-    # Sauvegarder les encodages mis à jour
-    with open(SUCCESSFUL_ENCODINGS_FILE, "w") as f:
-        json.dump(encodings, f, indent=4)
+
+def compacter_historique(retention_jours):
+    """
+    Supprime de l'historique les encodages plus anciens que la durée de rétention,
+    en réécrivant le fichier de façon atomique.
+
+    Arguments:
+    retention_jours -- Nombre de jours conservés (0 ou moins : tout conserver).
+
+    Retourne:
+    Le nombre d'octets supprimés.
+    """
+    if not retention_jours or retention_jours <= 0:
+        return 0
+    ensure_file_exists()
+
+    limite = time.time() - retention_jours * 86400
+    temporaire = f"{SUCCESSFUL_ENCODINGS_FILE}.tmp"
+    with _verrou:
+        try:
+            with open(SUCCESSFUL_ENCODINGS_FILE, "rb") as f:
+                taille = os.fstat(f.fileno()).st_size
+                position = _position_depuis(f, taille, limite)
+                if position == 0:
+                    return 0
+                f.seek(position)
+                with open(temporaire, "wb") as sortie:
+                    while True:
+                        bloc = f.read(1024 * 1024)
+                        if not bloc:
+                            break
+                        sortie.write(bloc)
+            os.replace(temporaire, SUCCESSFUL_ENCODINGS_FILE)
+        except OSError as e:
+            logger.error(f"Erreur lors de la compaction de l'historique: {e}")
+            return 0
+
+    logger.info(
+        f"Historique compacté : encodages de plus de {retention_jours} jours supprimés"
+    )
+    return position
 
 
 def get_recent_encodings(hours=72):
@@ -73,23 +249,11 @@ def get_recent_encodings(hours=72):
     Retourne:
     Une liste d'encodages réussis, triée du plus récent au plus ancien
     """
-    ensure_file_exists()
-
-    try:
-        with open(SUCCESSFUL_ENCODINGS_FILE, "r") as f:
-            encodings = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
-
     # Calculer le timestamp limite
     cutoff_time = time.time() - (hours * 3600)
 
-    # Filtrer les encodages récents
-    recent_encodings = [
-        encoding
-        for encoding in encodings
-        if encoding.get("timestamp", 0) >= cutoff_time
-    ]
+    # Lire uniquement les encodages récents
+    recent_encodings = lire_historique(depuis=cutoff_time)
 
     # Trier par timestamp décroissant (plus récent en premier)
     recent_encodings.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
@@ -1,25 +1,47 @@
 import os
-import time
-from file_handling import charger_fichiers, sauvegarder_fichiers
-from constants import debug_mode, fichier_encodes, fichier_sauvegarde, extensions
+from file_handling import EtatFichiers
+from media_index import IndexMedias, empreinte_fichier
+from constants import (
+    debug_mode,
+    fichier_encodes,
+    fichier_sauvegarde,
+    extensions,
+    intervalle_surveillance,
+)
+from config import load_config
+from folder_watcher import creer_detecteur, obtenir_fichiers
+from file_stability import FiltreStabilite
+from encoding import copier_file_attente
 from utils import horodatage
 from logger import colored_log, setup_logger
-from state_persistence import save_interrupted_encodings
 
 logger = setup_logger(__name__)
 
 
-def obtenir_fichiers(dossier):
+def reprendre_fichiers_en_attente(
+    dossiers_presets, fichiers_detectes, fichiers_encodes, filtre_stabilite
+):
     """
-    Retourne un ensemble de fichiers présents dans le dossier et ses sous-dossiers dont les extensions
-    correspondent à celles spécifiées dans la liste 'extensions'.
+    Remet en attente de stabilisation les fichiers détectés lors d'une exécution
+    précédente mais jamais ajoutés à la file (téléchargement encore en cours à
+    l'arrêt) : le parcours initial les considère comme connus et ne les
+    signalerait plus comme nouveaux.
+
+    Retourne:
+    Le nombre de fichiers remis en attente.
     """
-    fichiers = set()
-    for root, _, files in os.walk(dossier):
-        for fichier in files:
-            if os.path.splitext(fichier)[1].lower() in extensions:
-                fichiers.add(os.path.join(root, fichier))
-    return fichiers
+    repris = 0
+    for dossier, preset in dossiers_presets.items():
+        for fichier in list(fichiers_detectes.dossiers.get(dossier, ())):
+            if fichiers_encodes.contient(dossier, fichier):
+                continue
+            if not os.path.exists(fichier):
+                # Fichier supprimé pendant l'arrêt
+                fichiers_detectes.retirer(dossier, fichier)
+                continue
+            filtre_stabilite.ajouter(fichier, dossier=dossier, preset=preset)
+            repris += 1
+    return repris
 
 
 def surveille_dossiers(
@@ -42,44 +64,60 @@ def surveille_dossiers(
     )
     logger.info("=" * 100)
 
-    def safe_load_files(file_path):
+    def safe_load_files(etat):
         """Lecture sécurisée d'un fichier JSON."""
         try:
-            return charger_fichiers(file_path)
+            etat.charger()
         except Exception as e:
-            logger.warning(f"Impossible de charger le fichier {file_path}: {str(e)}")
-            return {}
+            logger.warning(f"Impossible de charger le fichier {etat.fichier}: {str(e)}")
+        return etat
 
-    def safe_save_files(file_path, data):
-        """Écriture sécurisée dans un fichier JSON."""
+    def safe_save_files(etat):
+        """Écriture sécurisée dans un fichier JSON, seulement si l'état a changé."""
         try:
-            sauvegarder_fichiers(file_path, data)
+            etat.sauvegarder_si_necessaire()
         except Exception as e:
             logger.warning(
-                f"Impossible de sauvegarder le fichier {file_path}: {str(e)}"
+                f"Impossible de sauvegarder le fichier {etat.fichier}: {str(e)}"
             )
 
     try:
         # Charger les fichiers détectés et encodés à partir des fichiers de sauvegarde
-        fichiers_detectes = safe_load_files(fichier_sauvegarde)
-        fichiers_encodes = safe_load_files(fichier_encodes)
+        fichiers_detectes = safe_load_files(EtatFichiers(fichier_sauvegarde))
+        fichiers_encodes = safe_load_files(EtatFichiers(fichier_encodes))
+        # Médias déjà traités, tous dossiers confondus, par chemin et par contenu
+        index_medias = safe_load_files(IndexMedias())
+        ignorer_doublons = load_config().get("ignorer_doublons", True)
 
         # Obtenir la liste initiale des fichiers dans chaque dossier
-        fichiers_initiaux = {
-            dossier: obtenir_fichiers(dossier) for dossier in dossiers_presets
-        }
+        # (notifications du système de fichiers si possible, scrutation sinon)
+        detecteur = creer_detecteur(
+            list(dossiers_presets), load_config().get("mode_surveillance", "auto")
+        )
+        logger.info(f"Mode de surveillance des dossiers: {detecteur.mode}")
+
+        # Les fichiers détectés restent en attente tant qu'ils sont en cours d'écriture
+        filtre_stabilite = FiltreStabilite(
+            load_config().get("delai_stabilite_fichier", 30)
+        )
+        repris = reprendre_fichiers_en_attente(
+            dossiers_presets, fichiers_detectes, fichiers_encodes, filtre_stabilite
+        )
+        if repris:
+            logger.info(
+                f"{repris} fichier(s) détecté(s) non encodé(s) remis en attente"
+            )
 
         print(f"{horodatage()} 🔍 Surveillance initiale des dossiers terminée.")
 
         while True:
+            # Attendre les changements dans les dossiers surveillés
+            changements = detecteur.attendre_changements(intervalle_surveillance)
+
             # Indique si au moins un nouveau fichier a été ajouté à la file durant ce cycle
             nouveaux_detectes_dans_cycle = False
-            for dossier, preset in dossiers_presets.items():
-                # Obtenir la liste actuelle des fichiers dans le dossier
-                fichiers_actuels = obtenir_fichiers(dossier)
-                # Déterminer les nouveaux fichiers et les fichiers supprimés
-                nouveaux_fichiers = fichiers_actuels - fichiers_initiaux[dossier]
-                fichiers_supprimes = fichiers_initiaux[dossier] - fichiers_actuels
+            for dossier, (nouveaux_fichiers, fichiers_supprimes) in changements.items():
+                preset = dossiers_presets[dossier]
 
                 # Traiter les nouveaux fichiers détectés
                 if nouveaux_fichiers:
@@ -90,77 +128,93 @@ def surveille_dossiers(
                         ):
                             # Ignorer les fichiers déjà encodés
                             continue
-                        if dossier not in fichiers_detectes:
-                            fichiers_detectes[dossier] = []
-                        fichiers_detectes[dossier].append(fichier)
-
-                        # Vérifier si le fichier est toujours accessible
-                        if os.path.exists(fichier) and os.access(fichier, os.R_OK):
-                            # Ajouter le fichier à la file d'attente s'il n'a pas déjà été encodé
-                            if fichier not in fichiers_encodes.get(dossier, []):
-                                file_encodage.put(
-                                    {
-                                        "folder": dossier,
-                                        "file": fichier,
-                                        "preset": preset,
-                                    }
-                                )
-                                if dossier not in fichiers_encodes:
-                                    fichiers_encodes[dossier] = []
-                                fichiers_encodes[dossier].append(fichier)
-
-                                colored_log(
-                                    logger,
-                                    f"Fichier {os.path.basename(fichier)} ajouté à la file d'encodage avec preset {preset}",
-                                    "INFO",
-                                    "skyblue",
-                                )
-                                # Marquer qu'on a détecté quelque chose dans ce cycle
-                                nouveaux_detectes_dans_cycle = True
-
-                                # Mettre à jour l'interface graphique
-                                if signals:
-                                    # Créer une copie temporaire de la queue pour l'affichage
-                                    queue_items = list(file_encodage.queue)
-                                    signals.update_queue.emit(queue_items)
-
-                                    # Sauvegarder l'état des encodages interrompus
-                                    # L'encodage en cours est None car on vient d'ajouter un fichier à la queue
-                                    save_interrupted_encodings(None, queue_items)
-                        else:
-                            logger.error(
-                                f"Le fichier {fichier} n'est plus accessible, ignoré"
+                        fichiers_detectes.ajouter(dossier, fichier)
+
+                        # Attendre que le fichier soit entièrement écrit avant de l'encoder
+                        if not fichiers_encodes.contient(dossier, fichier):
+                            filtre_stabilite.ajouter(
+                                fichier, dossier=dossier, preset=preset
                             )
+                            if debug_mode:
+                                logger.debug(
+                                    f"Fichier en attente de stabilisation: {fichier}"
+                                )
 
                 # Traiter les fichiers supprimés détectés
                 if fichiers_supprimes:
                     for fichier in fichiers_supprimes:
                         if debug_mode:
                             logger.debug(f"Fichier supprimé dans {dossier}: {fichier}")
-                        if (
-                            dossier in fichiers_detectes
-                            and fichier in fichiers_detectes[dossier]
-                        ):
-                            fichiers_detectes[dossier].remove(fichier)
-                        if (
-                            dossier in fichiers_encodes
-                            and fichier in fichiers_encodes[dossier]
-                        ):
-                            fichiers_encodes[dossier].remove(fichier)
-
-                # Mettre à jour la liste des fichiers initialement détectés pour le prochain cycle
-                fichiers_initiaux[dossier] = fichiers_actuels
+                        filtre_stabilite.retirer(fichier)
+                        fichiers_detectes.retirer(dossier, fichier)
+                        fichiers_encodes.retirer(dossier, fichier)
+
+            # Ajouter à la file les fichiers dont l'écriture est terminée
+            for fichier, infos in filtre_stabilite.fichiers_prets():
+                dossier = infos["dossier"]
+                preset = infos["preset"]
+
+                # Vérifier si le fichier est toujours accessible
+                if not (os.path.exists(fichier) and os.access(fichier, os.R_OK)):
+                    logger.error(f"Le fichier {fichier} n'est plus accessible, ignoré")
+                    continue
+
+                # Ajouter le fichier à la file d'attente s'il n'a pas déjà été encodé
+                if fichiers_encodes.contient(dossier, fichier):
+                    continue
+
+                # Ignorer les fichiers au contenu identique à un média déjà traité
+                # (fichier renommé, téléchargé à nouveau ou présent dans un autre dossier)
+                empreinte = empreinte_fichier(fichier)
+                original = index_medias.doublon(fichier, empreinte)
+                if original is not None and ignorer_doublons:
+                    if original == fichier:
+                        message = "déjà traité avec le même contenu"
+                    else:
+                        message = f"identique à {original}"
+                    colored_log(
+                        logger,
+                        f"Fichier {os.path.basename(fichier)} {message}, ignoré",
+                        "WARNING",
+                        "orange",
+                    )
+                    fichiers_encodes.ajouter(dossier, fichier)
+                    continue
+                index_medias.enregistrer(fichier, empreinte)
+
+                file_encodage.put(
+                    {
+                        "folder": dossier,
+                        "file": fichier,
+                        "preset": preset,
+                    }
+                )
+                fichiers_encodes.ajouter(dossier, fichier)
+
+                colored_log(
+                    logger,
+                    f"Fichier {os.path.basename(fichier)} ajouté à la file d'encodage avec preset {preset}",
+                    "INFO",
+                    "skyblue",
+                )
+                # Marquer qu'on a détecté quelque chose dans ce cycle
+                nouveaux_detectes_dans_cycle = True
+
+                # Mettre à jour l'interface graphique
+                if signals:
+                    # Créer une copie temporaire de la queue pour l'affichage
+                    queue_items = copier_file_attente(file_encodage)
+                    signals.update_queue.emit(queue_items)
 
             # Afficher un séparateur uniquement si des nouveaux fichiers ont été détectés
             if nouveaux_detectes_dans_cycle:
                 logger.info("=" * 100)
 
-            # Sauvegarder l'état actuel des fichiers détectés et encodés
-            safe_save_files(fichier_sauvegarde, fichiers_detectes)
-            safe_save_files(fichier_encodes, fichiers_encodes)
-
-            # Attendre avant le prochain cycle de surveillance
-            time.sleep(10)
+            # Sauvegarder les fichiers détectés et encodés s'ils ont changé
+            # (les modifications rapprochées sont regroupées)
+            safe_save_files(fichiers_detectes)
+            safe_save_files(fichiers_encodes)
+            safe_save_files(index_medias)
     except Exception as e:
         logger.error(
             f"Erreur dans la surveillance des dossiers: {str(e)}", exc_info=True
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core_scheduler import (
+    repartir_coeurs,
+    option_threads_encodeur,
+    OrdonnanceurCoeurs,
+)
+
+
+class TestRepartirCoeurs(unittest.TestCase):
+    def test_job_unique_recoit_tous_les_coeurs(self):
+        result = repartir_coeurs([("a", 1)], list(range(8)))
+        self.assertEqual(result, {"a": list(range(8))})
+
+    def test_repartition_ponderee(self):
+        result = repartir_coeurs([("4k", 4), ("dessin", 1)], list(range(32)))
+        self.assertEqual(len(result["4k"]) + len(result["dessin"]), 32)
+        self.assertGreater(len(result["4k"]), len(result["dessin"]))
+        # Les plages de cœurs ne se chevauchent pas
+        self.assertFalse(set(result["4k"]) & set(result["dessin"]))
+
+    def test_plus_de_jobs_que_de_coeurs(self):
+        result = repartir_coeurs([("a", 1), ("b", 1), ("c", 1)], [0, 1])
+        self.assertEqual(result, {"a": [0], "b": [1], "c": [0]})
+
+    def test_aucun_job(self):
+        self.assertEqual(repartir_coeurs([], [0, 1]), {})
+
+
+class TestOrdonnanceurCoeurs(unittest.TestCase):
+    def test_reequilibrage_au_demarrage_et_a_la_fin(self):
+        ordonnanceur = OrdonnanceurCoeurs(coeurs=list(range(10)))
+        self.assertEqual(ordonnanceur.enregistrer_job("film", "4K - 10bits"), 10)
+
+        threads = ordonnanceur.enregistrer_job("episode", "Dessins animes VF")
+        self.assertLess(threads, len(ordonnanceur.coeurs_attribues("film")))
+        self.assertEqual(
+            len(ordonnanceur.coeurs_attribues("film")) + threads,
+            10,
+        )
+
+        ordonnanceur.liberer_job("episode")
+        self.assertEqual(len(ordonnanceur.coeurs_attribues("film")), 10)
+
+    @patch("core_scheduler.psutil.Process")
+    def test_affinite_appliquee_aux_processus(self, mock_process):
+        ordonnanceur = OrdonnanceurCoeurs(coeurs=[0, 1, 2, 3])
+        ordonnanceur.enregistrer_job("a", "Films - Series VF")
+        ordonnanceur.attacher_processus("a", 1234)
+        mock_process.return_value.cpu_affinity.assert_called_with([0, 1, 2, 3])
+
+        ordonnanceur.enregistrer_job("b", "Films - Series VF")
+        mock_process.return_value.cpu_affinity.assert_called_with([0, 1])
+
+
+class TestOptionThreads(unittest.TestCase):
+    @patch("core_scheduler.obtenir_encodeur_preset", return_value="x265_10bit")
+    def test_encodeur_logiciel(self, _):
+        self.assertEqual(option_threads_encodeur("preset", 6), "--encopts=pools=6")
+
+    @patch("core_scheduler.obtenir_encodeur_preset", return_value="nvenc_h265")
+    def test_encodeur_materiel(self, _):
+        self.assertIsNone(option_threads_encodeur("preset", 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
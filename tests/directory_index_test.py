@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from directory_index import IndexDossiers
+from folder_watcher import obtenir_fichiers
+
+
+def creer_fichier(chemin):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin, "wb") as f:
+        f.write(b"data")
+
+
+def vieillir(dossier):
+    """Recule la date de modification de tous les répertoires de l'arborescence."""
+    passe = time.time() - 3600
+    for root, _, _ in os.walk(dossier):
+        os.utime(root, (passe, passe))
+
+
+class TestIndexDossiers(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.racine = os.path.join(self.test_dir, "Series")
+        creer_fichier(os.path.join(self.racine, "Saison 1", "e01.mkv"))
+        creer_fichier(os.path.join(self.racine, "Saison 1", "e01.nfo"))
+        creer_fichier(os.path.join(self.racine, "Saison 2", "e01.mp4"))
+        creer_fichier(os.path.join(self.racine, "film.avi"))
+        vieillir(self.racine)
+        self.fichier_index = os.path.join(self.test_dir, "index.json")
+        self.index = IndexDossiers(self.fichier_index)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_meme_resultat_que_parcours_complet(self):
+        self.assertEqual(
+            self.index.obtenir_fichiers(self.racine), obtenir_fichiers(self.racine)
+        )
+
+    def test_repertoires_inchanges_non_relus(self):
+        self.index.obtenir_fichiers(self.racine)
+        with patch.object(self.index, "_lister", wraps=self.index._lister) as lister:
+            self.index.obtenir_fichiers(self.racine)
+        lister.assert_not_called()
+
+    def test_seul_le_repertoire_modifie_est_relu(self):
+        self.index.obtenir_fichiers(self.racine)
+        nouveau = os.path.join(self.racine, "Saison 2", "e02.mkv")
+        creer_fichier(nouveau)
+        with patch.object(self.index, "_lister", wraps=self.index._lister) as lister:
+            fichiers = self.index.obtenir_fichiers(self.racine)
+        self.assertIn(nouveau, fichiers)
+        lister.assert_called_once()
+        self.assertEqual(lister.call_args[0][0], os.path.join(self.racine, "Saison 2"))
+
+    def test_sous_dossier_supprime(self):
+        self.index.obtenir_fichiers(self.racine)
+        shutil.rmtree(os.path.join(self.racine, "Saison 1"))
+        fichiers = self.index.obtenir_fichiers(self.racine)
+        self.assertEqual(fichiers, obtenir_fichiers(self.racine))
+        self.assertNotIn(os.path.join(self.racine, "Saison 1"), self.index.repertoires)
+
+    def test_index_conserve_entre_deux_lancements(self):
+        attendu = self.index.obtenir_fichiers(self.racine)
+        self.index.sauvegarder()
+
+        index = IndexDossiers(self.fichier_index)
+        with patch.object(index, "_lister", wraps=index._lister) as lister:
+            self.assertEqual(index.obtenir_fichiers(self.racine), attendu)
+        lister.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from encode_estimator import EstimateurEncodage, caracteristiques_media, temps_restant
+
+PRESET = "Films - Series VF"
+
+
+def enregistrement(duree_source, duree_encodage, taille_source, taille, largeur=1920):
+    return {
+        "file_size": taille,
+        "preset": PRESET,
+        "largeur": largeur,
+        "duree_source": duree_source,
+        "duree_encodage": duree_encodage,
+        "taille_source": taille_source,
+    }
+
+
+class TestEstimateurEncodage(unittest.TestCase):
+    def setUp(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"0" * 1024 * 1024)
+        self.fichier = f.name
+        # Historique introuvable : le modèle n'est construit que par entrainer()
+        self.estimateur = EstimateurEncodage(fichier=self.fichier + ".absent")
+
+    def tearDown(self):
+        os.remove(self.fichier)
+
+    def test_caracteristiques_du_scan(self):
+        scan = {
+            "TitleList": [
+                {
+                    "Duration": {"Hours": 1, "Minutes": 2, "Seconds": 3},
+                    "Geometry": {"Width": 1920, "Height": 1080},
+                    "VideoCodec": "h264",
+                }
+            ]
+        }
+        self.assertEqual(
+            caracteristiques_media(scan),
+            {"duree_source": 3723, "largeur": 1920, "hauteur": 1080, "codec": "h264"},
+        )
+        self.assertIsNone(caracteristiques_media(None)["duree_source"])
+
+    def test_estimation_par_vitesse_et_rapport_de_taille(self):
+        self.estimateur.entrainer(
+            [
+                enregistrement(3600, 1800, 4000, 1000),
+                enregistrement(3600, 1200, 4000, 1000),
+                enregistrement(3600, 3600, 4000, 1000),
+            ]
+        )
+        estimation = self.estimateur.estimer(
+            self.fichier, PRESET, {"duree_source": 1200, "largeur": 1920}
+        )
+        # Vitesse médiane : 2 secondes de vidéo par seconde d'encodage
+        self.assertAlmostEqual(estimation["duree"], 600)
+        self.assertAlmostEqual(estimation["taille"], 0.25)
+
+    def test_remux_ignore(self):
+        remux = dict(enregistrement(3600, 10, 4000, 4000), remux=True)
+        self.estimateur.entrainer([enregistrement(3600, 1800, 4000, 1000), remux])
+        estimation = self.estimateur.estimer(
+            self.fichier, PRESET, {"duree_source": 3600, "largeur": 1920}
+        )
+        self.assertAlmostEqual(estimation["duree"], 1800)
+
+    def test_repli_sur_le_debit_sans_duree_connue(self):
+        self.estimateur.entrainer([enregistrement(None, 100, 50, 10)])
+        estimation = self.estimateur.estimer(self.fichier, "Autre preset", {})
+        self.assertAlmostEqual(estimation["duree"], 2)
+
+    def test_sans_historique(self):
+        self.assertEqual(
+            self.estimateur.estimer(self.fichier, PRESET, {}),
+            {"duree": None, "taille": None},
+        )
+        self.assertIsNone(self.estimateur.estimer("/inexistant.mkv", PRESET, {}))
+
+    def test_temps_restant(self):
+        self.assertIsNone(temps_restant(10, 0))
+        self.assertEqual(temps_restant(10, 0, 100), 90)
+        self.assertEqual(temps_restant(50, 50), 50)
+        # À mi-parcours, moyenne de l'extrapolation (50) et de la prévision (150)
+        self.assertEqual(temps_restant(50, 50, 200), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from encoding_pool import PoolEncodage
+
+
+def faux_traitement(file_encodage, signals, drapeaux):
+    """Boucle d'un worker sans encodage : s'arrête comme traitement_file_encodage."""
+    while not (
+        drapeaux.get("stop") or drapeaux.get("retire") or drapeaux.get("closing")
+    ):
+        time.sleep(0.01)
+
+
+def attendre(condition, delai=5):
+    fin = time.monotonic() + delai
+    while not condition() and time.monotonic() < fin:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestPoolEncodage(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("encoding_pool.traitement_file_encodage", faux_traitement)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.control_flags = {"closing": False}
+        self.pool = PoolEncodage(MagicMock(), self.control_flags, taille=2)
+        self.abonne = MagicMock()
+        self.pool.abonner(self.abonne)
+
+    def tearDown(self):
+        self.control_flags["closing"] = True
+        attendre(lambda: not self.pool.workers)
+
+    def test_redimensionner(self):
+        self.pool.redimensionner(3)
+        self.assertEqual(self.pool.taille(), 3)
+        self.abonne.assert_called_with(3)
+
+        # Les workers sans encodage en cours sont retirés en premier
+        occupe = min(self.pool.workers)
+        self.pool.workers[occupe]["flags"]["en_cours"] = {"file": "a.mkv"}
+        self.pool.redimensionner(1)
+        self.assertEqual(self.pool.taille(), 1)
+        self.abonne.assert_called_with(1)
+        self.assertTrue(attendre(lambda: list(self.pool.workers) == [occupe]))
+
+        # Au moins un worker
+        self.pool.redimensionner(0)
+        self.assertEqual(self.pool.taille(), 1)
+
+    def test_controles_par_worker(self):
+        premier, second = sorted(self.pool.workers)
+        self.pool.basculer_pause(premier, True)
+        self.pool.passer(second)
+        drapeaux = {w: self.pool.workers[w]["flags"] for w in (premier, second)}
+        self.assertTrue(drapeaux[premier]["pause"])
+        self.assertFalse(drapeaux[second]["pause"])
+        self.assertTrue(drapeaux[second]["skip"])
+        self.assertFalse(drapeaux[premier]["skip"])
+
+        # Arrêter un worker le retire du pool et met à jour le nombre affiché
+        self.pool.arreter(premier)
+        self.assertTrue(drapeaux[premier]["stop"])
+        self.assertEqual(self.pool.taille(), 1)
+        self.abonne.assert_called_once_with(1)
+        self.assertTrue(attendre(lambda: list(self.pool.workers) == [second]))
+
+        # Le dernier worker n'est pas retiré : seul son encodage est interrompu
+        self.pool.arreter(second)
+        self.assertTrue(drapeaux[second]["stop_all"])
+        self.assertFalse(drapeaux[second]["stop"])
+        self.assertEqual(self.pool.taille(), 1)
+        self.abonne.assert_called_once_with(1)
+
+    def test_drapeaux_chaines_aux_drapeaux_globaux(self):
+        premier, second = sorted(self.pool.workers)
+        drapeaux = self.pool.workers[premier]["flags"]
+
+        # Les écritures d'un worker restent dans ses propres drapeaux
+        drapeaux["stop_all"] = True
+        self.assertNotIn("stop_all", self.control_flags)
+        self.assertFalse(self.pool.workers[second]["flags"]["stop_all"])
+
+        # Les drapeaux globaux absents du worker sont lus dans ceux de l'application
+        self.assertFalse(drapeaux["closing"])
+        self.control_flags["closing"] = True
+        self.assertTrue(drapeaux["closing"])
+        self.assertTrue(attendre(lambda: not self.pool.workers))
+
+    def test_pause_globale_appliquee_aux_nouveaux_workers(self):
+        self.pool.mettre_en_pause(True)
+        self.assertFalse(self.control_flags.get("pause", False))
+        self.pool.redimensionner(3)
+        self.assertTrue(
+            all(worker["flags"]["pause"] for worker in self.pool.workers.values())
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
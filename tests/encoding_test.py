@@ -0,0 +1,38 @@
+import unittest
+import sys
+import os
+import io
+import subprocess
+import time
+from queue import Queue
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from encoding import read_output, terminer_processus
+
+
+class TestLectureSortie(unittest.TestCase):
+    def test_lignes_puis_fin_de_flux(self):
+        file_sortie = Queue()
+        read_output(io.StringIO("Encoding: task 1 of 1, 1.00 %\nMuxing\n"), file_sortie)
+        self.assertEqual(file_sortie.get_nowait(), "Encoding: task 1 of 1, 1.00 %\n")
+        self.assertEqual(file_sortie.get_nowait(), "Muxing\n")
+        self.assertIsNone(file_sortie.get_nowait())
+
+    def test_arret_d_un_processus_silencieux(self):
+        # Un processus qui n'écrit rien ne doit pas bloquer son arrêt
+        process = subprocess.Popen(
+            [sys.executable, "-c", "import time; time.sleep(60)"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        debut = time.monotonic()
+        terminer_processus(process)
+        self.assertIsNotNone(process.returncode)
+        self.assertLess(time.monotonic() - debut, 5)
+        process.stdout.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Remplaçant de HandBrakeCLI pour les tests : reproduit les sorties utilisées par
+l'application (version, scan JSON des pistes, progression de l'encodage) sans
+encoder quoi que ce soit.
+
+Variables d'environnement:
+FAKE_HANDBRAKE_DUREE -- Durée (en secondes) de l'encodage simulé (défaut 0.5).
+FAKE_HANDBRAKE_CODE -- Code de retour de l'encodage simulé (défaut 0).
+FAKE_HANDBRAKE_PISTES_AUDIO -- Nombre de pistes audio écrites dans le fichier
+                               encodé (défaut : celles demandées par --audio).
+
+Le fichier encodé contient le nombre de pistes encodées, que le scan de ce
+fichier restitue comme le ferait un vrai conteneur.
+"""
+
+import json
+import os
+import sys
+import time
+
+SCAN = {
+    "MainFeature": 0,
+    "TitleList": [
+        {
+            "AudioList": [
+                {
+                    "TrackNumber": 1,
+                    "LanguageCode": "fre",
+                    "Name": "VFF",
+                    "Default": True,
+                },
+                {"TrackNumber": 2, "LanguageCode": "eng", "Name": "", "Default": False},
+            ],
+            "SubtitleList": [],
+        }
+    ],
+}
+
+
+# Marqueur des pistes écrites dans un fichier encodé par ce script
+MARQUEUR = b"FAKEHB"
+
+
+def scan(chemin):
+    """Retourne le scan d'un fichier : celui de SCAN, ou les pistes d'un fichier encodé."""
+    try:
+        with open(chemin, "rb") as fichier:
+            contenu = fichier.read()
+    except (OSError, TypeError):
+        return SCAN
+    if MARQUEUR not in contenu:
+        return SCAN
+    pistes = json.loads(contenu.split(MARQUEUR, 1)[1].decode("utf-8"))
+    titre = {
+        "AudioList": [
+            {"TrackNumber": numero, "LanguageCode": "fre", "Name": "", "Default": False}
+            for numero in range(1, pistes["audio"] + 1)
+        ],
+        "SubtitleList": [
+            {"TrackNumber": numero, "LanguageCode": "fre", "Name": ""}
+            for numero in range(1, pistes["sous_titres"] + 1)
+        ],
+    }
+    return {"MainFeature": 0, "TitleList": [titre]}
+
+
+def pistes_encodees(arguments):
+    """Nombre de pistes audio et de sous-titres (non incrustés) du fichier encodé."""
+    audio = valeur_option_egale(arguments, "--audio")
+    sous_titres = valeur_option_egale(arguments, "--subtitle")
+    nb_sous_titres = 0 if sous_titres in (None, "none") else len(sous_titres.split(","))
+    if valeur_option_egale(arguments, "--subtitle-burned"):
+        nb_sous_titres -= 1
+    nb_audio = (
+        len(audio.split(",")) if audio else len(SCAN["TitleList"][0]["AudioList"])
+    )
+    nb_audio = int(os.environ.get("FAKE_HANDBRAKE_PISTES_AUDIO", nb_audio))
+    return {"audio": nb_audio, "sous_titres": nb_sous_titres}
+
+
+def valeur_option_egale(arguments, option):
+    for argument in arguments:
+        if argument.startswith(option + "="):
+            return argument.split("=", 1)[1]
+    return None
+
+
+def valeur_option(arguments, option):
+    if option in arguments:
+        index = arguments.index(option)
+        if index + 1 < len(arguments):
+            return arguments[index + 1]
+    return None
+
+
+def main(arguments):
+    if "--version" in arguments:
+        print("HandBrake 1.6.1")
+        return 0
+
+    if "--scan" in arguments:
+        print("[00:00:00] hb_init: starting libhb thread", file=sys.stderr)
+        scan_json = scan(valeur_option(arguments, "-i"))
+        print("JSON Title Set: " + json.dumps(scan_json, indent=4))
+        return 0
+
+    sortie = valeur_option(arguments, "-o")
+    if sortie is None:
+        print("Missing output file name. Run HandBrakeCLI --help", file=sys.stderr)
+        return 1
+
+    duree = float(os.environ.get("FAKE_HANDBRAKE_DUREE", "0.5"))
+    etapes = 10
+    for etape in range(etapes + 1):
+        pourcentage = 100 * etape / etapes
+        restant = int(duree * (etapes - etape) / etapes)
+        print(
+            f"Encoding: task 1 of 1, {pourcentage:.2f} % "
+            f"(25.00 fps, avg 24.00 fps, ETA 00h00m{restant:02d}s)",
+            flush=True,
+        )
+        time.sleep(duree / etapes)
+
+    code = int(os.environ.get("FAKE_HANDBRAKE_CODE", "0"))
+    if code == 0:
+        with open(sortie, "wb") as fichier:
+            fichier.write(b"\x1a\x45\xdf\xa3" + b"\x00" * 1024 + MARQUEUR)
+            fichier.write(json.dumps(pistes_encodees(arguments)).encode("utf-8"))
+        print("Encode done!", flush=True)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,252 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from farm_coordinator import CoordinateurFerme
+from farm_worker import (
+    AgentFerme,
+    ClientCoordinateur,
+    ErreurCoordinateur,
+    traduire_chemin,
+)
+from headless import EtatEncodages, ServiceControle, creer_serveur
+from job_queue import FileTaches
+from output_finalizer import finaliseur_sorties
+from tool_registry import registre_outils
+from probe_cache import cache_sondes
+
+FAKE_HANDBRAKECLI = os.path.join(os.path.dirname(__file__), "fake_handbrakecli.py")
+
+
+class Horloge:
+    def __init__(self):
+        self.maintenant = 0.0
+
+    def __call__(self):
+        return self.maintenant
+
+
+def fichiers(taches):
+    return [tache["file"] for tache in taches]
+
+
+class TestCoordinateurFerme(unittest.TestCase):
+    def setUp(self):
+        self.horloge = Horloge()
+        self.file = FileTaches()
+        self.journal = MagicMock()
+        self.file.attacher_journal(self.journal)
+        for nom in ["a", "b", "c"]:
+            self.file.put({"file": nom, "preset": "p", "output_dir": "/sortie"})
+        self.coordinateur = CoordinateurFerme(self.file, 60, self.horloge)
+
+    def operations(self):
+        return [appel.args[0] for appel in self.journal.enregistrer.call_args_list]
+
+    def test_file_vide(self):
+        self.file.vider()
+        self.assertIsNone(self.coordinateur.reclamer("agent"))
+
+    def test_bail_prolonge_par_les_battements(self):
+        bail = self.coordinateur.reclamer("agent")
+        self.assertEqual(bail["tache"]["file"], "a")
+        self.horloge.maintenant = 50
+        self.assertTrue(self.coordinateur.battement(bail["bail"], progression=40))
+        self.horloge.maintenant = 100
+        self.assertEqual(self.coordinateur.expirer(), 0)
+        (en_cours,) = self.coordinateur.instantane()
+        self.assertEqual((en_cours["worker"], en_cours["progression"]), ("agent", 40))
+
+        self.assertTrue(self.coordinateur.terminer(bail["bail"], True))
+        self.assertEqual(self.operations()[-1], "fin")
+        self.assertEqual(self.coordinateur.instantane(), [])
+
+    def test_tache_d_un_agent_muet_remise_en_tete(self):
+        bail = self.coordinateur.reclamer("agent")
+        self.horloge.maintenant = 61
+        self.assertEqual(self.coordinateur.expirer(), 1)
+        self.assertEqual(fichiers(self.file.instantane()), ["a", "b", "c"])
+        self.assertFalse(self.coordinateur.battement(bail["bail"]))
+        # Le journal retire la tâche des encodages en cours avant de la remettre en file
+        self.assertEqual(
+            self.operations()[-4:], ["debut", "echec", "ajout", "deplacement"]
+        )
+
+        autre = self.coordinateur.reclamer("autre")
+        self.assertEqual(autre["tache"]["file"], "a")
+        # Résultat tardif du premier agent : la tâche a déjà été reprise
+        self.assertFalse(self.coordinateur.terminer(bail["bail"], True))
+
+    def test_resultat_tardif_accepte_si_tache_pas_encore_reprise(self):
+        bail = self.coordinateur.reclamer("agent")
+        self.horloge.maintenant = 61
+        self.coordinateur.expirer()
+        self.assertTrue(self.coordinateur.terminer(bail["bail"], True))
+        self.assertEqual(fichiers(self.file.instantane()), ["b", "c"])
+
+    def test_renvoi_vers_les_encodages_manuels(self):
+        bail = self.coordinateur.reclamer("agent")
+        with patch(
+            "farm_coordinator.ajouter_fichier_a_liste_encodage_manuel"
+        ) as manuel:
+            self.assertTrue(self.coordinateur.terminer(bail["bail"], False, "audio"))
+        manuel.assert_called_once_with("a", "a", "audio", "p")
+        self.assertEqual(self.operations()[-1], "echec")
+
+    def test_liberer(self):
+        bail = self.coordinateur.reclamer("agent")
+        self.assertTrue(self.coordinateur.liberer(bail["bail"]))
+        self.assertEqual(fichiers(self.file.instantane()), ["a", "b", "c"])
+        self.assertFalse(self.coordinateur.liberer(bail["bail"]))
+
+    def test_traduction_des_chemins(self):
+        correspondances = {"D:/Torrents": "/mnt/torrents/"}
+        self.assertEqual(
+            traduire_chemin("D:\\Torrents\\Film VF\\a.mkv", correspondances),
+            "/mnt/torrents/Film VF/a.mkv",
+        )
+        self.assertEqual(
+            traduire_chemin("D:/TorrentsBis/a.mkv", correspondances),
+            "D:/TorrentsBis/a.mkv",
+        )
+
+
+@unittest.skipIf(os.name == "nt", "Le faux HandBrakeCLI est un script Python")
+class TestFermeSurLocalhost(unittest.TestCase):
+    """Coordinateur et plusieurs agents sur la même machine, via l'API HTTP."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.sortie = os.path.join(self.temp_dir.name, "sortie")
+
+        outils = {
+            "HandBrakeCLI": {"chemin": FAKE_HANDBRAKECLI, "version": "1.6.1"},
+            "mediainfo": {"chemin": None, "version": None},
+        }
+        for cible in [
+            patch.dict(registre_outils.outils, outils),
+            patch.object(
+                cache_sondes, "dossier", os.path.join(self.temp_dir.name, "cache")
+            ),
+            patch("encoding.record_successful_encoding"),
+            patch("encoding.notifier_encodage_lancement"),
+            patch("encoding.notifier_encodage_termine"),
+            patch("encoding.notifier_erreur_encodage"),
+        ]:
+            cible.start()
+            self.addCleanup(cible.stop)
+
+        self.file = FileTaches()
+        self.coordinateur = CoordinateurFerme(self.file, duree_bail=1)
+        service = ServiceControle(
+            self.file, MagicMock(en_pause=False), EtatEncodages(), self.coordinateur
+        )
+        self.serveur = creer_serveur(service, jeton="secret")
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.serveur.server_address[1]
+        self.client = ClientCoordinateur(self.url, "secret")
+
+    def tearDown(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+        self.temp_dir.cleanup()
+
+    def ajouter(self, nom):
+        source = os.path.join(self.temp_dir.name, nom)
+        with open(source, "wb") as f:
+            f.write(b"\x00" * 2048)
+        self.file.put(
+            {"file": source, "preset": "Films - Series VF", "output_dir": self.sortie}
+        )
+
+    def test_plusieurs_agents_se_partagent_la_file(self):
+        for numero in range(4):
+            self.ajouter(f"Film{numero}.mkv")
+        agents = [AgentFerme(self.client, f"agent-{i}", attente=0.1) for i in (1, 2)]
+        threads = [threading.Thread(target=agent.executer) for agent in agents]
+        for thread in threads:
+            thread.start()
+
+        fin = time.monotonic() + 20
+        while time.monotonic() < fin and (
+            not self.file.empty() or self.coordinateur.instantane()
+        ):
+            time.sleep(0.1)
+        for agent in agents:
+            agent.arreter()
+        for thread in threads:
+            thread.join()
+        # Fichiers encodés vérifiés et mis en place en arrière-plan
+        finaliseur_sorties.attendre()
+
+        self.assertTrue(self.file.empty())
+        self.assertEqual(self.coordinateur.instantane(), [])
+        self.assertEqual(
+            sorted(os.listdir(self.sortie)),
+            [f"Film{numero}_encoded.mkv" for numero in range(4)],
+        )
+
+    def test_echec_de_la_verification_signale_au_coordinateur(self):
+        self.ajouter("Film.mkv")
+        agent = AgentFerme(self.client, "agent")
+        bail = self.client.reclamer("agent")
+
+        with patch.dict(os.environ, {"FAKE_HANDBRAKE_PISTES_AUDIO": "0"}), patch(
+            "encoding.ajouter_fichier_a_liste_encodage_manuel"
+        ), patch.object(self.client, "terminer") as terminer:
+            # L'encodage réussit, mais le fichier encodé est rejeté
+            self.assertFalse(agent.traiter(bail))
+
+        terminer.assert_called_once_with(bail["bail"], False, None)
+        self.assertFalse(os.path.exists(os.path.join(self.sortie, "Film_encoded.mkv")))
+
+    def test_jeton_exige_par_le_coordinateur(self):
+        self.ajouter("Film.mkv")
+        for jeton in (None, "faux"):
+            with self.assertRaises(ErreurCoordinateur):
+                ClientCoordinateur(self.url, jeton).reclamer("intrus")
+        self.assertEqual(self.coordinateur.instantane(), [])
+        self.assertEqual(self.file.qsize(), 1)
+
+    def test_renvoi_vers_les_encodages_manuels_transmis(self):
+        self.ajouter("Film.mkv")
+        source = os.path.join(self.temp_dir.name, "Film.mkv")
+        agent = AgentFerme(self.client, "agent")
+        bail = self.client.reclamer("agent")
+
+        with patch(
+            "encoding.pre_analyseur.prendre", return_value={"raison_manuel": "audio"}
+        ), patch("encoding.ajouter_fichier_a_liste_encodage_manuel"), patch(
+            "farm_coordinator.ajouter_fichier_a_liste_encodage_manuel"
+        ) as manuel:
+            self.assertFalse(agent.traiter(bail))
+
+        # Le coordinateur ajoute le fichier à sa propre liste, bail terminé
+        manuel.assert_called_once_with(source, "Film.mkv", "audio", "Films - Series VF")
+        self.assertEqual(self.coordinateur.instantane(), [])
+        self.assertTrue(self.file.empty())
+
+    def test_agent_abandonne_si_son_bail_expire(self):
+        self.ajouter("Film.mkv")
+        agent = AgentFerme(self.client, "lent")
+        bail = self.client.reclamer("lent")
+        # Le coordinateur considère l'agent comme mort avant le premier battement
+        self.coordinateur.horloge = lambda: time.monotonic() + 10
+
+        with patch.dict(os.environ, {"FAKE_HANDBRAKE_DUREE": "30"}):
+            debut = time.monotonic()
+            self.assertFalse(agent.traiter(bail))
+        self.assertLess(time.monotonic() - debut, 10)
+        self.assertTrue(agent.control_flags["bail_perdu"])
+        self.assertEqual(self.file.qsize(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,19 @@ import unittest
 import sys
 import os
 import json
+import tempfile
+from unittest.mock import patch
 
 # Ajouter le répertoire racine au PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from file_handling import charger_fichiers
+from file_handling import (
+    charger_fichiers,
+    sauvegarder_fichiers,
+    sauvegarder_etats_en_attente,
+    EtatFichiers,
+    SauvegardeDifferee,
+)
 
 
 class TestFileHandling(unittest.TestCase):
@@ -30,6 +38,88 @@ class TestFileHandling(unittest.TestCase):
         result = charger_fichiers("non_existent_file.json")
         self.assertEqual(result, {})
 
+    def test_sauvegarde_atomique(self):
+        sauvegarder_fichiers(self.test_file, self.test_data)
+        # Une erreur pendant l'écriture laisse l'ancienne version intacte
+        with patch("json.dump", side_effect=OSError("disque plein")):
+            with self.assertRaises(OSError):
+                sauvegarder_fichiers(self.test_file, {"autre": "valeur"})
+        self.assertEqual(charger_fichiers(self.test_file), self.test_data)
+        os.remove(f"{self.test_file}.tmp")
+
+
+class Horloge:
+    def __init__(self):
+        self.instant = 0.0
+
+    def __call__(self):
+        return self.instant
+
+
+class TestEtatFichiers(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.fichier = os.path.join(self.temp_dir.name, "fichiers_encodes.json")
+        self.horloge = Horloge()
+        self.etat = EtatFichiers(
+            self.fichier, delai=2, delai_max=10, horloge=self.horloge
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_ecriture_seulement_apres_modification(self):
+        self.assertFalse(self.etat.sauvegarder_si_necessaire())
+        self.assertFalse(os.path.exists(self.fichier))
+        self.etat.ajouter("D:/Films", "D:/Films/b.mkv")
+        self.etat.ajouter("D:/Films", "D:/Films/a.mkv")
+        self.horloge.instant = 2
+        self.assertTrue(self.etat.sauvegarder_si_necessaire())
+        self.assertEqual(
+            charger_fichiers(self.fichier),
+            {"D:/Films": ["D:/Films/a.mkv", "D:/Films/b.mkv"]},
+        )
+        # Ajout d'un fichier déjà présent : rien à écrire
+        self.etat.ajouter("D:/Films", "D:/Films/a.mkv")
+        self.horloge.instant = 10
+        self.assertFalse(self.etat.sauvegarder_si_necessaire())
+
+    def test_regroupement_des_modifications(self):
+        for instant in range(12):
+            self.horloge.instant = instant
+            self.etat.ajouter("D:/Films", f"D:/Films/{instant}.mkv")
+            ecrit = self.etat.sauvegarder_si_necessaire()
+            # Modifications continues : écriture forcée au bout de delai_max
+            self.assertEqual(ecrit, instant == 10)
+
+    def test_rechargement_et_retrait(self):
+        self.etat.ajouter("D:/Films", "D:/Films/a.mkv")
+        self.etat.sauvegarder_si_necessaire(forcer=True)
+        recharge = EtatFichiers(self.fichier)
+        recharge.charger()
+        self.assertTrue(recharge.contient("D:/Films", "D:/Films/a.mkv"))
+        recharge.retirer("D:/Films", "D:/Films/a.mkv")
+        recharge.retirer("D:/Series", "D:/Series/x.mkv")
+        self.assertFalse(recharge.contient("D:/Films", "D:/Films/a.mkv"))
+        self.assertTrue(recharge.modifie)
+
+    def test_donnees_obligatoires(self):
+        class SansDonnees(SauvegardeDifferee):
+            pass
+
+        with self.assertRaises(TypeError):
+            SansDonnees(self.fichier)
+
+    def test_modifications_en_attente_enregistrees_a_la_fermeture(self):
+        self.etat.ajouter("D:/Films", "D:/Films/a.mkv")
+        # Le délai de regroupement n'est pas écoulé
+        self.assertFalse(self.etat.sauvegarder_si_necessaire())
+        sauvegarder_etats_en_attente()
+        self.assertEqual(
+            charger_fichiers(self.fichier), {"D:/Films": ["D:/Films/a.mkv"]}
+        )
+        self.assertFalse(self.etat.modifie)
+
 
 if __name__ == "__main__":
     unittest.main()
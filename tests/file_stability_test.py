@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from file_stability import FiltreStabilite
+
+
+class HorlogeFactice:
+    def __init__(self):
+        self.maintenant = 1000.0
+
+    def __call__(self):
+        return self.maintenant
+
+    def avancer(self, secondes):
+        self.maintenant += secondes
+
+
+class TestFiltreStabilite(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.fichier = os.path.join(self.test_dir, "film.mkv")
+        with open(self.fichier, "wb") as f:
+            f.write(b"debut")
+        self.horloge = HorlogeFactice()
+        self.filtre = FiltreStabilite(30, horloge=self.horloge)
+        self.filtre.ajouter(self.fichier, dossier=self.test_dir, preset="Mangas")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_fichier_stable_pret_apres_delai(self):
+        self.assertEqual(self.filtre.fichiers_prets(), [])
+        self.horloge.avancer(29)
+        self.assertEqual(self.filtre.fichiers_prets(), [])
+        self.horloge.avancer(1)
+        self.assertEqual(
+            self.filtre.fichiers_prets(),
+            [(self.fichier, {"dossier": self.test_dir, "preset": "Mangas"})],
+        )
+        self.assertNotIn(self.fichier, self.filtre)
+
+    def test_fichier_en_cours_d_ecriture_reste_en_attente(self):
+        self.filtre.fichiers_prets()
+        self.horloge.avancer(25)
+        with open(self.fichier, "ab") as f:
+            f.write(b"suite")
+        self.assertEqual(self.filtre.fichiers_prets(), [])
+
+        # La période de calme repart de la dernière modification
+        self.horloge.avancer(25)
+        self.assertEqual(self.filtre.fichiers_prets(), [])
+        self.horloge.avancer(5)
+        self.assertEqual(len(self.filtre.fichiers_prets()), 1)
+
+    @patch("file_stability.est_verrouille", return_value=True)
+    def test_fichier_verrouille_reste_en_attente(self, _):
+        self.filtre.fichiers_prets()
+        self.horloge.avancer(60)
+        self.assertEqual(self.filtre.fichiers_prets(), [])
+        self.assertIn(self.fichier, self.filtre)
+
+    def test_fichier_supprime_oublie(self):
+        os.remove(self.fichier)
+        self.assertEqual(self.filtre.fichiers_prets(), [])
+        self.assertEqual(len(self.filtre), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
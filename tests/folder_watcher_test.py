@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from folder_watcher import (
+    DetecteurPolling,
+    DetecteurEvenements,
+    WATCHDOG_DISPONIBLE,
+)
+
+
+def creer_fichier(chemin, contenu=b"data"):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin, "wb") as f:
+        f.write(contenu)
+
+
+class TestDetecteurPolling(unittest.TestCase):
+    detecteur_classe = DetecteurPolling
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        creer_fichier(os.path.join(self.test_dir, "existant.mkv"))
+        self.detecteur = self.detecteur_classe([self.test_dir])
+        self.detecteur.demarrer()
+
+    def tearDown(self):
+        self.detecteur.arreter()
+        shutil.rmtree(self.test_dir)
+
+    def attendre(self):
+        """Cumule les changements jusqu'à ce qu'il n'y en ait plus"""
+        nouveaux, supprimes = set(), set()
+        for _ in range(5):
+            changements = self.detecteur.attendre_changements(0.5)
+            n, s = changements.get(self.test_dir, (set(), set()))
+            if not n and not s and (nouveaux or supprimes):
+                break
+            nouveaux |= n
+            supprimes |= s
+        return nouveaux, supprimes
+
+    def test_fichiers_initiaux_ignores(self):
+        nouveaux, supprimes = self.attendre()
+        self.assertEqual(nouveaux, set())
+        self.assertEqual(supprimes, set())
+
+    def test_nouveau_fichier_video(self):
+        chemin = os.path.join(self.test_dir, "sous", "episode.mkv")
+        creer_fichier(chemin)
+        creer_fichier(os.path.join(self.test_dir, "notes.txt"))
+        nouveaux, _ = self.attendre()
+        self.assertEqual(nouveaux, {chemin})
+
+    def test_fichier_supprime(self):
+        chemin = os.path.join(self.test_dir, "existant.mkv")
+        os.remove(chemin)
+        _, supprimes = self.attendre()
+        self.assertEqual(supprimes, {chemin})
+
+    def test_dossier_deplace_dans_la_surveillance(self):
+        externe = tempfile.mkdtemp()
+        try:
+            creer_fichier(os.path.join(externe, "Film", "film.mp4"))
+            shutil.move(
+                os.path.join(externe, "Film"), os.path.join(self.test_dir, "Film")
+            )
+            nouveaux, _ = self.attendre()
+            self.assertEqual(
+                nouveaux, {os.path.join(self.test_dir, "Film", "film.mp4")}
+            )
+        finally:
+            shutil.rmtree(externe)
+
+
+@unittest.skipUnless(WATCHDOG_DISPONIBLE, "watchdog n'est pas installé")
+class TestDetecteurEvenements(TestDetecteurPolling):
+    detecteur_classe = DetecteurEvenements
+
+
+if __name__ == "__main__":
+    unittest.main()
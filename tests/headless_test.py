@@ -0,0 +1,192 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import json
+import tempfile
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from headless import EtatEncodages, ServiceControle, creer_serveur
+from job_queue import FileTaches
+
+
+class TestEtatEncodages(unittest.TestCase):
+    def test_progression_suivie_par_les_signaux(self):
+        etat = EtatEncodages()
+        signals = etat.creer_signaux(1)
+        signals.update_file_info.emit("/films/a.mkv", "Films - Series VF")
+        signals.update_progress.emit(42)
+        signals.update_encoding_stats.emit("25.00")
+
+        (worker,) = etat.instantane()
+        self.assertEqual(worker["worker"], 1)
+        self.assertEqual(worker["fichier"], "/films/a.mkv")
+        self.assertEqual(worker["progression"], 42)
+        self.assertEqual(worker["fps"], "25.00")
+
+        signals.encoding_done.emit()
+        self.assertIsNone(etat.instantane()[0]["fichier"])
+        signals.worker_finished.emit()
+        self.assertEqual(etat.instantane(), [])
+
+
+class TestApiControle(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.fichiers = []
+        for nom in ["a.mkv", "b.mkv", "c.mkv"]:
+            chemin = os.path.join(self.temp_dir.name, nom)
+            open(chemin, "wb").close()
+            self.fichiers.append(chemin)
+
+        self.file_encodage = FileTaches()
+        self.pool = MagicMock(en_pause=False)
+        self.pool.encodages_en_cours.return_value = []
+        service = ServiceControle(self.file_encodage, self.pool, EtatEncodages())
+        self.serveur = creer_serveur(service)
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.serveur.server_address[1]
+
+    def tearDown(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+        self.temp_dir.cleanup()
+
+    def requete(self, chemin, donnees=None):
+        corps = json.dumps(donnees).encode("utf-8") if donnees is not None else None
+        requete = urllib.request.Request(self.url + chemin, data=corps)
+        try:
+            with urllib.request.urlopen(requete, timeout=5) as reponse:
+                return reponse.status, json.loads(reponse.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_ajout_et_reorganisation_de_la_file(self):
+        ids = []
+        for fichier in self.fichiers:
+            code, contenu = self.requete(
+                "/queue", {"file": fichier, "preset": "Films - Series VF"}
+            )
+            self.assertEqual(code, 200)
+            ids.append(contenu["resultat"]["id"])
+
+        code, contenu = self.requete("/queue/move", {"id": ids[2], "position": "top"})
+        self.assertEqual((code, contenu["resultat"]), (200, 0))
+        self.assertEqual(self.requete("/queue/remove", {"id": ids[0]})[0], 200)
+
+        code, contenu = self.requete("/queue")
+        self.assertEqual(code, 200)
+        self.assertEqual(
+            [tache["file"] for tache in contenu["queue"]],
+            [self.fichiers[2], self.fichiers[1]],
+        )
+
+    @patch(
+        "scheduling.estimateur_encodage.estimer",
+        side_effect=AssertionError("estimation pendant la requête"),
+    )
+    def test_file_avec_estimations_conservees(self, _):
+        id_tache = self.file_encodage.put({"file": self.fichiers[0], "preset": "x"})
+        self.file_encodage.actualiser_infos(
+            {id_tache: {"estimation": {"duree": 600, "taille": 700}}}
+        )
+        code, contenu = self.requete("/queue")
+        self.assertEqual(code, 200)
+        tache = contenu["queue"][0]
+        self.assertEqual((tache["duree_estimee"], tache["taille_estimee"]), (600, 700))
+
+    def test_requetes_invalides(self):
+        code, contenu = self.requete(
+            "/queue", {"file": "/inexistant.mkv", "preset": "x"}
+        )
+        self.assertEqual(code, 400)
+        self.assertIn("introuvable", contenu["erreur"])
+        self.assertEqual(self.requete("/queue/move", {"id": 1})[0], 400)
+        self.assertEqual(
+            self.requete("/queue/move", {"id": 1, "position": "left"})[0], 400
+        )
+        self.assertEqual(self.requete("/queue/remove", {"id": 99})[0], 400)
+        self.assertEqual(self.requete("/inconnue", {})[0], 404)
+
+    def test_commandes_des_workers(self):
+        self.requete("/pause", {"paused": True})
+        self.pool.mettre_en_pause.assert_called_once_with(True)
+        self.requete("/pause", {"paused": False, "worker": 2})
+        self.pool.basculer_pause.assert_called_once_with(2, False)
+        self.requete("/skip", {})
+        self.pool.passer_tout.assert_called_once()
+        self.requete("/stop", {"worker": 1})
+        self.pool.arreter.assert_called_once_with(1)
+        self.requete("/workers", {"count": 3})
+        self.pool.redimensionner.assert_called_once_with(3)
+
+        code, contenu = self.requete("/progress")
+        self.assertEqual(code, 200)
+        self.assertEqual(contenu, {"paused": False, "workers": [], "farm": []})
+
+
+class TestJetonApi(unittest.TestCase):
+    def setUp(self):
+        self.pool = MagicMock(en_pause=False)
+        service = ServiceControle(FileTaches(), self.pool, EtatEncodages())
+        self.serveur = creer_serveur(service, jeton="secret")
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.serveur.server_address[1]
+
+    def tearDown(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+    def code(self, chemin, donnees=None, jeton=None):
+        corps = json.dumps(donnees).encode("utf-8") if donnees is not None else None
+        entetes = {"Authorization": f"Bearer {jeton}"} if jeton else {}
+        requete = urllib.request.Request(self.url + chemin, corps, entetes)
+        try:
+            with urllib.request.urlopen(requete, timeout=5) as reponse:
+                return reponse.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def test_jeton_exige_sur_chaque_route(self):
+        self.assertEqual(self.code("/queue"), 401)
+        self.assertEqual(self.code("/progress", jeton="faux"), 401)
+        self.assertEqual(self.code("/stop", {}), 401)
+        self.assertEqual(self.code("/farm/claim", {"worker": "a"}, "faux"), 401)
+        self.pool.arreter_tout.assert_not_called()
+
+        self.assertEqual(self.code("/queue", jeton="secret"), 200)
+        self.assertEqual(self.code("/stop", {}, "secret"), 200)
+        self.pool.arreter_tout.assert_called_once()
+
+    def test_ecoute_sur_le_reseau_sans_jeton_refusee(self):
+        service = ServiceControle(FileTaches(), self.pool, EtatEncodages())
+        with self.assertRaises(ValueError):
+            creer_serveur(service, "0.0.0.0")
+        with self.assertRaises(ValueError):
+            creer_serveur(service, "192.168.1.10")
+
+
+class TestSansInterface(unittest.TestCase):
+    def test_pyqt_non_importe(self):
+        racine = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        resultat = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import headless, sys; print('PyQt5' in sys.modules)",
+            ],
+            cwd=racine,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(resultat.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import threading
+from queue import Empty
+from unittest.mock import MagicMock, patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from job_queue import FileTaches
+
+
+def fichiers(file_taches):
+    return [tache["file"] for tache in file_taches.instantane()]
+
+
+class TestFileTaches(unittest.TestCase):
+    def setUp(self):
+        self.file = FileTaches()
+        self.ids = [
+            self.file.put({"file": nom, "preset": "Films - Series VF"})
+            for nom in ["a", "b", "c", "d"]
+        ]
+
+    def test_ordre_d_arrivee_et_identifiants(self):
+        self.assertEqual(fichiers(self.file), ["a", "b", "c", "d"])
+        self.assertEqual([t["id"] for t in self.file.instantane()], self.ids)
+        self.assertEqual(self.file.get()["file"], "a")
+        self.assertEqual(self.file.get_nowait()["file"], "b")
+        self.assertEqual(self.file.qsize(), 2)
+
+    def test_priorite(self):
+        self.file.put({"file": "urgent"}, priorite=-1)
+        self.assertEqual(self.file.get()["file"], "urgent")
+
+    def test_deplacements(self):
+        a, b, c, d = self.ids
+        self.assertTrue(self.file.monter_en_tete(c))
+        self.assertEqual(fichiers(self.file), ["c", "a", "b", "d"])
+        self.assertTrue(self.file.descendre(c))
+        self.assertEqual(fichiers(self.file), ["a", "c", "b", "d"])
+        self.assertTrue(self.file.monter(d))
+        self.assertEqual(fichiers(self.file), ["a", "c", "d", "b"])
+        self.assertTrue(self.file.descendre_en_fin(a))
+        self.assertEqual(fichiers(self.file), ["c", "d", "b", "a"])
+        self.assertFalse(self.file.monter(c))
+        self.assertFalse(self.file.descendre(a))
+        self.assertEqual(self.file.position(b), 2)
+
+        # Les workers suivent le nouvel ordre
+        self.assertEqual(
+            [self.file.get()["file"] for _ in range(4)], ["c", "d", "b", "a"]
+        )
+
+    def test_retrait_par_identifiant(self):
+        self.assertEqual(self.file.retirer(self.ids[1])["file"], "b")
+        self.assertIsNone(self.file.retirer(self.ids[1]))
+        self.assertFalse(self.file.monter_en_tete(self.ids[1]))
+        self.assertEqual(fichiers(self.file), ["a", "c", "d"])
+        self.assertEqual(self.file.get()["file"], "a")
+        self.assertEqual(self.file.get()["file"], "c")
+
+    def test_nombreux_deplacements(self):
+        # Les entrées obsolètes du tas ne doivent ni s'accumuler ni perturber l'ordre
+        for _ in range(200):
+            self.file.monter_en_tete(self.ids[3])
+            self.file.descendre_en_fin(self.ids[3])
+        self.assertLess(len(self.file._tas), 50)
+        self.assertEqual(fichiers(self.file), ["a", "b", "c", "d"])
+
+    def test_passage_en_tete_ou_en_fin_sans_tri(self):
+        journal = MagicMock()
+        self.file.attacher_journal(journal)
+        with patch.object(
+            self.file, "_ids_ordonnes", side_effect=AssertionError("tri complet")
+        ):
+            self.file.monter_en_tete(self.ids[2])
+            self.file.descendre_en_fin(self.ids[0])
+        self.assertEqual(
+            [appel.kwargs["position"] for appel in journal.enregistrer.call_args_list],
+            [0, 3],
+        )
+        self.assertEqual(fichiers(self.file), ["c", "b", "d", "a"])
+
+    def test_estimations_conservees_avec_les_taches(self):
+        abonne = MagicMock()
+        self.file.abonner(abonne)
+        a, b = self.ids[:2]
+        self.assertEqual(
+            self.file.actualiser_infos(
+                {a: {"estimation": {"duree": 600, "taille": 700}}, 99: {}, b: {}}
+            ),
+            [a, b],
+        )
+        # Une seule notification pour toutes les tâches actualisées
+        abonne.assert_called_once()
+        tache = self.file.instantane()[0]
+        self.assertEqual((tache["duree_estimee"], tache["taille_estimee"]), (600, 700))
+        self.assertNotIn("duree_estimee", self.file.instantane()[1])
+
+        # Les valeurs affichées ne sont pas reprises par une tâche remise en file
+        self.file.put(tache)
+        self.assertNotIn("duree_estimee", self.file.instantane()[-1])
+
+    def test_get_attend_une_tache(self):
+        file = FileTaches()
+        with self.assertRaises(Empty):
+            file.get(timeout=0.05)
+        with self.assertRaises(Empty):
+            file.get_nowait()
+        threading.Timer(0.05, file.put, [{"file": "e"}]).start()
+        self.assertEqual(file.get(timeout=5)["file"], "e")
+
+    def test_abonnes_notifies(self):
+        abonne = MagicMock()
+        self.file.abonner(abonne)
+        self.file.monter_en_tete(self.ids[2])
+        abonne.assert_called_once()
+        self.assertEqual(
+            [t["file"] for t in abonne.call_args[0][0]], ["c", "a", "b", "d"]
+        )
+        self.file.vider()
+        abonne.assert_called_with([])
+        self.assertTrue(self.file.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
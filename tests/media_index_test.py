@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from media_index import IndexMedias, empreinte_fichier
+
+
+class TestIndexMedias(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def creer(self, nom, contenu):
+        chemin = os.path.join(self.temp_dir.name, nom)
+        with open(chemin, "wb") as f:
+            f.write(contenu)
+        return chemin
+
+    def test_empreinte(self):
+        contenu = os.urandom(300)
+        a = self.creer("a.mkv", contenu)
+        b = self.creer("b.mkv", contenu)
+        # Même début et même fin mais contenu intermédiaire différent : non lu
+        c = self.creer("c.mkv", contenu[:100] + b"x" * 100 + contenu[200:])
+        d = self.creer("d.mkv", contenu[:-1] + b"!")
+        self.assertEqual(empreinte_fichier(a, 100), empreinte_fichier(b, 100))
+        self.assertEqual(empreinte_fichier(a, 100), empreinte_fichier(c, 100))
+        self.assertNotEqual(empreinte_fichier(a, 100), empreinte_fichier(d, 100))
+        self.assertTrue(empreinte_fichier(a, 100).startswith("300-"))
+        self.assertIsNone(empreinte_fichier(os.path.join(self.temp_dir.name, "x")))
+
+    def test_doublon_entre_dossiers(self):
+        index = IndexMedias(os.path.join(self.temp_dir.name, "index.json"))
+        index.enregistrer("D:/Films/film.mkv", "10-abc")
+        self.assertEqual(
+            index.doublon("D:/Films/copie.mkv", "10-abc"), "D:/Films/film.mkv"
+        )
+        self.assertEqual(
+            index.doublon("D:/Film 4K/copie.mkv", "10-abc"), "D:/Films/film.mkv"
+        )
+        self.assertIsNone(index.doublon("D:/Films/autre.mkv", "20-def"))
+        self.assertIsNone(index.doublon("D:/Films/autre.mkv", None))
+
+    def test_meme_chemin_telecharge_a_nouveau(self):
+        index = IndexMedias(os.path.join(self.temp_dir.name, "index.json"))
+        index.enregistrer("D:/Films/film.mkv", "10-abc")
+        # Supprimé puis téléchargé à nouveau au même endroit, même contenu
+        self.assertEqual(
+            index.doublon("D:/Films/film.mkv", "10-abc"), "D:/Films/film.mkv"
+        )
+        # Nouveau contenu au même chemin : pas un doublon
+        self.assertIsNone(index.doublon("D:/Films/film.mkv", "20-def"))
+
+    def test_chemin_enregistre_avec_un_nouveau_contenu(self):
+        index = IndexMedias(os.path.join(self.temp_dir.name, "index.json"))
+        index.enregistrer("D:/Films/film.mkv", "10-abc")
+        index.enregistrer("D:/Films/film.mkv", "20-def")
+        # L'ancien contenu n'est plus associé à ce chemin
+        self.assertEqual(index.empreintes, {"20-def": "D:/Films/film.mkv"})
+        self.assertIsNone(index.doublon("D:/Series/a.mkv", "10-abc"))
+
+        # Une autre copie de l'ancien contenu reste connue
+        index.enregistrer("D:/Films/copie.mkv", "20-def")
+        index.enregistrer("D:/Films/b.mkv", "30-ghi")
+        index.enregistrer("D:/Films/film.mkv", "30-ghi")
+        self.assertEqual(index.empreintes["20-def"], "D:/Films/copie.mkv")
+        self.assertEqual(index.empreintes["30-ghi"], "D:/Films/b.mkv")
+
+    def test_sauvegarde_et_rechargement(self):
+        fichier = os.path.join(self.temp_dir.name, "index.json")
+        index = IndexMedias(fichier)
+        index.enregistrer("D:/Films/film.mkv", "10-abc")
+        self.assertTrue(index.sauvegarder_si_necessaire(forcer=True))
+        # Rien de nouveau : pas de réécriture
+        index.enregistrer("D:/Films/film.mkv", "10-abc")
+        self.assertFalse(index.modifie)
+
+        recharge = IndexMedias(fichier)
+        recharge.charger()
+        self.assertEqual(
+            recharge.doublon("D:/Series/renomme.mkv", "10-abc"), "D:/Films/film.mkv"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
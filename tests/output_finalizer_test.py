@@ -0,0 +1,303 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import errno
+import os
+import sys
+import tempfile
+import time
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from output_finalizer import (
+    FinaliseurSorties,
+    chemin_temporaire,
+    deplacer_atomiquement,
+    dossiers_sortie_connus,
+    nettoyer_sorties_partielles,
+    verifier_sortie,
+)
+from tool_registry import registre_outils
+from probe_cache import cache_sondes
+
+FAKE_HANDBRAKECLI = os.path.join(os.path.dirname(__file__), "fake_handbrakecli.py")
+ENTETE_MKV = b"\x1a\x45\xdf\xa3"
+
+
+class TestVerificationSortie(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fichier(self, nom, contenu):
+        chemin = os.path.join(self.temp_dir.name, nom)
+        with open(chemin, "wb") as f:
+            f.write(contenu)
+        return chemin
+
+    def test_chemin_temporaire(self):
+        self.assertEqual(
+            chemin_temporaire("/films/Film_encoded.mkv"),
+            "/films/.Film_encoded.partiel.mkv",
+        )
+
+    def test_fichier_valide(self):
+        self.assertIsNone(verifier_sortie(self.fichier("a.mkv", ENTETE_MKV + b"\0")))
+        mp4 = self.fichier("b.mp4", b"\0\0\0\x20ftypisom")
+        self.assertIsNone(verifier_sortie(mp4))
+
+    def test_fichier_absent_vide_ou_illisible(self):
+        self.assertIsNotNone(verifier_sortie(os.path.join(self.temp_dir.name, "x")))
+        self.assertIsNotNone(verifier_sortie(self.fichier("vide.mkv", b"")))
+        self.assertIsNotNone(verifier_sortie(self.fichier("c.mkv", b"\0" * 64)))
+
+    def scan(self, secondes, audio=1, sous_titres=0):
+        return {
+            "TitleList": [
+                {
+                    "Duration": {"Seconds": secondes},
+                    "AudioList": [{}] * audio,
+                    "SubtitleList": [{}] * sous_titres,
+                }
+            ]
+        }
+
+    def test_duree_comparee_a_la_source(self):
+        chemin = self.fichier("a.mkv", ENTETE_MKV + b"\0")
+        with patch("output_finalizer.obtenir_pistes", return_value=self.scan(3590)):
+            self.assertIsNone(verifier_sortie(chemin, 3600))
+            self.assertIn("durée", verifier_sortie(chemin, 5400))
+        # Scan du fichier encodé impossible : le fichier est rejeté
+        with patch("output_finalizer.obtenir_pistes", return_value=None):
+            self.assertIn("scan", verifier_sortie(chemin, 3600))
+
+    def test_pistes_comparees_a_la_selection(self):
+        chemin = self.fichier("a.mkv", ENTETE_MKV + b"\0")
+        attentes = {"pistes_audio": 2, "sous_titres": 1, "incrustation": False}
+        with patch(
+            "output_finalizer.obtenir_pistes",
+            return_value=self.scan(3600, audio=2, sous_titres=1),
+        ):
+            self.assertIsNone(verifier_sortie(chemin, 3600, attentes))
+        with patch(
+            "output_finalizer.obtenir_pistes",
+            return_value=self.scan(3600, audio=1, sous_titres=1),
+        ):
+            self.assertIn("piste(s) audio", verifier_sortie(chemin, 3600, attentes))
+        # Le sous-titre incrusté ne doit plus être une piste de sous-titres
+        incruste = {"pistes_audio": None, "sous_titres": 0, "incrustation": True}
+        with patch(
+            "output_finalizer.obtenir_pistes",
+            return_value=self.scan(3600, sous_titres=1),
+        ):
+            self.assertIn("incrusté", verifier_sortie(chemin, None, incruste))
+
+
+class TestDeplacement(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "local.mkv")
+        with open(self.source, "wb") as f:
+            f.write(ENTETE_MKV + b"contenu")
+        self.destination = os.path.join(self.temp_dir.name, "Film_encoded.mkv")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_deplacement_entre_volumes(self):
+        remplacer = os.replace
+        appels = []
+
+        def replace(source, destination):
+            appels.append((source, destination))
+            # Le renommage direct échoue comme entre deux volumes
+            if len(appels) == 1:
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return remplacer(source, destination)
+
+        with patch("output_finalizer.os.replace", side_effect=replace):
+            deplacer_atomiquement(self.source, self.destination)
+
+        # Copie sous le nom temporaire dans le dossier de destination, puis renommage
+        self.assertEqual(
+            appels[1], (chemin_temporaire(self.destination), self.destination)
+        )
+        self.assertFalse(os.path.exists(self.source))
+        with open(self.destination, "rb") as f:
+            self.assertEqual(f.read(), ENTETE_MKV + b"contenu")
+
+    def test_fichier_verifie_puis_deplace(self):
+        finaliseur = FinaliseurSorties()
+        rappel = MagicMock()
+        finaliseur.publier(self.source, self.destination, rappel=rappel)
+        finaliseur.attendre()
+
+        rappel.assert_called_once_with(None)
+        self.assertTrue(os.path.exists(self.destination))
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_fichier_invalide_supprime(self):
+        finaliseur = FinaliseurSorties()
+        rappel = MagicMock()
+        with patch(
+            "output_finalizer.verifier_sortie", return_value="fichier encodé vide"
+        ):
+            finaliseur.publier(self.source, self.destination, rappel=rappel)
+            finaliseur.attendre()
+
+        rappel.assert_called_once_with("fichier encodé vide")
+        self.assertFalse(os.path.exists(self.source))
+        self.assertFalse(os.path.exists(self.destination))
+
+    def test_erreur_pendant_la_verification(self):
+        finaliseur = FinaliseurSorties()
+        rappel = MagicMock()
+        with patch(
+            "output_finalizer.verifier_sortie", side_effect=ValueError("scan corrompu")
+        ):
+            finaliseur.publier(self.source, self.destination, rappel=rappel)
+            finaliseur.attendre()
+
+        self.assertIn("scan corrompu", rappel.call_args[0][0])
+        self.assertFalse(os.path.exists(self.destination))
+
+    def test_echec_du_deplacement(self):
+        finaliseur = FinaliseurSorties()
+        rappel = MagicMock()
+        destination = os.path.join(self.temp_dir.name, "absent", "Film.mkv")
+        finaliseur.publier(self.source, destination, rappel=rappel)
+        finaliseur.attendre()
+
+        self.assertIn("déplacement impossible", rappel.call_args[0][0])
+        # Le fichier encodé n'est pas perdu
+        self.assertTrue(os.path.exists(self.source))
+
+
+class TestNettoyageSortiesPartielles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dossier = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fichier(self, nom, age=3600):
+        chemin = os.path.join(self.dossier, nom)
+        with open(chemin, "wb") as f:
+            f.write(ENTETE_MKV)
+        instant = time.time() - age
+        os.utime(chemin, (instant, instant))
+        return chemin
+
+    def test_fichiers_incomplets_supprimes(self):
+        self.fichier("Film_encoded.mkv")
+        self.fichier(".Serie_encoded.mkv")
+        abandonne = self.fichier(".Film2_encoded.partiel.mkv")
+        segmente = self.fichier(".Film3_encoded.partiel.mkv")
+        os.makedirs(f"{segmente}.segments")
+        # Fichier récent : peut-être en cours d'écriture par un agent de la ferme
+        en_cours = self.fichier(".Film4_encoded.partiel.mkv", age=10)
+
+        self.assertEqual(nettoyer_sorties_partielles([self.dossier, "/absent"]), 1)
+
+        self.assertFalse(os.path.exists(abandonne))
+        for chemin in (segmente, en_cours):
+            self.assertTrue(os.path.exists(chemin))
+        self.assertEqual(len(os.listdir(self.dossier)), 5)
+
+    def test_dossiers_sortie_connus(self):
+        with patch(
+            "output_finalizer.obtenir_dossier_sortie_dossier_source",
+            side_effect=lambda dossier: f"{dossier}/sortie",
+        ), patch("output_finalizer.dossier_sortie", "D:/Ripped"):
+            dossiers = dossiers_sortie_connus(
+                {"D:/Films": "p"}, [{"file": "f", "output_dir": "E:\\Manuel"}, "x"]
+            )
+        self.assertEqual(dossiers, {"D:/Films/sortie", "D:/Ripped", "E:/Manuel"})
+
+
+@unittest.skipIf(os.name == "nt", "Le faux HandBrakeCLI est un script Python")
+class TestEncodageSousNomTemporaire(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "Film.mkv")
+        with open(self.source, "wb") as f:
+            f.write(b"\x00" * 2048)
+        self.sortie = os.path.join(self.temp_dir.name, "sortie")
+
+        outils = {
+            "HandBrakeCLI": {"chemin": FAKE_HANDBRAKECLI, "version": "1.6.1"},
+            "mediainfo": {"chemin": None, "version": None},
+        }
+        self.record = MagicMock()
+        for cible in [
+            patch.dict(registre_outils.outils, outils),
+            patch.object(
+                cache_sondes, "dossier", os.path.join(self.temp_dir.name, "cache")
+            ),
+            patch("encoding.record_successful_encoding", self.record),
+            patch("encoding.notifier_encodage_lancement"),
+            patch("encoding.notifier_encodage_termine"),
+            patch("encoding.notifier_erreur_encodage"),
+        ]:
+            cible.start()
+            self.addCleanup(cible.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def encoder(self):
+        from encoding import lancer_encodage_avec_gui
+        from output_finalizer import finaliseur_sorties
+        import process_launcher
+
+        commandes = []
+        lancer = process_launcher.lancer_processus
+
+        def enregistrer(commande, **options):
+            commandes.append(commande)
+            return lancer(commande, **options)
+
+        self.validation = MagicMock()
+        with patch("encoding.lancer_processus", side_effect=enregistrer):
+            resultat = lancer_encodage_avec_gui(
+                self.source,
+                "Films - Series VF",
+                signals=MagicMock(),
+                control_flags={},
+                dossier_sortie_personnalise=self.sortie,
+                rappel_validation=self.validation,
+            )
+        finaliseur_sorties.attendre()
+        return resultat, commandes
+
+    def test_sortie_renommee_apres_verification(self):
+        resultat, (commande,) = self.encoder()
+
+        self.assertTrue(resultat)
+        chemin_sortie = os.path.join(self.sortie, "Film_encoded.mkv")
+        self.assertEqual(
+            commande[commande.index("-o") + 1], chemin_temporaire(chemin_sortie)
+        )
+        self.assertEqual(os.listdir(self.sortie), ["Film_encoded.mkv"])
+        self.record.assert_called_once()
+        self.validation.assert_called_once_with(True)
+
+    def test_piste_audio_manquante(self):
+        with patch.dict(os.environ, {"FAKE_HANDBRAKE_PISTES_AUDIO": "0"}), patch(
+            "encoding.ajouter_fichier_a_liste_encodage_manuel"
+        ) as manuel:
+            self.encoder()
+
+        self.assertEqual(os.listdir(self.sortie), [])
+        self.record.assert_not_called()
+        manuel.assert_called_once()
+        self.assertIn("piste(s) audio", manuel.call_args[0][2])
+        # L'encodage a réussi, mais le fichier encodé est rejeté
+        self.validation.assert_called_once_with(False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest.mock import patch, MagicMock
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from probe_ahead import preparer_encodage, PreAnalyseur
+from job_queue import FileTaches
+
+
+@patch("probe_ahead.obtenir_pistes", return_value={"TitleList": []})
+class TestPreparerEncodage(unittest.TestCase):
+    @patch("probe_ahead.analyser_sous_titres_francais", return_value=(2, 3, {}))
+    @patch("probe_ahead.filtrer_pistes_audio", return_value=[1, 2])
+    def test_commande_complete(self, *_):
+        preparation = preparer_encodage("in.mkv", "Films - Series VF", "out.mkv")
+        commande = preparation["commande"]
+        self.assertEqual(commande[0], "HandBrakeCLI")
+        self.assertIn("--audio=1,2", commande)
+        self.assertIn("--subtitle=2,3", commande)
+        self.assertIn("--subtitle-burned=2", commande)
+        # Le sous-titre non verbal est incrusté : une seule piste de sous-titres
+        self.assertEqual(
+            preparation["attentes"],
+            {"pistes_audio": 2, "sous_titres": 1, "incrustation": True},
+        )
+
+    @patch("probe_ahead.filtrer_pistes_audio", return_value=None)
+    def test_sans_audio_francais(self, *_):
+        self.assertEqual(
+            preparer_encodage("in.mkv", "Films - Series VF", "out.mkv"),
+            {"raison_manuel": "audio"},
+        )
+
+    @patch("probe_ahead.analyser_sous_titres_francais", return_value=(None, None, {}))
+    @patch("probe_ahead.filtrer_pistes_audio", return_value=[1])
+    def test_vo_sans_sous_titres(self, *_):
+        self.assertEqual(
+            preparer_encodage("in.mkv", "Mangas VO", "out.mkv"),
+            {"raison_manuel": "subtitle"},
+        )
+
+    def test_echec_du_scan(self, mock_pistes):
+        mock_pistes.return_value = None
+        self.assertIsNone(preparer_encodage("in.mkv", "Mangas VO", "out.mkv"))
+
+
+class TestPreAnalyseur(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.file_encodage = FileTaches()
+        self.taches = []
+        for nom in ("a.mkv", "b.mkv", "c.mkv"):
+            chemin = os.path.join(self.test_dir, nom).replace("\\", "/")
+            with open(chemin, "wb") as f:
+                f.write(b"video")
+            tache = {"folder": "", "file": chemin, "preset": "Mangas VO"}
+            self.taches.append(tache)
+            self.file_encodage.put(tache)
+        self.pre_analyseur = PreAnalyseur(profondeur=2)
+        self.pre_analyseur.file_encodage = self.file_encodage
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def chemin_sortie(self, tache):
+        base = os.path.splitext(os.path.basename(tache["file"]))[0]
+        return f"D:/Ripped/{base}_encoded.mkv"
+
+    @patch("probe_ahead.preparer_encodage", return_value={"commande": ["cmd"]})
+    def test_tete_de_file_preparee(self, mock_preparer):
+        self.pre_analyseur.analyser_file()
+        self.pre_analyseur.analyser_file()
+        self.assertEqual(mock_preparer.call_count, 2)
+
+        tache = self.taches[0]
+        preparation = self.pre_analyseur.prendre(
+            tache["file"], tache["preset"], self.chemin_sortie(tache)
+        )
+        self.assertEqual(preparation["commande"], ["cmd"])
+
+    @patch("probe_ahead.preparer_encodage", return_value={"commande": ["cmd"]})
+    def test_preparation_perimee_si_fichier_modifie(self, _):
+        self.pre_analyseur.analyser_file()
+        tache = self.taches[0]
+        with open(tache["file"], "ab") as f:
+            f.write(b" modifiee")
+        self.assertIsNone(
+            self.pre_analyseur.prendre(
+                tache["file"], tache["preset"], self.chemin_sortie(tache)
+            )
+        )
+
+    @patch("probe_ahead.ajouter_fichier_a_liste_encodage_manuel")
+    @patch("probe_ahead.preparer_encodage")
+    def test_fichier_manuel_retire_de_la_file(self, mock_preparer, mock_manuel):
+        mock_preparer.side_effect = [
+            {"raison_manuel": "subtitle"},
+            {"commande": ["cmd"]},
+            {"commande": ["cmd"]},
+        ]
+        self.pre_analyseur.signals = MagicMock()
+        self.pre_analyseur.analyser_file()
+
+        self.assertNotIn(
+            self.taches[0]["file"],
+            [tache["file"] for tache in self.file_encodage.instantane()],
+        )
+        self.assertEqual(self.file_encodage.qsize(), 2)
+        mock_manuel.assert_called_once()
+        self.assertEqual(mock_manuel.call_args[0][2], "subtitle")
+        self.pre_analyseur.signals.update_queue.emit.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
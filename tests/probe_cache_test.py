@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from probe_cache import CacheSondes
+
+
+class TestCacheSondes(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = CacheSondes(os.path.join(self.test_dir, "cache"), taille_max=2)
+        self.fichier = self.creer_fichier("film.mkv")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def creer_fichier(self, nom, contenu=b"video"):
+        chemin = os.path.join(self.test_dir, nom)
+        with open(chemin, "wb") as f:
+            f.write(contenu)
+        return chemin
+
+    def test_analyse_lancee_une_seule_fois(self):
+        sonder = MagicMock(return_value={"pistes": [1, 2]})
+        self.assertEqual(
+            self.cache.obtenir(self.fichier, "mediainfo", sonder), {"pistes": [1, 2]}
+        )
+        self.assertEqual(
+            self.cache.obtenir(self.fichier, "mediainfo", sonder), {"pistes": [1, 2]}
+        )
+        sonder.assert_called_once_with(self.fichier)
+
+    def test_outils_independants_pour_un_meme_fichier(self):
+        handbrake = MagicMock(return_value={"TitleList": []})
+        ffprobe = MagicMock(return_value={"streams": []})
+        self.cache.obtenir(self.fichier, "handbrake", handbrake)
+        self.cache.obtenir(self.fichier, "ffprobe", ffprobe)
+        self.cache.obtenir(self.fichier, "handbrake", handbrake)
+        self.cache.obtenir(self.fichier, "ffprobe", ffprobe)
+        handbrake.assert_called_once()
+        ffprobe.assert_called_once()
+
+    def test_fichier_modifie_analyse_de_nouveau(self):
+        sonder = MagicMock(side_effect=[{"version": 1}, {"version": 2}])
+        self.cache.obtenir(self.fichier, "ffprobe", sonder)
+        with open(self.fichier, "ab") as f:
+            f.write(b" remuxee")
+        self.assertEqual(
+            self.cache.obtenir(self.fichier, "ffprobe", sonder), {"version": 2}
+        )
+
+    def test_erreurs_non_mises_en_cache(self):
+        sonder = MagicMock(
+            side_effect=["Erreur MediaInfo (code 1)", None, {"ok": True}]
+        )
+        self.cache.obtenir(self.fichier, "mediainfo", sonder)
+        self.cache.obtenir(self.fichier, "mediainfo", sonder)
+        self.assertEqual(
+            self.cache.obtenir(self.fichier, "mediainfo", sonder), {"ok": True}
+        )
+        self.assertEqual(sonder.call_count, 3)
+
+    def test_fichier_inexistant_non_mis_en_cache(self):
+        sonder = MagicMock(return_value={"ok": True})
+        absent = os.path.join(self.test_dir, "absent.mkv")
+        self.cache.obtenir(absent, "ffprobe", sonder)
+        self.cache.obtenir(absent, "ffprobe", sonder)
+        self.assertEqual(sonder.call_count, 2)
+
+    def test_eviction_des_moins_recemment_utilises(self):
+        autres = [self.creer_fichier(f"episode{i}.mkv") for i in range(2)]
+        sonder = MagicMock(return_value={"ok": True})
+        self.cache.obtenir(self.fichier, "ffprobe", sonder)
+        entree = self.cache._chemin_entree(self.fichier)
+        os.utime(entree, (1, 1))
+        for chemin in autres:
+            self.cache.obtenir(chemin, "ffprobe", sonder)
+        self.assertFalse(os.path.exists(entree))
+        self.assertTrue(os.path.exists(self.cache._chemin_entree(autres[-1])))
+        # L'éviction redescend sous la taille maximale
+        self.assertEqual(len(os.listdir(self.cache.dossier)), 1)
+
+    def test_dossier_parcouru_seulement_au_dela_de_la_taille_maximale(self):
+        cache = CacheSondes(os.path.join(self.test_dir, "grand"), taille_max=10)
+        fichiers = [self.creer_fichier(f"episode{i}.mkv") for i in range(12)]
+        sonder = MagicMock(return_value={"ok": True})
+        with patch("probe_cache.os.scandir", wraps=os.scandir) as scandir:
+            for chemin in fichiers[:10]:
+                cache.obtenir(chemin, "ffprobe", sonder)
+            # Un seul parcours, au premier ajout, pour compter les entrées existantes
+            self.assertEqual(scandir.call_count, 1)
+            cache.obtenir(fichiers[0], "mediainfo", sonder)
+            cache.invalider(fichiers[1])
+            cache.obtenir(fichiers[1], "ffprobe", sonder)
+            self.assertEqual(scandir.call_count, 1)
+
+            cache.obtenir(fichiers[10], "ffprobe", sonder)
+            self.assertEqual(scandir.call_count, 2)
+            self.assertEqual(len(os.listdir(cache.dossier)), 9)
+            cache.obtenir(fichiers[11], "ffprobe", sonder)
+            self.assertEqual(scandir.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import subprocess
+import tempfile
+import threading
+import time
+import psutil
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from process_launcher import (
+    options_lancement,
+    executer,
+    lancer_processus,
+    suspendre_arbre,
+    reprendre_arbre,
+    tuer_arbre,
+    arreter_processus_nommes,
+)
+from tool_registry import registre_outils
+from probe_cache import cache_sondes
+
+FAKE_HANDBRAKECLI = os.path.join(os.path.dirname(__file__), "fake_handbrakecli.py")
+
+# Processus qui lance un enfant puis attend : l'arbre complet doit être géré
+PARENT_AVEC_ENFANT = (
+    "import subprocess, sys, time; "
+    "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+    "time.sleep(60)"
+)
+
+
+def attendre_enfants(pid, nombre, delai=5):
+    fin = time.monotonic() + delai
+    while time.monotonic() < fin:
+        enfants = psutil.Process(pid).children(recursive=True)
+        if len(enfants) >= nombre:
+            return enfants
+        time.sleep(0.05)
+    raise AssertionError("Le processus enfant n'a pas démarré")
+
+
+def statut_apres_signal(processus, arrete, delai=5):
+    """Les signaux d'arrêt et de reprise sont asynchrones : attendre qu'ils s'appliquent."""
+    fin = time.monotonic() + delai
+    while time.monotonic() < fin:
+        statut = processus.status()
+        if (statut == psutil.STATUS_STOPPED) == arrete:
+            return statut
+        time.sleep(0.02)
+    return processus.status()
+
+
+class TestLanceurProcessus(unittest.TestCase):
+    def test_options_selon_la_plateforme(self):
+        options = options_lancement(groupe=True)
+        if os.name == "nt":
+            self.assertIn("startupinfo", options)
+            self.assertTrue(options["creationflags"] & subprocess.CREATE_NO_WINDOW)
+        else:
+            self.assertEqual(options, {"start_new_session": True})
+            self.assertEqual(options_lancement(), {})
+
+    def test_executer(self):
+        result = executer(
+            [sys.executable, "-c", "print('ok')"], capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.strip(), "ok")
+
+    def test_priorite_appliquee(self):
+        process = lancer_processus(
+            [sys.executable, "-c", "import time; time.sleep(60)"], priorite="basse"
+        )
+        try:
+            if os.name == "nt":
+                attendu = psutil.IDLE_PRIORITY_CLASS
+            else:
+                attendu = 19
+            self.assertEqual(psutil.Process(process.pid).nice(), attendu)
+        finally:
+            tuer_arbre(process.pid)
+            process.wait()
+
+    def test_suspendre_puis_reprendre_l_arbre(self):
+        process = lancer_processus([sys.executable, "-c", PARENT_AVEC_ENFANT])
+        try:
+            enfant = attendre_enfants(process.pid, 1)[0]
+            suspendre_arbre(process.pid)
+            self.assertEqual(statut_apres_signal(enfant, True), psutil.STATUS_STOPPED)
+            reprendre_arbre(process.pid)
+            self.assertNotEqual(
+                statut_apres_signal(enfant, False), psutil.STATUS_STOPPED
+            )
+        finally:
+            tuer_arbre(process.pid)
+            process.wait()
+
+    def test_tuer_arbre_y_compris_suspendu(self):
+        process = lancer_processus([sys.executable, "-c", PARENT_AVEC_ENFANT])
+        enfant = attendre_enfants(process.pid, 1)[0]
+        suspendre_arbre(process.pid)
+
+        self.assertTrue(tuer_arbre(process.pid, delai=5))
+        process.wait(timeout=5)
+        self.assertFalse(enfant.is_running())
+
+    def test_tuer_arbre_processus_termine(self):
+        process = lancer_processus([sys.executable, "-c", "pass"])
+        process.wait()
+        self.assertTrue(tuer_arbre(process.pid))
+
+    def test_arreter_les_descendants_nommes(self):
+        process = lancer_processus([sys.executable, "-c", PARENT_AVEC_ENFANT])
+        enfant = attendre_enfants(process.pid, 1)[0]
+        nom = psutil.Process(process.pid).name()
+        try:
+            self.assertEqual(
+                arreter_processus_nommes(nom, delai=5, descendants_seulement=True), 2
+            )
+            process.wait(timeout=5)
+            self.assertFalse(enfant.is_running())
+        finally:
+            tuer_arbre(process.pid)
+
+
+@unittest.skipIf(os.name == "nt", "Le faux HandBrakeCLI est un script Python")
+class TestEncodageAvecFauxHandBrake(unittest.TestCase):
+    """Parcours complet d'un encodage avec le remplaçant de HandBrakeCLI."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "Film.mkv")
+        with open(self.source, "wb") as f:
+            f.write(b"\x00" * 2048)
+        self.sortie = os.path.join(self.temp_dir.name, "sortie")
+
+        outils = {
+            "HandBrakeCLI": {"chemin": FAKE_HANDBRAKECLI, "version": "1.6.1"},
+            "mediainfo": {"chemin": None, "version": None},
+        }
+        for cible in [
+            patch.dict(registre_outils.outils, outils),
+            patch.object(
+                cache_sondes, "dossier", os.path.join(self.temp_dir.name, "cache")
+            ),
+            patch("encoding.record_successful_encoding"),
+            patch("encoding.notifier_encodage_lancement"),
+            patch("encoding.notifier_encodage_termine"),
+            patch("encoding.notifier_erreur_encodage"),
+        ]:
+            cible.start()
+            self.addCleanup(cible.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_scan_des_pistes(self):
+        from file_operations import obtenir_pistes
+
+        info_pistes = obtenir_pistes(self.source)
+        audio = info_pistes["TitleList"][0]["AudioList"]
+        self.assertEqual(audio[0]["LanguageCode"], "fre")
+
+    def test_encodage_complet(self):
+        from encoding import lancer_encodage_avec_gui
+        from output_finalizer import finaliseur_sorties
+
+        signals = MagicMock()
+        resultat = lancer_encodage_avec_gui(
+            self.source,
+            "Films - Series VF",
+            signals=signals,
+            control_flags={},
+            dossier_sortie_personnalise=self.sortie,
+        )
+        # Fichier encodé vérifié et mis en place en arrière-plan
+        finaliseur_sorties.attendre()
+
+        self.assertTrue(resultat)
+        self.assertTrue(os.path.exists(os.path.join(self.sortie, "Film_encoded.mkv")))
+        signals.update_progress.emit.assert_called_with(100)
+        signals.encoding_done.emit.assert_called()
+
+    def test_arret_pendant_la_pause(self):
+        from encoding import lancer_encodage_avec_gui
+
+        control_flags = {}
+
+        def pause_puis_arret(*args):
+            # Mettre en pause dès la première progression, puis demander l'arrêt
+            if not control_flags.get("pause"):
+                control_flags["pause"] = True
+                threading.Timer(0.5, control_flags.update, [{"stop": True}]).start()
+
+        signals = MagicMock()
+        signals.update_progress.emit.side_effect = pause_puis_arret
+        with patch.dict(os.environ, {"FAKE_HANDBRAKE_DUREE": "30"}):
+            debut = time.monotonic()
+            resultat = lancer_encodage_avec_gui(
+                self.source,
+                "Films - Series VF",
+                signals=signals,
+                control_flags=control_flags,
+                dossier_sortie_personnalise=self.sortie,
+            )
+
+        self.assertFalse(resultat)
+        self.assertLess(time.monotonic() - debut, 15)
+        self.assertFalse(os.path.exists(os.path.join(self.sortie, "Film_encoded.mkv")))
+
+    def test_arret_a_la_fermeture(self):
+        from encoding import lancer_encodage_avec_gui
+
+        control_flags = {}
+
+        def fermeture(*args):
+            # Fermer l'application dès la première progression
+            control_flags["closing"] = True
+
+        signals = MagicMock()
+        signals.update_progress.emit.side_effect = fermeture
+        with patch.dict(os.environ, {"FAKE_HANDBRAKE_DUREE": "30"}), patch(
+            "encoding.ajouter_fichier_a_liste_encodage_manuel"
+        ) as ajouter:
+            debut = time.monotonic()
+            resultat = lancer_encodage_avec_gui(
+                self.source,
+                "Films - Series VF",
+                signals=signals,
+                control_flags=control_flags,
+                dossier_sortie_personnalise=self.sortie,
+            )
+
+        self.assertFalse(resultat)
+        self.assertLess(time.monotonic() - debut, 15)
+        # Encodage interrompu pour être repris, pas renvoyé aux encodages manuels
+        ajouter.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from progress_parser import (
+    EvenementProgression,
+    SuiviProgression,
+    analyser_ligne,
+    formater_duree,
+    pourcentage_global,
+)
+
+# Extrait de la sortie de HandBrakeCLI lors d'un encodage en une passe
+SORTIE_HANDBRAKE = """\
+[20:14:02] Starting work at: Sat Oct 17 20:14:02 2026
+[20:14:02] 1 job(s) to process
+Encoding: task 1 of 1, 0.00 %
+Encoding: task 1 of 1, 0.21 %
+Encoding: task 1 of 1, 0.43 %
+Encoding: task 1 of 1, 0.64 % (98.41 fps, avg 101.37 fps, ETA 00h19m42s)
+Encoding: task 1 of 1, 0.85 % (99.02 fps, avg 100.88 fps, ETA 00h19m38s)
+Encoding: task 1 of 1, 1.07 %
+Encoding: task 1 of 1, 1.28 % (102.63 fps, avg 101.10 fps, ETA 00h19m31s)
+Encoding: task 1 of 1, 99.79 % (111.40 fps, avg 108.64 fps, ETA 00h00m02s)
+Encoding: task 1 of 1, 100.00 % (110.05 fps, avg 108.65 fps, ETA 00h00m00s)
+[20:33:17] work: average encoding speed for job is 108.650055 fps
+Muxing: this may take awhile...
+[20:33:18] Finished work at: Sat Oct 17 20:33:18 2026
+"""
+
+
+class HorlogeFactice:
+    def __init__(self):
+        self.maintenant = 0.0
+
+    def __call__(self):
+        return self.maintenant
+
+
+class TestAnalyserLigne(unittest.TestCase):
+    def test_ligne_complete(self):
+        evenement = analyser_ligne(
+            "Encoding: task 1 of 1, 45.67 % (123.45 fps, avg 110.23 fps, ETA 01h12m34s)"
+        )
+        self.assertEqual(
+            evenement, EvenementProgression(1, 1, 45.67, 123.45, 110.23, 4354)
+        )
+
+    def test_ligne_sans_statistiques(self):
+        evenement = analyser_ligne("Encoding: task 2 of 2, 0.52 %")
+        self.assertEqual(evenement, EvenementProgression(2, 2, 0.52, None, None, None))
+
+    def test_lignes_ignorees(self):
+        self.assertIsNone(analyser_ligne("Muxing: this may take awhile..."))
+        self.assertIsNone(analyser_ligne("[20:14:02] 1 job(s) to process"))
+
+    def test_pourcentage_global_deux_passes(self):
+        evenement = EvenementProgression(2, 2, 50.0, None, None, None)
+        self.assertEqual(pourcentage_global(evenement), 75.0)
+
+    def test_formater_duree(self):
+        self.assertEqual(formater_duree(3725.9), "1h2m5s")
+
+
+class TestSuiviProgression(unittest.TestCase):
+    def setUp(self):
+        self.horloge = HorlogeFactice()
+        self.suivi = SuiviProgression(0.5, horloge=self.horloge)
+
+    def test_sortie_enregistree_regroupee(self):
+        # Toute la sortie arrive dans le même intervalle : seuls le premier
+        # événement et la fin de l'encodage sont transmis
+        transmis = [
+            evenement
+            for ligne in SORTIE_HANDBRAKE.splitlines()
+            if (evenement := self.suivi.traiter(ligne)) is not None
+        ]
+        self.assertEqual([e.pourcentage for e in transmis], [0.0, 100.0])
+        self.assertEqual(transmis[-1].fps, 110.05)
+        self.assertIsNone(self.suivi.vider())
+
+    def test_au_plus_un_evenement_par_intervalle(self):
+        lignes = [l for l in SORTIE_HANDBRAKE.splitlines() if "Encoding" in l][:-1]
+        transmis = []
+        for ligne in lignes:
+            self.horloge.maintenant += 0.2
+            evenement = self.suivi.traiter(ligne)
+            if evenement is not None:
+                transmis.append(evenement)
+        # 8 lignes en 1,6 s avec un intervalle de 0,5 s
+        self.assertEqual(len(transmis), 3)
+
+        # Le dernier état est transmis en fin d'encodage
+        self.assertEqual(self.suivi.vider().pourcentage, 99.79)
+
+    def test_fps_conserves_entre_deux_lignes(self):
+        self.suivi.traiter(
+            "Encoding: task 1 of 1, 0.64 % (98.41 fps, avg 101.37 fps, ETA 00h19m42s)"
+        )
+        self.horloge.maintenant += 1
+        evenement = self.suivi.traiter("Encoding: task 1 of 1, 1.07 %")
+        self.assertEqual(evenement.fps, 98.41)
+        self.assertEqual(evenement.eta, 1182)
+
+    def test_changement_de_passe_transmis(self):
+        self.suivi.traiter("Encoding: task 1 of 2, 99.90 %")
+        evenement = self.suivi.traiter("Encoding: task 2 of 2, 0.10 %")
+        self.assertEqual(evenement.passe, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
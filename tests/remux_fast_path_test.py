@@ -0,0 +1,191 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from remux_fast_path import (
+    caracteristiques_video,
+    cible_preset,
+    commande_copie_flux,
+    flux_remux,
+    raison_reencodage,
+)
+from tool_registry import registre_outils
+from probe_cache import cache_sondes
+
+FAKE_HANDBRAKECLI = os.path.join(os.path.dirname(__file__), "fake_handbrakecli.py")
+
+CONFIG = {
+    "remux_sources_conformes": True,
+    "debit_max_remux_kbps": {"1080p": 6000, "2160p": 20000},
+}
+
+
+def mediainfo(format_video="HEVC", largeur=1920, hauteur=1080, bits=8, debit=4000000):
+    return {
+        "media": {
+            "track": [
+                {"@type": "General", "OverallBitRate": "9000000"},
+                {
+                    "@type": "Video",
+                    "Format": format_video,
+                    "Width": str(largeur),
+                    "Height": str(hauteur),
+                    "BitDepth": str(bits),
+                    "BitRate": str(debit) if debit else None,
+                },
+            ]
+        }
+    }
+
+
+class TestDecisionRemux(unittest.TestCase):
+    def setUp(self):
+        for cible in [
+            patch("remux_fast_path.load_config", return_value=CONFIG),
+            patch.dict(
+                registre_outils.outils,
+                {"ffmpeg": {"chemin": "ffmpeg", "version": "6.0"}},
+            ),
+        ]:
+            cible.start()
+            self.addCleanup(cible.stop)
+
+    def raison(self, preset="Films - Series VF", **video):
+        with patch(
+            "remux_fast_path.obtenir_info_mediainfo", return_value=mediainfo(**video)
+        ):
+            return raison_reencodage("film.mkv", preset)
+
+    def test_cible_des_presets(self):
+        self.assertEqual(
+            cible_preset("Films - Series VF"),
+            {"format": "HEVC", "profondeur": 8, "largeur": 1920, "hauteur": 1080},
+        )
+        self.assertEqual(cible_preset("4K - 10bits")["profondeur"], 10)
+        self.assertIsNone(cible_preset("Preset inconnu"))
+
+    def test_caracteristiques_video(self):
+        self.assertEqual(
+            caracteristiques_video(mediainfo(debit=None)),
+            {
+                "format": "HEVC",
+                "largeur": 1920,
+                "hauteur": 1080,
+                "profondeur": 8,
+                # Débit du conteneur à défaut de celui de la piste vidéo
+                "debit": 9000,
+            },
+        )
+        self.assertIsNone(caracteristiques_video("Erreur MediaInfo"))
+
+    def test_source_conforme(self):
+        self.assertIsNone(self.raison())
+        # Une source 10 bits reste conforme à un preset 8 bits
+        self.assertIsNone(self.raison(bits=10))
+
+    def test_source_a_reencoder(self):
+        self.assertIn("format", self.raison(format_video="AVC"))
+        self.assertIn("résolution", self.raison(largeur=3840, hauteur=2160))
+        self.assertIn("bits", self.raison("4K - 10bits", largeur=3840, hauteur=2160))
+        self.assertIn("débit", self.raison(debit=12000000))
+
+    def test_flux_des_pistes_selectionnees(self):
+        with patch("remux_fast_path.raison_reencodage", return_value=None):
+            self.assertEqual(
+                flux_remux("film.mkv", "Films - Series VF", [1, 3], 2, False),
+                ["0:v:0", "0:a:0", "0:a:2", "0:s:1"],
+            )
+            self.assertEqual(
+                flux_remux("film.mkv", "Films - Series VF", [], None, False),
+                ["0:v:0", "0:a?"],
+            )
+            # Un sous-titre à incruster impose le réencodage
+            self.assertIsNone(flux_remux("film.mkv", "Mangas VO", [1], 1, True))
+
+    def test_option_desactivee(self):
+        with patch("remux_fast_path.load_config", return_value={}):
+            self.assertIsNone(
+                flux_remux("film.mkv", "Films - Series VF", [1], 1, False)
+            )
+
+    def test_commande_copie_flux(self):
+        self.assertEqual(
+            commande_copie_flux("in.mkv", "out.mkv", ["0:v", "0:3"], ["-y"], "ffmpeg"),
+            ["ffmpeg", "-i", "in.mkv", "-map", "0:v", "-map", "0:3", "-y"]
+            + ["-c", "copy", "out.mkv"],
+        )
+
+
+@unittest.skipIf(os.name == "nt", "Le faux HandBrakeCLI est un script Python")
+class TestRemuxAuLieuDEncoder(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "Film.mkv")
+        with open(self.source, "wb") as f:
+            f.write(b"\x00" * 2048)
+        self.sortie = os.path.join(self.temp_dir.name, "sortie")
+
+        outils = {
+            "HandBrakeCLI": {"chemin": FAKE_HANDBRAKECLI, "version": "1.6.1"},
+            "mediainfo": {"chemin": None, "version": None},
+            "ffmpeg": {"chemin": "ffmpeg", "version": "6.0"},
+        }
+        self.record = MagicMock()
+        for cible in [
+            patch.dict(registre_outils.outils, outils),
+            patch.object(
+                cache_sondes, "dossier", os.path.join(self.temp_dir.name, "cache")
+            ),
+            patch("remux_fast_path.load_config", return_value=CONFIG),
+            patch("remux_fast_path.raison_reencodage", return_value=None),
+            patch("encoding.record_successful_encoding", self.record),
+            patch("encoding.notifier_encodage_lancement"),
+            patch("encoding.notifier_encodage_termine"),
+            patch("encoding.notifier_erreur_encodage"),
+        ]:
+            cible.start()
+            self.addCleanup(cible.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_source_conforme_remuxee(self):
+        from encoding import lancer_encodage_avec_gui
+        from output_finalizer import finaliseur_sorties
+        import process_launcher
+
+        commandes = []
+        lancer = process_launcher.lancer_processus
+
+        def remuxer(commande, **options):
+            # ffmpeg n'est pas installé : le faux HandBrakeCLI écrit le fichier
+            commandes.append(commande)
+            sortie = commande[-1]
+            return lancer([FAKE_HANDBRAKECLI, "-o", sortie, "--audio=1"], **options)
+
+        with patch("encoding.lancer_processus", side_effect=remuxer):
+            resultat = lancer_encodage_avec_gui(
+                self.source,
+                "Films - Series VF",
+                signals=MagicMock(),
+                control_flags={},
+                dossier_sortie_personnalise=self.sortie,
+            )
+        finaliseur_sorties.attendre()
+
+        self.assertTrue(resultat)
+        (commande,) = commandes
+        self.assertEqual(commande[:3], ["ffmpeg", "-i", self.source])
+        self.assertIn("copy", commande)
+        self.assertEqual(os.listdir(self.sortie), ["Film_encoded.mkv"])
+        # Remux exclu des estimations de durée d'encodage
+        self.assertTrue(self.record.call_args[0][2]["remux"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from job_queue import FileTaches
+from scheduling import (
+    EstimationsFile,
+    PolitiqueOrdonnancement,
+    creer_politique,
+    estimer_duree_encodage,
+)
+
+
+class Horloge:
+    def __init__(self):
+        self.instant = 1000.0
+
+    def __call__(self):
+        return self.instant
+
+
+def fichiers(file_taches):
+    return [tache["file"] for tache in file_taches.instantane()]
+
+
+class TestEstimation(unittest.TestCase):
+    @patch("scheduling.estimateur_encodage.estimer", return_value=None)
+    def test_estimation_selon_taille_et_preset(self, _):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"0" * 1024)
+        try:
+            leger = estimer_duree_encodage(
+                {"file": f.name, "preset": "Dessins animes VF"}
+            )
+            lourd = estimer_duree_encodage({"file": f.name, "preset": "4K - 10bits"})
+            self.assertAlmostEqual(lourd, leger * 4)
+        finally:
+            os.remove(f.name)
+
+    @patch(
+        "scheduling.estimateur_encodage.estimer",
+        return_value={"duree": 1800, "taille": 700},
+    )
+    def test_estimation_d_apres_l_historique(self, _):
+        self.assertEqual(estimer_duree_encodage({"file": "a.mkv"}), 30)
+
+    def test_fichier_introuvable(self):
+        self.assertIsNone(estimer_duree_encodage({"file": "/inexistant.mkv"}))
+
+    def test_fifo_par_defaut(self):
+        self.assertIsNone(creer_politique({}))
+        politique = creer_politique({"politique_file_attente": "equitable"})
+        self.assertEqual(politique.nom, "equitable")
+
+
+class TestPolitiqueDansLaFile(unittest.TestCase):
+    def setUp(self):
+        self.horloge = Horloge()
+        self.durees = {"gros": 600, "moyen": 60, "court": 20}
+
+    def creer_file(self, nom, **options):
+        politique = PolitiqueOrdonnancement(nom, horloge=self.horloge, **options)
+        return FileTaches(politique)
+
+    def estimer(self, file):
+        EstimationsFile(
+            lambda tache: {"minutes_estimees": self.durees.get(tache["file"])}
+        ).actualiser(file)
+
+    def test_plus_court_d_abord(self):
+        file = self.creer_file("plus_court_d_abord")
+        for nom in ["gros", "inconnu", "moyen", "court"]:
+            file.put({"file": nom})
+        self.estimer(file)
+        self.assertEqual(fichiers(file), ["court", "moyen", "gros", "inconnu"])
+        self.assertEqual(file.instantane()[0]["priorite"], 20)
+        self.assertEqual(file.get()["file"], "court")
+
+    def test_poids_des_dossiers(self):
+        file = self.creer_file("plus_court_d_abord", poids_dossiers={"films": 20})
+        file.put({"file": "moyen", "folder": "series"})
+        file.put({"file": "gros", "folder": "films"})
+        self.estimer(file)
+        self.assertEqual(fichiers(file), ["gros", "moyen"])
+
+    def test_tour_de_role_entre_dossiers(self):
+        file = self.creer_file("equitable")
+        for nom, dossier in [("a1", "a"), ("a2", "a"), ("a3", "a"), ("b1", "b")]:
+            file.put({"file": nom, "folder": dossier})
+        file.put({"file": "c1", "folder": "c"})
+        self.assertEqual(fichiers(file), ["a1", "b1", "c1", "a2", "a3"])
+        self.assertEqual(file.get()["file"], "a1")
+        # Un dossier arrivé après le début du tour attend le tour suivant
+        file.put({"file": "d1", "folder": "d"})
+        self.assertEqual(fichiers(file), ["b1", "c1", "a2", "d1", "a3"])
+        # Un dossier dont la dernière tâche est retirée retrouve son tour
+        file.retirer(file.instantane()[3]["id"])
+        file.put({"file": "d2", "folder": "d"})
+        self.assertEqual(fichiers(file), ["b1", "c1", "a2", "d2", "a3"])
+
+    def test_vieillissement_evite_la_famine(self):
+        file = self.creer_file("plus_court_d_abord", vieillissement=1.0)
+        file.put({"file": "gros"})
+        self.horloge.instant += 60 * 600
+        file.put({"file": "court"})
+        self.estimer(file)
+        self.assertEqual(fichiers(file), ["gros", "court"])
+        self.assertEqual(file.instantane()[0]["priorite"], 0)
+
+    def test_deplacement_manuel_conserve(self):
+        file = self.creer_file("plus_court_d_abord")
+        id_gros = file.put({"file": "gros"})
+        file.put({"file": "moyen"})
+        self.estimer(file)
+        file.monter_en_tete(id_gros)
+        file.put({"file": "court"})
+        self.estimer(file)
+        # Une tâche plus courte ajoutée ensuite ne repasse pas devant
+        self.assertEqual(fichiers(file), ["gros", "court", "moyen"])
+
+    def test_cles_calculees_une_seule_fois(self):
+        file = self.creer_file("plus_court_d_abord")
+        for nom in ["gros", "moyen", "court"]:
+            file.put({"file": nom})
+        self.estimer(file)
+        cle = MagicMock(wraps=file.politique.cle)
+        with patch.object(file.politique, "cle", cle):
+            file.put({"file": "inconnu"})
+            self.assertEqual(file.get()["file"], "court")
+            file.retirer(file.instantane()[0]["id"])
+        # Seule la tâche ajoutée reçoit une clé, les autres ne sont pas recalculées
+        self.assertEqual(cle.call_count, 1)
+
+    @patch(
+        "scheduling.estimateur_encodage.estimer",
+        side_effect=AssertionError("estimation pendant l'ajout"),
+    )
+    def test_ajout_sans_estimation(self, _):
+        file = self.creer_file("plus_court_d_abord")
+        file.put({"file": "gros"})
+        self.assertEqual(fichiers(file), ["gros"])
+
+    def test_estimation_en_arriere_plan(self):
+        file = self.creer_file("plus_court_d_abord")
+        estimations = EstimationsFile(
+            lambda tache: {"minutes_estimees": self.durees.get(tache["file"])},
+            intervalle=3600,
+        )
+        estimations.demarrer(file)
+        try:
+            file.put({"file": "gros"})
+            file.put({"file": "court"})
+            # Les nouvelles tâches sont estimées sans attendre la réestimation complète
+            fin = time.monotonic() + 5
+            while fichiers(file) != ["court", "gros"] and time.monotonic() < fin:
+                time.sleep(0.01)
+            self.assertEqual(fichiers(file), ["court", "gros"])
+        finally:
+            estimations.arreter()
+
+
+if __name__ == "__main__":
+    unittest.main()
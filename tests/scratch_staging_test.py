@@ -0,0 +1,213 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scratch_staging import ZoneTransit
+from output_finalizer import finaliseur_sorties
+from job_queue import FileTaches
+from tool_registry import registre_outils
+from probe_cache import cache_sondes
+
+FAKE_HANDBRAKECLI = os.path.join(os.path.dirname(__file__), "fake_handbrakecli.py")
+
+
+class TestZoneTransit(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dossier = os.path.join(self.temp_dir.name, "transit")
+        self.zone = ZoneTransit(self.dossier, 1)
+        # Budget en octets pour les tests
+        self.zone.budget = 3000
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def source(self, nom, taille=1000):
+        chemin = os.path.join(self.temp_dir.name, nom)
+        with open(chemin, "wb") as f:
+            f.write(os.urandom(taille))
+        return chemin
+
+    def contenu(self, chemin):
+        with open(chemin, "rb") as f:
+            return f.read()
+
+    def test_copie_utilisee_puis_supprimee(self):
+        source = self.source("a.mkv")
+        copie = self.zone.copier(source)
+        self.assertEqual(self.contenu(copie), self.contenu(source))
+        self.assertEqual(self.zone.prendre(source), copie)
+
+        self.zone.rendre(source)
+        self.assertFalse(os.path.exists(copie))
+        self.assertEqual(self.zone.copies, {})
+
+    def test_eviction_des_copies_les_plus_anciennes(self):
+        a, b, c, d = (self.source(nom) for nom in ["a", "b", "c", "d"])
+        copie_a = self.zone.copier(a)
+        self.zone.copier(b)
+        self.zone.copier(c)
+        # 'a' est en cours d'encodage : 'b' est évincée à sa place
+        self.zone.prendre(a)
+        self.assertIsNotNone(self.zone.copier(d))
+        self.assertEqual(set(self.zone.copies), {a, c, d})
+        self.assertTrue(os.path.exists(copie_a))
+
+    def test_fichier_trop_grand_pour_le_budget(self):
+        source = self.source("gros.mkv", 4000)
+        self.assertIsNone(self.zone.prendre(source))
+        self.assertEqual(self.zone.copies, {})
+
+    def test_source_modifiee_copiee_a_nouveau(self):
+        source = self.source("a.mkv")
+        self.zone.copier(source)
+        with open(source, "ab") as f:
+            f.write(b"suite")
+        copie = self.zone.copier(source)
+        self.assertEqual(self.contenu(copie), self.contenu(source))
+
+    def test_copie_interrompue(self):
+        source = self.source("a.mkv")
+        self.assertIsNone(self.zone.copier(source, interrompre=lambda: True))
+        self.assertEqual(os.listdir(os.path.join(self.dossier, "sources")), [])
+        self.assertEqual(self.zone.copies, {})
+
+    def test_reservation_des_sorties(self):
+        self.zone.copier(self.source("a.mkv", 2000))
+        # La copie inutilisée est évincée pour laisser la place à la sortie
+        chemin = self.zone.reserver_sortie("/films/a_encoded.mkv", 1500)
+        self.assertTrue(os.path.basename(chemin).endswith("_a_encoded.mkv"))
+        self.assertEqual(self.zone.copies, {})
+        self.assertIsNone(self.zone.reserver_sortie("/films/b_encoded.mkv", 2000))
+
+        with open(chemin, "wb") as f:
+            f.write(b"partiel")
+        self.zone.liberer_sortie("/films/a_encoded.mkv", chemin)
+        self.assertFalse(os.path.exists(chemin))
+        self.assertEqual(self.zone.reservations, {})
+
+    def test_sorties_de_meme_nom_distinctes(self):
+        self.zone.budget = 10000
+        a = self.zone.reserver_sortie("/series/ShowA/S01E01_encoded.mkv", 10)
+        b = self.zone.reserver_sortie("/series/ShowB/S01E01_encoded.mkv", 10)
+        self.assertNotEqual(a, b)
+        # Nom stable d'une exécution à l'autre (reprise des segments)
+        self.zone.liberer_sortie("/series/ShowA/S01E01_encoded.mkv")
+        self.assertEqual(
+            self.zone.reserver_sortie("/series/ShowA/S01E01_encoded.mkv", 10), a
+        )
+
+    def test_sortie_non_deplacee_garde_sa_place(self):
+        chemin = self.zone.reserver_sortie("/films/a_encoded.mkv", 1500)
+        with open(chemin, "wb") as f:
+            f.write(b"encode")
+        # Déplacement impossible : le fichier encodé reste dans la zone de transit
+        self.zone.liberer_sortie("/films/a_encoded.mkv")
+        self.assertEqual(self.zone.reservations, {"/films/a_encoded.mkv": 1500})
+        self.assertIsNone(self.zone.reserver_sortie("/films/b_encoded.mkv", 2000))
+
+    def test_nettoyage_au_demarrage(self):
+        self.zone.copier(self.source("a.mkv"))
+        sorties = os.path.join(self.dossier, "sorties")
+        os.makedirs(os.path.join(sorties, "x_b_encoded.mkv.segments"))
+        for nom in ["x_a_encoded.mkv", "x_b_encoded.mkv"]:
+            with open(os.path.join(sorties, nom), "wb") as f:
+                f.write(b"partiel")
+
+        ZoneTransit(self.dossier, 1).nettoyer()
+
+        self.assertFalse(os.path.exists(os.path.join(self.dossier, "sources")))
+        # Seul l'encodage par segments, qui peut être repris, est conservé
+        self.assertEqual(
+            sorted(os.listdir(sorties)),
+            ["x_b_encoded.mkv", "x_b_encoded.mkv.segments"],
+        )
+
+    def test_anticipation_des_premiers_fichiers_de_la_file(self):
+        file = FileTaches()
+        sources = [self.source(nom) for nom in ["a", "b"]]
+        for source in sources:
+            file.put({"file": source, "preset": "p"})
+        self.zone.anticiper(file)
+        self.assertEqual(list(self.zone.copies), sources[:1])
+
+    def test_zone_inactive(self):
+        zone = ZoneTransit()
+        self.assertFalse(zone.active)
+        self.assertIsNone(zone.prendre(self.source("a.mkv")))
+        self.assertIsNone(zone.reserver_sortie("/films/a_encoded.mkv", 10))
+
+
+@unittest.skipIf(os.name == "nt", "Le faux HandBrakeCLI est un script Python")
+class TestEncodageDepuisLaZoneDeTransit(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "Film.mkv")
+        with open(self.source, "wb") as f:
+            f.write(b"\x00" * 2048)
+        self.sortie = os.path.join(self.temp_dir.name, "sortie")
+        self.transit = os.path.join(self.temp_dir.name, "transit")
+
+        from scratch_staging import zone_transit
+
+        outils = {
+            "HandBrakeCLI": {"chemin": FAKE_HANDBRAKECLI, "version": "1.6.1"},
+            "mediainfo": {"chemin": None, "version": None},
+        }
+        for cible in [
+            patch.dict(registre_outils.outils, outils),
+            patch.object(
+                cache_sondes, "dossier", os.path.join(self.temp_dir.name, "cache")
+            ),
+            patch.object(zone_transit, "dossier", self.transit),
+            patch.object(zone_transit, "budget", 1024**2),
+            patch("encoding.record_successful_encoding"),
+            patch("encoding.notifier_encodage_lancement"),
+            patch("encoding.notifier_encodage_termine"),
+            patch("encoding.notifier_erreur_encodage"),
+        ]:
+            cible.start()
+            self.addCleanup(cible.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_sortie_deplacee_vers_sa_destination(self):
+        from encoding import lancer_encodage_avec_gui
+        import process_launcher
+
+        commandes = []
+        lancer = process_launcher.lancer_processus
+
+        def enregistrer(commande, **options):
+            commandes.append(commande)
+            return lancer(commande, **options)
+
+        with patch("encoding.lancer_processus", side_effect=enregistrer):
+            resultat = lancer_encodage_avec_gui(
+                self.source,
+                "Films - Series VF",
+                signals=MagicMock(),
+                control_flags={},
+                dossier_sortie_personnalise=self.sortie,
+            )
+
+        finaliseur_sorties.attendre()
+
+        self.assertTrue(resultat)
+        (commande,) = commandes
+        self.assertTrue(commande[commande.index("-i") + 1].startswith(self.transit))
+        self.assertTrue(commande[commande.index("-o") + 1].startswith(self.transit))
+        self.assertTrue(os.path.exists(os.path.join(self.sortie, "Film_encoded.mkv")))
+        # Copie de la source et sortie locale supprimées
+        self.assertEqual(os.listdir(os.path.join(self.transit, "sources")), [])
+        self.assertEqual(os.listdir(os.path.join(self.transit, "sorties")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
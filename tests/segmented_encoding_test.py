@@ -0,0 +1,149 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from segmented_encoding import (
+    chapitres_media,
+    decouper_en_segments,
+    commande_segment,
+    ManifesteSegments,
+)
+from encoding import encoder_par_segments
+
+COMMANDE = ["HandBrakeCLI", "-i", "Film.mkv", "-o", "Film_encoded.mkv", "-Z", "x"]
+
+
+class TestDecoupage(unittest.TestCase):
+    def test_fichier_trop_court(self):
+        self.assertEqual(decouper_en_segments(900, 600, [300] * 3), [])
+        self.assertEqual(decouper_en_segments(None, 600, [300] * 3), [])
+
+    def test_pas_de_decoupage_sans_chapitres(self):
+        # Un découpage par durée décalerait l'audio à chaque jonction
+        self.assertEqual(decouper_en_segments(3000, 600), [])
+        self.assertEqual(decouper_en_segments(3000, 600, [3000]), [])
+        self.assertEqual(decouper_en_segments(3000, 600, [1500, 0, 1500]), [])
+
+    def test_decoupage_par_chapitres(self):
+        # Chapitres regroupés jusqu'à 10 minutes, dernier segment court rattaché
+        segments = decouper_en_segments(2600, 600, [300] * 8 + [200])
+        self.assertEqual(
+            [s["chapitres"] for s in segments], [[1, 2], [3, 4], [5, 6], [7, 9]]
+        )
+        self.assertEqual(segments[-1]["debut"], 1800)
+        self.assertEqual(segments[-1]["duree"], 800)
+
+    def test_chapitres_du_scan(self):
+        scan = {
+            "TitleList": [
+                {
+                    "ChapterList": [
+                        {"Duration": {"Hours": 0, "Minutes": 5, "Seconds": 3}},
+                        {"Duration": {"Hours": 1, "Minutes": 0, "Seconds": 0}},
+                    ]
+                }
+            ]
+        }
+        self.assertEqual(chapitres_media(scan), [303, 3600])
+        self.assertEqual(chapitres_media(None), [])
+
+    def test_commande_segment(self):
+        segments = decouper_en_segments(1800, 600, [600, 600, 600])
+        commande = commande_segment(COMMANDE, segments[1], "seg.mkv")
+        self.assertEqual(commande[4], "seg.mkv")
+        self.assertIn("--chapters=2-2", commande)
+        self.assertFalse(
+            any(o.startswith(("--start-at", "--stop-at")) for o in commande)
+        )
+        self.assertEqual(COMMANDE[4], "Film_encoded.mkv")
+
+
+class TestManifesteSegments(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.temp_dir.name, "Film.mkv")
+        with open(self.source, "wb") as f:
+            f.write(b"\x00" * 1024)
+        self.sortie = os.path.join(self.temp_dir.name, "Film_encoded.mkv")
+        self.segments = decouper_en_segments(1800, 600, [600, 600, 600])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def encoder_premier_segment(self):
+        manifeste = ManifesteSegments(self.sortie)
+        manifeste.preparer(self.source, "preset", self.segments)
+        segment = manifeste.restants()[0]
+        with open(manifeste.chemin_segment(segment), "wb") as f:
+            f.write(b"segment")
+        manifeste.marquer_termine(segment, 42)
+        return manifeste
+
+    def test_reprise_des_segments_termines(self):
+        self.encoder_premier_segment()
+        manifeste = ManifesteSegments(self.sortie)
+        self.assertEqual(manifeste.preparer(self.source, "preset", self.segments), 1)
+        self.assertEqual([s["index"] for s in manifeste.restants()], [1, 2])
+        self.assertEqual(manifeste.duree_terminee(), 600)
+        self.assertEqual(manifeste.duree_encodage(), 42)
+
+    def test_manifeste_d_un_autre_encodage_ignore(self):
+        self.encoder_premier_segment()
+        manifeste = ManifesteSegments(self.sortie)
+        self.assertEqual(manifeste.preparer(self.source, "autre", self.segments), 0)
+
+        self.encoder_premier_segment()
+        with open(self.source, "ab") as f:
+            f.write(b"modifie")
+        manifeste = ManifesteSegments(self.sortie)
+        self.assertEqual(manifeste.preparer(self.source, "preset", self.segments), 0)
+        self.assertEqual(os.listdir(manifeste.dossier), ["manifeste.json"])
+
+    def test_segment_disparu_reencode(self):
+        manifeste = self.encoder_premier_segment()
+        os.remove(manifeste.chemin_segment(manifeste.segments[0]))
+        manifeste = ManifesteSegments(self.sortie)
+        self.assertEqual(manifeste.preparer(self.source, "preset", self.segments), 0)
+
+    def test_encodage_reprend_au_premier_segment_restant(self):
+        manifeste = self.encoder_premier_segment()
+        commandes = []
+
+        def executer(commande, *args):
+            commandes.append(commande)
+            with open(commande[4], "wb") as f:
+                f.write(b"segment")
+            return {"code": 0, "duree": 10, "fps_moyen": 24.0}
+
+        with patch("encoding.executer_handbrake", side_effect=executer), patch.object(
+            ManifesteSegments, "assembler", return_value=True
+        ):
+            resultat = encoder_par_segments(
+                manifeste, COMMANDE, "Film", MagicMock(), {}, self.sortie, 0
+            )
+
+        self.assertEqual(resultat, {"code": 0, "duree": 62, "fps_moyen": 24.0})
+        self.assertEqual(
+            [c[-1] for c in commandes], ["--chapters=2-2", "--chapters=3-3"]
+        )
+        self.assertEqual(manifeste.restants(), [])
+
+    def test_interruption_conserve_les_segments_termines(self):
+        manifeste = self.encoder_premier_segment()
+        arret = {"code": None, "duree": 0, "fps_moyen": None}
+        with patch("encoding.executer_handbrake", return_value=arret):
+            resultat = encoder_par_segments(
+                manifeste, COMMANDE, "Film", None, {}, self.sortie, 0
+            )
+        self.assertIsNone(resultat["code"])
+        manifeste = ManifesteSegments(self.sortie)
+        self.assertEqual(manifeste.preparer(self.source, "preset", self.segments), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
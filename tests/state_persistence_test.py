@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from job_queue import FileTaches
+from state_persistence import JournalEncodages
+
+
+def fichiers(taches):
+    return [tache["file"] for tache in taches]
+
+
+class TestJournalEncodages(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.fichier_etat = os.path.join(self.temp_dir.name, "etat.json")
+        self.fichier_journal = os.path.join(self.temp_dir.name, "etat.journal")
+        self.journal = self.creer_journal()
+        self.file = FileTaches()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def creer_journal(self, taille_max=500):
+        return JournalEncodages(self.fichier_etat, self.fichier_journal, taille_max)
+
+    def relire(self):
+        return self.creer_journal().charger()
+
+    def lignes_journal(self):
+        with open(self.fichier_journal) as f:
+            return f.readlines()
+
+    def test_rien_n_est_ecrit_avant_demarrage(self):
+        self.file.put({"file": "a"})
+        self.assertIsNone(self.relire())
+        self.assertFalse(os.path.exists(self.fichier_journal))
+
+    def test_rejeu_de_la_file(self):
+        self.file.put({"file": "a"})
+        self.file.attacher_journal(self.journal)
+        ids = {nom: self.file.put({"file": nom}) for nom in ["b", "c", "d"]}
+        self.file.monter_en_tete(ids["d"])
+        self.file.descendre(ids["b"])
+        self.file.retirer(ids["c"])
+
+        self.assertEqual(fichiers(self.relire()["encoding_queue"]), ["d", "a", "b"])
+        self.assertEqual(fichiers(self.file.instantane()), ["d", "a", "b"])
+        # Une ligne ajoutée par modification, sans réécrire l'instantané
+        self.assertEqual(len(self.lignes_journal()), 6)
+
+    def test_encodages_commences_repris_en_premier(self):
+        self.file.attacher_journal(self.journal)
+        for nom in ["a", "b", "c"]:
+            self.file.put({"file": nom})
+        a = self.file.get()
+        b = self.file.get()
+        self.file.terminer(a, reussi=True)
+
+        etat = self.relire()
+        self.assertEqual(fichiers(etat["encodages_en_cours"]), ["b"])
+        self.assertEqual(etat["current_encoding"]["file"], "b")
+        self.assertEqual(fichiers(etat["encoding_queue"]), ["c"])
+
+        self.file.terminer(b, reussi=False)
+        self.file.vider()
+        self.assertIsNone(self.relire())
+
+    def test_compaction_en_instantane(self):
+        journal = self.creer_journal(taille_max=4)
+        self.file.attacher_journal(journal)
+        for nom in ["a", "b", "c", "d", "e"]:
+            self.file.put({"file": nom})
+        self.assertEqual(len(self.lignes_journal()), 1)
+        with open(self.fichier_etat) as f:
+            self.assertEqual(json.load(f)["sequence"], 4)
+        self.assertEqual(
+            fichiers(self.relire()["encoding_queue"]), ["a", "b", "c", "d", "e"]
+        )
+
+    def test_evenements_deja_dans_l_instantane_ignores(self):
+        self.file.attacher_journal(self.journal)
+        self.file.put({"file": "a"})
+        lignes = self.lignes_journal()
+        # Arrêt entre l'écriture de l'instantané et la remise à zéro du journal
+        self.journal._instantane()
+        with open(self.fichier_journal, "w") as f:
+            f.writelines(lignes)
+            f.write('{"seq": 2, "op": "aj')
+        self.assertEqual(fichiers(self.relire()["encoding_queue"]), ["a"])
+
+    def test_ancien_format_d_etat(self):
+        with open(self.fichier_etat, "w") as f:
+            json.dump(
+                {"current_encoding": {"file": "a"}, "encoding_queue": [{"file": "b"}]},
+                f,
+            )
+        etat = self.relire()
+        self.assertEqual(fichiers(etat["encodages_en_cours"]), ["a"])
+        self.assertEqual(fichiers(etat["encoding_queue"]), ["b"])
+
+    def test_ecritures_concurrentes(self):
+        self.file.attacher_journal(self.journal)
+
+        def ajouter(prefixe):
+            for i in range(50):
+                self.file.put({"file": f"{prefixe}{i}"})
+
+        threads = [threading.Thread(target=ajouter, args=(p,)) for p in "xyz"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            fichiers(self.relire()["encoding_queue"]),
+            fichiers(self.file.instantane()),
+        )
+
+    def test_effacer(self):
+        self.file.attacher_journal(self.journal)
+        self.file.put({"file": "a"})
+        self.journal.effacer()
+        self.assertIsNone(self.relire())
+        # Les modifications suivantes restent journalisées
+        self.file.put({"file": "b"})
+        self.assertEqual(fichiers(self.relire()["encoding_queue"]), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,11 +13,10 @@ Ce module contient deux classes principales de tests :
         des noms mixtes, et des structures de données anormales.
      - Utilise des données mockées pour simuler les sorties de MediaInfo.
 - `TestMediaInfoFunctions` :
-     - Valide le comportement des fonctions `obtenir_info_mediainfo` et
-        `obtenir_info_mediainfo_explicit_path`.
+     - Valide le comportement de la fonction `obtenir_info_mediainfo`.
      - Teste des scénarios où MediaInfo retourne des données valides, échoue, ou retourne
         un JSON invalide.
-     - Vérifie également le mécanisme de fallback vers un chemin explicite lorsque MediaInfo
+     - Vérifie également l'utilisation du chemin de MediaInfo trouvé par le registre des outils.
 Fonctionnalités testées :
 -------------------------
 1. Analyse des sous-titres :
@@ -54,7 +53,6 @@ from constants import dossiers_presets
 from subtitle_analyzer import (
     analyser_sous_titres_francais,
     obtenir_info_mediainfo,
-    obtenir_info_mediainfo_explicit_path,
 )
 
 
@@ -644,14 +642,10 @@ class TestMediaInfoFunctions(unittest.TestCase):
     Méthodes:
             Configure un exemple de sortie JSON de MediaInfo à utiliser dans les tests.
             Teste le cas où MediaInfo est disponible et retourne des données valides.
-            Teste le mécanisme de fallback vers un chemin explicite lorsque MediaInfo
-            n'est pas trouvé dans le PATH système.
+            Teste l'utilisation du chemin trouvé par le registre des outils, et le cas
+            où MediaInfo n'a été trouvé nulle part.
             Teste la gestion des erreurs lorsque l'exécution de MediaInfo échoue.
             Teste la gestion des erreurs lorsque MediaInfo retourne un JSON invalide.
-            Teste la fonction avec un chemin explicite vers l'exécutable MediaInfo
-            et vérifie qu'elle s'exécute avec succès.
-            Teste la gestion des erreurs lorsque l'exécution avec un chemin explicite
-            vers MediaInfo échoue.
     """
 
     def setUp(self):
@@ -674,26 +668,24 @@ class TestMediaInfoFunctions(unittest.TestCase):
             }
         )
 
+    @patch("subtitle_analyzer.registre_outils.chemin", return_value="mediainfo")
     @patch("subprocess.run")
-    def test_obtenir_info_mediainfo_success(self, mock_run):
+    def test_obtenir_info_mediainfo_success(self, mock_run, _):
         """Teste le cas où MediaInfo est disponible et retourne des données valides"""
         # Configurer le mock pour simuler une exécution réussie de mediainfo
-        version_process = MagicMock()
-        version_process.stdout = "MediaInfo v21.03\n"
-        version_process.returncode = 0
-
         mediainfo_process = MagicMock()
         mediainfo_process.stdout = self.sample_mediainfo_json
         mediainfo_process.returncode = 0
 
-        # Le premier appel à run() vérifie la version, le second obtient les infos du fichier
-        mock_run.side_effect = [version_process, mediainfo_process]
+        # Le chemin de MediaInfo vient du registre des outils : un seul appel à run()
+        mock_run.return_value = mediainfo_process
 
         # Tester la fonction avec un fichier fictif
         result = obtenir_info_mediainfo("dummy.mkv")
 
         # Vérifier que subprocess.run a été appelé correctement
-        self.assertEqual(mock_run.call_count, 2)
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(mock_run.call_args[0][0][0], "mediainfo")
 
         # Vérifier que le résultat est bien un dictionnaire avec la structure attendue
         self.assertIsInstance(result, dict)
@@ -701,35 +693,35 @@ class TestMediaInfoFunctions(unittest.TestCase):
         self.assertIn("track", result["media"])
         self.assertEqual(len(result["media"]["track"]), 4)
 
+    @patch("subtitle_analyzer.registre_outils.chemin")
     @patch("subprocess.run")
-    @patch("os.path.exists")
-    def test_obtenir_info_mediainfo_fallback_path(self, mock_exists, mock_run):
-        """Teste le fallback vers le chemin explicite quand mediainfo n'est pas dans le PATH"""
-        # Simuler que MediaInfo n'est pas dans le PATH mais existe dans un chemin spécifique
-        mock_run.side_effect = FileNotFoundError("mediainfo not found")
-        mock_exists.return_value = True  # Chemin alternatif existe
-
-        # Configurer le mock pour le chemin explicite
-        explicit_process = MagicMock()
-        explicit_process.stdout = self.sample_mediainfo_json
-        explicit_process.returncode = 0
-
-        # Utiliser un autre patch pour le chemin explicite
-        with patch(
-            "subtitle_analyzer.obtenir_info_mediainfo_explicit_path",
-            return_value=json.loads(self.sample_mediainfo_json),
-        ) as mock_explicit:
-            result = obtenir_info_mediainfo("dummy.mkv")
-
-            # Vérifier que la fonction a tenté d'utiliser le chemin explicite
-            mock_explicit.assert_called_once()
-
-            # Vérifier le résultat
-            self.assertIsInstance(result, dict)
-            self.assertIn("media", result)
+    def test_obtenir_info_mediainfo_chemin_du_registre(self, mock_run, mock_chemin):
+        """Teste l'utilisation du chemin explicite trouvé par le registre des outils"""
+        chemin_explicite = r"C:\Program Files\MediaInfo\MediaInfo.exe"
+        mock_chemin.return_value = chemin_explicite
+        mock_run.return_value = MagicMock(
+            stdout=self.sample_mediainfo_json, returncode=0
+        )
+
+        result = obtenir_info_mediainfo("dummy.mkv")
+
+        mock_chemin.assert_called_with("mediainfo")
+        self.assertEqual(mock_run.call_args[0][0][0], chemin_explicite)
+        self.assertIsInstance(result, dict)
+        self.assertIn("media", result)
 
+    @patch("subtitle_analyzer.registre_outils.chemin", return_value=None)
     @patch("subprocess.run")
-    def test_obtenir_info_mediainfo_error(self, mock_run):
+    def test_obtenir_info_mediainfo_introuvable(self, mock_run, _):
+        """Teste le cas où MediaInfo n'a été trouvé ni dans le PATH ni dans Program Files"""
+        result = obtenir_info_mediainfo("dummy.mkv")
+
+        mock_run.assert_not_called()
+        self.assertEqual(result, "MediaInfo non trouvé sur le système")
+
+    @patch("subtitle_analyzer.registre_outils.chemin", return_value="mediainfo")
+    @patch("subprocess.run")
+    def test_obtenir_info_mediainfo_error(self, mock_run, _):
         """Teste la gestion des erreurs quand MediaInfo échoue"""
         # Simuler une erreur dans l'exécution de MediaInfo
         error_process = MagicMock()
@@ -744,19 +736,16 @@ class TestMediaInfoFunctions(unittest.TestCase):
         self.assertIsInstance(result, str)
         self.assertTrue(result.startswith("Erreur MediaInfo"))
 
+    @patch("subtitle_analyzer.registre_outils.chemin", return_value="mediainfo")
     @patch("subprocess.run")
-    def test_obtenir_info_mediainfo_invalid_json(self, mock_run):
+    def test_obtenir_info_mediainfo_invalid_json(self, mock_run, _):
         """Teste la gestion des erreurs quand MediaInfo retourne un JSON invalide"""
         # Configurer le mock pour renvoyer un JSON invalide
-        version_process = MagicMock()
-        version_process.stdout = "MediaInfo v21.03\n"
-        version_process.returncode = 0
-
         invalid_json_process = MagicMock()
         invalid_json_process.stdout = "Not a valid JSON"
         invalid_json_process.returncode = 0
 
-        mock_run.side_effect = [version_process, invalid_json_process]
+        mock_run.return_value = invalid_json_process
 
         result = obtenir_info_mediainfo("dummy.mkv")
 
@@ -764,49 +753,6 @@ class TestMediaInfoFunctions(unittest.TestCase):
         self.assertIsInstance(result, str)
         self.assertTrue("Erreur de décodage JSON" in result)
 
-    @patch("subprocess.run")
-    def test_obtenir_info_mediainfo_explicit_path_success(self, mock_run):
-        """Teste la fonction avec un chemin explicite vers MediaInfo"""
-        # Configurer le mock pour simuler une exécution réussie
-        mock_process = MagicMock()
-        mock_process.stdout = self.sample_mediainfo_json
-        mock_process.returncode = 0
-
-        mock_run.return_value = mock_process
-
-        # Utiliser un chemin qui s'adapte au système d'exploitation
-        if os.name == "nt":  # Windows
-            mediainfo_path = os.path.join(
-                os.environ.get("PROGRAMFILES", "C:/Program Files"),
-                "MediaInfo",
-                "MediaInfo.exe",
-            )
-        else:  # Linux/Mac
-            mediainfo_path = "/usr/bin/mediainfo"
-
-        result = obtenir_info_mediainfo_explicit_path("dummy.mkv", mediainfo_path)
-
-        # Vérifier que subprocess.run a été appelé avec le bon chemin
-        mock_run.assert_called_once()
-        call_args = mock_run.call_args[0][0]
-        self.assertEqual(call_args[0], mediainfo_path)
-
-        # Vérifier le résultat
-        self.assertIsInstance(result, dict)
-        self.assertIn("media", result)
-
-    @patch("subprocess.run")
-    def test_obtenir_info_mediainfo_explicit_path_error(self, mock_run):
-        """Teste la gestion des erreurs avec un chemin explicite"""
-        # Simuler une exception lors de l'exécution
-        mock_run.side_effect = Exception("Test exception")
-
-        result = obtenir_info_mediainfo_explicit_path("dummy.mkv", "invalid/path")
-
-        # Vérifier que le résultat est une chaîne d'erreur
-        self.assertIsInstance(result, str)
-        self.assertTrue(result.startswith("Une erreur avec le chemin explicite"))
-
 
 if __name__ == "__main__":
     unittest.main()
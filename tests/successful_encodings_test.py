@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import time
+from unittest.mock import patch
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import successful_encodings
+from successful_encodings import (
+    record_successful_encoding,
+    lire_historique,
+    get_recent_encodings,
+    compacter_historique,
+    _position_depuis,
+)
+
+
+class TestHistoriqueJsonLines(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.fichier = os.path.join(self.temp_dir.name, "successful_encodings.jsonl")
+        cible = patch.object(
+            successful_encodings, "SUCCESSFUL_ENCODINGS_FILE", self.fichier
+        )
+        cible.start()
+        self.addCleanup(cible.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def ecrire(self, horodatages):
+        with open(self.fichier, "w") as f:
+            for horodatage in horodatages:
+                f.write(
+                    json.dumps({"timestamp": horodatage, "filename": str(horodatage)})
+                    + "\n"
+                )
+
+    def test_ajout_en_fin_de_fichier(self):
+        record_successful_encoding("/sortie/a_encoded.mkv", 100)
+        record_successful_encoding("/sortie/b_encoded.mkv", 200)
+        with open(self.fichier) as f:
+            lignes = f.readlines()
+        self.assertEqual(len(lignes), 2)
+        self.assertEqual(json.loads(lignes[1])["filename"], "b_encoded.mkv")
+        self.assertEqual(
+            [e["filename"] for e in get_recent_encodings()],
+            ["b_encoded.mkv", "a_encoded.mkv"],
+        )
+
+    def test_enregistrement_avec_details(self):
+        record_successful_encoding(
+            "/sortie/film_encoded.mkv",
+            700.123,
+            {"preset": "Films - Series VF", "duree_encodage": 1800.0},
+        )
+        encoding = lire_historique()[0]
+        self.assertEqual(encoding["file_size"], 700.12)
+        self.assertEqual(encoding["preset"], "Films - Series VF")
+        self.assertEqual(encoding["duree_encodage"], 1800.0)
+        self.assertIn("hote", encoding)
+
+    def test_ligne_tronquee_ignoree(self):
+        record_successful_encoding("/sortie/a_encoded.mkv", 100)
+        with open(self.fichier, "a") as f:
+            f.write('{"timestamp": 12')
+        record_successful_encoding("/sortie/b_encoded.mkv", 200)
+        self.assertEqual(len(lire_historique()), 2)
+
+    def test_recherche_par_dichotomie(self):
+        horodatages = list(range(0, 1000, 10))
+        self.ecrire(horodatages)
+        with open(self.fichier, "rb") as f:
+            taille = os.fstat(f.fileno()).st_size
+            for cible in [-5, 0, 5, 500, 505, 990, 995]:
+                f.seek(_position_depuis(f, taille, cible))
+                ligne = f.readline()
+                attendu = [h for h in horodatages if h >= cible]
+                if attendu:
+                    self.assertEqual(json.loads(ligne)["timestamp"], attendu[0])
+                else:
+                    self.assertEqual(ligne, b"")
+
+    def test_lecture_partielle(self):
+        self.ecrire(range(100))
+        self.assertEqual(
+            [e["timestamp"] for e in lire_historique(depuis=97)], [97, 98, 99]
+        )
+
+    def test_compaction(self):
+        maintenant = time.time()
+        self.ecrire(
+            [maintenant - 10 * 86400, maintenant - 5 * 86400, maintenant - 3600]
+        )
+        self.assertGreater(compacter_historique(7), 0)
+        self.assertEqual(len(lire_historique()), 2)
+        self.assertEqual(compacter_historique(7), 0)
+        self.assertEqual(compacter_historique(0), 0)
+        self.assertEqual(len(lire_historique()), 2)
+
+    def test_migration_de_l_ancien_historique(self):
+        ancien = os.path.join(self.temp_dir.name, "successful_encodings.json")
+        with open(ancien, "w") as f:
+            json.dump(
+                [{"timestamp": 2, "filename": "b"}, {"timestamp": 1, "filename": "a"}],
+                f,
+                indent=4,
+            )
+        self.assertEqual([e["filename"] for e in lire_historique()], ["a", "b"])
+        self.assertFalse(os.path.exists(ancien))
+        self.assertTrue(os.path.exists(ancien + ".bak"))
+
+
+if __name__ == "__main__":
+    unittest.main()
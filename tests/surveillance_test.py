@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from file_handling import EtatFichiers
+from file_stability import FiltreStabilite
+from surveillance import reprendre_fichiers_en_attente
+
+
+class TestReprise(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.detectes = EtatFichiers(os.path.join(self.test_dir, "detectes.json"))
+        self.encodes = EtatFichiers(os.path.join(self.test_dir, "encodes.json"))
+        self.filtre = FiltreStabilite(30)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def fichier(self, nom):
+        chemin = os.path.join(self.test_dir, nom)
+        with open(chemin, "wb") as f:
+            f.write(b"\x00")
+        return chemin
+
+    def test_fichiers_detectes_non_encodes_remis_en_attente(self):
+        telecharge = self.fichier("Telecharge.mkv")
+        encode = self.fichier("Encode.mkv")
+        supprime = os.path.join(self.test_dir, "Supprime.mkv")
+        for chemin in (telecharge, encode, supprime):
+            self.detectes.ajouter(self.test_dir, chemin)
+        self.encodes.ajouter(self.test_dir, encode)
+
+        repris = reprendre_fichiers_en_attente(
+            {self.test_dir: "Mangas"}, self.detectes, self.encodes, self.filtre
+        )
+
+        self.assertEqual(repris, 1)
+        self.assertIn(telecharge, self.filtre)
+        self.assertNotIn(encode, self.filtre)
+        self.assertEqual(
+            self.filtre.en_attente[telecharge]["infos"],
+            {"dossier": self.test_dir, "preset": "Mangas"},
+        )
+        # Le fichier disparu pendant l'arrêt est oublié
+        self.assertFalse(self.detectes.contient(self.test_dir, supprime))
+
+    def test_dossier_plus_surveille_ignore(self):
+        self.detectes.ajouter("/ailleurs", self.fichier("Film.mkv"))
+        repris = reprendre_fichiers_en_attente(
+            {self.test_dir: "Mangas"}, self.detectes, self.encodes, self.filtre
+        )
+        self.assertEqual(repris, 0)
+        self.assertEqual(len(self.filtre), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Ajouter le répertoire racine au PYTHONPATH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tool_registry import RegistreOutils
+
+DEFINITIONS = {
+    "mediainfo": {
+        "candidats": ["mediainfo", r"C:\Program Files\MediaInfo\MediaInfo.exe"],
+        "option_version": "--Version",
+    },
+}
+
+
+class TestRegistreOutils(unittest.TestCase):
+    def setUp(self):
+        self.registre = RegistreOutils(DEFINITIONS)
+
+    @patch("tool_registry.subprocess.run")
+    @patch("tool_registry.localiser", side_effect=lambda c: f"/usr/bin/{c}")
+    def test_outil_resolu_une_seule_fois(self, _, mock_run):
+        mock_run.return_value = MagicMock(
+            returncode=0, stdout="MediaInfo Command line,\nMediaInfoLib - v21.03\n"
+        )
+        for _ in range(3):
+            self.assertEqual(self.registre.chemin("mediainfo"), "/usr/bin/mediainfo")
+        self.assertEqual(self.registre.version("mediainfo"), "21.03")
+        mock_run.assert_called_once()
+
+    @patch("tool_registry.subprocess.run")
+    @patch("tool_registry.localiser")
+    def test_repli_sur_le_chemin_explicite(self, mock_localiser, mock_run):
+        chemin_explicite = DEFINITIONS["mediainfo"]["candidats"][1]
+        mock_localiser.side_effect = lambda c: c if c == chemin_explicite else None
+        mock_run.return_value = MagicMock(returncode=0, stdout="v22.12")
+        self.assertEqual(self.registre.chemin("mediainfo"), chemin_explicite)
+
+    @patch("tool_registry.localiser", return_value=None)
+    def test_outil_introuvable_puis_rafraichi(self, mock_localiser):
+        self.assertFalse(self.registre.est_disponible("mediainfo"))
+        self.assertEqual(self.registre.commande("mediainfo"), "mediainfo")
+
+        mock_localiser.return_value = "/opt/mediainfo"
+        with patch(
+            "tool_registry.subprocess.run",
+            return_value=MagicMock(returncode=0, stdout="v23.04"),
+        ):
+            # Le résultat reste en mémoire tant que le registre n'est pas rafraîchi
+            self.assertFalse(self.registre.est_disponible("mediainfo"))
+            self.registre.resoudre()
+        self.assertEqual(self.registre.chemin("mediainfo"), "/opt/mediainfo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import os
+import re
+import shutil
+import subprocess
+import threading
+from constants import BASE_PATH
+from process_launcher import executer
+from logger import setup_logger
+
+# Configuration du logger
+logger = setup_logger(__name__)
+
+# Emplacements possibles de chaque outil externe, par ordre de préférence, et
+# option affichant sa version. Les noms simples sont cherchés dans le PATH.
+OUTILS = {
+    "HandBrakeCLI": {
+        "candidats": [
+            "HandBrakeCLI",
+            r"C:\Program Files\HandBrake\HandBrakeCLI.exe",
+        ],
+        "option_version": "--version",
+    },
+    "mediainfo": {
+        "candidats": [
+            "mediainfo",
+            r"C:\Program Files\MediaInfo\MediaInfo.exe",
+            r"C:\Program Files (x86)\MediaInfo\MediaInfo.exe",
+        ],
+        "option_version": "--Version",
+    },
+    "ffmpeg": {
+        "candidats": [os.path.join(BASE_PATH, "bin", "ffmpeg.exe"), "ffmpeg"],
+        "option_version": "-version",
+    },
+    "ffprobe": {
+        "candidats": [os.path.join(BASE_PATH, "bin", "ffprobe.exe"), "ffprobe"],
+        "option_version": "-version",
+    },
+}
+
+version_pattern = re.compile(r"v?(\d+(?:\.\d+)+)")
+
+
+def localiser(candidat):
+    """Retourne le chemin de l'exécutable s'il existe, None sinon."""
+    if os.path.isabs(candidat):
+        return candidat if os.path.isfile(candidat) else None
+    return shutil.which(candidat)
+
+
+def lire_version(chemin, option_version):
+    """
+    Exécute l'outil avec son option de version.
+
+    Returns:
+        Le numéro de version (ou la première ligne affichée), None si l'outil ne répond pas.
+    """
+    try:
+        result = executer(
+            [chemin, option_version], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Impossible d'exécuter {chemin}: {e}")
+        return None
+    if result.returncode != 0:
+        return None
+    sortie = result.stdout.strip()
+    match = version_pattern.search(sortie)
+    if match:
+        return match.group(1)
+    return sortie.splitlines()[0] if sortie else ""
+
+
+class RegistreOutils:
+    """
+    Localise une seule fois les outils externes (HandBrakeCLI, MediaInfo, ffmpeg,
+    ffprobe) et mémorise leur chemin et leur version. La recherche peut être
+    relancée à la demande, par exemple après l'installation d'un outil.
+    """
+
+    def __init__(self, definitions=OUTILS):
+        self.definitions = definitions
+        self.outils = {}
+        self._lock = threading.Lock()
+
+    def resoudre(self, nom=None):
+        """
+        Recherche un outil (ou tous si 'nom' vaut None) et met à jour le registre.
+        """
+        noms = [nom] if nom else list(self.definitions)
+        for nom_outil in noms:
+            definition = self.definitions[nom_outil]
+            trouve = {"chemin": None, "version": None}
+            for candidat in definition["candidats"]:
+                chemin = localiser(candidat)
+                if chemin is None:
+                    continue
+                version = lire_version(chemin, definition["option_version"])
+                if version is not None:
+                    trouve = {"chemin": chemin, "version": version}
+                    break
+            with self._lock:
+                self.outils[nom_outil] = trouve
+            if trouve["chemin"]:
+                logger.debug(
+                    f"{nom_outil} trouvé: {trouve['chemin']} (version {trouve['version']})"
+                )
+            else:
+                logger.warning(f"{nom_outil} introuvable sur le système")
+
+    def _info(self, nom):
+        with self._lock:
+            info = self.outils.get(nom)
+        if info is None:
+            # Outil jamais recherché : le localiser au premier usage
+            self.resoudre(nom)
+            with self._lock:
+                info = self.outils[nom]
+        return info
+
+    def chemin(self, nom):
+        """Retourne le chemin de l'outil, ou None s'il est introuvable."""
+        return self._info(nom)["chemin"]
+
+    def version(self, nom):
+        """Retourne la version de l'outil, ou None s'il est introuvable."""
+        return self._info(nom)["version"]
+
+    def est_disponible(self, nom):
+        return self.chemin(nom) is not None
+
+    def commande(self, nom):
+        """
+        Retourne l'exécutable à placer en tête d'une ligne de commande : le chemin
+        trouvé, ou à défaut le nom de l'outil (l'erreur sera alors remontée à l'exécution).
+        """
+        return self.chemin(nom) or nom
+
+
+# Registre partagé par toute l'application (résolu au démarrage par main)
+registre_outils = RegistreOutils()
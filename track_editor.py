@@ -24,14 +24,57 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 from logger import setup_logger, colored_log
-from constants import BASE_PATH, dossiers_presets
+from constants import dossiers_presets
+from probe_cache import cache_sondes
+from tool_registry import registre_outils
+from process_launcher import executer, lancer_processus
+from remux_fast_path import commande_copie_flux
 
 # Configuration du logger
 logger = setup_logger(__name__)
 
-# Chemin vers ffmpeg.exe
-FFMPEG_PATH = os.path.join(BASE_PATH, "bin", "ffmpeg.exe")
-FFPROBE_PATH = os.path.join(BASE_PATH, "bin", "ffprobe.exe")
+
+def localiser_outil(nom):
+    """
+    Retourne le chemin de ffmpeg/ffprobe (dossier bin de l'application ou PATH).
+    Si l'outil n'avait pas été trouvé au démarrage, relance sa recherche.
+    """
+    chemin = registre_outils.chemin(nom)
+    if chemin is None:
+        registre_outils.resoudre(nom)
+        chemin = registre_outils.chemin(nom)
+    return chemin
+
+
+def executer_ffprobe(filepath, ffprobe_path=None):
+    """
+    Exécute ffprobe sur un fichier et retourne ses flux et son format.
+
+    Args:
+        filepath: Chemin du fichier à analyser
+
+    Returns:
+        Le dictionnaire JSON produit par ffprobe, ou None en cas d'erreur
+    """
+    cmd = [
+        ffprobe_path or registre_outils.commande("ffprobe"),
+        "-v",
+        "quiet",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        filepath,
+    ]
+
+    result = executer(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"Erreur lors de l'exécution de ffprobe: {result.stderr}")
+        return None
+
+    # Analyser les données JSON
+    return json.loads(result.stdout)
+
 
 # Liste des codes de langues courantes
 LANGUAGE_CODES = {
@@ -216,30 +259,24 @@ class TrackEditorDialog(QDialog):
         """Charge les informations sur les pistes audio et sous-titres"""
         try:
             # Vérifier si ffprobe existe
-            if not os.path.exists(FFPROBE_PATH):
-                logger.error(f"ffprobe introuvable à l'emplacement: {FFPROBE_PATH}")
+            ffprobe_path = localiser_outil("ffprobe")
+            if ffprobe_path is None:
+                logger.error("ffprobe introuvable")
                 QMessageBox.critical(
                     self,
                     "Erreur",
-                    f"ffprobe introuvable à l'emplacement: {FFPROBE_PATH}\nVérifiez que ffprobe.exe est présent dans le dossier bin.",
+                    "ffprobe introuvable.\nVérifiez que ffprobe.exe est présent dans le dossier bin ou accessible via le PATH.",
                 )
                 return
 
             # Utiliser ffprobe pour obtenir les informations du fichier
-            cmd = [
-                FFPROBE_PATH,
-                "-v",
-                "quiet",
-                "-print_format",
-                "json",
-                "-show_format",
-                "-show_streams",
+            # (réutilise l'analyse en cache si le fichier n'a pas changé)
+            file_info = cache_sondes.obtenir(
                 self.filepath,
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"Erreur lors de l'exécution de ffprobe: {result.stderr}")
+                "ffprobe",
+                lambda chemin: executer_ffprobe(chemin, ffprobe_path),
+            )
+            if file_info is None:
                 QMessageBox.critical(
                     self,
                     "Erreur",
@@ -247,9 +284,6 @@ class TrackEditorDialog(QDialog):
                 )
                 return
 
-            # Analyser les données JSON
-            file_info = json.loads(result.stdout)
-
             # Vider les tableaux
             self.audio_table.setRowCount(0)
             self.subtitle_table.setRowCount(0)
@@ -580,12 +614,13 @@ class TrackEditorDialog(QDialog):
             return
 
         # Vérifier si ffmpeg existe
-        if not os.path.exists(FFMPEG_PATH):
-            logger.error(f"ffmpeg introuvable à l'emplacement: {FFMPEG_PATH}")
+        ffmpeg_path = localiser_outil("ffmpeg")
+        if ffmpeg_path is None:
+            logger.error("ffmpeg introuvable")
             QMessageBox.critical(
                 self,
                 "Erreur",
-                f"ffmpeg introuvable à l'emplacement: {FFMPEG_PATH}\nVérifiez que ffmpeg.exe est présent dans le dossier bin.",
+                "ffmpeg introuvable.\nVérifiez que ffmpeg.exe est présent dans le dossier bin ou accessible via le PATH.",
             )
             return
 
@@ -611,8 +646,8 @@ class TrackEditorDialog(QDialog):
                 if reply == QMessageBox.No:
                     return
 
-            # Construire la commande ffmpeg
-            cmd = [FFMPEG_PATH, "-i", self.filepath]
+            # Flux copiés et options de sortie de la commande ffmpeg
+            flux = []
 
             # Ajouter les options de mappage
             map_options = []
@@ -620,12 +655,12 @@ class TrackEditorDialog(QDialog):
 
             if track_type == "audio":
                 # Cartographier toutes les pistes vidéo
-                cmd.extend(["-map", "0:v"])
+                flux.append("0:v")
 
                 # Cartographier les pistes audio restantes avec leurs métadonnées
                 for i, track in enumerate(self.audio_tracks):
                     stream_index = track["stream_index"]
-                    cmd.extend(["-map", f"0:{stream_index}"])
+                    flux.append(f"0:{stream_index}")
 
                     # Ajouter les métadonnées modifiées
                     if track.get("modified", False):
@@ -639,18 +674,16 @@ class TrackEditorDialog(QDialog):
                         )
 
                 # Cartographier toutes les pistes de sous-titres
-                cmd.extend(
-                    ["-map", "0:s?"]
-                )  # Le ? rend la présence de sous-titres optionnelle
+                flux.append("0:s?")  # Le ? rend la présence de sous-titres optionnelle
 
             elif track_type == "subtitle":
                 # Cartographier toutes les pistes vidéo et audio
-                cmd.extend(["-map", "0:v", "-map", "0:a"])
+                flux.extend(["0:v", "0:a"])
 
                 # Cartographier les pistes de sous-titres restantes avec leurs métadonnées
                 for i, track in enumerate(self.subtitle_tracks):
                     stream_index = track["stream_index"]
-                    cmd.extend(["-map", f"0:{stream_index}"])
+                    flux.append(f"0:{stream_index}")
 
                     # Ajouter les métadonnées modifiées
                     if track.get("modified", False):
@@ -671,13 +704,14 @@ class TrackEditorDialog(QDialog):
                             disposition.append("default")
 
                         if disposition:
-                            cmd.extend([f"-disposition:s:{i}", "+".join(disposition)])
-
-            # Ajouter les options de métadonnées
-            cmd.extend(metadata_options)
+                            metadata_options.extend(
+                                [f"-disposition:s:{i}", "+".join(disposition)]
+                            )
 
-            # Ajouter les options de copie des codecs et le chemin de sortie
-            cmd.extend(["-c", "copy", temp_output])
+            # Copier les codecs sans réencodage vers le fichier de sortie
+            cmd = commande_copie_flux(
+                self.filepath, temp_output, flux, metadata_options, ffmpeg_path
+            )
 
             # Afficher la commande
             cmd_str = " ".join(cmd)
@@ -715,12 +749,11 @@ class TrackEditorDialog(QDialog):
             QApplication.processEvents()
 
             # Exécuter la commande ffmpeg
-            process = subprocess.Popen(
+            process = lancer_processus(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 universal_newlines=True,
-                creationflags=subprocess.CREATE_NO_WINDOW,
             )
 
             # Attendre que le processus se termine
@@ -936,36 +969,14 @@ class TrackEditorDialog(QDialog):
                     selected_preset = queue_choice["preset"]
 
                     # Vérifier si la fenêtre parente est la MainWindow
-                    if hasattr(self.parent(), "control_flags"):
-                        # Récupérer la liste actuelle des fichiers en attente
-                        current_queue = []
-
-                        if hasattr(self.parent(), "get_current_queue_files"):
-                            current_queue = self.parent().get_current_queue_files()
-
-                        # Ajouter le fichier à la file d'attente
+                    if hasattr(self.parent(), "file_encodage"):
+                        # Ajouter le fichier à la file d'attente (l'interface et l'état
+                        # sauvegardé sont mis à jour par les abonnés de la file)
                         new_item = {"file": final_path, "preset": selected_preset}
-                        current_queue.append(new_item)
-
-                        # Mettre à jour la file d'attente
-                        if hasattr(self.parent(), "update_queue"):
-                            self.parent().update_queue(current_queue)
-
-                        # Signaler le changement
-                        self.parent().control_flags["queue_modified"] = True
-
-                        # Forcer la mise à jour immédiate
-                        try:
-                            from state_persistence import save_interrupted_encodings
-
-                            save_interrupted_encodings(None, current_queue)
-                            logger.info(
-                                f"Fichier ajouté à la file d'attente avec le preset {selected_preset}"
-                            )
-                        except Exception as e:
-                            logger.error(
-                                f"Erreur lors de l'ajout à la file d'attente: {e}"
-                            )
+                        self.parent().file_encodage.put(new_item)
+                        logger.info(
+                            f"Fichier ajouté à la file d'attente avec le preset {selected_preset}"
+                        )
 
                     QMessageBox.information(
                         self,
@@ -1034,12 +1045,13 @@ class TrackEditorDialog(QDialog):
                 return
 
         # Vérifier si ffmpeg existe
-        if not os.path.exists(FFMPEG_PATH):
-            logger.error(f"ffmpeg introuvable à l'emplacement: {FFMPEG_PATH}")
+        ffmpeg_path = localiser_outil("ffmpeg")
+        if ffmpeg_path is None:
+            logger.error("ffmpeg introuvable")
             QMessageBox.critical(
                 self,
                 "Erreur",
-                f"ffmpeg introuvable à l'emplacement: {FFMPEG_PATH}\nVérifiez que ffmpeg.exe est présent dans le dossier bin.",
+                "ffmpeg introuvable.\nVérifiez que ffmpeg.exe est présent dans le dossier bin ou accessible via le PATH.",
             )
             return
 
@@ -1047,20 +1059,21 @@ class TrackEditorDialog(QDialog):
         progress_dialog = None
 
         try:
-            # Construire la commande ffmpeg
-            cmd = [FFMPEG_PATH, "-i", self.filepath]
+            # Flux copiés et options de sortie de la commande ffmpeg
+            flux = []
+            options = []
 
             # Ajouter les options de mappage
-            cmd.extend(["-map", "0:v"])  # Cartographier toutes les pistes vidéo
+            flux.append("0:v")  # Cartographier toutes les pistes vidéo
 
             # Cartographier et configurer les pistes audio avec leurs métadonnées
             for i, track in enumerate(self.audio_tracks):
                 stream_index = track["stream_index"]
-                cmd.extend(["-map", f"0:{stream_index}"])
+                flux.append(f"0:{stream_index}")
 
                 # Ajouter les métadonnées modifiées
                 if track.get("modified", False):
-                    cmd.extend(
+                    options.extend(
                         [
                             f"-metadata:s:a:{i}",
                             f"language={track['language']}",
@@ -1072,11 +1085,11 @@ class TrackEditorDialog(QDialog):
             # Cartographier et configurer les pistes de sous-titres
             for i, track in enumerate(self.subtitle_tracks):
                 stream_index = track["stream_index"]
-                cmd.extend(["-map", f"0:{stream_index}"])
+                flux.append(f"0:{stream_index}")
 
                 # Ajouter les métadonnées modifiées
                 if track.get("modified", False):
-                    cmd.extend(
+                    options.extend(
                         [
                             f"-metadata:s:s:{i}",
                             f"language={track['language']}",
@@ -1093,10 +1106,12 @@ class TrackEditorDialog(QDialog):
                         disposition.append("default")
 
                     if disposition:
-                        cmd.extend([f"-disposition:s:{i}", "+".join(disposition)])
+                        options.extend([f"-disposition:s:{i}", "+".join(disposition)])
 
-            # Ajouter les options de copie des codecs et le chemin de sortie
-            cmd.extend(["-c", "copy", temp_output])
+            # Copier les codecs sans réencodage vers le fichier de sortie
+            cmd = commande_copie_flux(
+                self.filepath, temp_output, flux, options, ffmpeg_path
+            )
 
             # Afficher la commande
             cmd_str = " ".join(cmd)
@@ -1134,12 +1149,11 @@ class TrackEditorDialog(QDialog):
             QApplication.processEvents()
 
             # Exécuter la commande ffmpeg
-            process = subprocess.Popen(
+            process = lancer_processus(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 universal_newlines=True,
-                creationflags=subprocess.CREATE_NO_WINDOW,
             )
 
             # Attendre que le processus se termine
@@ -1356,34 +1370,14 @@ class TrackEditorDialog(QDialog):
                 selected_preset = queue_choice["preset"]
 
                 # Vérifier si la fenêtre parente est la MainWindow
-                if hasattr(self.parent(), "control_flags"):
-                    # Récupérer la liste actuelle des fichiers en attente
-                    current_queue = []
-
-                    if hasattr(self.parent(), "get_current_queue_files"):
-                        current_queue = self.parent().get_current_queue_files()
-
-                    # Ajouter le fichier à la file d'attente
+                if hasattr(self.parent(), "file_encodage"):
+                    # Ajouter le fichier à la file d'attente (l'interface et l'état
+                    # sauvegardé sont mis à jour par les abonnés de la file)
                     new_item = {"file": final_path, "preset": selected_preset}
-                    current_queue.append(new_item)
-
-                    # Mettre à jour la file d'attente
-                    if hasattr(self.parent(), "update_queue"):
-                        self.parent().update_queue(current_queue)
-
-                    # Signaler le changement
-                    self.parent().control_flags["queue_modified"] = True
-
-                    # Forcer la mise à jour immédiate
-                    try:
-                        from state_persistence import save_interrupted_encodings
-
-                        save_interrupted_encodings(None, current_queue)
-                        logger.info(
-                            f"Fichier ajouté à la file d'attente avec le preset {selected_preset}"
-                        )
-                    except Exception as e:
-                        logger.error(f"Erreur lors de l'ajout à la file d'attente: {e}")
+                    self.parent().file_encodage.put(new_item)
+                    logger.info(
+                        f"Fichier ajouté à la file d'attente avec le preset {selected_preset}"
+                    )
 
                 QMessageBox.information(
                     self,
@@ -1,3 +1,4 @@
+import os
 import unicodedata
 from datetime import datetime
 
@@ -17,6 +18,36 @@ def enlever_accents(input_str):
     return "".join([c for c in nfkd_form if not unicodedata.combining(c)])
 
 
+def normaliser_chemin(chemin):
+    return chemin.replace("\\", "/")
+
+
+def copier_file_attente(file_encodage):
+    """
+    Retourne une copie des éléments de la file d'attente sans les retirer,
+    dans l'ordre de traitement.
+
+    Arguments:
+    file_encodage -- FileTaches de la file d'attente d'encodage.
+    """
+    return file_encodage.instantane()
+
+
+def retirer_de_file_attente(file_encodage, tache):
+    """
+    Retire un élément précis de la file d'attente s'il s'y trouve encore.
+
+    Arguments:
+    file_encodage -- FileTaches de la file d'attente d'encodage.
+    tache -- Élément à retirer.
+
+    Retourne:
+    True si l'élément a été retiré, False s'il avait déjà été pris par un worker.
+    """
+    id_tache = file_encodage.id_de(tache)
+    return id_tache is not None and file_encodage.retirer(id_tache) is not None
+
+
 def tronquer_nom_fichier(nom_fichier, debut=40, fin=20):
     """
     Tronque le nom du fichier pour conserver les 40 premiers caractères,
@@ -59,6 +90,41 @@ def obtenir_dossier_sortie_dossier_source(dossier_source):
         return dossiers_sortie_surveillance.get(dossier_source, dossier_sortie)
 
 
+def calculer_chemin_sortie(
+    fichier, dossier_source=None, dossier_sortie_personnalise=None
+):
+    """
+    Détermine le dossier de sortie et le chemin du fichier encodé d'un fichier source.
+
+    Arguments:
+    fichier -- Chemin du fichier source.
+    dossier_source -- Dossier surveillé d'où provient le fichier (optionnel).
+    dossier_sortie_personnalise -- Dossier choisi lors d'un ajout manuel (optionnel).
+
+    Retourne:
+    Un tuple (dossier_sortie_final, chemin_sortie).
+    """
+    # Obtenir le dossier de sortie selon la priorité
+    if dossier_sortie_personnalise:
+        # Priorité 1 : Dossier personnalisé (ajout manuel via interface)
+        dossier_sortie_final = dossier_sortie_personnalise
+    elif dossier_source:
+        # Priorité 2 : Dossier basé sur la surveillance automatique
+        dossier_sortie_final = obtenir_dossier_sortie_dossier_source(dossier_source)
+    else:
+        # Priorité 3 : Fallback vers le dossier par défaut
+        from constants import dossier_sortie
+
+        dossier_sortie_final = dossier_sortie
+
+    base_nom, _ = os.path.splitext(os.path.basename(fichier))
+    fichier_sortie = f"{base_nom}_encoded.mkv"  # Toujours utiliser .mkv comme extension
+    chemin_sortie = normaliser_chemin(
+        os.path.join(dossier_sortie_final, fichier_sortie)
+    )
+    return dossier_sortie_final, chemin_sortie
+
+
 def obtenir_dossier_sortie_preset(preset):
     """
     Retourne le dossier de sortie correspondant à un preset donné.